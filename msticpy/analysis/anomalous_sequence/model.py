@@ -5,12 +5,32 @@
 # --------------------------------------------------------------------------
 """Module for Model class for modelling sessions data."""
 
+import gzip
+import json
 from collections import defaultdict
-from typing import Dict, List, Union
+from functools import partial
+from pathlib import Path
+from typing import IO, DefaultDict, Dict, List, Optional, Tuple, Union
 
 from ...common.exceptions import MsticpyException
 from .utils import cmds_only, cmds_params_only, cmds_params_values, probabilities
 from .utils.data_structures import Cmd
+from .utils.encoding import EncodedModel, EncodedSessions
+
+# version of the saved model file format
+_MODEL_FORMAT_VERSION = 1
+
+# non laplace smoothed counts attributes (in training order)
+_COUNT_ATTRS = (
+    "_seq1_counts",
+    "_seq2_counts",
+    "_param_counts",
+    "_cmd_param_counts",
+    "_value_counts",
+    "_param_value_counts",
+)
+# counts which are nested (conditional on a command or param)
+_NESTED_COUNTS = ("seq2_counts", "cmd_param_counts", "param_value_counts")
 
 
 # pylint: disable=too-many-instance-attributes
@@ -59,18 +79,7 @@ class Model:
             which params have values which are suitable for modelling.
 
         """
-        if not isinstance(sessions, list):
-            raise MsticpyException("`sessions` should be a list")
-        if not sessions:
-            raise MsticpyException("`sessions` should not be an empty list")
-        for i, ses in enumerate(sessions):
-            if not isinstance(ses, list):
-                raise MsticpyException("each session in `sessions` should be a list")
-            if len(ses) == 0:
-                raise MsticpyException(
-                    f"session at index {i} of `sessions` is empty. Each session "
-                    "should contain at least one command"
-                )
+        _check_sessions(sessions)
 
         self.start_token = "##START##"  # nosec B105
         self.end_token = "##END##"  # nosec B105
@@ -79,6 +88,7 @@ class Model:
         self.sessions = sessions
         self.session_type = None
         self._asses_input()
+        self._auto_modellable_params = modellable_params is None
 
         # non laplace smoothed counts
         self._seq1_counts = None
@@ -116,6 +126,16 @@ class Model:
         self.rare_windows_geo: Dict[int, list] = {}
         self.rare_window_likelihoods_geo: Dict[int, list] = {}
 
+        # array-backed probabilities and sessions used for scoring
+        self._encoded_model: Optional[EncodedModel] = None
+        self._encoded_sessions: Optional[Tuple[list, EncodedSessions]] = None
+
+    def __getstate__(self):
+        """Return the model state for pickling (without the encoded sessions)."""
+        state = self.__dict__.copy()
+        state["_encoded_sessions"] = None
+        return state
+
     def train(self):
         """
         Train the model by computing counts and probabilities.
@@ -127,6 +147,170 @@ class Model:
         self._compute_counts()
         self._laplace_smooth_counts()
         self._compute_probs()
+        self._encoded_sessions = None
+
+    def partial_fit(self, sessions: List[List[Union[str, Cmd]]]):
+        """
+        Update the trained model with a new batch of sessions.
+
+        The counts of the new sessions are added to the (non laplace
+        smoothed) counts of the sessions which the model has already
+        been trained on, and the probabilities are recomputed from the
+        combined counts. The result is the same as training the model
+        on all of the sessions at once.
+
+        The `sessions` attribute is replaced with the new sessions, so
+        the compute_* methods will score the new batch of sessions.
+        If the model has not been trained yet, it is first trained on
+        its current sessions.
+
+        Parameters
+        ----------
+        sessions: List[List[Union[str, Cmd]]]
+            list of sessions, where each session is a list of either
+            strings or a list of the Cmd datatype. The sessions should
+            be of the same type as the sessions already modelled.
+
+        """
+        if self._seq1_counts is None:
+            self._compute_counts()
+        prev_counts = {
+            attr: getattr(self, attr)
+            for attr in _COUNT_ATTRS
+            if getattr(self, attr) is not None
+        }
+        self.set_sessions(sessions)
+        self._compute_counts()
+        for attr, counts in prev_counts.items():
+            setattr(self, attr, _merge_counts(counts, getattr(self, attr)))
+        self._update_modellable_params()
+        self._laplace_smooth_counts()
+        self._compute_probs()
+
+    def set_sessions(self, sessions: List[List[Union[str, Cmd]]]):
+        """
+        Replace the sessions to be scored by the model.
+
+        This can be used to score new sessions with a trained (or
+        loaded) model without retraining it. Any previously computed
+        scores are discarded.
+
+        Parameters
+        ----------
+        sessions: List[List[Union[str, Cmd]]]
+            list of sessions, where each session is a list of either
+            strings or a list of the Cmd datatype. The sessions should
+            be of the same type as the sessions already modelled.
+
+        """
+        _check_sessions(sessions)
+        session_type = _get_session_type(sessions)
+        if self._seq1_counts is not None and session_type != self.session_type:
+            raise MsticpyException(
+                f"`sessions` are of type {session_type} but the model "
+                f"was trained on sessions of type {self.session_type}"
+            )
+        self.sessions = sessions
+        self.session_type = session_type
+        self._encoded_sessions = None
+
+        self.set_params_cond_cmd_probs = {}
+        self.session_likelihoods = None
+        self.session_geomean_likelihoods = None
+        self.rare_windows = {}
+        self.rare_window_likelihoods = {}
+        self.rare_windows_geo = {}
+        self.rare_window_likelihoods_geo = {}
+
+    def save(self, path: Union[str, Path]):
+        """
+        Save the trained model to a file.
+
+        The (non laplace smoothed) counts, tokens and modellable params
+        are saved as JSON, which is gzip compressed if `path` ends
+        with ".gz". The sessions and computed scores are not saved.
+
+        Parameters
+        ----------
+        path: Union[str, Path]
+            path of the file to write.
+
+        Notes
+        -----
+        The commands, params and values must be JSON serializable.
+
+        """
+        if self._seq1_counts is None:
+            raise MsticpyException(
+                "please train the model first before using this method"
+            )
+        model_data = {
+            "format_version": _MODEL_FORMAT_VERSION,
+            "session_type": self.session_type,
+            "start_token": self.start_token,
+            "end_token": self.end_token,
+            "unk_token": self.unk_token,
+            "modellable_params": (
+                None if self.modellable_params is None else list(self.modellable_params)
+            ),
+            "auto_modellable_params": self._auto_modellable_params,
+            "counts": {
+                attr.lstrip("_"): _counts_to_list(getattr(self, attr))
+                for attr in _COUNT_ATTRS
+                if getattr(self, attr) is not None
+            },
+        }
+        with _open_model_file(path, "w") as model_file:
+            json.dump(model_data, model_file)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "Model":
+        """
+        Load a model saved with the `save` method.
+
+        The loaded model has no sessions. Use the `set_sessions`
+        method to score sessions or `partial_fit` to train it
+        further.
+
+        Parameters
+        ----------
+        path: Union[str, Path]
+            path of the saved model file.
+
+        Returns
+        -------
+        Model
+            The trained model.
+
+        """
+        with _open_model_file(path, "r") as model_file:
+            model_data = json.load(model_file)
+        if model_data.get("format_version") != _MODEL_FORMAT_VERSION:
+            raise MsticpyException(
+                f"Unsupported model format version {model_data.get('format_version')}"
+            )
+        modellable_params = model_data["modellable_params"]
+        model = cls(
+            sessions=[[model_data["end_token"]]],
+            modellable_params=(
+                None if modellable_params is None else set(modellable_params)
+            ),
+        )
+        model.sessions = []
+        model.session_type = model_data["session_type"]
+        model.start_token = model_data["start_token"]
+        model.end_token = model_data["end_token"]
+        model.unk_token = model_data["unk_token"]
+        model._auto_modellable_params = model_data["auto_modellable_params"]
+        for attr, counts in model_data["counts"].items():
+            setattr(
+                model,
+                f"_{attr}",
+                _counts_from_list(counts, nested=attr in _NESTED_COUNTS),
+            )
+        model._laplace_smooth_counts()
+        model._compute_probs()
+        return model
 
     def compute_scores(self, use_start_end_tokens: bool):
         """
@@ -228,18 +412,23 @@ class Model:
                 end_token=self.end_token,
             )
 
-            if self.modellable_params is None:
-                modellable_params = cmds_params_values.get_params_to_model_values(
-                    param_counts=param_counts, param_value_counts=param_value_counts
-                )
-                self.modellable_params = modellable_params
-
             self._seq1_counts = seq1_counts
             self._seq2_counts = seq2_counts
             self._param_counts = param_counts
             self._cmd_param_counts = cmd_param_counts
             self._value_counts = value_counts
             self._param_value_counts = param_value_counts
+            self._update_modellable_params()
+
+    def _update_modellable_params(self):
+        """Use rough heuristics to determine the params with modellable values."""
+        if self.session_type != SessionType.cmds_params_values:
+            return
+        if self._auto_modellable_params or self.modellable_params is None:
+            self.modellable_params = cmds_params_values.get_params_to_model_values(
+                param_counts=self._param_counts,
+                param_value_counts=self._param_value_counts,
+            )
 
     def _laplace_smooth_counts(self):
         """
@@ -382,7 +571,7 @@ class Model:
                 'this method is not available for your type of input data "sessions"'
             )
         if self.session_type == SessionType.cmds_params_only:
-            result = defaultdict(lambda: defaultdict(lambda: 0))
+            result = defaultdict(partial(defaultdict, int))
             for ses in self.sessions:
                 for cmd in ses:
                     c_name = cmd.name
@@ -396,7 +585,7 @@ class Model:
                     result[c_name][tuple(params)] = prob
             self.set_params_cond_cmd_probs = result
         else:
-            result = defaultdict(lambda: defaultdict(lambda: 0))
+            result = defaultdict(partial(defaultdict, int))
             for ses in self.sessions:
                 for cmd in ses:
                     c_name = cmd.name
@@ -446,45 +635,10 @@ class Model:
                 "please train the model first before using this method"
             )
 
-        result = []
-
-        for sess in self.sessions:
-            if self.session_type == SessionType.cmds_only:
-                tmp = cmds_only.compute_likelihood_window(
-                    window=sess,
-                    prior_probs=self.prior_probs,
-                    trans_probs=self.trans_probs,
-                    use_start_token=use_start_end_tokens,
-                    use_end_token=use_start_end_tokens,
-                    start_token=self.start_token,
-                    end_token=self.end_token,
-                )
-            elif self.session_type == SessionType.cmds_params_only:
-                tmp = cmds_params_only.compute_likelihood_window(
-                    window=sess,
-                    prior_probs=self.prior_probs,
-                    trans_probs=self.trans_probs,
-                    param_cond_cmd_probs=self.param_cond_cmd_probs,
-                    use_start_token=use_start_end_tokens,
-                    use_end_token=use_start_end_tokens,
-                    start_token=self.start_token,
-                    end_token=self.end_token,
-                )
-            else:
-                tmp = cmds_params_values.compute_likelihood_window(
-                    window=sess,
-                    prior_probs=self.prior_probs,
-                    trans_probs=self.trans_probs,
-                    param_cond_cmd_probs=self.param_cond_cmd_probs,
-                    value_cond_param_probs=self.value_cond_param_probs,
-                    modellable_params=self.modellable_params,
-                    use_start_token=use_start_end_tokens,
-                    use_end_token=use_start_end_tokens,
-                    start_token=self.start_token,
-                    end_token=self.end_token,
-                )
-
-            result.append(tmp)
+        encoded_model, encoded_sessions = self._get_encoded_sessions()
+        result = encoded_model.compute_likelihoods_of_sessions(
+            encoded_sessions, use_start_end_tokens=use_start_end_tokens
+        ).tolist()
 
         self.session_likelihoods = result
 
@@ -560,61 +714,66 @@ class Model:
                 "please train the model first before using this method"
             )
 
-        if self.session_type == SessionType.cmds_only:
-            rare_tuples = [
-                cmds_only.rarest_window_session(
-                    session=ses,
-                    prior_probs=self.prior_probs,
-                    trans_probs=self.trans_probs,
-                    window_len=window_len,
-                    use_start_end_tokens=use_start_end_tokens,
-                    start_token=self.start_token,
-                    end_token=self.end_token,
-                    use_geo_mean=use_geo_mean,
-                )
-                for ses in self.sessions
-            ]
-        elif self.session_type == SessionType.cmds_params_only:
-            rare_tuples = [
-                cmds_params_only.rarest_window_session(
-                    session=ses,
-                    prior_probs=self.prior_probs,
-                    trans_probs=self.trans_probs,
-                    param_cond_cmd_probs=self.param_cond_cmd_probs,
-                    window_len=window_len,
-                    use_start_end_tokens=use_start_end_tokens,
-                    start_token=self.start_token,
-                    end_token=self.end_token,
-                    use_geo_mean=use_geo_mean,
-                )
-                for ses in self.sessions
-            ]
-        else:
-            rare_tuples = [
-                cmds_params_values.rarest_window_session(
-                    session=ses,
-                    prior_probs=self.prior_probs,
-                    trans_probs=self.trans_probs,
-                    param_cond_cmd_probs=self.param_cond_cmd_probs,
-                    value_cond_param_probs=self.value_cond_param_probs,
-                    modellable_params=self.modellable_params,
-                    window_len=window_len,
-                    use_start_end_tokens=use_start_end_tokens,
-                    start_token=self.start_token,
-                    end_token=self.end_token,
-                    use_geo_mean=use_geo_mean,
-                )
-                for ses in self.sessions
-            ]
+        encoded_model, encoded_sessions = self._get_encoded_sessions()
+        window_idx, window_liks = encoded_model.compute_rarest_windows(
+            encoded_sessions,
+            window_len=window_len,
+            use_start_end_tokens=use_start_end_tokens,
+            use_geo_mean=use_geo_mean,
+        )
+        rare_windows = [
+            ses[idx : idx + window_len] if idx >= 0 else []  # noqa: E203
+            for ses, idx in zip(self.sessions, window_idx)
+        ]
 
         if use_geo_mean:
-            self.rare_windows_geo[window_len] = [rare[0] for rare in rare_tuples]
-            self.rare_window_likelihoods_geo[window_len] = [
-                rare[1] for rare in rare_tuples
-            ]
+            self.rare_windows_geo[window_len] = rare_windows
+            self.rare_window_likelihoods_geo[window_len] = window_liks.tolist()
         else:
-            self.rare_windows[window_len] = [rare[0] for rare in rare_tuples]
-            self.rare_window_likelihoods[window_len] = [rare[1] for rare in rare_tuples]
+            self.rare_windows[window_len] = rare_windows
+            self.rare_window_likelihoods[window_len] = window_liks.tolist()
+
+    def _get_encoded_sessions(self) -> Tuple[EncodedModel, EncodedSessions]:
+        """Return the encoded model and sessions, encoding them if needed."""
+        if self._encoded_model is None:
+            self._encoded_model = EncodedModel(
+                prior_probs=self.prior_probs,
+                trans_probs=self.trans_probs,
+                start_token=self.start_token,
+                end_token=self.end_token,
+                unk_token=self.unk_token,
+            )
+        if self._encoded_sessions is None or self._encoded_sessions[0] is not (
+            self.sessions
+        ):
+            param_prob_func = (
+                None
+                if self.session_type == SessionType.cmds_only
+                else self._compute_param_prob
+            )
+            self._encoded_sessions = (
+                self.sessions,
+                self._encoded_model.encode_sessions(self.sessions, param_prob_func),
+            )
+        return self._encoded_model, self._encoded_sessions[1]
+
+    def _compute_param_prob(self, cmd: Cmd) -> float:
+        """Return probability of the params (and values) of `cmd`."""
+        if self.session_type == SessionType.cmds_params_only:
+            return cmds_params_only.compute_prob_setofparams_given_cmd(
+                cmd=cmd.name,
+                params=cmd.params,
+                param_cond_cmd_probs=self.param_cond_cmd_probs,
+                use_geo_mean=True,
+            )
+        return cmds_params_values.compute_prob_setofparams_given_cmd(
+            cmd=cmd.name,
+            params_with_vals=cmd.params,
+            param_cond_cmd_probs=self.param_cond_cmd_probs,
+            value_cond_param_probs=self.value_cond_param_probs,
+            modellable_params=self.modellable_params,
+            use_geo_mean=True,
+        )
 
     def _compute_probs_cmds(self):
         """Compute the individual and transition command probabilties."""
@@ -631,6 +790,7 @@ class Model:
 
         self.prior_probs = prior_probs
         self.trans_probs = trans_probs
+        self._encoded_model = None
 
     def _compute_probs_params(self):
         """Compute the individual param probs and param conditional on command probs."""
@@ -675,33 +835,78 @@ class Model:
         attribute of the Cmd datatype is a set or a dict.
 
         """
-        session = self.sessions[0]
-        cmd = session[0]
-        if isinstance(cmd, str):
-            self.session_type = SessionType.cmds_only
-        elif self._check_cmd_type():
-            if isinstance(cmd.params, set):
-                self.session_type = SessionType.cmds_params_only
-            elif isinstance(cmd.params, dict):
-                self.session_type = SessionType.cmds_params_values
-            else:
-                raise MsticpyException(
-                    "Params attribute of Cmd data structure should "
-                    + "be either a set or a dict"
-                )
-        else:
+        self.session_type = _get_session_type(self.sessions)
+
+
+def _check_sessions(sessions: List[List[Union[str, Cmd]]]):
+    """Check that `sessions` is a non-empty list of non-empty sessions."""
+    if not isinstance(sessions, list):
+        raise MsticpyException("`sessions` should be a list")
+    if not sessions:
+        raise MsticpyException("`sessions` should not be an empty list")
+    for i, ses in enumerate(sessions):
+        if not isinstance(ses, list):
+            raise MsticpyException("each session in `sessions` should be a list")
+        if len(ses) == 0:
             raise MsticpyException(
-                "Each element of 'sessions' should be a list of either "
-                + "strings, or Cmd data types"
+                f"session at index {i} of `sessions` is empty. Each session "
+                "should contain at least one command"
             )
 
-    def _check_cmd_type(self):
-        """Check whether the Cmd datatype has the expected attributes."""
-        session = self.sessions[0]
-        cmd = session[0]
-        if "name" in dir(cmd) and "params" in dir(cmd):
-            return True
-        return False
+
+def _get_session_type(sessions: List[List[Union[str, Cmd]]]) -> str:
+    """Return the SessionType of `sessions` (from the first command)."""
+    cmd = sessions[0][0]
+    if isinstance(cmd, str):
+        return SessionType.cmds_only
+    if "name" in dir(cmd) and "params" in dir(cmd):
+        if isinstance(cmd.params, set):
+            return SessionType.cmds_params_only
+        if isinstance(cmd.params, dict):
+            return SessionType.cmds_params_values
+        raise MsticpyException(
+            "Params attribute of Cmd data structure should "
+            + "be either a set or a dict"
+        )
+    raise MsticpyException(
+        "Each element of 'sessions' should be a list of either "
+        + "strings, or Cmd data types"
+    )
+
+
+def _merge_counts(counts: DefaultDict, new_counts: DefaultDict) -> DefaultDict:
+    """Add the (possibly nested) `new_counts` to `counts` in place."""
+    for key, count in new_counts.items():
+        if isinstance(count, dict):
+            _merge_counts(counts[key], count)
+        else:
+            counts[key] += count
+    return counts
+
+
+def _counts_to_list(counts: DefaultDict) -> list:
+    """Convert (possibly nested) counts to JSON serializable [key, count] pairs."""
+    return [
+        [key, _counts_to_list(count) if isinstance(count, dict) else count]
+        for key, count in counts.items()
+    ]
+
+
+def _counts_from_list(count_pairs: list, nested: bool) -> DefaultDict:
+    """Convert [key, count] pairs created by `_counts_to_list` back to counts."""
+    if nested:
+        counts: DefaultDict = defaultdict(partial(defaultdict, int))
+        for key, nested_pairs in count_pairs:
+            counts[key].update(nested_pairs)
+        return counts
+    return defaultdict(int, count_pairs)
+
+
+def _open_model_file(path: Union[str, Path], mode: str) -> IO[str]:
+    """Open a (gzip compressed if ".gz") model file in text mode."""
+    if str(path).endswith(".gz"):
+        return gzip.open(path, f"{mode}t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")  # pylint: disable=consider-using-with
 
 
 class SessionType:
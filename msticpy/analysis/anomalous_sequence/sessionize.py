@@ -101,7 +101,6 @@ def sessionize_data(
     return agg_df
 
 
-# pylint: disable=too-many-locals, too-many-branches
 def create_session_col(
     data: pd.DataFrame,
     user_identifier_cols: List[str],
@@ -161,42 +160,61 @@ def create_session_col(
         user_identifier_cols + [time_col]
     ).reset_index(drop=True)
 
-    # initialise first row
-    ses_ind = 0
-    df_with_sesind.loc[0, "time_diff"] = pd.to_timedelta(0)
-    df_with_sesind.loc[0, "cml_time"] = pd.to_timedelta(0)
-    df_with_sesind.loc[0, "session_ind"] = ses_ind
-
-    for i in range(1, len(df_with_sesind)):
-        cur = df_with_sesind.iloc[i]
-        prev = df_with_sesind.iloc[i - 1]
-
-        # if any of the user_identifier_cols values change, a new session should start
-        new_flag = False
-        for col in user_identifier_cols:
-            if cur[col] != prev[col]:
-                new_flag = True
-                break
-
-        dif = cur[time_col] - prev[time_col]
-        cml = prev["cml_time"] + dif
-        # if the max session length is exceeded or the max separation between events is exceeded,
-        # a new session should start
-        if dif > max_sep or cml > max_ses:
-            new_flag = True
-
-        if new_flag:
-            df_with_sesind.loc[i, "time_diff"] = pd.to_timedelta(0)
-            df_with_sesind.loc[i, "cml_time"] = pd.to_timedelta(0)
-            ses_ind += 1
-            df_with_sesind.loc[i, "session_ind"] = ses_ind
-        else:
-            df_with_sesind.loc[i, "time_diff"] = dif
-            df_with_sesind.loc[i, "cml_time"] = cml
-            df_with_sesind.loc[i, "session_ind"] = ses_ind
+    # if any of the user_identifier_cols values change or the max separation
+    # between events is exceeded, a new session should start
+    user_vals = df_with_sesind[user_identifier_cols]
+    new_session = user_vals.ne(user_vals.shift()).any(axis=1).to_numpy()
+    new_session |= (df_with_sesind[time_col].diff() > max_sep).to_numpy()
+    new_session[0] = True
+    # if the max session length is exceeded, a new session should start
+    _split_long_sessions(df_with_sesind[time_col], new_session, max_ses)
+    df_with_sesind["session_ind"] = np.cumsum(new_session) - 1
 
     # replace dummy_str with nan values
     for col in user_identifier_cols:
         df_with_sesind[col] = df_with_sesind[col].replace("dummy_str", np.nan)
 
     return df_with_sesind[final_cols]
+
+
+def _split_long_sessions(
+    times: pd.Series, new_session: np.ndarray, max_ses: pd.Timedelta
+):
+    """
+    Mark the starts of sessions that exceed `max_ses` in `new_session`.
+
+    Parameters
+    ----------
+    times: pd.Series
+        The sorted time stamps of the events.
+    new_session: np.ndarray
+        Boolean array marking the first event of each session. This is
+        updated in place.
+    max_ses: pd.Timedelta
+        The maximum length of a session.
+
+    Notes
+    -----
+    An event starts a new session if it is more than `max_ses` after the
+    first event of the current session. Since the session start changes
+    each time a session is split, only sessions spanning more than
+    `max_ses` need to be searched for further split points.
+
+    """
+    # events with no time stamp never start a new session
+    times = times.ffill().bfill()
+    if times.isna().all():
+        return
+    ses_starts = np.flatnonzero(new_session)
+    ses_ends = np.append(ses_starts[1:], len(new_session))
+    ses_ids = np.cumsum(new_session) - 1
+    elapsed = times - times.iloc[ses_starts[ses_ids]].array
+    for ses_id in np.unique(ses_ids[(elapsed > max_ses).to_numpy()]):
+        start, end = ses_starts[ses_id], ses_ends[ses_id]
+        ses_times = times.iloc[start:end]
+        pos = 0
+        while True:
+            pos = ses_times.searchsorted(ses_times.iloc[pos] + max_ses, side="right")
+            if pos >= end - start:
+                break
+            new_session[start + pos] = True
@@ -7,6 +7,7 @@
 
 import copy
 from collections import defaultdict
+from functools import partial
 from typing import DefaultDict, List, Tuple, Union
 
 import numpy as np
@@ -50,9 +51,9 @@ def compute_counts(  # nosec
             "different"
         )
 
-    seq1_counts: DefaultDict[str, int] = defaultdict(lambda: 0)
+    seq1_counts: DefaultDict[str, int] = defaultdict(int)
     seq2_counts: DefaultDict[str, DefaultDict[str, int]] = defaultdict(
-        lambda: defaultdict(lambda: 0)
+        partial(defaultdict, int)
     )
 
     for session in sessions:
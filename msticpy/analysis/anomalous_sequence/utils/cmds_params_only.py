@@ -13,6 +13,7 @@ of accompanying params.
 
 import copy
 from collections import defaultdict
+from functools import partial
 from typing import DefaultDict, List, Tuple, Union
 
 import numpy as np
@@ -66,14 +67,14 @@ def compute_counts(  # nosec
         param conditional on command counts
 
     """
-    seq1_counts: DefaultDict[str, int] = defaultdict(lambda: 0)
+    seq1_counts: DefaultDict[str, int] = defaultdict(int)
     seq2_counts: DefaultDict[str, DefaultDict[str, int]] = defaultdict(
-        lambda: defaultdict(lambda: 0)
+        partial(defaultdict, int)
     )
 
-    param_counts: DefaultDict[str, int] = defaultdict(lambda: 0)
+    param_counts: DefaultDict[str, int] = defaultdict(int)
     cmd_param_counts: DefaultDict[str, DefaultDict[str, int]] = defaultdict(
-        lambda: defaultdict(lambda: 0)
+        partial(defaultdict, int)
     )
 
     for session in sessions:
@@ -13,6 +13,7 @@ accompanying params and values.
 
 import copy
 from collections import defaultdict
+from functools import partial
 from typing import DefaultDict, List, Tuple, Union
 
 import numpy as np
@@ -82,19 +83,19 @@ def compute_counts(  # noqa MC0001  # nosec
         value conditional on param counts
 
     """
-    seq1_counts: DefaultDict[str, int] = defaultdict(lambda: 0)
+    seq1_counts: DefaultDict[str, int] = defaultdict(int)
     seq2_counts: DefaultDict[str, DefaultDict[str, int]] = defaultdict(
-        lambda: defaultdict(lambda: 0)
+        partial(defaultdict, int)
     )
 
-    param_counts: DefaultDict[str, int] = defaultdict(lambda: 0)
+    param_counts: DefaultDict[str, int] = defaultdict(int)
     cmd_param_counts: DefaultDict[str, DefaultDict[str, int]] = defaultdict(
-        lambda: defaultdict(lambda: 0)
+        partial(defaultdict, int)
     )
 
-    value_counts: DefaultDict[str, int] = defaultdict(lambda: 0)
+    value_counts: DefaultDict[str, int] = defaultdict(int)
     param_value_counts: DefaultDict[str, DefaultDict[str, int]] = defaultdict(
-        lambda: defaultdict(lambda: 0)
+        partial(defaultdict, int)
     )
 
     for session in sessions:
@@ -0,0 +1,319 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""
+Helper module for array-backed computations when modelling sessions.
+
+Commands are interned to integer ids and the trained command
+probabilities are stored in NumPy arrays. Sessions are encoded as
+a single flat array of command ids (with session offsets) so that
+the likelihoods of sessions and of sliding windows can be computed
+with vectorized array operations rather than per-command dictionary
+lookups.
+"""
+
+from typing import Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from ..utils.data_structures import Cmd, StateMatrix
+
+
+class EncodedSessions(NamedTuple):
+    """
+    Sessions encoded as flat arrays.
+
+    Each session is followed by the `end_token` id, so that session
+    `i` occupies positions `offsets[i]` to `offsets[i + 1] - 1`
+    (inclusive) of `cmd_ids`, with the end token at the last of
+    these positions.
+
+    """
+
+    cmd_ids: np.ndarray
+    offsets: np.ndarray
+    param_probs: Optional[np.ndarray] = None
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """Return the number of commands in each session."""
+        return np.diff(self.offsets) - 1
+
+
+class EncodedModel:
+    """Array-backed representation of trained command probabilities."""
+
+    def __init__(
+        self,
+        prior_probs: Union[StateMatrix, dict],
+        trans_probs: Union[StateMatrix, dict],
+        start_token: str,
+        end_token: str,
+        unk_token: str,
+    ):
+        """
+        Intern the commands and build the probability arrays.
+
+        Parameters
+        ----------
+        prior_probs: Union[StateMatrix, dict]
+            computed probabilities of individual commands
+        trans_probs: Union[StateMatrix, dict]
+            computed probabilities of sequences of commands (length 2)
+        start_token: str
+            dummy command to signify the start of a session (e.g. "##START##")
+        end_token: str
+            dummy command to signify the end of a session (e.g. "##END##")
+        unk_token: str
+            dummy command to signify an unseen command (e.g. "##UNK##")
+
+        """
+        cmds = list(prior_probs)
+        for cmd in [*trans_probs, start_token, end_token, unk_token]:
+            if cmd not in prior_probs:
+                cmds.append(cmd)
+        self.cmd_ids: Dict[str, int] = {cmd: idx for idx, cmd in enumerate(cmds)}
+        self.end_token = end_token
+        self.start_id = self.cmd_ids[start_token]
+        self.end_id = self.cmd_ids[end_token]
+        self.unk_id = self.cmd_ids[unk_token]
+
+        # lookups use the StateMatrix unk_token fallback for unseen
+        # commands and transitions
+        self.prior = np.array([prior_probs[cmd] for cmd in cmds], dtype=float)
+        self.trans = np.array(
+            [[trans_probs[prev][cur] for cur in cmds] for prev in cmds], dtype=float
+        )
+
+    def encode_sessions(
+        self,
+        sessions: List[List[Union[str, Cmd]]],
+        param_prob_func: Optional[Callable[[Cmd], float]] = None,
+    ) -> EncodedSessions:
+        """
+        Encode the sessions as flat arrays of command ids.
+
+        Parameters
+        ----------
+        sessions: List[List[Union[str, Cmd]]]
+            list of sessions, where each session is a list of either
+            strings or a list of the Cmd datatype.
+        param_prob_func: Optional[Callable[[Cmd], float]]
+            function returning the probability of the params (and values)
+            of a Cmd conditional on the command. This is called once for
+            each distinct command, params and values combination.
+            Only used if the sessions are lists of the Cmd datatype.
+
+        Returns
+        -------
+        EncodedSessions
+            The encoded sessions.
+
+        """
+        cmd_ids: List[int] = []
+        param_probs: List[float] = []
+        offsets = [0]
+        prob_cache: Dict[Hashable, float] = {}
+        end_prob = (
+            param_prob_func(Cmd(name=self.end_token, params={}))
+            if param_prob_func is not None
+            else 1.0
+        )
+        for session in sessions:
+            if param_prob_func is None:
+                cmd_ids.extend(self.cmd_ids.get(cmd, self.unk_id) for cmd in session)
+            else:
+                for cmd in session:
+                    cmd_ids.append(self.cmd_ids.get(cmd.name, self.unk_id))
+                    param_probs.append(
+                        _get_param_prob(cmd, param_prob_func, prob_cache)
+                    )
+                param_probs.append(end_prob)
+            cmd_ids.append(self.end_id)
+            offsets.append(len(cmd_ids))
+        return EncodedSessions(
+            cmd_ids=np.array(cmd_ids, dtype=np.int64),
+            offsets=np.array(offsets, dtype=np.int64),
+            param_probs=(
+                np.array(param_probs, dtype=float) if param_prob_func else None
+            ),
+        )
+
+    def compute_likelihoods_of_sessions(
+        self, sessions: EncodedSessions, use_start_end_tokens: bool
+    ) -> np.ndarray:
+        """
+        Compute the likelihoods of each of the encoded sessions.
+
+        The likelihood is computed as the exponential of the sum of
+        the log probabilities of the commands in each session.
+
+        Parameters
+        ----------
+        sessions: EncodedSessions
+            the encoded sessions
+        use_start_end_tokens: bool
+            if True, then `start_token` and `end_token` will be prepended
+            and appended to the session respectively before the calculations
+            are done
+
+        Returns
+        -------
+        np.ndarray
+            likelihood of each session
+
+        """
+        starts = sessions.offsets[:-1]
+        if not starts.size:
+            return np.zeros(0)
+        first_probs, trans_in = self._get_cmd_probs(sessions, use_start_end_tokens)
+        end_pos = sessions.offsets[1:] - 1
+        cmd_probs = trans_in.copy()
+        cmd_probs[starts] = first_probs[starts]
+        if sessions.param_probs is not None:
+            cmd_probs *= sessions.param_probs
+        # the end token contributes only the transition to the end token
+        cmd_probs[end_pos] = trans_in[end_pos] if use_start_end_tokens else 1.0
+        with np.errstate(divide="ignore"):
+            log_probs = np.log(cmd_probs)
+        return np.exp(np.add.reduceat(log_probs, starts))
+
+    def compute_rarest_windows(
+        self,
+        sessions: EncodedSessions,
+        window_len: int,
+        use_start_end_tokens: bool,
+        use_geo_mean: bool = False,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the rarest sliding window of `window_len` in each encoded session.
+
+        Parameters
+        ----------
+        sessions: EncodedSessions
+            the encoded sessions
+        window_len: int
+            length of sliding window for likelihood calculations
+        use_start_end_tokens: bool
+            if True, then `start_token` and `end_token` will be prepended
+            and appended to the session respectively before the calculations
+            are done
+        use_geo_mean: bool
+            if True, then each of the likelihoods of the sliding windows
+            will be raised to the power of (1/`window_len`)
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            index of the start of the rarest window in each session
+            (-1 if the session is shorter than the window) and the
+            likelihood of the rarest window (np.nan if the session
+            is shorter than the window).
+
+        """
+        n_sessions = len(sessions.offsets) - 1
+        win_counts = sessions.lengths + int(use_start_end_tokens) - window_len + 1
+        win_counts = np.clip(win_counts, 0, None)
+        if window_len < 1 or not win_counts.any():
+            return np.full(n_sessions, -1, dtype=np.int64), np.full(n_sessions, np.nan)
+
+        # position of each window in its session and in the flat arrays
+        win_sessions = np.repeat(np.arange(n_sessions), win_counts)
+        win_group_starts = np.cumsum(win_counts) - win_counts
+        win_pos = np.arange(len(win_sessions)) - win_group_starts[win_sessions]
+
+        liks = self._window_likelihoods(
+            sessions,
+            win_pos,
+            sessions.offsets[win_sessions] + win_pos,
+            window_len,
+            use_start_end_tokens,
+        )
+        if use_geo_mean:
+            liks = liks ** (1 / window_len)
+        return _rarest_windows(liks, win_counts, win_sessions, win_pos)
+
+    def _window_likelihoods(
+        self,
+        sessions: EncodedSessions,
+        win_pos: np.ndarray,
+        win_starts: np.ndarray,
+        window_len: int,
+        use_start_token: bool,
+    ) -> np.ndarray:
+        """Return the likelihood of each window starting at `win_starts`."""
+        first_probs, trans_in = self._get_cmd_probs(sessions, use_start_token)
+        # multiply the probabilities in the same order as the per-window
+        # calculation in the cmds_* modules
+        liks = np.where(
+            win_pos == 0,
+            first_probs[win_starts],
+            self.prior[sessions.cmd_ids[win_starts]],
+        )
+        if sessions.param_probs is not None:
+            liks = liks * sessions.param_probs[win_starts]
+        for offset in range(1, window_len):
+            liks = liks * trans_in[win_starts + offset]
+            if sessions.param_probs is not None:
+                liks = liks * sessions.param_probs[win_starts + offset]
+        return liks
+
+    def _get_cmd_probs(
+        self, sessions: EncodedSessions, use_start_token: bool
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the first command and transition probabilities of each command.
+
+        The first command probability is the transition probability from
+        the start token if `use_start_token` is True, otherwise the prior
+        probability of the command. The transition probability of each
+        command is conditional on the previous command in the session
+        (or the start token for the first command).
+
+        """
+        cmd_ids = sessions.cmd_ids
+        prev_ids = np.empty_like(cmd_ids)
+        prev_ids[1:] = cmd_ids[:-1]
+        prev_ids[sessions.offsets[:-1]] = self.start_id
+        trans_in = self.trans[prev_ids, cmd_ids]
+        first_probs = trans_in if use_start_token else self.prior[cmd_ids]
+        return first_probs, trans_in
+
+
+def _rarest_windows(
+    liks: np.ndarray,
+    win_counts: np.ndarray,
+    win_sessions: np.ndarray,
+    win_pos: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the position and likelihood of the rarest window in each session."""
+    window_idx = np.full(len(win_counts), -1, dtype=np.int64)
+    window_liks = np.full(len(win_counts), np.nan)
+    # find the first window with the minimum likelihood in each session
+    has_windows = win_counts > 0
+    win_group_starts = np.cumsum(win_counts) - win_counts
+    window_liks[has_windows] = np.minimum.reduceat(liks, win_group_starts[has_windows])
+    is_min = np.flatnonzero(liks == window_liks[win_sessions])
+    min_sessions, first_min = np.unique(win_sessions[is_min], return_index=True)
+    window_idx[min_sessions] = win_pos[is_min[first_min]]
+    return window_idx, window_liks
+
+
+def _get_param_prob(
+    cmd: Cmd, param_prob_func: Callable[[Cmd], float], prob_cache: Dict[Hashable, float]
+) -> float:
+    """Return the (cached) probability of the params of `cmd`."""
+    params = cmd.params
+    try:
+        key: Hashable = (
+            cmd.name,
+            frozenset(params.items() if isinstance(params, dict) else params),
+        )
+        if key not in prob_cache:
+            prob_cache[key] = param_prob_func(cmd)
+        return prob_cache[key]
+    except TypeError:
+        # unhashable param values
+        return param_prob_func(cmd)
@@ -6,6 +6,7 @@
 """Helper module for computing training probabilities when modelling sessions."""
 
 from collections import defaultdict
+from functools import partial
 from typing import DefaultDict, Tuple, Union
 
 from ..utils.data_structures import StateMatrix
@@ -40,9 +41,9 @@ def compute_cmds_probs(  # nosec
     """
     total_cmds = sum(seq1_counts.values())
 
-    prior_probs: DefaultDict[str, float] = defaultdict(lambda: 0)
+    prior_probs: DefaultDict[str, float] = defaultdict(float)
     trans_probs: DefaultDict[str, DefaultDict[str, float]] = defaultdict(
-        lambda: defaultdict(lambda: 0)
+        partial(defaultdict, float)
     )
 
     # compute prior probs
@@ -108,9 +109,9 @@ def compute_params_probs(  # nosec
         param conditional on command probabilities
 
     """
-    param_probs: DefaultDict[str, float] = defaultdict(lambda: 0)
+    param_probs: DefaultDict[str, float] = defaultdict(float)
     param_cond_cmd_probs: DefaultDict[str, DefaultDict[str, float]] = defaultdict(
-        lambda: defaultdict(lambda: 0)
+        partial(defaultdict, float)
     )
 
     for cmd, params in cmd_param_counts.items():
@@ -164,9 +165,9 @@ def compute_values_probs(  # nosec
         value conditional on param probabilities
 
     """
-    value_probs: DefaultDict[str, float] = defaultdict(lambda: 0)
+    value_probs: DefaultDict[str, float] = defaultdict(float)
     value_cond_param_probs: DefaultDict[str, DefaultDict[str, float]] = defaultdict(
-        lambda: defaultdict(lambda: 0)
+        partial(defaultdict, float)
     )
 
     for param, values in param_value_counts.items():
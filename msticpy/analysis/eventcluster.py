@@ -31,11 +31,13 @@ add_process_features: derives numerical features from text features such as
 commandline and process path.
 
 """
+import logging
 import re
 from binascii import crc32
 from functools import lru_cache
-from math import floor, log10
-from typing import Any, List, Tuple, Union
+from inspect import signature
+from math import floor
+from typing import Any, Callable, List, Tuple, Union
 
 import numpy as np
 import pandas as pd
@@ -59,6 +61,11 @@ except ImportError as imp_err:
 __version__ = VERSION
 __author__ = "Ian Hellen"
 
+logger = logging.getLogger(__name__)
+
+# default delimiters used for delimiter counts and hashes
+_DEF_DELIMS = r'[\s\-\\/\.,"\'|&:;%$()]'
+
 
 # pylint: disable=too-many-arguments, too-many-locals
 @export
@@ -70,8 +77,10 @@ def dbcluster_events(
     time_column: str = "TimeCreatedUtc",
     max_cluster_distance: float = 0.01,
     min_cluster_samples: int = 2,
+    cluster_method: Union[str, Any] = "dbscan",
+    deduplicate: bool = False,
     **kwargs,
-) -> Tuple[pd.DataFrame, DBSCAN, np.ndarray]:
+) -> Tuple[pd.DataFrame, Any, np.ndarray]:
     """
     Cluster data set according to cluster_columns features.
 
@@ -92,18 +101,37 @@ def dbcluster_events(
         (the default is 'TimeCreatedUtc')
     max_cluster_distance : float, optional
         DBSCAN eps (max cluster member distance) (the default is 0.01)
+        This is not used for HDBSCAN - pass `cluster_selection_epsilon`
+        as a keyword argument to merge HDBSCAN clusters closer than
+        this distance.
     min_cluster_samples : int, optional
         DBSCAN min_samples (the minimum cluster size) (the default is 2)
+        For HDBSCAN, this is used as the min_cluster_size.
+    cluster_method : Union[str, Any], optional
+        The clustering algorithm - "dbscan" (the default) or "hdbscan"
+        (requires scikit-learn 1.3 or later). You can also pass
+        a clustering object that follows the scikit-learn API
+        (a `fit` method and `labels_` attribute), e.g. a DBSCAN
+        object using a precomputed sparse neighbors graph.
+        Negative labels are treated as noise (unclustered) items.
+    deduplicate : bool, optional
+        If True, cluster only the distinct feature rows, weighting each
+        row by the number of times that it occurs (the default is False).
+        This is much faster and uses less memory for data with many
+        repeated feature values. It requires a clustering algorithm
+        that supports `sample_weight` (such as DBSCAN) and is ignored
+        for other algorithms. Note that the returned clustering
+        object is fitted to the distinct rows.
 
     Other Parameters
     ----------------
-    kwargs: Other arguments are passed to DBSCAN constructor
+    kwargs: Other arguments are passed to the DBSCAN (or HDBSCAN) constructor
 
     Returns
     -------
-    Tuple[pd.DataFrame, DBSCAN, np.ndarray]
+    Tuple[pd.DataFrame, Any, np.ndarray]
         Output dataframe with clustered rows
-        DBSCAN model
+        Clustering (e.g. DBSCAN) model
         Normalized data set
 
     """
@@ -124,17 +152,16 @@ def dbcluster_events(
             f" is not one of allowed types: {type_list}",
         )
 
-    # Create DBSCAN cluster object
-    db_cluster = DBSCAN(
-        eps=max_cluster_distance, min_samples=min_cluster_samples, **kwargs
+    # Create the cluster object
+    cluster_model = _create_cluster_model(
+        cluster_method, max_cluster_distance, min_cluster_samples, **kwargs
     )
 
     # Normalize the data (most clustering algorithms don't do well with
     # unnormalized data)
     x_norm = Normalizer().fit_transform(x_input) if normalize else x_input
     # fit the data set
-    db_cluster.fit(x_norm)
-    labels = db_cluster.labels_
+    labels = _fit_cluster_model(cluster_model, x_norm, deduplicate)
     cluster_set, counts = np.unique(labels, return_counts=True)
     if verbose:
         print(
@@ -153,7 +180,97 @@ def dbcluster_events(
     if verbose:
         print("Cluster output rows: ", len(clustered_events))
 
-    return clustered_events, db_cluster, x_norm
+    return clustered_events, cluster_model, x_norm
+
+
+def _create_cluster_model(
+    cluster_method: Union[str, Any],
+    max_cluster_distance: float,
+    min_cluster_samples: int,
+    **kwargs,
+) -> Any:
+    """Return the clustering object for `cluster_method`."""
+    if not isinstance(cluster_method, str):
+        return cluster_method
+    if cluster_method.casefold() == "dbscan":
+        return DBSCAN(
+            eps=max_cluster_distance, min_samples=min_cluster_samples, **kwargs
+        )
+    if cluster_method.casefold() == "hdbscan":
+        try:
+            # pylint: disable=import-outside-toplevel
+            from sklearn.cluster import HDBSCAN
+        except ImportError as hdb_imp_err:
+            raise MsticpyImportExtraError(
+                "HDBSCAN clustering requires scikit-learn 1.3 or later",
+                title="Error importing HDBSCAN from Scikit Learn",
+                extra="ml",
+            ) from hdb_imp_err
+        return HDBSCAN(min_cluster_size=max(min_cluster_samples, 2), **kwargs)
+    raise ValueError(
+        f"Unknown cluster_method '{cluster_method}'.",
+        "Expected one of 'dbscan', 'hdbscan' or a clustering object.",
+    )
+
+
+def _fit_cluster_model(
+    cluster_model: Any, x_norm: np.ndarray, deduplicate: bool
+) -> np.ndarray:
+    """
+    Fit the cluster model and return the cluster label of each row.
+
+    Parameters
+    ----------
+    cluster_model : Any
+        The clustering object
+    x_norm : np.ndarray
+        The (normalized) features
+    deduplicate : bool
+        If True (and the model supports sample weights) fit the
+        model to the distinct rows, weighted by their counts
+
+    Returns
+    -------
+    np.ndarray
+        The cluster labels (-1 for noise items)
+
+    """
+    if deduplicate and "sample_weight" in signature(cluster_model.fit).parameters:
+        uniq_rows, first_idx, inverse, row_counts = np.unique(
+            x_norm,
+            axis=0,
+            return_index=True,
+            return_inverse=True,
+            return_counts=True,
+        )
+        # fit the rows in the order of their first occurrence so that
+        # cluster ids are the same as when fitting all of the rows
+        order = np.argsort(first_idx)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        _fit_model(cluster_model, uniq_rows[order], sample_weight=row_counts[order])
+        labels = np.asarray(cluster_model.labels_)[rank[inverse.reshape(-1)]]
+    else:
+        _fit_model(cluster_model, x_norm)
+        labels = np.asarray(cluster_model.labels_)
+    return np.where(labels < 0, -1, labels)
+
+
+def _fit_model(cluster_model: Any, x_data: np.ndarray, **kwargs):
+    """Fit the cluster model, retrying HDBSCAN without a selection epsilon."""
+    try:
+        cluster_model.fit(x_data, **kwargs)
+    except TypeError:
+        # scikit-learn HDBSCAN can fail selecting clusters by epsilon
+        # for data with many identical rows
+        if not getattr(cluster_model, "cluster_selection_epsilon", 0):
+            raise
+        logger.warning(
+            "HDBSCAN failed with cluster_selection_epsilon=%s, retrying with 0",
+            cluster_model.cluster_selection_epsilon,
+        )
+        cluster_model.set_params(cluster_selection_epsilon=0.0)
+        cluster_model.fit(x_data, **kwargs)
 
 
 def _merge_clustered_items(
@@ -185,69 +302,51 @@ def _merge_clustered_items(
         Merged dataframe
 
     """
-    if isinstance(data, pd.DataFrame) and data.iloc[0][time_column].tz:
+    if not isinstance(data, pd.DataFrame):
+        data = pd.DataFrame(data)
+    if time_column in data and isinstance(data[time_column].dtype, pd.DatetimeTZDtype):
         ts_type = "datetime64[ns, UTC]"
     else:
         ts_type = "datetime64[ns]"
 
-    cluster_list = []
-    # Iterate through clusters, adding exemplar to output frame
-    # pylint: disable=consider-using-enumerate
-    # we need to know the index of the item within the loop
-    for idx in range(len(cluster_set)):
-        cluster_id = cluster_set[idx]
-        class_members = labels == cluster_id
-        if isinstance(data, pd.DataFrame):
-            time_ordered = data[class_members].sort_values(time_column, ascending=True)
-            first_event_time = time_ordered[0:][time_column].iat[0]
-            last_event_time = time_ordered[-1:][time_column].iat[0]
-        else:
-            first_event_time = None
-            last_event_time = None
-
-        if cluster_id == -1:
-            # 'Noise' events are individual items that could not be assigned
-            # to a cluster and so are unique
-            cluster_list.append(
-                data[class_members]
-                .assign(
-                    Clustered=False,
-                    ClusterId=cluster_id,
-                    ClusterSize=1,
-                    TimeGenerated=first_event_time,
-                    FirstEventTime=first_event_time,
-                    LastEventTime=last_event_time,
-                )
-                .astype(
-                    dtype={
-                        "TimeGenerated": ts_type,
-                        "FirstEventTime": ts_type,
-                        "LastEventTime": ts_type,
-                    }
-                )
-            )
-        else:
-            # Otherwise, just choose the first example of the cluster set
-            cluster_list.append(
-                data[class_members]
-                .assign(
-                    Clustered=True,
-                    ClusterId=cluster_id,
-                    ClusterSize=counts[idx],
-                    TimeGenerated=first_event_time,
-                    FirstEventTime=first_event_time,
-                    LastEventTime=last_event_time,
-                )[0:1]
-                .astype(
-                    dtype={
-                        "TimeGenerated": ts_type,
-                        "FirstEventTime": ts_type,
-                        "LastEventTime": ts_type,
-                    }
-                )
-            )
-    # pylint: enable=consider-using-enumerate
-    return pd.concat(cluster_list)
+    # 'Noise' events are individual items that could not be assigned
+    # to a cluster and so are unique - these are all kept.
+    # Otherwise, just choose the first example of the cluster set
+    is_noise = labels == -1
+    selected = is_noise | ~pd.Series(labels).duplicated().to_numpy()
+    sel_labels = labels[selected]
+    sel_noise = is_noise[selected]
+    if time_column in data:
+        event_times = (
+            data[time_column].groupby(labels).agg(["min", "max"]).reindex(sel_labels)
+        )
+        first_event_times = event_times["min"].to_numpy()
+        last_event_times = event_times["max"].to_numpy()
+    else:
+        first_event_times = last_event_times = None
+
+    clustered = (
+        data[selected]
+        .assign(
+            Clustered=~sel_noise,
+            ClusterId=sel_labels,
+            ClusterSize=np.where(
+                sel_noise, 1, counts[np.searchsorted(cluster_set, sel_labels)]
+            ),
+            TimeGenerated=first_event_times,
+            FirstEventTime=first_event_times,
+            LastEventTime=last_event_times,
+        )
+        .astype(
+            dtype={
+                "TimeGenerated": ts_type,
+                "FirstEventTime": ts_type,
+                "LastEventTime": ts_type,
+            }
+        )
+    )
+    # order the output by cluster id (noise items first)
+    return clustered.iloc[np.argsort(sel_labels, kind="stable")]
 
 
 @export
@@ -335,22 +434,17 @@ def _add_processname_features(
         Path separator for OS
 
     """
+    proc_names = output_df["NewProcessName"]
     if "processName" not in output_df or force:
-        output_df["processName"] = output_df.apply(
-            lambda x: x.NewProcessName.split(path_separator)[-1], axis=1
+        output_df["processName"] = _map_unique(
+            proc_names, lambda vals: vals.str.rsplit(path_separator, n=1).str[-1]
         )
     if "pathScore" not in output_df or force:
-        output_df["pathScore"] = output_df.apply(
-            lambda x: char_ord_score(x.NewProcessName), axis=1
-        )
+        output_df["pathScore"] = _map_unique(proc_names, _char_ord_sums)
     if "pathLogScore" not in output_df or force:
-        output_df["pathLogScore"] = output_df.apply(
-            lambda x: log10(x.pathScore) if x.pathScore else 0, axis=1
-        )
+        output_df["pathLogScore"] = _log10_or_zero(output_df["pathScore"])
     if "pathHash" not in output_df or force:
-        output_df["pathHash"] = output_df.apply(
-            lambda x: crc32_hash(x.NewProcessName), axis=1
-        )
+        output_df["pathHash"] = _map_unique(proc_names, _crc32_hashes)
 
 
 def _add_commandline_features(output_df: pd.DataFrame, force: bool):
@@ -365,29 +459,76 @@ def _add_commandline_features(output_df: pd.DataFrame, force: bool):
         If True overwrite existing feature columns
 
     """
+    cmd_lines = output_df["CommandLine"]
     if "commandlineLen" not in output_df or force:
-        output_df["commandlineLen"] = output_df.apply(
-            lambda x: len(x.CommandLine), axis=1
+        output_df["commandlineLen"] = _map_unique(
+            cmd_lines, lambda vals: vals.str.len()
         )
     if "commandlineLogLen" not in output_df or force:
-        output_df["commandlineLogLen"] = output_df.apply(
-            lambda x: log10(x.commandlineLen) if x.commandlineLen else 0, axis=1
-        )
+        output_df["commandlineLogLen"] = _log10_or_zero(output_df["commandlineLen"])
     if "commandlineTokensFull" not in output_df or force:
-        output_df["commandlineTokensFull"] = output_df[["CommandLine"]].apply(
-            lambda x: delim_count(x.CommandLine), axis=1
+        output_df["commandlineTokensFull"] = _map_unique(
+            cmd_lines, lambda vals: vals.str.count(_DEF_DELIMS)
         )
 
     if "commandlineScore" not in output_df or force:
-        output_df["commandlineScore"] = output_df.apply(
-            lambda x: char_ord_score(x.CommandLine), axis=1
-        )
+        output_df["commandlineScore"] = _map_unique(cmd_lines, _char_ord_sums)
     if "commandlineTokensHash" not in output_df or force:
-        output_df["commandlineTokensHash"] = output_df.apply(
-            lambda x: delim_hash(x.CommandLine), axis=1
+        output_df["commandlineTokensHash"] = _map_unique(
+            cmd_lines,
+            lambda vals: _crc32_hashes(vals.str.findall(_DEF_DELIMS).str.join("")),
         )
 
 
+def _map_unique(
+    data: pd.Series, func: Callable[[pd.Series], Union[pd.Series, np.ndarray]]
+) -> pd.Series:
+    """
+    Calculate a feature for the unique values of `data` and map back to rows.
+
+    Parameters
+    ----------
+    data : pd.Series
+        The input values
+    func : Callable[[pd.Series], Union[pd.Series, np.ndarray]]
+        Vectorized function taking a Series of the unique (non-null)
+        values and returning a feature value for each.
+
+    Returns
+    -------
+    pd.Series
+        The feature values for each row of `data` (NaN for null values).
+
+    """
+    codes, uniques = pd.factorize(data)
+    results = np.asarray(func(pd.Series(uniques, dtype=object)))
+    if (codes < 0).any():
+        # null values have a code of -1 - append NaN for these
+        results = np.append(results, np.nan)
+    return pd.Series(results[codes], index=data.index)
+
+
+def _char_ord_sums(values: pd.Series) -> np.ndarray:
+    """Return the sum of the ord values of the characters of each string."""
+    ords = np.frombuffer(
+        "".join(values).encode("utf-32-le", errors="surrogatepass"), dtype=np.uint32
+    )
+    cum_ords = np.concatenate([[0], np.cumsum(ords, dtype=np.int64)])
+    ends = np.cumsum(values.str.len().to_numpy(dtype=np.int64))
+    starts = np.concatenate([[0], ends[:-1]])
+    return cum_ords[ends] - cum_ords[starts]
+
+
+def _crc32_hashes(values: pd.Series) -> np.ndarray:
+    """Return the CRC32 hash of each string."""
+    return np.array([crc32(value.encode("utf-8")) for value in values], dtype=np.int64)
+
+
+def _log10_or_zero(values: pd.Series) -> pd.Series:
+    """Return log10 of the values (or 0 for zero values)."""
+    return np.log10(values.where(values != 0, 1).astype(float))
+
+
 @export
 @lru_cache(maxsize=1024)
 def delim_count(value: str, delim_list: str = r'[\s\-\\/\.,"\'|&:;%$()]') -> int:
@@ -580,7 +721,7 @@ def char_ord_score_df(data: pd.DataFrame, column: str, scale: int = 1) -> pd.Ser
     algorithms.
 
     """
-    return data.apply(lambda x: sum(ord(char) for char in x[column]) / scale, axis=1)
+    return _map_unique(data[column], _char_ord_sums) / scale
 
 
 @export
@@ -604,7 +745,9 @@ def token_count_df(data: pd.DataFrame, column: str, delimiter: str = " ") -> pd.
         count of tokens in strings in `column`
 
     """
-    return data.apply(lambda x: len(x[column].split(delimiter)), axis=1)
+    return _map_unique(
+        data[column], lambda vals: vals.str.count(re.escape(delimiter)) + 1
+    )
 
 
 @export
@@ -625,7 +768,7 @@ def crc32_hash_df(data: pd.DataFrame, column: str) -> pd.Series:
         CRC32 hash of input column
 
     """
-    return data.apply(lambda x: crc32(bytes(x[column].encode("utf-8"))), axis=1)
+    return _map_unique(data[column], _crc32_hashes)
 
 
 # pylint: disable=too-many-arguments, too-many-statements
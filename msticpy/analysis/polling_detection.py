@@ -13,8 +13,8 @@ updates or malware beaconing and checking for instructions.
 There is currently only one technique available for filtering polling data which is
 the class PeriodogramPollingDetector.
 """
-from collections import Counter
-from typing import List, Optional, Tuple, Union
+from concurrent.futures import Executor
+from typing import Callable, List, Optional, Tuple, Union
 
 import numpy as np
 import numpy.typing as npt
@@ -22,6 +22,11 @@ import pandas as pd
 from scipy import signal, special
 
 from ..common.utility import export
+from ..common.utility.parallel import map_parallel
+
+# Maximum number of time steps (groups x steps) in each batch of
+# periodograms - limits the memory used by each batch
+_MAX_BATCH_STEPS = 2**23
 
 
 @export
@@ -55,7 +60,8 @@ class PeriodogramPollingDetector:
         else:
             self.data = data
 
-    def _g_test(self, pxx: npt.NDArray, exclude_pi: bool) -> Tuple[float, float]:
+    @staticmethod
+    def _g_test(pxx: npt.NDArray, exclude_pi: bool) -> Tuple[float, float]:
         """
         Carry out fishers g test for periodicity.
 
@@ -95,7 +101,7 @@ class PeriodogramPollingDetector:
             pxx = pxx[:-1]
 
         pxx_length = len(pxx)
-        test_statistic = np.max(pxx) / sum(pxx)
+        test_statistic = np.max(pxx) / np.sum(pxx)
         upper = np.floor(1 / test_statistic).astype("int")
 
         if pxx_length > 700:
@@ -160,11 +166,8 @@ class PeriodogramPollingDetector:
           [2] https://github.com/fraspass/human_activity/blob/master/fourier.py
 
         """
-        time_steps = np.arange(process_start, process_end, step=interval)
-        counting_process = Counter(timestamps)
-
-        dn_ = np.array([counting_process[t] for t in time_steps])
-        dn_star = dn_ - len(timestamps) / len(time_steps)
+        dn_ = _counting_process(timestamps, process_start, process_end, interval)
+        dn_star = dn_ - len(timestamps) / len(dn_)
 
         freq, pxx = signal.periodogram(dn_star)
 
@@ -178,7 +181,11 @@ class PeriodogramPollingDetector:
         return p_val, max_pxx_freq, 1 / max_pxx_freq
 
     def detect_polling(
-        self, time_column: str, groupby: Optional[Union[List[str], str]] = None
+        self,
+        time_column: str,
+        groupby: Optional[Union[List[str], str]] = None,
+        n_jobs: Optional[int] = None,
+        executor: Optional[Executor] = None,
     ) -> None:
         """
         Detect the time interval which is highly periodic.
@@ -186,8 +193,9 @@ class PeriodogramPollingDetector:
         Runs PeriodogramPollingDetector._detect_polling_arr on the time_column and populates a
         p_value column, dominant_frequency column and dominant_interval column.
 
-        If groupby column(s) are given then PeriodogramPollingDetector._detect_polling_arr is ran on
-        each group.
+        If groupby column(s) are given then the periodogram polling detection is run on
+        each group. Groups with the same number of time steps are processed together
+        in batches.
 
         Parameters
         ----------
@@ -195,6 +203,15 @@ class PeriodogramPollingDetector:
             The name of the column that contains timestamps
         groupby: str or list[str], optional
             Column(s) to group by
+        n_jobs: int, optional
+            The number of processes to use to process the batches of groups.
+            If None or 1 (the default) the groups are processed in the current
+            process. Negative values are relative to the number of CPUs (-1 uses
+            all CPUs).
+        executor: Executor, optional
+            An executor used to process the batches of groups (the default is None).
+            If not supplied and `n_jobs` > 1, a ProcessPoolExecutor is created.
+
         """
         ts_col = self.data[time_column]
 
@@ -208,16 +225,162 @@ class PeriodogramPollingDetector:
             self.data["dominant_frequency"] = freq
             self.data["dominant_interval"] = interval
         else:
-            grouped_results = self.data.groupby(groupby).apply(
-                lambda x: self._detect_polling_arr(
-                    x[time_column], min(x[time_column]), max(x[time_column])
-                )
+            grouped_results_df = self._detect_polling_grouped(
+                ts_col, groupby, n_jobs=n_jobs, executor=executor
             )
+            self.data = self.data.merge(grouped_results_df)
 
-            grouped_results_df = pd.DataFrame(
-                grouped_results.tolist(),
-                columns=["p_value", "dominant_frequency", "dominant_interval"],
-                index=grouped_results.index,
-            ).reset_index()
+    def _detect_polling_grouped(
+        self,
+        ts_col: pd.Series,
+        groupby: Union[List[str], str],
+        n_jobs: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ) -> pd.DataFrame:
+        """Return the polling detection results for each group."""
+        grouped = self.data.groupby(groupby)
+        group_times = _get_group_times(grouped, ts_col)
+
+        results = np.full((grouped.ngroups, 3), np.nan)
+        batches = _get_group_batches(group_times)
+        batch_results = map_parallel(
+            _detect_polling_batch,
+            [[group_times[idx] for idx in batch] for batch in batches],
+            n_jobs=n_jobs,
+            executor=executor,
+            g_test=self._g_test,
+        )
+        for batch, batch_result in zip(batches, batch_results):
+            results[batch] = batch_result
+
+        return pd.DataFrame(
+            results,
+            columns=["p_value", "dominant_frequency", "dominant_interval"],
+            index=grouped.size().index,
+        ).reset_index()
+
+
+def _get_group_times(grouped, ts_col: pd.Series) -> List[npt.NDArray]:
+    """Return an array of the timestamps in each group of `grouped`."""
+    group_ids = grouped.ngroup().to_numpy()
+    in_group = group_ids >= 0
+    group_ids = group_ids[in_group]
+    order = np.argsort(group_ids, kind="stable")
+    group_sizes = np.bincount(group_ids, minlength=grouped.ngroups)
+    return np.split(ts_col.to_numpy()[in_group][order], np.cumsum(group_sizes)[:-1])
+
+
+def _counting_process(
+    timestamps: npt.ArrayLike,
+    process_start: int,
+    process_end: int,
+    interval: int = 1,
+) -> npt.NDArray:
+    """
+    Return the number of timestamps in each interval of the counting process.
 
-            self.data = self.data.merge(grouped_results_df)
+    Parameters
+    ----------
+    timestamps: ArrayLike
+        An array like object containing connection arrival times as timestamps
+    process_start: int
+        The timestamp representing the start of the counting process
+    process_end: int
+        The timestamp representing the end of the counting process (exclusive)
+    interval: int
+        The interval in seconds between observations
+
+    Returns
+    -------
+    NDArray
+        The count of timestamps in each interval.
+
+    """
+    n_steps = _get_n_steps(process_start, process_end, interval)
+    steps = (np.asarray(timestamps) - process_start) // interval
+    steps = steps[(steps >= 0) & (steps < n_steps)].astype(np.int64)
+    return np.bincount(steps, minlength=n_steps)
+
+
+def _get_n_steps(process_start, process_end, interval: int = 1) -> int:
+    """Return the number of intervals from process_start to process_end."""
+    return max(int(np.ceil((process_end - process_start) / interval)), 0)
+
+
+def _get_group_batches(group_times: List[npt.NDArray]) -> List[npt.NDArray]:
+    """Return batches of group indexes, with each batch having groups of equal length."""
+    n_steps = np.array(
+        [_get_n_steps(times.min(), times.max()) for times in group_times],
+        dtype=np.int64,
+    )
+    batches = []
+    for length in np.unique(n_steps):
+        groups = np.flatnonzero(n_steps == length)
+        n_batches = int(np.ceil(len(groups) * max(length, 1) / _MAX_BATCH_STEPS))
+        batches.extend(np.array_split(groups, n_batches))
+    return batches
+
+
+def _detect_polling_batch(
+    group_times: List[npt.NDArray],
+    g_test: Callable[[npt.NDArray, bool], Tuple[float, float]],
+) -> npt.NDArray:
+    """
+    Carry out periodogram polling detection on a batch of groups of timestamps.
+
+    The counting process for each group is calculated with a single
+    `np.bincount` and the periodograms for all of the groups are
+    calculated together, so all of the groups must span the same
+    number of time steps.
+
+    Parameters
+    ----------
+    group_times: List[NDArray]
+        The timestamps of each group.
+    g_test: Callable[[NDArray, bool], Tuple[float, float]]
+        The function used to carry out fishers G test.
+
+    Returns
+    -------
+    NDArray
+        The p value, dominant frequency and dominant interval for each group
+        (NaN for groups with fewer than two time steps).
+
+    """
+    results = np.full((len(group_times), 3), np.nan)
+    starts = np.array([times.min() for times in group_times])
+    n_steps = _get_n_steps(starts[0], group_times[0].max())
+    if n_steps < 2:
+        return results
+
+    group_sizes = np.array([len(times) for times in group_times])
+    dn_star = (
+        _batch_counts(group_times, starts, group_sizes, n_steps)
+        - (group_sizes / n_steps)[:, np.newaxis]
+    )
+
+    freq, pxx = signal.periodogram(dn_star, axis=-1)
+    max_pxx_freq = freq[np.argmax(pxx, axis=-1)]
+    exclude_pi = n_steps % 2 == 0
+    for idx, group_pxx in enumerate(pxx):
+        _, results[idx, 0] = g_test(group_pxx, exclude_pi)
+    results[:, 1] = max_pxx_freq
+    results[:, 2] = 1 / max_pxx_freq
+    return results
+
+
+def _batch_counts(
+    group_times: List[npt.NDArray],
+    starts: npt.NDArray,
+    group_sizes: npt.NDArray,
+    n_steps: int,
+) -> npt.NDArray:
+    """Return the counting process of each group as rows of a 2D array."""
+    # bin the timestamps of all groups into one flat array of counts
+    steps = np.concatenate(group_times) - np.repeat(starts, group_sizes)
+    offsets = np.repeat(np.arange(len(group_times)) * n_steps, group_sizes)
+    in_range = steps < n_steps
+    return np.bincount(
+        (steps[in_range] + offsets[in_range]).astype(np.int64),
+        minlength=len(group_times) * n_steps,
+    ).reshape(len(group_times), n_steps)
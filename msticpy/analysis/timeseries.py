@@ -4,16 +4,23 @@
 # license information.
 # --------------------------------------------------------------------------
 """Module for timeseries analysis functions."""
+import hashlib
 import inspect
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
 from .._version import VERSION
 from ..common.exceptions import MsticpyException, MsticpyImportExtraError
 from ..common.timespan import TimeSpan
 from ..common.utility import check_kwargs, export
+from ..common.utility.parallel import map_parallel
 from ..vis.timeseries import display_timeseries_anomalies
 
 try:
@@ -29,6 +36,8 @@ except ImportError as imp_err:
 __version__ = VERSION
 __author__ = "Ashwin Patil"
 
+logger = logging.getLogger(__name__)
+
 
 @pd.api.extensions.register_dataframe_accessor("mp_timeseries")
 class MsticpyTimeSeriesAccessor:
@@ -57,6 +66,19 @@ class MsticpyTimeSeriesAccessor:
         score_threshold : float, optional
             standard deviation threshold value calculated using Z-score used to
             flag anomalies, by default 3
+        robust : bool, optional
+            Use the robust (outlier resistant) version of STL, by default False
+        group_by : Union[str, List[str]], optional
+            Column(s) identifying separate time series (e.g. per host).
+            Each series is decomposed separately and the results returned
+            as a single DataFrame. `time_column` must be supplied.
+        n_jobs : int, optional
+            The number of processes used to decompose the `group_by` series,
+            by default None (decompose in the current process).
+        executor : Executor, optional
+            An executor used to decompose the `group_by` series.
+        cache : bool, optional
+            Cache the STL decomposition of each series, by default True.
 
         Returns
         -------
@@ -89,13 +111,20 @@ class MsticpyTimeSeriesAccessor:
             By default, True
         anomalies_column : str, optional
             The column containing the anomalies flag.
+        group_by : Union[str, List[str]], optional
+            The column(s) identifying each time series of a grouped
+            analysis. If supplied, a DataFrame of the anomaly periods
+            for each group is returned.
 
         Returns
         -------
-        List[TimeSpan] :
-            TimeSpan(start, end)
+        Union[List[TimeSpan], pd.DataFrame] :
+            TimeSpan(start, end) or, if `group_by` is supplied,
+            DataFrame of group_by columns, start and end.
 
         """
+        if kwargs.get("group_by"):
+            return find_anomaly_periods_by_group(data=self._df, **kwargs)
         return find_anomaly_periods(data=self._df, **kwargs)
 
     def apply_threshold(self, **kwargs):
@@ -213,8 +242,89 @@ _DEFAULT_KWARGS = [
     "score_threshold",
     "time_column",
     "data_column",
+    "robust",
+    "group_by",
+    "n_jobs",
+    "executor",
+    "cache",
 ]
 
+# Maximum number and total size (bytes) of cached STL decompositions
+_STL_CACHE_SIZE = 1024
+_STL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Number of series decomposed in each worker task
+_STL_BATCH_SIZE = 64
+
+
+class _STLComponents(NamedTuple):
+    """STL decomposition components of a series."""
+
+    resid: np.ndarray
+    trend: np.ndarray
+    seasonal: np.ndarray
+    weights: np.ndarray
+
+
+class _STLOptions(NamedTuple):
+    """Options for STL decomposition of grouped time series."""
+
+    score_threshold: float
+    stl_params: Dict[str, Any]
+    use_cache: bool = True
+    n_jobs: Optional[int] = None
+    executor: Optional[Executor] = None
+
+
+class _STLCache:
+    """Thread-safe LRU cache of STL decompositions, bounded by count and size."""
+
+    def __init__(self, max_items: int, max_bytes: int):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[Tuple[Any, ...], _STLComponents]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of cached decompositions."""
+        return len(self._items)
+
+    @property
+    def size(self) -> int:
+        """Return the total size (bytes) of the cached decompositions."""
+        return self._size
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[_STLComponents]:
+        """Return the cached decomposition for `key` (or None)."""
+        with self._lock:
+            components = self._items.get(key)
+            if components is not None:
+                self._items.move_to_end(key)
+            return components
+
+    def put(self, key: Tuple[Any, ...], components: _STLComponents):
+        """Add `components` to the cache, evicting the least recently used."""
+        size = sum(comp.nbytes for comp in components)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                self._size -= sum(comp.nbytes for comp in self._items.pop(key))
+            self._items[key] = components
+            self._size += size
+            while len(self._items) > self.max_items or self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= sum(comp.nbytes for comp in evicted)
+
+    def clear(self):
+        """Remove all cached decompositions."""
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+
+
+_STL_CACHE = _STLCache(_STL_CACHE_SIZE, _STL_CACHE_MAX_BYTES)
+
 
 @export
 def ts_anomalies_stl(data: pd.DataFrame, **kwargs) -> pd.DataFrame:
@@ -243,6 +353,27 @@ def ts_anomalies_stl(data: pd.DataFrame, **kwargs) -> pd.DataFrame:
     score_threshold : float, optional
         standard deviation threshold value calculated using Z-score used to
         flag anomalies, by default 3
+    robust : bool, optional
+        Use the robust (outlier resistant) version of STL, by default False
+    group_by : Union[str, List[str]], optional
+        Column(s) identifying separate time series (e.g. per host or
+        account). If supplied, each series is decomposed separately and
+        the results are returned as a single DataFrame, with the
+        group_by columns as the first columns. `time_column` must be
+        supplied with this option.
+    n_jobs : int, optional
+        The number of processes used to decompose the `group_by` series.
+        If None or 1 (the default) the series are decomposed in the current
+        process. Negative values are relative to the number of CPUs (-1 uses
+        all CPUs).
+    executor : Executor, optional
+        An executor used to decompose the `group_by` series (the default is None).
+        If not supplied and `n_jobs` > 1, a ProcessPoolExecutor is created.
+    cache : bool, optional
+        Cache the STL decomposition of each series, so that re-analyzing
+        unchanged series (e.g. with a different score_threshold) does not
+        repeat the decomposition. The cache holds up to 1024 series
+        (and up to 64MB). By default, True.
 
     Returns
     -------
@@ -255,33 +386,181 @@ def ts_anomalies_stl(data: pd.DataFrame, **kwargs) -> pd.DataFrame:
     -----
     The decomposition method is STL - Seasonal-Trend Decomposition using LOESS
 
+    When using `group_by`, series that cannot be decomposed (e.g. because
+    they are shorter than two periods) are omitted from the results.
+
     """
     check_kwargs(kwargs, _DEFAULT_KWARGS)
-    seasonal: int = kwargs.get("seasonal", 7)
-    period: int = kwargs.get("period", 24)
     score_threshold: float = kwargs.get("score_threshold", 3.0)
     time_column = kwargs.get("time_column")
     data_column = kwargs.get("data_column")
+    group_by = kwargs.get("group_by")
+    stl_params = {
+        "seasonal": kwargs.get("seasonal", 7),
+        "period": kwargs.get("period", 24),
+        "robust": kwargs.get("robust", False),
+    }
+    use_cache: bool = kwargs.get("cache", True)
 
     if not isinstance(data, pd.DataFrame):
         raise MsticpyException("input data should be a pandas dataframe")
+    if group_by:
+        return _ts_anomalies_stl_grouped(
+            data,
+            group_by=[group_by] if isinstance(group_by, str) else list(group_by),
+            time_column=time_column,
+            data_column=data_column,
+            options=_STLOptions(
+                score_threshold=score_threshold,
+                stl_params=stl_params,
+                use_cache=use_cache,
+                n_jobs=kwargs.get("n_jobs"),
+                executor=kwargs.get("executor"),
+            ),
+        )
 
     if time_column:
         data = data.set_index(time_column)
     data_column = data_column or data.columns[0]
     data = data[[data_column]]
 
+    values = data[data_column].values
+    components = _get_cached_stl(values, stl_params) if use_cache else None
+    if components is None:
+        components = _stl_decompose(values, **stl_params)
+        if use_cache:
+            _cache_stl(values, stl_params, components)
+    return _stl_anomalies(data, components, score_threshold)
+
+
+def _ts_anomalies_stl_grouped(
+    data: pd.DataFrame,
+    group_by: List[str],
+    time_column: Optional[str],
+    data_column: Optional[str],
+    options: _STLOptions,
+) -> pd.DataFrame:
+    """Return STL anomalies for each `group_by` time series."""
+    if not time_column:
+        raise MsticpyException("time_column must be supplied with group_by")
+    data_column = data_column or next(
+        col for col in data.columns if col not in group_by and col != time_column
+    )
+    group_data = [
+        (key, group.set_index(time_column)[[data_column]])
+        for key, group in data.groupby(group_by)
+    ]
+
+    components = _decompose_groups(
+        [group[data_column].values for _, group in group_data], options
+    )
+
+    group_results = (
+        _group_stl_anomalies(key, group, comps, group_by, options.score_threshold)
+        for (key, group), comps in zip(group_data, components)
+    )
+    results = [result for result in group_results if result is not None]
+    if not results:
+        return pd.DataFrame(columns=[*group_by, time_column, data_column])
+    return pd.concat(results, ignore_index=True)
+
+
+def _group_stl_anomalies(
+    key: Any,
+    group: pd.DataFrame,
+    components: Optional[_STLComponents],
+    group_by: List[str],
+    score_threshold: float,
+) -> Optional[pd.DataFrame]:
+    """Return the STL anomalies for a group, with the group_by key columns."""
+    if components is None:
+        logger.warning("Skipping time series for %s", key)
+        return None
+    try:
+        result = _stl_anomalies(group, components, score_threshold)
+    except ValueError as err:
+        # e.g. a constant series gives NaN scores
+        logger.warning("Skipping time series for %s: %s", key, err)
+        return None
+    key_values = key if isinstance(key, tuple) else (key,)
+    for col_idx, (col, value) in enumerate(zip(group_by, key_values)):
+        result.insert(col_idx, col, value)
+    return result
+
+
+def _decompose_groups(
+    group_values: List[np.ndarray], options: _STLOptions
+) -> List[Optional[_STLComponents]]:
+    """Return the (cached or new) STL components of each series (or None)."""
+    stl_params = options.stl_params
+    # decompose the series which are not already cached
+    components: List[Optional[_STLComponents]] = [
+        _get_cached_stl(values, stl_params) if options.use_cache else None
+        for values in group_values
+    ]
+    to_decompose = [idx for idx, comps in enumerate(components) if comps is None]
+    batches = [
+        to_decompose[idx : idx + _STL_BATCH_SIZE]  # noqa: E203
+        for idx in range(0, len(to_decompose), _STL_BATCH_SIZE)
+    ]
+    batch_results = map_parallel(
+        _stl_decompose_batch,
+        [[group_values[idx] for idx in batch] for batch in batches],
+        n_jobs=options.n_jobs,
+        executor=options.executor,
+        **stl_params,
+    )
+    for batch, batch_components in zip(batches, batch_results):
+        for idx, comps in zip(batch, batch_components):
+            components[idx] = comps
+            if options.use_cache and comps is not None:
+                _cache_stl(group_values[idx], stl_params, comps)
+    return components
+
+
+def _stl_decompose(
+    values: np.ndarray, seasonal: int, period: int, robust: bool
+) -> _STLComponents:
+    """Return the STL decomposition components of `values`."""
     # STL method does Season-Trend decomposition using LOESS.
-    # Accepts timeseries dataframe
-    stl = STL(data[data_column].values, seasonal=seasonal, period=period)
+    stl = STL(values, seasonal=seasonal, period=period, robust=robust)
     # Fitting the data - Estimate season, trend and residuals components.
     res = stl.fit()
+    return _STLComponents(
+        resid=np.asarray(res.resid),
+        trend=np.asarray(res.trend),
+        seasonal=np.asarray(res.seasonal),
+        weights=np.asarray(res.weights),
+    )
+
+
+def _stl_decompose_batch(
+    series: List[np.ndarray], seasonal: int, period: int, robust: bool
+) -> List[Optional[_STLComponents]]:
+    """Return the STL decomposition components (or None) for a batch of series."""
+    results: List[Optional[_STLComponents]] = []
+    for values in series:
+        try:
+            results.append(
+                _stl_decompose(values, seasonal=seasonal, period=period, robust=robust)
+            )
+        except ValueError as err:
+            # e.g. the series is too short for the period
+            logger.warning("STL decomposition failed: %s", err)
+            results.append(None)
+    return results
+
+
+def _stl_anomalies(
+    data: pd.DataFrame, components: _STLComponents, score_threshold: float
+) -> pd.DataFrame:
+    """Return the STL decomposition and anomalies for a single series."""
     result = data.copy()
     # Create dataframe columns from decomposition results
-    result["residual"] = res.resid
-    result["trend"] = res.trend
-    result["seasonal"] = res.seasonal
-    result["weights"] = res.weights
+    result["residual"] = components.resid
+    result["trend"] = components.trend
+    result["seasonal"] = components.seasonal
+    result["weights"] = components.weights
     # Baseline is generally seasonal + trend
     result["baseline"] = result["seasonal"] + result["trend"]
     # Type cast and replace na values with 0
@@ -304,6 +583,31 @@ def ts_anomalies_stl(data: pd.DataFrame, **kwargs) -> pd.DataFrame:
     return result.reset_index().sort_values(time_index_name, ascending=True)
 
 
+def _stl_cache_key(values: np.ndarray, stl_params: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Return the cache key for the series values and STL parameters."""
+    values = np.ascontiguousarray(values)
+    return (
+        hashlib.sha256(values.tobytes()).hexdigest(),
+        str(values.dtype),
+        len(values),
+        *sorted(stl_params.items()),
+    )
+
+
+def _get_cached_stl(
+    values: np.ndarray, stl_params: Dict[str, Any]
+) -> Optional[_STLComponents]:
+    """Return the cached STL decomposition of `values` (or None)."""
+    return _STL_CACHE.get(_stl_cache_key(values, stl_params))
+
+
+def _cache_stl(
+    values: np.ndarray, stl_params: Dict[str, Any], components: _STLComponents
+):
+    """Add the STL decomposition of `values` to the cache."""
+    _STL_CACHE.put(_stl_cache_key(values, stl_params), components)
+
+
 timeseries_anomalies_stl = ts_anomalies_stl
 
 
@@ -421,6 +725,62 @@ def find_anomaly_periods(
     ]
 
 
+def find_anomaly_periods_by_group(
+    data: pd.DataFrame,
+    group_by: Union[str, List[str]],
+    time_column: str = "TimeGenerated",
+    period: str = "1H",
+    pos_only: bool = True,
+    anomalies_column: str = "anomalies",
+) -> pd.DataFrame:
+    """
+    Return anomaly periods for each group of a grouped time series analysis.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        The data to process (e.g. the output of `ts_anomalies_stl`
+        using the `group_by` parameter)
+    group_by : Union[str, List[str]]
+        The column(s) identifying each time series
+    time_column : str, optional
+        The name of the time column
+    period : str, optional
+        pandas-compatible time period designator,
+        by default "1H"
+    pos_only : bool, optional
+        If True only extract positive anomaly periods,
+        else extract both positive and negative.
+        By default, True
+    anomalies_column : str, optional
+        The column containing the anomalies flag.
+
+    Returns
+    -------
+    pd.DataFrame
+        The `group_by` columns plus "start" and "end" columns for each
+        anomaly period.
+
+    """
+    group_by = [group_by] if isinstance(group_by, str) else list(group_by)
+    anom_filter = [1] if pos_only else [1, -1]
+    anomalies = data[data[anomalies_column].isin(anom_filter)]
+    group_periods = []
+    for key, group in anomalies.groupby(group_by):
+        key_values = key if isinstance(key, tuple) else (key,)
+        group_periods.extend(
+            (*key_values, start, end)
+            for start, end in extract_anomaly_periods(
+                data=group,
+                time_column=time_column,
+                period=period,
+                pos_only=pos_only,
+                anomalies_column=anomalies_column,
+            ).items()
+        )
+    return pd.DataFrame(group_periods, columns=[*group_by, "start", "end"])
+
+
 def create_time_period_kqlfilter(periods: Dict[datetime, datetime]) -> str:
     """
     Return KQL time filter expression from anomaly periods.
@@ -0,0 +1,198 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""
+Shared HTTP client registry.
+
+HTTP clients are created once per process (and name) and re-used
+by all callers, so that connections are kept alive and pooled
+rather than opening a new TCP connection and TLS session for
+every request. HTTP/2 is used if the `h2` package is installed
+and it is not disabled in settings.
+
+Settings format
+
+.. code-block:: yaml
+
+    msticpy:
+        Http:
+            Http2: true
+            MaxConnections: 100
+            MaxKeepaliveConnections: 20
+            KeepaliveExpiry: 30
+
+All settings are optional. The request timeout is taken from
+the `msticpy.http_timeout` setting (see `get_http_timeout`).
+
+"""
+import asyncio
+import atexit
+import importlib.util
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from .._version import VERSION
+from .pkg_config import get_config, get_http_timeout
+from .utility import export, mp_ua_header
+
+__version__ = VERSION
+__author__ = "Ian Hellen"
+
+_DEFAULT_MAX_CONNECTIONS = 100
+_DEFAULT_MAX_KEEPALIVE = 20
+_DEFAULT_KEEPALIVE_EXPIRY = 30.0
+
+_CLIENTS: Dict[str, httpx.Client] = {}
+_ASYNC_CLIENTS: Dict[Tuple[str, int], Tuple[asyncio.AbstractEventLoop, Any]] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+@export
+def http2_available() -> bool:
+    """Return True if the `h2` package needed for HTTP/2 is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def _client_params(**kwargs) -> Dict[str, Any]:
+    """Return httpx client parameters from settings and `kwargs`."""
+    http_config = get_config("msticpy.Http", None) or {}
+    http2 = kwargs.pop("http2", http_config.get("Http2", True))
+    limits = httpx.Limits(
+        max_connections=kwargs.pop(
+            "max_connections",
+            http_config.get("MaxConnections", _DEFAULT_MAX_CONNECTIONS),
+        ),
+        max_keepalive_connections=kwargs.pop(
+            "max_keepalive_connections",
+            http_config.get("MaxKeepaliveConnections", _DEFAULT_MAX_KEEPALIVE),
+        ),
+        keepalive_expiry=kwargs.pop(
+            "keepalive_expiry",
+            http_config.get("KeepaliveExpiry", _DEFAULT_KEEPALIVE_EXPIRY),
+        ),
+    )
+    return {
+        "timeout": get_http_timeout(**kwargs),
+        "headers": mp_ua_header(),
+        "limits": limits,
+        "http2": bool(http2) and http2_available(),
+    }
+
+
+@export
+def get_http_client(name: str = "default", **kwargs) -> httpx.Client:
+    """
+    Return the shared HTTP client for `name`.
+
+    Parameters
+    ----------
+    name : str, optional
+        The name of the client, by default "default".
+        Callers that need a separate connection pool can
+        use a different name.
+
+    Other Parameters
+    ----------------
+    timeout : Union[int, float, Tuple, httpx.Timeout], optional
+        Default timeout for the client.
+    http2 : bool, optional
+        Use HTTP/2 if available, by default True
+    max_connections : int, optional
+        Maximum number of connections in the pool.
+    max_keepalive_connections : int, optional
+        Maximum number of idle connections kept alive.
+    keepalive_expiry : float, optional
+        Time in seconds that idle connections are kept alive.
+
+    Returns
+    -------
+    httpx.Client
+        The shared client instance.
+
+    Notes
+    -----
+    The parameters are only used when the client is first created.
+    Callers should pass any request-specific settings (such as timeout
+    and headers) with each request.
+
+    """
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(name)
+        if client is None or client.is_closed:
+            client = httpx.Client(**_client_params(**kwargs))
+            _CLIENTS[name] = client
+        return client
+
+
+@export
+def get_async_http_client(name: str = "default", **kwargs) -> httpx.AsyncClient:
+    """
+    Return the shared async HTTP client for `name`.
+
+    Parameters
+    ----------
+    name : str, optional
+        The name of the client, by default "default".
+
+    Other Parameters
+    ----------------
+    kwargs :
+        Client settings - see `get_http_client`.
+
+    Returns
+    -------
+    httpx.AsyncClient
+        The shared async client instance.
+
+    Notes
+    -----
+    Async connections cannot be shared across event loops, so
+    a separate client is created for each running event loop.
+
+    """
+    try:
+        loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    key = (name, id(loop))
+    with _CLIENTS_LOCK:
+        # remove clients belonging to event loops that have been closed
+        for closed_key in [
+            cl_key
+            for cl_key, (cl_loop, _) in _ASYNC_CLIENTS.items()
+            if cl_loop is not None and cl_loop.is_closed()
+        ]:
+            del _ASYNC_CLIENTS[closed_key]
+        client_loop, client = _ASYNC_CLIENTS.get(key, (loop, None))
+        if client is None or client.is_closed or client_loop is not loop:
+            client = httpx.AsyncClient(**_client_params(**kwargs))
+            _ASYNC_CLIENTS[key] = (loop, client)
+        return client
+
+
+@export
+def close_http_clients(name: Optional[str] = None):
+    """
+    Close shared HTTP clients.
+
+    Parameters
+    ----------
+    name : Optional[str], optional
+        The name of the client to close, by default None
+        (close all clients).
+
+    """
+    with _CLIENTS_LOCK:
+        for cl_name in [cl_nm for cl_nm in _CLIENTS if name in (None, cl_nm)]:
+            _CLIENTS.pop(cl_name).close()
+        # Async clients hold no connections once their event loop has
+        # closed, so we just drop the references.
+        for cl_key in [key for key in _ASYNC_CLIENTS if name in (None, key[0])]:
+            del _ASYNC_CLIENTS[cl_key]
+
+
+atexit.register(close_http_clients)
@@ -324,8 +324,9 @@ def _fetch_secret_setting(
         _description_
 
     """
-    if isinstance(config_setting, str):
-        return config_setting
+    if isinstance(config_setting, (str, int, float)):
+        # numeric settings (e.g. max_concurrency) are returned unchanged
+        return config_setting  # type: ignore[return-value]
     if not isinstance(config_setting, dict):
         return NotImplementedError(
             "Configuration setting format not recognized.",
@@ -0,0 +1,189 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""Helper functions for running DataFrame and other functions in parallel."""
+import logging
+import os
+import pickle  # nosec
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..._version import VERSION
+from .types import export
+
+__version__ = VERSION
+__author__ = "Ian Hellen"
+
+logger = logging.getLogger(__name__)
+
+# Minimum number of rows in each partition - smaller partitions
+# cost more in process communication than they save
+_MIN_PARTITION_ROWS = 1000
+
+
+@export
+def run_partitioned(
+    func: Callable[..., pd.DataFrame],
+    data: pd.DataFrame,
+    n_jobs: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    min_rows: Optional[int] = None,
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    Run `func` over row partitions of `data` in parallel processes.
+
+    Parameters
+    ----------
+    func : Callable[..., pd.DataFrame]
+        Function that takes a DataFrame as its first parameter
+        and returns a DataFrame. This must be picklable (e.g. a
+        module-level function or a method of a picklable object).
+    data : pd.DataFrame
+        The input data.
+    n_jobs : Optional[int], optional
+        The number of partitions/processes to use, by default None.
+        If None or 1 (and no `executor` is supplied), `func` is
+        run in the current process. Negative values are relative
+        to the number of CPUs (-1 uses all CPUs).
+    executor : Optional[Executor], optional
+        An executor to run the partitions, by default None.
+        If not supplied, a ProcessPoolExecutor is created.
+    min_rows : Optional[int], optional
+        The minimum number of rows in each partition,
+        by default None (1000 rows).
+
+    Other Parameters
+    ----------------
+    kwargs :
+        Other arguments passed to `func`.
+
+    Returns
+    -------
+    pd.DataFrame
+        The results of each partition, concatenated in the order
+        of the input rows. The result always has a new RangeIndex
+        (whether or not the data was partitioned).
+
+    Notes
+    -----
+    Partitions keep the index of the input data, so any
+    source index values in the results refer to `data`.
+
+    """
+    n_parts = _get_n_jobs(n_jobs, executor)
+    if min_rows is None:
+        min_rows = _MIN_PARTITION_ROWS
+    n_parts = min(n_parts, len(data) // max(min_rows, 1))
+    if n_parts <= 1:
+        return _concat_results([func(data, **kwargs)])
+
+    bounds = np.linspace(0, len(data), n_parts + 1, dtype=int)
+    partitions = [data.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+    logger.info("Running %s in %d partitions", func, n_parts)
+    results = _map_executor(partial(func, **kwargs), partitions, executor, n_parts)
+    if results is None:
+        return _concat_results([func(data, **kwargs)])
+    return _concat_results(results)
+
+
+@export
+def map_parallel(
+    func: Callable[..., Any],
+    items: Sequence[Any],
+    n_jobs: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    **kwargs,
+) -> List[Any]:
+    """
+    Run `func` on each of `items` in parallel processes.
+
+    Parameters
+    ----------
+    func : Callable[..., Any]
+        Function that takes an item as its first parameter.
+        This must be picklable (e.g. a module-level function).
+    items : Sequence[Any]
+        The items (e.g. batches of data) to process.
+    n_jobs : Optional[int], optional
+        The number of processes to use, by default None.
+        If None or 1 (and no `executor` is supplied), `func` is
+        run in the current process. Negative values are relative
+        to the number of CPUs (-1 uses all CPUs).
+    executor : Optional[Executor], optional
+        An executor to run the items, by default None.
+        If not supplied, a ProcessPoolExecutor is created.
+
+    Other Parameters
+    ----------------
+    kwargs :
+        Other arguments passed to `func`.
+
+    Returns
+    -------
+    List[Any]
+        The result of `func` for each item, in the order of `items`.
+
+    """
+    item_func = partial(func, **kwargs)
+    n_workers = min(_get_n_jobs(n_jobs, executor), len(items))
+    if n_workers > 1:
+        logger.info("Running %s on %d items", func, len(items))
+        results = _map_executor(item_func, items, executor, n_workers)
+        if results is not None:
+            return results
+    return [item_func(item) for item in items]
+
+
+def _map_executor(
+    func: Callable[..., Any],
+    items: Sequence[Any],
+    executor: Optional[Executor],
+    n_workers: int,
+) -> Optional[List[Any]]:
+    """Map `func` over `items` in an executor, returning None if this fails."""
+    if executor is None or isinstance(executor, ProcessPoolExecutor):
+        try:
+            pickle.dumps(func)
+        except Exception as err:  # pylint: disable=broad-except
+            # e.g. local functions and lambdas (AttributeError or
+            # PicklingError) or objects holding locks (TypeError)
+            logger.warning(
+                "Cannot run %s in parallel (%s) - running serially", func, err
+            )
+            return None
+    try:
+        if executor is not None:
+            return list(executor.map(func, items))
+        with ProcessPoolExecutor(max_workers=n_workers) as proc_executor:
+            return list(proc_executor.map(func, items))
+    except (BrokenProcessPool, pickle.PicklingError) as err:
+        logger.warning("Parallel execution failed (%s) - running serially", err)
+        return None
+
+
+def _get_n_jobs(n_jobs: Optional[int], executor: Optional[Executor]) -> int:
+    """Return the number of partitions to use."""
+    cpu_count = os.cpu_count() or 1
+    if n_jobs is None:
+        return cpu_count if executor is not None else 1
+    if n_jobs < 0:
+        return max(1, cpu_count + 1 + n_jobs)
+    return max(1, n_jobs)
+
+
+def _concat_results(results: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate partition results, ignoring empty results."""
+    non_empty = [result for result in results if not result.empty]
+    if not non_empty:
+        return results[0].reset_index(drop=True)
+    if len(non_empty) == 1:
+        return non_empty[0].reset_index(drop=True)
+    return pd.concat(non_empty, ignore_index=True)
@@ -15,6 +15,7 @@ from functools import lru_cache
 from json import JSONDecodeError
 from typing import Any, Dict
 
+import httpx
 import pandas as pd
 
 from ..._version import VERSION
@@ -90,8 +91,8 @@ class HttpContextProvider(ContextProvider, HttpProvider):
                 result["SafeObservable"], result["ObservableType"], query_type
             )
             if verb == "GET":
-                response = self._httpx_client.get(
-                    **req_params, timeout=get_http_timeout(**kwargs)
+                response = self._send_request(
+                    verb, **req_params, timeout=get_http_timeout(**kwargs)
                 )
             else:
                 raise NotImplementedError(f"Unsupported verb {verb}")
@@ -119,9 +120,11 @@ class HttpContextProvider(ContextProvider, HttpProvider):
             JSONDecodeError,
             NotImplementedError,
             ConnectionError,
+            httpx.HTTPError,
         ) as err:
             self._err_to_results(result, err)
             if not isinstance(err, LookupError):
+                result["Status"] = LookupStatus.QUERY_FAILED.value
                 url = req_params.get("url", None) if req_params else None
                 result["Reference"] = url
         return pd.DataFrame([result])
@@ -40,6 +40,7 @@ from IPython.display import HTML, display
 
 from .._version import VERSION
 from ..common.exceptions import MsticpyUserConfigError
+from ..common.http_client import get_http_client
 from ..common.pkg_config import current_config_path, get_http_timeout
 from ..common.provider_settings import ProviderSettings, get_provider_settings
 from ..common.utility import SingletonArgsClass, export, is_ipython, mp_ua_header
@@ -331,7 +332,7 @@ Alternatively, you can pass this to the IPStackLookup class when creating it:
         submit_url = self._IPSTACK_API.format(
             iplist=",".join(ip_list), access_key=self._api_key
         )
-        response = httpx.get(
+        response = get_http_client().get(
             submit_url, timeout=get_http_timeout(), headers=mp_ua_header()
         )
 
@@ -355,23 +356,25 @@ Alternatively, you can pass this to the IPStackLookup class when creating it:
     def _lookup_ip_list(self, ip_list: List[str]):
         """Lookup IP Addresses one-by-one."""
         ip_loc_results = []
-        with httpx.Client(timeout=get_http_timeout(), headers=mp_ua_header()) as client:
-            for ip_addr in ip_list:
-                submit_url = self._IPSTACK_API.format(
-                    iplist=ip_addr, access_key=self._api_key
-                )
-                response = client.get(submit_url)
-                if response.status_code == 200:
+        client = get_http_client()
+        for ip_addr in ip_list:
+            submit_url = self._IPSTACK_API.format(
+                iplist=ip_addr, access_key=self._api_key
+            )
+            response = client.get(
+                submit_url, timeout=get_http_timeout(), headers=mp_ua_header()
+            )
+            if response.status_code == 200:
+                ip_loc_results.append((response.json(), response.status_code))
+            elif response:
+                try:
                     ip_loc_results.append((response.json(), response.status_code))
-                elif response:
-                    try:
-                        ip_loc_results.append((response.json(), response.status_code))
-                        continue
-                    except JSONDecodeError:
-                        ip_loc_results.append((None, response.status_code))
-                else:
-                    print("Unknown response from IPStack request.")
-                    ip_loc_results.append((None, -1))
+                    continue
+                except JSONDecodeError:
+                    ip_loc_results.append((None, response.status_code))
+            else:
+                print("Unknown response from IPStack request.")
+                ip_loc_results.append((None, -1))
         return ip_loc_results
 
 
@@ -12,9 +12,11 @@ processing performance may be limited to a specific number of
 requests per minute for the account type that you have.
 
 """
+import random
+import time
 import traceback
 from abc import abstractmethod
-from typing import Any, Dict, List, Tuple, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import attr
 import httpx
@@ -23,10 +25,12 @@ from attr import Factory
 
 from .._version import VERSION
 from ..common.exceptions import MsticpyConfigError
+from ..common.http_client import get_http_client
 from ..common.pkg_config import get_http_timeout
 from ..common.utility import mp_ua_header
 from .lookup_result import LookupStatus
 from .provider_base import Provider
+from .rate_limiter import get_rate_limiter, parse_retry_after
 
 __version__ = VERSION
 __author__ = "Ian Hellen"
@@ -48,6 +52,28 @@ class APILookupParams:
     sub_type: str = ""
 
 
+@attr.s(auto_attribs=True)
+class BulkLookupParams(APILookupParams):
+    """
+    HTTP Bulk Lookup Params definition.
+
+    Notes
+    -----
+    The observables in a batch are joined with `separator` and
+    substituted for "{observable}" in the query. If `json_key` is
+    set, the list of observables is also sent as the `json_key`
+    value of a JSON request body.
+    `result_key` is the field in each response record that contains
+    the observable.
+
+    """
+
+    batch_size: int = 100
+    separator: str = ","
+    json_key: str = ""
+    result_key: str = ""
+
+
 class HttpProvider(Provider):
     """
     HTTP Generic lookup provider base class.
@@ -81,6 +107,22 @@ class HttpProvider(Provider):
             ...
 
 
+    Define the maximum number of concurrent requests to the service
+    (can be overridden with the `max_concurrency` __init__ parameter)
+
+    .. code:: python
+
+        _MAX_CONCURRENCY = 4
+
+    Define request quotas for the service, if any.
+    (can be overridden with the `requests_per_minute` and
+    `requests_per_day` __init__ parameters)
+
+    .. code:: python
+
+        _REQUESTS_PER_MINUTE = 4
+        _REQUESTS_PER_DAY = 500
+
     Define list of required __init__ params
 
     .. code:: python
@@ -124,10 +166,36 @@ class HttpProvider(Provider):
     # List of required __init__ params
     _REQUIRED_PARAMS: List[str] = []
 
+    # Maximum number of concurrent requests to the service
+    _MAX_CONCURRENCY = 4
+
+    # Request quotas for the service (None == no limit).
+    # Quotas depend on the user's subscription, so these are not set by
+    # default - users set them with the requests_per_minute and
+    # requests_per_day provider arguments.
+    _REQUESTS_PER_MINUTE: Optional[int] = None
+    _REQUESTS_PER_DAY: Optional[int] = None
+
+    # Retry settings for throttled requests and transient failures
+    _MAX_RETRIES = 3
+    _BACKOFF_BASE = 1.0
+    _MAX_BACKOFF = 60.0
+    _RETRY_STATUS = {429, 500, 502, 503, 504}
+
     def __init__(self, **kwargs):
         """Initialize the class."""
         super().__init__(**kwargs)
-        self._httpx_client = httpx.Client(timeout=get_http_timeout(**kwargs))
+        self._httpx_client = get_http_client()
+        self._timeout = get_http_timeout(**kwargs)
+        self._rate_limiter = get_rate_limiter(
+            self.__class__.__name__,
+            requests_per_minute=kwargs.get(
+                "requests_per_minute", self._REQUESTS_PER_MINUTE
+            ),
+            requests_per_day=kwargs.get("requests_per_day", self._REQUESTS_PER_DAY),
+        )
+        self.max_retries = int(kwargs.get("max_retries", self._MAX_RETRIES))
+        self.max_rate_wait: Optional[float] = kwargs.get("max_rate_wait")
         self._request_params = {}
         if "ApiID" in kwargs:
             api_id = kwargs.pop("ApiID")
@@ -226,12 +294,31 @@ class HttpProvider(Provider):
             HTTP method, dictionary of parameter keys/values
 
         """
-        req_params = {"observable": value}
-        req_params.update(self._request_params)
         value_key = f"{value_type}-{query_type}" if query_type else value_type
         src = self.item_query_defs.get(value_key, None)
         if not src:
             raise LookupError(f"Provider does not support this type {value_key}.")
+        return src.verb, self._build_request_params(src, value)
+
+    def _build_request_params(self, src: APILookupParams, value: str) -> Dict[str, Any]:
+        """
+        Return httpx request parameters for a query definition.
+
+        Parameters
+        ----------
+        src : APILookupParams
+            The query definition
+        value : str
+            The value substituted for "{observable}" in the query.
+
+        Returns
+        -------
+        Dict[str, Any]
+            Dictionary of parameter keys/values
+
+        """
+        req_params = {"observable": value}
+        req_params.update(self._request_params)
 
         # create a parameter dictionary to pass to requests
         # substitute any parameter value from our req_params dict
@@ -266,7 +353,94 @@ class HttpProvider(Provider):
                 req_dict["auth"] = auth_strs
             else:
                 raise NotImplementedError(f"Unknown auth type {src.auth_type}")
-        return src.verb, req_dict
+        return req_dict
+
+    def _send_request(self, verb: str, **kwargs) -> httpx.Response:
+        """
+        Send an HTTP request, applying rate limits and retries.
+
+        Parameters
+        ----------
+        verb : str
+            The HTTP method (e.g. "GET")
+        kwargs :
+            Request parameters passed to httpx (e.g. "url", "headers",
+            "params", "timeout").
+
+        Returns
+        -------
+        httpx.Response
+            The response. If the request could not be sent within
+            `max_rate_wait` seconds, a 429 response is returned
+            without sending the request.
+
+        Raises
+        ------
+        httpx.TransportError
+            If the request failed after all retries.
+
+        Notes
+        -----
+        Requests are throttled to the provider's quota using a token
+        bucket shared by all instances of the provider. Responses
+        with status 429, 500, 502, 503 or 504 and network errors are
+        retried up to `max_retries` times with exponential backoff.
+        If the response has a Retry-After header, all requests to
+        the provider are paused for the time specified. If this is
+        longer than `max_rate_wait` (or 60 seconds if `max_rate_wait`
+        is not set), the response is returned without retrying.
+        Requests are sent using the process-wide shared HTTP client,
+        so connections are re-used across providers and lookups.
+
+        """
+        kwargs.setdefault("timeout", self._timeout)
+        if getattr(self._httpx_client, "is_closed", False):
+            self._httpx_client = get_http_client()
+        attempt = 0
+        while True:
+            if not self._rate_limiter.acquire(max_wait=self.max_rate_wait):
+                return httpx.Response(
+                    status_code=429,
+                    text="Provider request quota exceeded.",
+                    request=httpx.Request(verb, kwargs.get("url", "")),
+                )
+            try:
+                response = getattr(self._httpx_client, verb.lower())(**kwargs)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self._backoff_delay(attempt))
+                attempt += 1
+                continue
+            if response.status_code not in self._RETRY_STATUS:
+                return response
+            if attempt >= self.max_retries:
+                return response
+            delay = parse_retry_after(response.headers.get("Retry-After"))
+            if delay is None:
+                delay = self._backoff_delay(attempt)
+            elif delay > self._max_retry_delay:
+                # don't block requests for long periods (e.g. if a daily
+                # quota is exhausted) - return the response to the caller
+                return response
+            if response.status_code in (429, 503):
+                # pause all requests to this provider
+                self._rate_limiter.pause(delay)
+            else:
+                time.sleep(delay)
+            attempt += 1
+
+    @property
+    def _max_retry_delay(self) -> float:
+        """Return the maximum Retry-After delay to wait before retrying."""
+        if self.max_rate_wait is None:
+            return self._MAX_BACKOFF
+        return self.max_rate_wait
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Return exponential backoff delay with jitter for `attempt`."""
+        delay = min(self._MAX_BACKOFF, self._BACKOFF_BASE * 2**attempt)
+        return delay + random.uniform(0, self._BACKOFF_BASE)  # nosec
 
     @staticmethod
     def _failed_response(response: Dict) -> bool:
@@ -305,4 +479,6 @@ class HttpProvider(Provider):
             return "Authorization failed. Check account and key details."
         if status_code == 403:
             return "Request forbidden. Allowed query rate may have been exceeded."
+        if status_code == 429:
+            return "Too many requests. Allowed query rate has been exceeded."
         return httpx.codes.get_reason_phrase(status_code) or "Unknown HTTP status code."
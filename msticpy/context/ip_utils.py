@@ -27,6 +27,7 @@ from deprecated.sphinx import deprecated
 
 from .._version import VERSION
 from ..common.exceptions import MsticpyConnectionError, MsticpyException
+from ..common.http_client import get_http_client
 from ..common.utility import arg_to_list, export
 from ..datamodel.entities import GeoLocation, IpAddress
 
@@ -65,7 +66,7 @@ def _fetch_asns():
         nonlocal asns_dict  # noqa
         if not asns_dict:
             try:
-                asns_resp = httpx.get(_POTAROO_ASNS_URL)
+                asns_resp = get_http_client().get(_POTAROO_ASNS_URL)
             except httpx.ConnectError as err:
                 raise MsticpyConnectionError(
                     "Unable to get ASN details from potaroo.net"
@@ -612,7 +613,7 @@ def _add_rdap_data(
             for link in rdap_data_content["links"]:
                 if link["rel"] == "up":
                     up_data_link = link["href"]
-                    up_rdap_data = httpx.get(up_data_link)
+                    up_rdap_data = get_http_client().get(up_data_link)
                     up_rdap_data_content = up_rdap_data.json()
                     up_net = _create_net(up_rdap_data_content)
                     ipwhois_result.properties["nets"].append(up_net)
@@ -632,7 +633,7 @@ def _rdap_lookup(url: str, retry_count: int = 5) -> httpx.Response:
     rdap_data = None
     while retry_count > 0 and not rdap_data:
         try:
-            rdap_data = httpx.get(url)
+            rdap_data = get_http_client().get(url)
         except (httpx.WriteError, httpx.ReadError):
             retry_count -= 1
     if not rdap_data:
@@ -27,6 +27,7 @@ from ..common.exceptions import MsticpyConfigError, MsticpyUserConfigError
 from ..common.provider_settings import get_provider_settings, reload_settings
 from ..common.utility import export, is_ipython
 from ..vis.ti_browser import browse_results
+from .lookup_cache import LookupCache
 from .lookup_result import LookupStatus
 
 # used in dynamic instantiation of providers
@@ -74,7 +75,12 @@ class Lookup:
 
     PACKAGE: str = ""
 
-    def __init__(self, providers: Optional[List[str]] = None, **kwargs):
+    def __init__(
+        self,
+        providers: Optional[List[str]] = None,
+        cache: Union[bool, str, LookupCache, None] = None,
+        **kwargs,
+    ):
         """
         Initialize TILookup instance.
 
@@ -90,11 +96,17 @@ class Lookup:
             call `TILookup.list_available_providers()`.
             Note: if primary_provides or secondary_providers is specified
             This will override the providers list.
+        cache : Union[bool, str, LookupCache, None], optional
+            Persistent cache for lookup results, by default None (no
+            persistent cache). Use True to use the default cache file
+            ("~/.msticpy/lookup_cache.db"), a path to use a specific
+            cache file, or a LookupCache instance.
 
         """
         self._providers: Dict[str, Provider] = {}
         self._secondary_providers: Dict[str, Provider] = {}
         self._providers_to_load = providers
+        self.cache: Optional[LookupCache] = _create_cache(cache)
 
         primary_providers = kwargs.pop("primary_providers", None)
         if primary_providers:
@@ -501,6 +513,7 @@ class Lookup:
                     item_type_col=item_type_col,
                     query_type=query_type,
                     prog_counter=prog_counter if progress else None,
+                    lookup_cache=self.cache,
                     **kwargs,
                 )
             )
@@ -510,7 +523,8 @@ class Lookup:
         # collect the return values of the tasks
         results = await asyncio.gather(*result_futures)
         # cancel the progress task if results have completed.
-        prog_task.cancel()
+        if progress:
+            prog_task.cancel()
         return self._combine_results(results, provider_names, **kwargs)
 
     def lookup_items_sync(
@@ -580,6 +594,7 @@ class Lookup:
                     item_col=item_col,
                     item_type_col=item_type_col,
                     query_type=query_type,
+                    lookup_cache=self.cache,
                     **kwargs,
                 )
             )
@@ -771,3 +786,14 @@ class Lookup:
         if not result_list:
             print("No Item matches")
         return pd.concat(result_list, sort=False) if result_list else None
+
+
+def _create_cache(cache: Union[bool, str, LookupCache, None]) -> Optional[LookupCache]:
+    """Return LookupCache instance for the `cache` parameter value."""
+    if isinstance(cache, LookupCache):
+        return cache
+    if cache is True:
+        return LookupCache()
+    if isinstance(cache, str):
+        return LookupCache(path=cache)
+    return None
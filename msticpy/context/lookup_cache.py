@@ -0,0 +1,329 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""
+Persistent cache for Lookup provider results.
+
+Results are stored in a SQLite database keyed by provider, item,
+item type and query type. The cache can be shared by multiple
+Lookup instances, notebook sessions and processes.
+Entries expire after a time-to-live (TTL) that can be set
+per provider. When the total size of cached results exceeds
+the configured maximum, the least recently used entries are
+evicted.
+
+"""
+import logging
+
+# pickle is only used to store and read results that were
+# written by this module to a cache file owned by the user.
+import pickle  # nosec
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Union
+
+import pandas as pd
+
+from .._version import VERSION
+from ..common.utility import export
+from .lookup_result import LookupStatus
+
+__version__ = VERSION
+__author__ = "Ian Hellen"
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_CACHE_PATH = "~/.msticpy/lookup_cache.db"
+_DEFAULT_TTL = 24 * 60 * 60
+_DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS lookup_cache (
+    provider TEXT NOT NULL,
+    item TEXT NOT NULL,
+    item_type TEXT NOT NULL,
+    query_type TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_access REAL NOT NULL,
+    size INTEGER NOT NULL,
+    result BLOB NOT NULL,
+    PRIMARY KEY (provider, item, item_type, query_type)
+)
+"""
+_CREATE_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_last_access ON lookup_cache (last_access)
+"""
+
+
+class CacheStats(NamedTuple):
+    """Lookup cache statistics."""
+
+    hits: int
+    misses: int
+    entries: int
+    size: int
+
+
+@export
+class LookupCache:
+    """Persistent, TTL-aware cache for provider lookup results."""
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        ttl: int = _DEFAULT_TTL,
+        provider_ttl: Optional[Dict[str, int]] = None,
+        max_size: int = _DEFAULT_MAX_SIZE,
+    ):
+        """
+        Initialize the lookup cache.
+
+        Parameters
+        ----------
+        path : Optional[Union[str, Path]], optional
+            Path to the cache database file, by default
+            "~/.msticpy/lookup_cache.db". Use ":memory:" to create
+            a non-persistent cache.
+        ttl : int, optional
+            Default time-to-live for cached results in seconds,
+            by default 24 hours.
+        provider_ttl : Optional[Dict[str, int]], optional
+            Dictionary of provider name and time-to-live (in seconds)
+            for providers that should not use the default `ttl`.
+        max_size : int, optional
+            Maximum total size of the cached results in bytes,
+            by default 256MB. Least recently used results are
+            evicted when this size is exceeded.
+
+        """
+        self.ttl = ttl
+        self.provider_ttl: Dict[str, int] = provider_ttl or {}
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        if path is None:
+            path = _DEFAULT_CACHE_PATH
+        if str(path) == ":memory:":
+            self.path = str(path)
+        else:
+            db_path = Path(path).expanduser()
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self.path = str(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        with self._lock:
+            self._conn.execute(_CREATE_TABLE)
+            self._conn.execute(_CREATE_INDEX)
+
+    def __repr__(self) -> str:
+        """Return string representation of the cache."""
+        return f"{self.__class__.__name__}(path='{self.path}', ttl={self.ttl})"
+
+    def get_ttl(self, provider: str) -> int:
+        """Return the time-to-live in seconds for `provider`."""
+        return self.provider_ttl.get(provider, self.ttl)
+
+    def get(
+        self,
+        provider: str,
+        item: str,
+        item_type: Optional[str] = None,
+        query_type: Optional[str] = None,
+    ) -> Optional[pd.DataFrame]:
+        """
+        Return the cached result for an item, if present and not expired.
+
+        Parameters
+        ----------
+        provider : str
+            Provider name
+        item : str
+            The item (observable) value
+        item_type : Optional[str], optional
+            The item type, by default None
+        query_type : Optional[str], optional
+            The query sub-type, by default None
+
+        Returns
+        -------
+        Optional[pd.DataFrame]
+            The cached result or None if there is no valid entry.
+
+        """
+        key = _cache_key(provider, item, item_type, query_type)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created, result FROM lookup_cache WHERE provider = ? "
+                "AND item = ? AND item_type = ? AND query_type = ?",
+                key,
+            ).fetchone()
+            if row is None or now - row[0] > self.get_ttl(provider):
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE lookup_cache SET last_access = ? WHERE provider = ? "
+                "AND item = ? AND item_type = ? AND query_type = ?",
+                (now, *key),
+            )
+            self.hits += 1
+        try:
+            return pickle.loads(row[1])  # nosec
+        except (pickle.PickleError, EOFError, AttributeError, ImportError) as err:
+            logger.warning("Could not read cached result for %s: %s", key, err)
+            return None
+
+    def put(
+        self,
+        provider: str,
+        item: str,
+        item_type: Optional[str],
+        query_type: Optional[str],
+        result: pd.DataFrame,
+    ) -> bool:
+        """
+        Add a result to the cache.
+
+        Parameters
+        ----------
+        provider : str
+            Provider name
+        item : str
+            The item (observable) value
+        item_type : Optional[str]
+            The item type
+        query_type : Optional[str]
+            The query sub-type
+        result : pd.DataFrame
+            The lookup result.
+
+        Returns
+        -------
+        bool
+            True if the result was cached. Failed lookups are
+            not cached.
+
+        """
+        if not _is_cacheable(result):
+            return False
+        key = _cache_key(provider, item, item_type, query_type)
+        try:
+            blob = pickle.dumps(result)
+        except (pickle.PickleError, TypeError, AttributeError) as err:
+            logger.warning("Could not cache result for %s: %s", key, err)
+            return False
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO lookup_cache (provider, item, item_type, "
+                "query_type, created, last_access, size, result) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (*key, now, now, len(blob), blob),
+            )
+            self._evict()
+        return True
+
+    def purge_expired(self) -> int:
+        """
+        Remove expired entries from the cache.
+
+        Returns
+        -------
+        int
+            The number of entries removed.
+
+        """
+        now = time.time()
+        removed = 0
+        with self._lock:
+            for prov_name, ttl in self.provider_ttl.items():
+                removed += self._conn.execute(
+                    "DELETE FROM lookup_cache WHERE provider = ? AND created < ?",
+                    (prov_name, now - ttl),
+                ).rowcount
+            prov_names = list(self.provider_ttl)
+            removed += self._conn.execute(
+                "DELETE FROM lookup_cache WHERE created < ? AND provider NOT IN "
+                f"({', '.join('?' * len(prov_names))})",
+                (now - self.ttl, *prov_names),
+            ).rowcount
+        return removed
+
+    def clear(self, provider: Optional[str] = None):
+        """
+        Remove cached entries.
+
+        Parameters
+        ----------
+        provider : Optional[str], optional
+            If supplied, only remove entries for this provider,
+            by default all entries are removed.
+
+        """
+        with self._lock:
+            if provider:
+                self._conn.execute(
+                    "DELETE FROM lookup_cache WHERE provider = ?", (provider,)
+                )
+            else:
+                self._conn.execute("DELETE FROM lookup_cache")
+
+    @property
+    def stats(self) -> CacheStats:
+        """Return cache hit/miss counters, entry count and total size."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), TOTAL(size) FROM lookup_cache"
+            ).fetchone()
+        return CacheStats(
+            hits=self.hits, misses=self.misses, entries=entries, size=int(size)
+        )
+
+    def close(self):
+        """Close the cache database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self):
+        """Evict least recently used entries until under `max_size`."""
+        total_size = self._conn.execute(
+            "SELECT TOTAL(size) FROM lookup_cache"
+        ).fetchone()[0]
+        if total_size <= self.max_size:
+            return
+        excess = total_size - self.max_size
+        rows = self._conn.execute(
+            "SELECT rowid, size FROM lookup_cache ORDER BY last_access"
+        )
+        evict_ids = []
+        for row_id, size in rows:
+            if excess <= 0:
+                break
+            evict_ids.append((row_id,))
+            excess -= size
+        self._conn.executemany("DELETE FROM lookup_cache WHERE rowid = ?", evict_ids)
+        logger.info("Evicted %d entries from lookup cache", len(evict_ids))
+
+
+def _cache_key(
+    provider: str, item: str, item_type: Optional[str], query_type: Optional[str]
+):
+    """Return the key tuple used for a cache entry."""
+    return (provider, str(item), str(item_type or ""), str(query_type or ""))
+
+
+def _is_cacheable(result: pd.DataFrame) -> bool:
+    """Return True if the lookup result did not fail."""
+    if not isinstance(result, pd.DataFrame) or result.empty:
+        return False
+    if "Status" not in result.columns:
+        return True
+    return bool(
+        result["Status"].isin([LookupStatus.OK.value, LookupStatus.NO_DATA.value]).all()
+    )
@@ -18,7 +18,7 @@ import collections
 from abc import ABC, abstractmethod
 from asyncio import get_event_loop
 from functools import lru_cache, partial, singledispatch
-from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple, Union
 
 import pandas as pd
 
@@ -29,6 +29,9 @@ from ..transform.iocextract import IoCType as Type
 from .lookup_result import LookupStatus
 from .preprocess_observable import PreProcessor
 
+if TYPE_CHECKING:
+    from .lookup_cache import LookupCache
+
 __version__ = VERSION
 __author__ = "Ian Hellen"
 
@@ -41,6 +44,9 @@ class Provider(ABC):
 
     _QUERIES: Dict[str, Any] = {}
 
+    # Maximum number of concurrent item lookups run by lookup_items_async
+    _MAX_CONCURRENCY: int = 1
+
     @abstractmethod
     def lookup_item(
         self, item: str, item_type: str = None, query_type: str = None, **kwargs
@@ -145,6 +151,9 @@ class Provider(ABC):
 
         self.require_url_encoding = False
         self._preprocessors = PreProcessor()
+        self.max_concurrency: int = max(
+            1, int(kwargs.get("max_concurrency", self._MAX_CONCURRENCY) or 1)
+        )
 
     @property
     def name(self) -> str:
@@ -185,14 +194,16 @@ class Provider(ABC):
             DataFrame of results.
 
         """
+        lookup_cache = kwargs.pop("lookup_cache", None)
         results = []
         for item, item_type in generate_items(data, item_col, item_type_col):
             if not item:
                 continue
-            item_result = self.lookup_item(
+            item_result = self._lookup_item_cached(
                 item,
                 item_type,
                 query_type,
+                lookup_cache=lookup_cache,
                 **kwargs,
             )
             results.append(item_result)
@@ -227,33 +238,72 @@ class Provider(ABC):
             If not specified the default record type for the item
             will be returned.
 
+        Other Parameters
+        ----------------
+        max_concurrency : int, optional
+            Maximum number of item lookups to run concurrently,
+            by default the provider `max_concurrency` setting.
+
         Returns
         -------
         pd.DataFrame
             DataFrame of results.
 
+        Notes
+        -----
+        Items are looked up in the default thread pool executor.
+        The number of lookups in flight for this provider at any
+        one time is bounded by `max_concurrency`.
+
         """
         event_loop = get_event_loop()
-        results = []
         prog_counter = kwargs.pop("prog_counter", None)
-        for item, item_type in generate_items(data, item_col, item_type_col):
-            item_type = kwargs.pop("item_type", item_type)
-            if not item:
-                continue
+        lookup_cache = kwargs.pop("lookup_cache", None)
+        type_override = kwargs.pop("item_type", None)
+        max_concurrency = kwargs.pop("max_concurrency", None) or self.max_concurrency
+        semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+
+        async def _lookup_item_bounded(item, item_type) -> pd.DataFrame:
             get_item = partial(
-                self.lookup_item,
+                self._lookup_item_cached,
                 item=item,
                 item_type=item_type,
                 query_type=query_type,
+                lookup_cache=lookup_cache,
                 **kwargs,
             )
-            item_result: pd.DataFrame = await event_loop.run_in_executor(None, get_item)
+            async with semaphore:
+                item_result = await event_loop.run_in_executor(None, get_item)
             if prog_counter:
                 await prog_counter.decrement()
-            results.append(item_result)
-
+            return item_result
+
+        lookup_tasks = [
+            _lookup_item_bounded(item, type_override or item_type)
+            for item, item_type in generate_items(data, item_col, item_type_col)
+            if item
+        ]
+        # gather returns results in the order of the input items
+        results = await asyncio.gather(*lookup_tasks)
         return pd.concat(results)
 
+    def _lookup_item_cached(
+        self,
+        item: str,
+        item_type: str = None,
+        query_type: str = None,
+        lookup_cache: Optional["LookupCache"] = None,
+        **kwargs,
+    ) -> pd.DataFrame:
+        """Return `lookup_item` result, using `lookup_cache` if supplied."""
+        if lookup_cache is None:
+            return self.lookup_item(item, item_type, query_type, **kwargs)
+        item_result = lookup_cache.get(self.name, item, item_type, query_type)
+        if item_result is None:
+            item_result = self.lookup_item(item, item_type, query_type, **kwargs)
+            lookup_cache.put(self.name, item, item_type, query_type, item_result)
+        return item_result
+
     @property
     def item_query_defs(self) -> Dict[str, Any]:
         """
@@ -0,0 +1,272 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""
+Request rate limiting for HTTP providers.
+
+Providers can declare request quotas (requests per minute and
+per day). A token bucket is created for each quota and shared
+by all instances of the provider in the process, so that
+concurrent lookups stay within the provider quota.
+
+The limiter can also be paused (for example, when a service
+returns HTTP 429 with a Retry-After header) so that all threads
+using the provider back off together.
+
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+
+from .._version import VERSION
+
+__version__ = VERSION
+__author__ = "Ian Hellen"
+
+
+# Period (seconds) of the per-minute and per-day limits
+_LIMIT_PERIODS = (60.0, 24 * 60 * 60.0)
+
+
+class TokenBucket:
+    """Token bucket allowing `capacity` requests per `period` seconds."""
+
+    def __init__(self, capacity: int, period: float):
+        """
+        Initialize the token bucket.
+
+        Parameters
+        ----------
+        capacity : int
+            Maximum number of requests (tokens) in the period.
+        period : float
+            The period in seconds over which tokens are replenished.
+
+        """
+        self.capacity = float(capacity)
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self._last = time.monotonic()
+
+    def reserve(self, now: float) -> float:
+        """
+        Take a token from the bucket, returning time to wait for it.
+
+        Parameters
+        ----------
+        now : float
+            The current time (from `time.monotonic`)
+
+        Returns
+        -------
+        float
+            The time in seconds until the reserved token is available.
+
+        Notes
+        -----
+        The token count may become negative - this allows waiting callers
+        to be scheduled in the order that they made the reservation.
+
+        """
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+    def cancel(self):
+        """Return a reserved token to the bucket."""
+        self.tokens += 1
+
+
+class RateLimiter:
+    """Thread-safe rate limiter for a provider."""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        requests_per_day: Optional[int] = None,
+    ):
+        """
+        Initialize the rate limiter.
+
+        Parameters
+        ----------
+        requests_per_minute : Optional[int], optional
+            Maximum requests per minute, by default None (no limit)
+        requests_per_day : Optional[int], optional
+            Maximum requests per day, by default None (no limit)
+
+        """
+        self.limits: Tuple[Optional[int], Optional[int]] = (
+            requests_per_minute,
+            requests_per_day,
+        )
+        self._bucket_map: Dict[float, TokenBucket] = {
+            period: TokenBucket(limit, period)
+            for limit, period in zip(self.limits, _LIMIT_PERIODS)
+            if limit
+        }
+        self._buckets: List[TokenBucket] = list(self._bucket_map.values())
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, max_wait: Optional[float] = None) -> bool:
+        """
+        Wait until a request is allowed.
+
+        Parameters
+        ----------
+        max_wait : Optional[float], optional
+            The maximum time in seconds to wait, by default None
+            (wait until the request is allowed).
+
+        Returns
+        -------
+        bool
+            True if the request can be sent, False if the wait
+            would have been longer than `max_wait`.
+
+        """
+        with self._lock:
+            now = time.monotonic()
+            waits = [bucket.reserve(now) for bucket in self._buckets]
+            wait = max([self._paused_until - now, *waits, 0.0])
+            if max_wait is not None and wait > max_wait:
+                for bucket in self._buckets:
+                    bucket.cancel()
+                return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def restrict(
+        self,
+        requests_per_minute: Optional[int] = None,
+        requests_per_day: Optional[int] = None,
+    ):
+        """
+        Apply the stricter of the current limits and the limits given.
+
+        Parameters
+        ----------
+        requests_per_minute : Optional[int], optional
+            Maximum requests per minute, by default None (no limit)
+        requests_per_day : Optional[int], optional
+            Maximum requests per day, by default None (no limit)
+
+        Notes
+        -----
+        Tokens already used are carried over to the new limits,
+        so restricting a limiter does not allow a burst of requests.
+
+        """
+        with self._lock:
+            new_limits = (
+                _stricter_limit(self.limits[0], requests_per_minute),
+                _stricter_limit(self.limits[1], requests_per_day),
+            )
+            for limit, cur_limit, period in zip(
+                new_limits, self.limits, _LIMIT_PERIODS
+            ):
+                if limit == cur_limit or limit is None:
+                    continue
+                bucket = TokenBucket(limit, period)
+                if period in self._bucket_map:
+                    bucket.tokens = min(bucket.tokens, self._bucket_map[period].tokens)
+                self._bucket_map[period] = bucket
+            self.limits = new_limits
+            self._buckets = list(self._bucket_map.values())
+
+    def pause(self, delay: float):
+        """
+        Pause all requests using this limiter for `delay` seconds.
+
+        Parameters
+        ----------
+        delay : float
+            Time in seconds to pause requests.
+
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+
+_RATE_LIMITERS: Dict[str, RateLimiter] = {}
+_RATE_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(
+    name: str,
+    requests_per_minute: Optional[int] = None,
+    requests_per_day: Optional[int] = None,
+) -> RateLimiter:
+    """
+    Return the shared rate limiter for provider `name`.
+
+    Parameters
+    ----------
+    name : str
+        The provider name.
+    requests_per_minute : Optional[int], optional
+        Maximum requests per minute, by default None (no limit)
+    requests_per_day : Optional[int], optional
+        Maximum requests per day, by default None (no limit)
+
+    Returns
+    -------
+    RateLimiter
+        The rate limiter for the provider. If there is already a
+        limiter for the provider with different limits, the stricter
+        of the existing and requested limits is applied to it.
+
+    """
+    with _RATE_LIMITERS_LOCK:
+        limiter = _RATE_LIMITERS.get(name)
+        if limiter is None:
+            limiter = RateLimiter(requests_per_minute, requests_per_day)
+            _RATE_LIMITERS[name] = limiter
+        elif limiter.limits != (requests_per_minute, requests_per_day):
+            limiter.restrict(requests_per_minute, requests_per_day)
+        return limiter
+
+
+def _stricter_limit(limit: Optional[int], new_limit: Optional[int]) -> Optional[int]:
+    """Return the stricter of two limits (None is no limit)."""
+    if limit and new_limit:
+        return min(limit, new_limit)
+    return limit or new_limit
+
+
+def parse_retry_after(retry_after: Optional[str]) -> Optional[float]:
+    """
+    Return the delay in seconds from a Retry-After header value.
+
+    Parameters
+    ----------
+    retry_after : Optional[str]
+        Retry-After header value - either a number of seconds
+        or an HTTP date.
+
+    Returns
+    -------
+    Optional[float]
+        Delay in seconds or None if the value could not be parsed.
+
+    """
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_time = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if retry_time.tzinfo is None:
+        retry_time = retry_time.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_time - datetime.now(timezone.utc)).total_seconds())
@@ -15,7 +15,7 @@ requests per minute for the account type that you have.
 from typing import Any, Dict, Tuple
 
 from ..._version import VERSION
-from ..http_provider import APILookupParams
+from ..http_provider import APILookupParams, BulkLookupParams
 from .ti_http_provider import HttpTIProvider
 from .ti_provider_base import ResultSeverity
 
@@ -46,6 +46,20 @@ class GreyNoise(HttpTIProvider):
         ),
     }
 
+    # Only the Enterprise quick lookup (query_type="quick") has a bulk
+    # endpoint - default (Community API) lookups are sent one IP at a time.
+    _BULK_QUERIES = {
+        # Enterprise API Multi Quick Lookup
+        "ipv4-quick": BulkLookupParams(
+            path="/v2/noise/multi/quick",
+            verb="POST",
+            headers={"key": "{AuthKey}"},
+            batch_size=1000,
+            json_key="ips",
+            result_key="ip",
+        ),
+    }
+
     def parse_results(self, response: Dict) -> Tuple[bool, ResultSeverity, Any]:
         """
         Return the details of the response.
@@ -99,6 +113,6 @@ class GreyNoise(HttpTIProvider):
             result_dict = response["RawResult"]
 
         severity = ResultSeverity.information
-        if response["RawResult"]["classification"] == "malicious":
+        if response["RawResult"].get("classification") == "malicious":
             severity = ResultSeverity.high
         return result, severity, result_dict
@@ -229,8 +229,8 @@ class OPR(HttpTIProvider):
 
         try:
             _, req_params = self._substitute_parms("dummy", "dns", None)
-            response = self._httpx_client.get(
-                url=req_url, headers=req_params["headers"]
+            response = self._send_request(
+                "GET", url=req_url, headers=req_params["headers"]
             )
             if response.status_code == 200:
                 result = {
@@ -14,14 +14,15 @@ requests per minute for the account type that you have.
 """
 from functools import lru_cache
 from json import JSONDecodeError
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List
 
+import httpx
 import pandas as pd
 
 from ..._version import VERSION
 from ...common.pkg_config import get_http_timeout
 from ...common.utility import export
-from ..http_provider import HttpProvider
+from ..http_provider import BulkLookupParams, HttpProvider
 from ..lookup_result import LookupStatus
 from .result_severity import ResultSeverity
 from .ti_provider_base import TIProvider
@@ -84,8 +85,8 @@ class HttpTIProvider(TIProvider, HttpProvider):
                 result["SafeIoc"], result["IocType"], query_type
             )
             if verb == "GET":
-                response = self._httpx_client.get(
-                    **req_params, timeout=get_http_timeout(**kwargs)
+                response = self._send_request(
+                    verb, **req_params, timeout=get_http_timeout(**kwargs)
                 )
             else:
                 raise NotImplementedError(f"Unsupported verb {verb}")
@@ -119,9 +120,145 @@ class HttpTIProvider(TIProvider, HttpProvider):
             JSONDecodeError,
             NotImplementedError,
             ConnectionError,
+            httpx.HTTPError,
         ) as err:
             self._err_to_results(result, err)
             if not isinstance(err, LookupError):
+                result["Status"] = LookupStatus.QUERY_FAILED.value
                 url = req_params.get("url", None) if req_params else None
                 result["Reference"] = url
         return pd.DataFrame([result])
+
+    def lookup_iocs_batch(
+        self,
+        iocs: Iterable[str],
+        ioc_type: str,
+        query_type: str = None,
+        **kwargs,
+    ) -> pd.DataFrame:
+        """
+        Lookup a batch of IoC observables of the same type.
+
+        Parameters
+        ----------
+        iocs : Iterable[str]
+            IoC Observable values
+        ioc_type : str
+            IoC Type of the observables
+        query_type : str, optional
+            Specify the data subtype to be queried, by default None.
+            If not specified the default record type for the IoC type
+            will be returned.
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame of results with one row for each IoC.
+
+        Raises
+        ------
+        LookupError
+            If the provider does not support batch lookups for
+            this IoC type.
+
+        Notes
+        -----
+        The IoCs are sent in requests of up to `batch_size` observables
+        as defined in the provider's `_BULK_QUERIES`. The response
+        records are mapped back to each IoC using the `result_key`
+        field and are parsed individually with `parse_results`.
+
+        """
+        query_key = f"{ioc_type}-{query_type}" if query_type else ioc_type
+        src = self._BULK_QUERIES.get(query_key)
+        if not isinstance(src, BulkLookupParams):
+            raise LookupError(f"Provider does not support batch lookups {query_key}.")
+
+        results: Dict[str, Dict[str, Any]] = {}
+        safe_iocs: Dict[str, str] = {}
+        for ioc in dict.fromkeys(iocs):
+            result = self._check_ioc_type(ioc, ioc_type, query_subtype=query_type)
+            result["Provider"] = kwargs.get("provider_name", self.__class__.__name__)
+            results[ioc] = result
+            if result["Status"] == LookupStatus.OK.value:
+                safe_iocs[result["SafeIoc"]] = ioc
+
+        safe_list = list(safe_iocs)
+        for step in range(0, len(safe_list), src.batch_size):
+            batch = safe_list[step : step + src.batch_size]  # noqa: E203
+            batch_results = [results[safe_iocs[safe_ioc]] for safe_ioc in batch]
+            self._lookup_batch_request(src, batch, batch_results, **kwargs)
+        return pd.DataFrame(list(results.values()))
+
+    def _lookup_batch_request(
+        self,
+        src: BulkLookupParams,
+        batch: List[str],
+        batch_results: List[Dict[str, Any]],
+        **kwargs,
+    ):
+        """Send a batch request and update `batch_results` from the response."""
+        req_params: Dict[str, Any] = {}
+        try:
+            req_params = self._build_request_params(src, src.separator.join(batch))
+            if src.json_key:
+                req_params["json"] = {src.json_key: batch}
+            response = self._send_request(
+                src.verb, **req_params, timeout=get_http_timeout(**kwargs)
+            )
+            if response.status_code != 200:
+                for result in batch_results:
+                    result["Status"] = response.status_code
+                    result["Reference"] = req_params["url"]
+                    result["RawResult"] = str(response)
+                    result["Result"] = False
+                    result["Details"] = self._response_message(response.status_code)
+                return
+            raw_results = self._split_batch_response(response.json(), src)
+        except (
+            LookupError,
+            JSONDecodeError,
+            NotImplementedError,
+            ConnectionError,
+            httpx.HTTPError,
+        ) as err:
+            for result in batch_results:
+                self._err_to_results(result, err)
+                if not isinstance(err, LookupError):
+                    result["Status"] = LookupStatus.QUERY_FAILED.value
+                result["Reference"] = req_params.get("url") if req_params else None
+            return
+
+        for safe_ioc, result in zip(batch, batch_results):
+            result["Reference"] = req_params["url"]
+            raw_result = raw_results.get(self._batch_key(safe_ioc))
+            if raw_result is None:
+                raw_result = raw_results.get(self._batch_key(result["Ioc"]))
+            if raw_result is None:
+                result["Result"] = False
+                result["Details"] = "Not found."
+                result["Status"] = LookupStatus.NO_DATA.value
+                continue
+            result["RawResult"] = raw_result
+            result["Status"] = LookupStatus.OK.value
+            result["Result"], severity, result["Details"] = self.parse_results(result)
+            result["Severity"] = ResultSeverity.parse(severity).name
+
+    @classmethod
+    def _split_batch_response(
+        cls, response: Any, src: BulkLookupParams
+    ) -> Dict[str, Any]:
+        """Return response records keyed by normalized observable."""
+        if isinstance(response, dict):
+            if src.result_key and src.result_key in response:
+                # single record response
+                response = [response]
+            else:
+                return {cls._batch_key(key): val for key, val in response.items()}
+        if not isinstance(response, list):
+            return {}
+        return {
+            cls._batch_key(record[src.result_key]): record
+            for record in response
+            if isinstance(record, dict) and src.result_key in record
+        }
@@ -13,16 +13,34 @@ requests per minute for the account type that you have.
 
 """
 
+import asyncio
 from abc import abstractmethod
-from typing import Any, Dict, Iterable, Tuple, Union
+from asyncio import get_event_loop
+from collections import defaultdict
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    DefaultDict,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import pandas as pd
 
 from ..._version import VERSION
 from ...common.utility import export
-from ..provider_base import PivotProvider, Provider
+from ..lookup_result import LookupStatus
+from ..provider_base import PivotProvider, Provider, generate_items
 from .result_severity import ResultSeverity
 
+if TYPE_CHECKING:
+    from ..lookup_cache import LookupCache
+
 __version__ = VERSION
 __author__ = "Ian Hellen"
 
@@ -33,6 +51,10 @@ class TIProvider(Provider):
 
     _QUERIES: Dict[str, Any] = {}
 
+    # Query definitions for IoC types that can be looked up in batches
+    # (see lookup_iocs_batch)
+    _BULK_QUERIES: Dict[str, Any] = {}
+
     def _check_item_type(
         self, item: str, item_type: str = None, query_subtype: str = None
     ) -> Dict:
@@ -289,6 +311,341 @@ class TIProvider(Provider):
             **kwargs,
         )
 
+    def lookup_iocs_batch(
+        self,
+        iocs: Iterable[str],
+        ioc_type: str,
+        query_type: str = None,
+        **kwargs,
+    ) -> pd.DataFrame:
+        """
+        Lookup a batch of IoC observables of the same type.
+
+        Parameters
+        ----------
+        iocs : Iterable[str]
+            IoC Observable values
+        ioc_type : str
+            IoC Type of the observables
+        query_type : str, optional
+            Specify the data subtype to be queried, by default None.
+            If not specified the default record type for the IoC type
+            will be returned.
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame of results with at least one row for each IoC.
+
+        Raises
+        ------
+        NotImplementedError
+            If the provider does not support batch lookups.
+
+        Notes
+        -----
+        Providers that support batch requests define query definitions
+        for the supported IoC types in `_BULK_QUERIES` and implement this
+        method. `lookup_iocs` and `lookup_items` use batch requests
+        automatically for these IoC types.
+
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} does not support batch lookups."
+        )
+
+    def supports_batch(self, ioc_type: str, query_type: str = None) -> bool:
+        """Return True if batch lookups are supported for `ioc_type`."""
+        if not self._BULK_QUERIES or not ioc_type:
+            return False
+        query_key = f"{ioc_type}-{query_type}" if query_type else ioc_type
+        return query_key in self._BULK_QUERIES
+
+    def lookup_items(
+        self,
+        data: Union[pd.DataFrame, Dict[str, str], Iterable[str]],
+        item_col: str = None,
+        item_type_col: str = None,
+        query_type: str = None,
+        **kwargs,
+    ) -> pd.DataFrame:
+        """
+        Lookup collection of items.
+
+        Parameters
+        ----------
+        data : Union[pd.DataFrame, Dict[str, str], Iterable[str]]
+            Data input in one of three formats:
+            1. Pandas dataframe (you must supply the column name in
+            `item_col` parameter)
+            2. Dict of items
+            3. Iterable of items
+        item_col : str, optional
+            DataFrame column to use for items, by default None
+        item_type_col : str, optional
+            DataFrame column to use for types, by default None
+        query_type : str, optional
+            Specify the data subtype to be queried, by default None.
+            If not specified the default record type for the type
+            will be returned.
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame of results.
+
+        Notes
+        -----
+        IoC types that the provider can look up in batches
+        (see `lookup_iocs_batch`) are sent as batch requests.
+
+        """
+        if not self._BULK_QUERIES:
+            return super().lookup_items(
+                data, item_col, item_type_col, query_type, **kwargs
+            )
+        lookup_cache = kwargs.pop("lookup_cache", None)
+        batches, single_items = self._partition_items(
+            data, item_col, item_type_col, query_type
+        )
+        single_results = [
+            self._lookup_item_cached(
+                item, item_type, query_type, lookup_cache=lookup_cache, **kwargs
+            )
+            for _, item, item_type in single_items
+        ]
+        batch_results = [
+            self._lookup_batch_cached(
+                batch, ioc_type, query_type, lookup_cache=lookup_cache, **kwargs
+            )
+            for ioc_type, batch in batches
+        ]
+        return _combine_results(single_items, single_results, batch_results)
+
+    async def lookup_items_async(
+        self,
+        data: Union[pd.DataFrame, Dict[str, str], Iterable[str]],
+        item_col: str = None,
+        item_type_col: str = None,
+        query_type: str = None,
+        **kwargs,
+    ) -> pd.DataFrame:
+        """
+        Lookup collection of items.
+
+        Parameters
+        ----------
+        data : Union[pd.DataFrame, Dict[str, str], Iterable[str]]
+            Data input in one of three formats:
+            1. Pandas dataframe (you must supply the column name in
+            `item_col` parameter)
+            2. Dict of items, Type
+            3. Iterable of items - Types will be inferred
+        item_col : str, optional
+            DataFrame column to use for items, by default None
+        item_type_col : str, optional
+            DataFrame column to use for Types, by default None
+        query_type : str, optional
+            Specify the data subtype to be queried, by default None.
+            If not specified the default record type for the item
+            will be returned.
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame of results.
+
+        Notes
+        -----
+        IoC types that the provider can look up in batches
+        (see `lookup_iocs_batch`) are sent as batch requests.
+        Batches and single item lookups are run concurrently,
+        bounded by `max_concurrency`.
+
+        """
+        if not self._BULK_QUERIES:
+            return await super().lookup_items_async(
+                data, item_col, item_type_col, query_type, **kwargs
+            )
+        prog_counter = kwargs.pop("prog_counter", None)
+        lookup_cache = kwargs.pop("lookup_cache", None)
+        batches, single_items = self._partition_items(
+            data, item_col, item_type_col, query_type, kwargs.pop("item_type", None)
+        )
+        semaphore = asyncio.Semaphore(
+            max(1, int(kwargs.pop("max_concurrency", None) or self.max_concurrency))
+        )
+
+        async def _run_bounded(lookup_func, item_count: int):
+            async with semaphore:
+                result = await get_event_loop().run_in_executor(None, lookup_func)
+            if prog_counter:
+                await prog_counter.decrement(item_count)
+            return result
+
+        tasks = [
+            _run_bounded(
+                partial(
+                    self._lookup_item_cached,
+                    item=item,
+                    item_type=item_type,
+                    query_type=query_type,
+                    lookup_cache=lookup_cache,
+                    **kwargs,
+                ),
+                1,
+            )
+            for _, item, item_type in single_items
+        ]
+        tasks.extend(
+            _run_bounded(
+                partial(
+                    self._lookup_batch_cached,
+                    batch,
+                    ioc_type,
+                    query_type,
+                    lookup_cache=lookup_cache,
+                    **kwargs,
+                ),
+                len(batch),
+            )
+            for ioc_type, batch in batches
+        )
+        task_results = await asyncio.gather(*tasks)
+        return _combine_results(
+            single_items,
+            task_results[: len(single_items)],
+            task_results[len(single_items) :],  # noqa: E203
+        )
+
+    def _partition_items(
+        self,
+        data: Union[pd.DataFrame, Dict[str, str], Iterable[str]],
+        item_col: Optional[str],
+        item_type_col: Optional[str],
+        query_type: Optional[str],
+        type_override: Optional[str] = None,
+    ) -> Tuple[List[Tuple[str, List[Tuple[int, str]]]], List[Tuple[int, str, str]]]:
+        """
+        Split items into batches and items to be looked up individually.
+
+        Returns
+        -------
+        Tuple[List[Tuple[str, List[Tuple[int, str]]]], List[Tuple[int, str, str]]]
+            List of (ioc_type, [(position, ioc),...]) batches and
+            list of (position, item, item_type) for single lookups.
+
+        """
+        batch_items: DefaultDict[str, List[Tuple[int, str]]] = defaultdict(list)
+        single_items: List[Tuple[int, str, str]] = []
+        for idx, (item, item_type) in enumerate(
+            generate_items(data, item_col, item_type_col)
+        ):
+            if not item:
+                continue
+            item_type = type_override or item_type
+            if self.supports_batch(item_type, query_type):
+                batch_items[item_type].append((idx, item))
+            else:
+                single_items.append((idx, item, item_type))
+        return self._split_batches(batch_items, query_type), single_items
+
+    def _split_batches(
+        self, batch_items: Dict[str, List[Tuple[int, str]]], query_type: Optional[str]
+    ) -> List[Tuple[str, List[Tuple[int, str]]]]:
+        """Split the items of each IoC type into batches of the query batch size."""
+        batches: List[Tuple[str, List[Tuple[int, str]]]] = []
+        for ioc_type, items in batch_items.items():
+            query_key = f"{ioc_type}-{query_type}" if query_type else ioc_type
+            batch_size = getattr(self._BULK_QUERIES[query_key], "batch_size", 100)
+            batches.extend(
+                (ioc_type, items[step : step + batch_size])  # noqa: E203
+                for step in range(0, len(items), batch_size)
+            )
+        return batches
+
+    def _lookup_batch_cached(
+        self,
+        batch: List[Tuple[int, str]],
+        ioc_type: str,
+        query_type: str = None,
+        lookup_cache: Optional["LookupCache"] = None,
+        **kwargs,
+    ) -> Dict[int, pd.DataFrame]:
+        """Lookup a batch of IoCs, returning results keyed by input position."""
+        results: Dict[str, pd.DataFrame] = {}
+        if lookup_cache is not None:
+            for _, ioc in batch:
+                cached = lookup_cache.get(self.name, ioc, ioc_type, query_type)
+                if cached is not None:
+                    results[ioc] = cached
+        uncached = list(dict.fromkeys(ioc for _, ioc in batch if ioc not in results))
+        if uncached:
+            batch_results = self._match_batch_results(
+                uncached,
+                self.lookup_iocs_batch(
+                    uncached, ioc_type, query_type=query_type, **kwargs
+                ),
+            )
+            for ioc in uncached:
+                if ioc not in batch_results:
+                    # the provider returned no row for the IoC - this
+                    # result is not cached
+                    results[ioc] = self._no_batch_result(
+                        ioc, ioc_type, query_type, **kwargs
+                    )
+                    continue
+                results[ioc] = batch_results[ioc]
+                if lookup_cache is not None:
+                    lookup_cache.put(
+                        self.name, ioc, ioc_type, query_type, batch_results[ioc]
+                    )
+        return {idx: results[ioc] for idx, ioc in batch}
+
+    def _match_batch_results(
+        self, iocs: List[str], batch_df: pd.DataFrame
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Return the batch result rows for each IoC in `iocs`.
+
+        Result rows are matched to the IoCs using the "Ioc" column.
+        If the provider has normalized the IoC value in its results
+        (e.g. the case of a hash or a canonical URL), rows are matched
+        using the normalized value (see `_batch_key`).
+
+        """
+        if batch_df.empty or "Ioc" not in batch_df.columns:
+            return {}
+        ioc_keys: DefaultDict[str, List[str]] = defaultdict(list)
+        for ioc in iocs:
+            ioc_keys[self._batch_key(ioc)].append(ioc)
+        matched: Dict[str, pd.DataFrame] = {}
+        for result_ioc, ioc_result in batch_df.groupby("Ioc", sort=False):
+            key_iocs = ioc_keys.get(self._batch_key(result_ioc), [])
+            if result_ioc in key_iocs:
+                # an exact match takes precedence over a normalized match
+                matched[result_ioc] = ioc_result
+                continue
+            for ioc in key_iocs:
+                matched.setdefault(ioc, ioc_result)
+        return matched
+
+    def _no_batch_result(
+        self, ioc: str, ioc_type: str, query_type: str = None, **kwargs
+    ) -> pd.DataFrame:
+        """Return a NO_DATA result for an IoC with no batch result row."""
+        result = self._check_ioc_type(ioc, ioc_type, query_subtype=query_type)
+        result["Provider"] = kwargs.get("provider_name", self.__class__.__name__)
+        result["Result"] = False
+        result["Details"] = "No result returned for this item."
+        result["Status"] = LookupStatus.NO_DATA.value
+        return pd.DataFrame([result])
+
+    @staticmethod
+    def _batch_key(ioc: Any) -> str:
+        """Return the normalized IoC value used to match batch results."""
+        return str(ioc).strip().rstrip("/").casefold()
+
     @property
     def ioc_query_defs(self) -> Dict[str, Any]:
         """
@@ -332,6 +689,21 @@ class TIProvider(Provider):
         return TIProvider.resolve_item_type(observable)
 
 
+def _combine_results(
+    single_items: List[Tuple[int, str, str]],
+    single_results: List[pd.DataFrame],
+    batch_results: List[Dict[int, pd.DataFrame]],
+) -> pd.DataFrame:
+    """Return single item and batch results combined in input order."""
+    results: Dict[int, pd.DataFrame] = {
+        idx: item_result
+        for (idx, _, _), item_result in zip(single_items, single_results)
+    }
+    for batch_result in batch_results:
+        results.update(batch_result)
+    return pd.concat([results[idx] for idx in sorted(results)])
+
+
 class TIPivotProvider(PivotProvider):
     """A class which provides TI pivot functions and a means of registering them."""
 
@@ -17,7 +17,7 @@ from typing import Any, Dict, Tuple
 
 from ..._version import VERSION
 from ...common.utility import export
-from ..http_provider import APILookupParams
+from ..http_provider import APILookupParams, BulkLookupParams
 from .result_severity import ResultSeverity
 from .ti_http_provider import HttpTIProvider
 
@@ -64,6 +64,30 @@ class VirusTotal(HttpTIProvider):
     _QUERIES["sha1_hash"] = _QUERIES["file_hash"]
     _QUERIES["sha256_hash"] = _QUERIES["file_hash"]
 
+    # file and url reports accept up to 4 resources per request
+    # with the public API (25 with a private API key)
+    _BULK_QUERIES = {
+        "file_hash": BulkLookupParams(
+            path="vtapi/v2/file/report",
+            params={**_PARAMS, "resource": "{observable}"},
+            headers={**_DEF_HEADERS, **_GZIP_HEADERS},
+            batch_size=4,
+            separator=",",
+            result_key="resource",
+        ),
+        "url": BulkLookupParams(
+            path="vtapi/v2/url/report",
+            params={**_PARAMS, "resource": "{observable}"},
+            headers={**_DEF_HEADERS, **_GZIP_HEADERS},
+            batch_size=4,
+            separator="\n",
+            result_key="resource",
+        ),
+    }
+    _BULK_QUERIES["md5_hash"] = _BULK_QUERIES["file_hash"]
+    _BULK_QUERIES["sha1_hash"] = _BULK_QUERIES["file_hash"]
+    _BULK_QUERIES["sha256_hash"] = _BULK_QUERIES["file_hash"]
+
     _REQUIRED_PARAMS = ["AuthKey"]
 
     _VT_DETECT_RESULTS = {
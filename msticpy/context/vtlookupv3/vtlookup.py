@@ -24,10 +24,10 @@ from collections import namedtuple
 from json import JSONDecodeError
 from typing import Any, Dict, List, Mapping, Optional, Tuple
 
-import httpx
 import pandas as pd
 
 from ..._version import VERSION
+from ...common.http_client import get_http_client
 from ...common.pkg_config import get_http_timeout
 from ...common.utility import export, mp_ua_header
 from ..lookup_result import SanitizedObservable
@@ -791,14 +791,14 @@ class VTLookup:
                 headers[hdr] = val
 
         if vt_param.http_verb == "post":
-            response = httpx.post(
+            response = get_http_client().post(
                 submit_url,
                 data=params,
                 headers=headers,
                 timeout=get_http_timeout(),
             )
         else:
-            response = httpx.get(
+            response = get_http_client().get(
                 submit_url,
                 params=params,
                 headers=headers,
@@ -12,23 +12,40 @@ from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 import pandas as pd
 
 from ..._version import VERSION
+from ...common.exceptions import MsticpyParameterError
 from ...common.pkg_config import get_config
 from ...common.utility import export, valid_pyname
 from ...nbwidgets.query_time import QueryTime
 from .. import drivers
 from ..drivers.driver_base import DriverBase, DriverProps
 from .param_extractor import extract_query_params
+from .query_cache import QueryCache, create_query_cache
 from .query_container import QueryContainer
 from .query_defns import DataEnvironment
-from .query_provider_connections_mixin import QueryProviderConnectionsMixin
+from .query_provider_connections_mixin import (
+    QueryProviderConnectionsMixin,
+    _write_parquet_chunks,
+)
 from .query_provider_utils_mixin import QueryProviderUtilsMixin
 from .query_store import QueryStore
+from .query_tasks import QueryTaskStatus
 
 __version__ = VERSION
 __author__ = "Ian Hellen"
 
 _HELP_FLAGS = ("help", "?")
 _DEBUG_FLAGS = ("print", "debug_query", "print_query")
+_CACHE_MODES = ("use", "refresh", "only")
+# Query options that do not change the query results (time_span is
+# added to the cache key separately)
+_CACHE_KEY_IGNORED_OPTIONS = {
+    "cache",
+    "parquet_path",
+    "progress",
+    "query_source",
+    "stream",
+    "time_span",
+}
 _COMPATIBLE_DRIVER_MAPPINGS = {
     "mssentinel": ["m365d"],
     "mde": ["m365d"],
@@ -71,6 +88,11 @@ class QueryProvider(QueryProviderConnectionsMixin, QueryProviderUtilsMixin):
             `DriverBase`)
         query_paths : List[str]
             Additional paths to look for query definitions.
+        cache : Union[bool, str, QueryCache, None], optional
+            Cache for query results, by default None (no cache).
+            Use True to use the default cache folder
+            ("~/.msticpy/query_cache"), a path to use a specific
+            cache folder, or a QueryCache instance.
         kwargs :
             Other arguments are passed to the data provider driver.
 
@@ -97,6 +119,7 @@ class QueryProvider(QueryProviderConnectionsMixin, QueryProviderUtilsMixin):
             data_environment
         )
 
+        self.cache: Optional[QueryCache] = create_query_cache(kwargs.pop("cache", None))
         self._driver_kwargs = kwargs.copy()
         if driver is None:
             self.driver_class = drivers.import_driver(data_environment)
@@ -226,6 +249,21 @@ class QueryProvider(QueryProviderConnectionsMixin, QueryProviderUtilsMixin):
         ----------------
         query_options : Dict[str, Any]
             Additional options passed to query driver.
+        cache : Union[str, bool, None], optional
+            How to use the query result cache: "use" - return a cached
+            result if there is one, otherwise run the query and cache
+            the result; "refresh" - run the query and replace any cached
+            result; "only" - only return a cached result (an empty
+            DataFrame is returned if there is no cached result);
+            False - do not use the cache. By default, "use" if the
+            provider was created with a cache, otherwise False. If the
+            provider has no cache, results are cached in memory only.
+        stream : bool, optional
+            Return an iterator of results, yielding the result from
+            each connection as it completes, by default False.
+        parquet_path : Optional[str], optional
+            Write the results to Parquet files in this folder
+            and return the folder path.
         kwargs : Dict[str, Any]
             Additional options passed to query driver.
 
@@ -236,17 +274,104 @@ class QueryProvider(QueryProviderConnectionsMixin, QueryProviderUtilsMixin):
             or a KqlResult if unsuccessful.
 
         """
+        stream = kwargs.pop("stream", False)
+        parquet_path = kwargs.pop("parquet_path", None)
+        cache_mode = self._get_cache_mode(kwargs.pop("cache", None))
         query_options = kwargs.pop("query_options", {}) or kwargs
         query_source = kwargs.pop("query_source", None)
 
         logger.info("Executing query '%s...'", query[:40])
         logger.debug("Full query: %s", query)
         logger.debug("Query options: %s", query_options)
-        if not self._additional_connections:
-            return self._query_provider.query(
-                query, query_source=query_source, **query_options
+        if self._additional_connections and (stream or parquet_path):
+            # streamed results from multiple connections are not cached
+            return self._exec_additional_connections(
+                query, stream=stream, parquet_path=parquet_path, **kwargs
+            )
+        cache_key = self._get_cache_key(query, query_options) if cache_mode else None
+        result = None
+        if cache_mode in ("use", "only") and self.cache is not None:
+            result = self.cache.get(cache_key) if cache_key else None
+            if result is None and cache_mode == "only":
+                logger.warning("No cached result found for query.")
+                result = pd.DataFrame()
+            elif result is not None:
+                logger.info("Using cached query result")
+        if result is None:
+            if not self._additional_connections:
+                result = self._query_provider.query(
+                    query, query_source=query_source, **query_options
+                )
+                query_failed = False
+            else:
+                # use the status of this query rather than self._query_status,
+                # which can be overwritten by concurrent split query chunks
+                query_status: List[QueryTaskStatus] = []
+                result = self._exec_additional_connections(
+                    query, on_complete=query_status.extend, **kwargs
+                )
+                query_failed = any(status.status == "failed" for status in query_status)
+            # don't cache partial results, empty results or error results
+            if (
+                cache_key
+                and self.cache is not None
+                and not query_failed
+                and isinstance(result, pd.DataFrame)
+                and not result.empty
+            ):
+                self.cache.put(cache_key, result)
+        if parquet_path:
+            return _write_parquet_chunks([result], parquet_path)
+        return iter([result]) if stream else result
+
+    def _get_cache_mode(self, cache: Union[str, bool, None]) -> Optional[str]:
+        """Return the cache mode for a query, creating a memory cache if needed."""
+        if cache is None:
+            return "use" if self.cache is not None else None
+        if cache is False:
+            return None
+        cache_mode = "use" if cache is True else str(cache).casefold()
+        if cache_mode not in _CACHE_MODES:
+            raise MsticpyParameterError(
+                f"Invalid value for cache: '{cache}'.",
+                f"Valid values are {', '.join(_CACHE_MODES)}, True or False.",
+                parameter="cache",
             )
-        return self._exec_additional_connections(query, **kwargs)
+        if self.cache is None:
+            # the provider was created without a cache - keep results
+            # in memory rather than writing them to the default cache folder
+            logger.info("Creating in-memory query cache")
+            self.cache = QueryCache(path=":memory:")
+        return cache_mode
+
+    def _get_cache_key(
+        self, query: str, query_options: Dict[str, Any]
+    ) -> Optional[str]:
+        """Return cache key for the query, connections and query options."""
+        connection_ids = [
+            driver.connection_id or ""
+            for driver in (self._query_provider, *self._additional_connections.values())
+        ]
+        if not all(connection_ids):
+            # results from different data sources could have the same key
+            logger.info("Not caching results - the connection has no identifier")
+            return None
+        time_span = query_options.get("time_span") or {}
+        other_options = sorted(
+            (name, str(value))
+            for name, value in query_options.items()
+            if name not in _CACHE_KEY_IGNORED_OPTIONS
+        )
+        return QueryCache.make_key(
+            self.environment_name,
+            f"{self.driver_class.__module__}.{self.driver_class.__qualname__}",
+            connection_ids[0],
+            *sorted(connection_ids[1:]),
+            query,
+            time_span.get("start"),
+            time_span.get("end"),
+            *other_options,
+        )
 
     @property
     def query_time(self):
@@ -365,6 +490,8 @@ class QueryProvider(QueryProviderConnectionsMixin, QueryProviderUtilsMixin):
                 source_path=all_query_paths,
                 recursive=True,
                 driver_query_filter=self._query_provider.query_attach_spec,
+                use_index=bool(settings.get("UseIndex", False)),
+                index_path=settings.get("IndexPath"),
             )
         # if no queries - just return an empty store
         return {self.environment_name: QueryStore(self.environment_name)}
@@ -18,6 +18,8 @@ __author__ = "Ian Hellen"
 
 logger = logging.getLogger(__name__)
 
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 def find_yaml_files(source_path: str, recursive: bool = True) -> Iterable[Path]:
     """
@@ -68,8 +70,8 @@ def read_query_def_file(query_file: str) -> Tuple[Dict, Dict, Dict]:
     """
     data_map = None
     with open(query_file, "r", encoding="utf-8") as f_handle:
-        # use safe_load instead load
-        data_map = yaml.safe_load(f_handle)
+        # use the (faster) libyaml safe loader if available
+        data_map = yaml.load(f_handle, Loader=_YamlLoader)  # nosec
 
     try:
         validate_query_defs(query_def_dict=data_map)
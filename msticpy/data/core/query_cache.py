@@ -0,0 +1,351 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""
+Query result cache.
+
+Query results are cached in memory and (optionally) on disk, keyed
+by the data environment, connection, rendered query text and query
+time range. Re-running the same query (e.g. re-running a notebook
+cell or a pivot function) returns the cached result rather than
+querying the data source again.
+
+Results are stored on disk as Parquet files if a Parquet library
+(pyarrow) is installed, otherwise as pickle files. Entries expire after
+a time-to-live (TTL). When the total size of cached results in either
+tier exceeds its maximum size, the least recently used entries are
+evicted.
+
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, NamedTuple, Optional, Tuple, Union
+
+import pandas as pd
+
+from ..._version import VERSION
+from ...common.utility import export
+from .query_utils import estimate_size, parquet_available
+
+__version__ = VERSION
+__author__ = "Ian Hellen"
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_CACHE_PATH = "~/.msticpy/query_cache"
+_DEFAULT_TTL = 60 * 60
+_DEFAULT_MAX_MEMORY = 512 * 1024 * 1024
+_DEFAULT_MAX_DISK = 4 * 1024 * 1024 * 1024
+_FILE_TYPES = (".parquet", ".pkl")
+
+
+class QueryCacheStats(NamedTuple):
+    """Query cache statistics."""
+
+    hits: int
+    misses: int
+    memory_entries: int
+    memory_size: int
+    disk_entries: int
+    disk_size: int
+
+
+class _MemoryEntry(NamedTuple):
+    """In-memory cache entry."""
+
+    created: float
+    data: pd.DataFrame
+    size: int
+
+
+@export
+class QueryCache:
+    """Two-tier (memory and disk), TTL-aware cache for query results."""
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        ttl: int = _DEFAULT_TTL,
+        max_memory: int = _DEFAULT_MAX_MEMORY,
+        max_disk: int = _DEFAULT_MAX_DISK,
+    ):
+        """
+        Initialize the query cache.
+
+        Parameters
+        ----------
+        path : Optional[Union[str, Path]], optional
+            Folder to store cached results, by default
+            "~/.msticpy/query_cache". Use ":memory:" to create
+            a memory-only cache.
+        ttl : int, optional
+            Time-to-live for cached results in seconds,
+            by default 1 hour.
+        max_memory : int, optional
+            Maximum total size of results held in memory in bytes,
+            by default 512MB.
+        max_disk : int, optional
+            Maximum total size of result files on disk in bytes,
+            by default 4GB.
+
+        """
+        self.ttl = ttl
+        self.max_memory = max_memory
+        self.max_disk = max_disk
+        self.hits = 0
+        self.misses = 0
+        if path is None:
+            path = _DEFAULT_CACHE_PATH
+        self.path: Optional[Path] = None
+        if str(path) != ":memory:":
+            self.path = Path(path).expanduser()
+            self.path.mkdir(parents=True, exist_ok=True)
+        self._memory: "OrderedDict[str, _MemoryEntry]" = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.RLock()
+
+    def __repr__(self) -> str:
+        """Return string representation of the cache."""
+        path = self.path or ":memory:"
+        return f"{self.__class__.__name__}(path='{path}', ttl={self.ttl})"
+
+    @staticmethod
+    def make_key(*key_items: Any) -> str:
+        """
+        Return a cache key for `key_items`.
+
+        Parameters
+        ----------
+        key_items : Any
+            Values that identify the query result (e.g. connection,
+            query text, start and end times).
+
+        Returns
+        -------
+        str
+            The key (a SHA256 hash of the item values).
+
+        """
+        key_str = "\x1f".join(str(item) for item in key_items)
+        return hashlib.sha256(key_str.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """
+        Return the cached result for `key`, if present and not expired.
+
+        Parameters
+        ----------
+        key : str
+            The cache key (see `make_key`).
+
+        Returns
+        -------
+        Optional[pd.DataFrame]
+            A copy of the cached result or None if there is no valid entry.
+
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry.created <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry.data.copy()
+                self._remove_memory(key)
+            created, data = self._read_file(key, now)
+            if data is None:
+                self.misses += 1
+                return None
+            self._add_memory(key, data, created)
+            self.hits += 1
+            return data.copy()
+
+    def put(self, key: str, data: Any) -> bool:
+        """
+        Add a query result to the cache.
+
+        Parameters
+        ----------
+        key : str
+            The cache key (see `make_key`).
+        data : Any
+            The query result.
+
+        Returns
+        -------
+        bool
+            True if the result was cached. Only DataFrame
+            results are cached.
+
+        """
+        if not isinstance(data, pd.DataFrame):
+            return False
+        now = time.time()
+        data = data.copy()
+        with self._lock:
+            self._add_memory(key, data, now)
+            if self.path is not None:
+                self._write_file(key, data, now)
+        return True
+
+    def clear(self):
+        """Remove all cached results."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+            for file in self._cache_files():
+                file.unlink()
+
+    def purge_expired(self) -> int:
+        """
+        Remove expired entries from the cache.
+
+        Returns
+        -------
+        int
+            The number of entries removed.
+
+        """
+        now = time.time()
+        removed = 0
+        with self._lock:
+            for key in [
+                key
+                for key, entry in self._memory.items()
+                if now - entry.created > self.ttl
+            ]:
+                self._remove_memory(key)
+                removed += 1
+            for file in self._cache_files():
+                if now - file.stat().st_mtime > self.ttl:
+                    file.unlink()
+                    removed += 1
+        return removed
+
+    @property
+    def stats(self) -> QueryCacheStats:
+        """Return cache hit/miss counters and number and size of entries."""
+        with self._lock:
+            files = [file.stat().st_size for file in self._cache_files()]
+            return QueryCacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                memory_entries=len(self._memory),
+                memory_size=self._memory_size,
+                disk_entries=len(files),
+                disk_size=sum(files),
+            )
+
+    def _add_memory(self, key: str, data: pd.DataFrame, created: float):
+        """Add entry to the memory tier, evicting LRU entries if needed."""
+        self._remove_memory(key)
+        size = estimate_size(data)
+        if size > self.max_memory:
+            return
+        self._memory[key] = _MemoryEntry(created, data, size)
+        self._memory_size += size
+        while self._memory_size > self.max_memory:
+            self._remove_memory(next(iter(self._memory)))
+
+    def _remove_memory(self, key: str):
+        """Remove entry from the memory tier."""
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_size -= entry.size
+
+    def _cache_files(self):
+        """Return the result files in the cache folder."""
+        if self.path is None:
+            return []
+        return [
+            file
+            for file in self.path.iterdir()
+            if file.suffix in _FILE_TYPES and file.is_file()
+        ]
+
+    def _read_file(self, key: str, now: float) -> Tuple[float, Optional[pd.DataFrame]]:
+        """Return creation time and data of the disk entry for `key`."""
+        if self.path is None:
+            return now, None
+        for suffix in _FILE_TYPES:
+            file = self.path.joinpath(f"{key}{suffix}")
+            if not file.is_file():
+                continue
+            created = file.stat().st_mtime
+            if now - created > self.ttl:
+                file.unlink()
+                return now, None
+            try:
+                if suffix == ".parquet":
+                    data = pd.read_parquet(file)
+                else:
+                    data = pd.read_pickle(file)  # nosec
+            except Exception as err:  # pylint: disable=broad-except
+                logger.warning("Could not read cached result %s: %s", file, err)
+                return now, None
+            # record the access time for LRU eviction
+            os.utime(file, (now, created))
+            return created, data
+        return now, None
+
+    def _write_file(self, key: str, data: pd.DataFrame, created: float):
+        """Write `data` to the disk tier, evicting LRU entries if needed."""
+        if self.path is None:
+            return
+        tmp_file = self.path.joinpath(f"{key}.{os.getpid()}.tmp")
+        suffix = ".pkl"
+        try:
+            if parquet_available():
+                try:
+                    data.to_parquet(tmp_file, index=True)
+                    suffix = ".parquet"
+                except Exception:  # pylint: disable=broad-except
+                    # some column types cannot be stored as Parquet
+                    logger.info("Cannot write result as Parquet - using pickle")
+            if suffix == ".pkl":
+                data.to_pickle(tmp_file)
+            for old_suffix in _FILE_TYPES:
+                self.path.joinpath(f"{key}{old_suffix}").unlink(missing_ok=True)
+            file = self.path.joinpath(f"{key}{suffix}")
+            os.replace(tmp_file, file)
+            os.utime(file, (created, created))
+        except OSError as err:
+            logger.warning("Could not write cached result %s: %s", key, err)
+            return
+        self._evict_files()
+
+    def _evict_files(self):
+        """Evict least recently used result files until under `max_disk`."""
+        files = [(file, file.stat()) for file in self._cache_files()]
+        excess = sum(stat.st_size for _, stat in files) - self.max_disk
+        if excess <= 0:
+            return
+        evicted = 0
+        for file, stat in sorted(files, key=lambda item: item[1].st_atime):
+            if excess <= 0:
+                break
+            file.unlink()
+            excess -= stat.st_size
+            evicted += 1
+        logger.info("Evicted %d result files from query cache", evicted)
+
+
+def create_query_cache(
+    cache: Union[bool, str, Path, QueryCache, None]
+) -> Optional[QueryCache]:
+    """Return QueryCache instance for the `cache` parameter value."""
+    if isinstance(cache, QueryCache):
+        return cache
+    if cache is True:
+        return QueryCache()
+    if isinstance(cache, (str, Path)):
+        return QueryCache(path=cache)
+    return None
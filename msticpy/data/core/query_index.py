@@ -0,0 +1,231 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""
+Compiled index of query definition files.
+
+Parsing the YAML query definition files is the most expensive part
+of creating a QueryProvider. The QueryIndex keeps the parsed contents
+of each file (keyed by path) in memory and in a file on disk so
+that files are only parsed again when they change.
+
+A file is treated as unchanged if its modification time and size
+match the indexed values. If these differ (e.g. the file was touched
+or checked out again), the SHA256 hash of the file contents is
+compared before re-parsing the file.
+
+Files that are not in the index are parsed in parallel (using a
+process pool) if there are enough of them to make this worthwhile.
+
+"""
+import hashlib
+import logging
+import os
+import pickle  # nosec
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from ..._version import VERSION
+from .data_query_reader import read_query_def_file
+
+__version__ = VERSION
+__author__ = "Ian Hellen"
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_INDEX_PATH = "~/.msticpy/query_index.pkl"
+_INDEX_VERSION = 1
+# Minimum number of files to parse before using a process pool
+_MIN_PARALLEL_FILES = 16
+_MAX_WORKERS = 8
+
+QueryFileDefs = Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]
+
+
+class _IndexEntry(NamedTuple):
+    """Index entry for a query file."""
+
+    mtime: int
+    size: int
+    digest: str
+    data: Optional[bytes]
+
+
+class QueryIndex:
+    """Cache of parsed query definition files."""
+
+    def __init__(self, index_path: Union[str, Path, None] = None):
+        """
+        Initialize the index.
+
+        Parameters
+        ----------
+        index_path : Union[str, Path, None], optional
+            Path to the index file, by default None
+            ("~/.msticpy/query_index.pkl").
+
+        """
+        self.index_path = Path(index_path or _DEFAULT_INDEX_PATH).expanduser()
+        self._entries: Dict[str, _IndexEntry] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def read_files(
+        self, file_paths: Iterable[Union[str, Path]]
+    ) -> Dict[str, Optional[QueryFileDefs]]:
+        """
+        Return the parsed query definitions for `file_paths`.
+
+        Parameters
+        ----------
+        file_paths : Iterable[Union[str, Path]]
+            The query definition files to read.
+
+        Returns
+        -------
+        Dict[str, Optional[QueryFileDefs]]
+            Dictionary of file path and (sources, defaults, metadata)
+            tuple for each file, in the order of `file_paths`.
+            The value is None for files that are not valid
+            query definition files.
+
+        """
+        results: Dict[str, Optional[_IndexEntry]] = {}
+        misses: List[Tuple[str, str, os.stat_result, str]] = []
+        with self._lock:
+            for file_path in file_paths:
+                file_path = str(file_path)
+                key = str(Path(file_path).resolve())
+                stat = os.stat(key)
+                entry = self._entries.get(key)
+                if entry and (entry.mtime, entry.size) == (
+                    stat.st_mtime_ns,
+                    stat.st_size,
+                ):
+                    results[file_path] = entry
+                    continue
+                digest = _file_digest(key)
+                if entry and entry.digest == digest:
+                    entry = entry._replace(mtime=stat.st_mtime_ns, size=stat.st_size)
+                    self._entries[key] = entry
+                    results[file_path] = entry
+                    continue
+                results[file_path] = None
+                misses.append((file_path, key, stat, digest))
+
+            if misses:
+                logger.info("Parsing %d query files", len(misses))
+                parsed = _parse_files([key for _, key, _, _ in misses])
+                for (file_path, key, stat, digest), data in zip(misses, parsed):
+                    entry = _IndexEntry(stat.st_mtime_ns, stat.st_size, digest, data)
+                    self._entries[key] = entry
+                    results[file_path] = entry
+                self._save()
+
+        return {
+            file_path: (
+                pickle.loads(entry.data)  # nosec
+                if entry and entry.data is not None
+                else None
+            )
+            for file_path, entry in results.items()
+        }
+
+    def clear(self):
+        """Remove all entries from the index."""
+        with self._lock:
+            self._entries.clear()
+            self._save()
+
+    def _load(self):
+        """Load the index from disk."""
+        if not self.index_path.is_file():
+            return
+        try:
+            with open(self.index_path, "rb") as index_file:
+                index_data = pickle.load(index_file)  # nosec
+            if index_data.get("version") == _INDEX_VERSION:
+                self._entries = {
+                    key: _IndexEntry(*entry)
+                    for key, entry in index_data["entries"].items()
+                }
+        except (OSError, EOFError, pickle.UnpicklingError, TypeError, ValueError):
+            logger.info("Could not read query index %s", self.index_path)
+            self._entries = {}
+
+    def _save(self):
+        """Save the index to disk, removing entries for deleted files."""
+        self._entries = {
+            key: entry for key, entry in self._entries.items() if Path(key).is_file()
+        }
+        index_data = {
+            "version": _INDEX_VERSION,
+            "entries": {key: tuple(entry) for key, entry in self._entries.items()},
+        }
+        tmp_path = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}")
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "wb") as index_file:
+                pickle.dump(index_data, index_file)
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            logger.info("Could not write query index %s", self.index_path)
+
+
+_INDEXES: Dict[Path, QueryIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_query_index(index_path: Union[str, Path, None] = None) -> QueryIndex:
+    """
+    Return the shared QueryIndex for `index_path`.
+
+    Parameters
+    ----------
+    index_path : Union[str, Path, None], optional
+        Path to the index file, by default None
+        ("~/.msticpy/query_index.pkl").
+
+    Returns
+    -------
+    QueryIndex
+        The query index. The same instance is returned for
+        each call with the same path.
+
+    """
+    path = Path(index_path or _DEFAULT_INDEX_PATH).expanduser()
+    with _INDEXES_LOCK:
+        if path not in _INDEXES:
+            _INDEXES[path] = QueryIndex(path)
+        return _INDEXES[path]
+
+
+def _file_digest(file_path: str) -> str:
+    """Return SHA256 hash of the file contents."""
+    with open(file_path, "rb") as file_handle:
+        return hashlib.sha256(file_handle.read()).hexdigest()
+
+
+def _parse_file(file_path: str) -> Optional[bytes]:
+    """Return pickled query definitions for the file or None if invalid."""
+    try:
+        return pickle.dumps(read_query_def_file(file_path))
+    except ValueError:
+        return None
+
+
+def _parse_files(file_paths: List[str]) -> List[Optional[bytes]]:
+    """Parse query files, using a process pool for large numbers of files."""
+    workers = min(os.cpu_count() or 1, _MAX_WORKERS)
+    if len(file_paths) >= _MIN_PARALLEL_FILES and workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(_parse_file, file_paths, chunksize=4))
+        except (BrokenProcessPool, OSError, pickle.PicklingError):
+            logger.info("Parallel query file parsing failed - parsing serially")
+    return [_parse_file(file_path) for file_path in file_paths]
@@ -6,25 +6,55 @@
 """Query Provider additional connection methods."""
 import asyncio
 import logging
-from concurrent.futures import ThreadPoolExecutor
+import math
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime
 from functools import partial
-from itertools import tee
-from typing import Any, Dict, List, Optional, Protocol, Tuple, Union
-
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+    Union,
+)
+
+import attr
 import pandas as pd
-from tqdm.auto import tqdm
 
 from ..._version import VERSION
-from ...common.exceptions import MsticpyDataQueryError
+from ...common.exceptions import MsticpyImportExtraError, MsticpyParameterError
 from ..drivers.driver_base import DriverBase, DriverProps
 from .query_source import QuerySource
+from .query_store import QueryStore
+from .query_tasks import (
+    _MIN_SPLIT_DELTA,
+    QueryDensity,
+    QueryTaskStatus,
+    _calc_equal_ranges,
+    _calc_split_ranges,
+    _iter_synchronous_queries,
+    _QueryTask,
+    _QueryTaskTracker,
+    _RetryOptions,
+)
+from .query_utils import parquet_available
 
 __version__ = VERSION
 __author__ = "Ian Hellen"
 
 logger = logging.getLogger(__name__)
 
+# Fraction of the driver result limits to aim for when planning auto splits
+_AUTO_SPLIT_FILL = 0.5
+
 
 # pylint: disable=too-few-public-methods, unnecessary-ellipsis
 class QueryProviderProtocol(Protocol):
@@ -34,6 +64,7 @@ class QueryProviderProtocol(Protocol):
     _driver_kwargs: Dict[str, Any]
     _additional_connections: Dict[str, Any]
     _query_provider: DriverBase
+    query_store: QueryStore
 
     def exec_query(self, query: str, **kwargs) -> Union[pd.DataFrame, Any]:
         """Execute a query against the provider."""
@@ -46,7 +77,6 @@ class QueryProviderProtocol(Protocol):
         ...
 
 
-# pylint: disable=super-init-not-called
 class QueryProviderConnectionsMixin(QueryProviderProtocol):
     """Mixin additional connection handling QueryProvider class."""
 
@@ -101,8 +131,29 @@ class QueryProviderConnectionsMixin(QueryProviderProtocol):
         ]
         return [f"Default: {self._query_provider.current_connection}", *add_connections]
 
+    @property
+    def last_query_status(self) -> pd.DataFrame:
+        """
+        Return the status of each part of the last split or multi-connection query.
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame with one row for each time chunk or connection
+            with the status ("success", "failed" or "split"), the
+            number of attempts, the number of rows returned and
+            the last error.
+
+        """
+        return pd.DataFrame(
+            [attr.asdict(status) for status in getattr(self, "_query_status", [])],
+            columns=[field.name for field in attr.fields(QueryTaskStatus)],
+        )
+
     # pylint: disable=too-many-locals
-    def _exec_additional_connections(self, query, **kwargs) -> pd.DataFrame:
+    def _exec_additional_connections(
+        self, query, **kwargs
+    ) -> Union[pd.DataFrame, Iterator[pd.DataFrame], str]:
         """
         Return results of query run query against additional connections.
 
@@ -114,13 +165,29 @@ class QueryProviderConnectionsMixin(QueryProviderProtocol):
             Show progress bar, by default True
         retry_on_error: bool, optional
             Retry failed queries, by default False
+        max_retries: int, optional
+            Maximum number of retries for each query, by default 3
+        retry_backoff: float, optional
+            Initial delay in seconds before retrying a query, by default 1.0.
+            The delay doubles for each retry.
+        stream: bool, optional
+            Return an iterator that yields the result of each connection
+            query as it completes, by default False
+        parquet_path: Optional[str], optional
+            Write the result of each connection query to a Parquet file
+            in this folder, rather than returning the results.
+        on_complete: Callable[[List[QueryTaskStatus]], None], optional
+            Function called with the status of each connection query
+            when all of the queries have completed.
         **kwargs : Dict[str, Any]
             Additional keyword arguments to pass to the query method.
 
         Returns
         -------
-        pd.DataFrame
-            The concatenated results of the query executed against all connections.
+        Union[pd.DataFrame, Iterator[pd.DataFrame], str]
+            The concatenated results of the query executed against all connections,
+            an iterator of results (if `stream` is True) or the path
+            of the Parquet output folder (if `parquet_path` is specified).
 
         Notes
         -----
@@ -129,39 +196,41 @@ class QueryProviderConnectionsMixin(QueryProviderProtocol):
         If the driver supports threading or async execution, the per-connection
         queries are executed asynchronously.
         Otherwise, the queries are executed sequentially.
+        The status of each connection query is available in
+        `last_query_status`.
 
         """
         progress = kwargs.pop("progress", True)
-        retry = kwargs.pop("retry_on_error", False)
+        stream = kwargs.pop("stream", False)
+        parquet_path = kwargs.pop("parquet_path", None)
+        on_complete = kwargs.pop("on_complete", None)
+        retry_options = _RetryOptions.from_kwargs(kwargs)
+        # split_on_error only applies to split queries
+        retry_options.split_on_error = False
         # Add the initial connection
-        query_tasks = {
-            self._query_provider.current_connection
-            or "0": partial(
-                self._query_provider.query,
-                query,
-                **kwargs,
+        query_tasks = [
+            _QueryTask(
+                query_id=self._query_provider.current_connection or "0",
+                func=partial(self._query_provider.query, query, **kwargs),
             )
-        }
+        ]
         # add the additional connections
-        query_tasks.update(
-            {
-                name: partial(connection.query, query, **kwargs)
-                for name, connection in self._additional_connections.items()
-            }
+        query_tasks.extend(
+            _QueryTask(query_id=name, func=partial(connection.query, query, **kwargs))
+            for name, connection in self._additional_connections.items()
         )
 
         logger.info("Running queries for %s connections.", len(query_tasks))
-        # Run the queries threaded if supported
-        if self._query_provider.get_driver_property(DriverProps.SUPPORTS_THREADING):
-            logger.info("Running threaded queries.")
-            event_loop = _get_event_loop()
-            return event_loop.run_until_complete(
-                self._exec_queries_threaded(query_tasks, progress, retry)
-            )
-
-        # standard synchronous execution
-        print(f"Running query for {len(self._additional_connections)} connections.")
-        return self._exec_synchronous_queries(progress, query_tasks)
+        if not self._query_provider.get_driver_property(DriverProps.SUPPORTS_THREADING):
+            print(f"Running query for {len(self._additional_connections)} connections.")
+        return self._exec_query_tasks(
+            query_tasks,
+            progress=progress,
+            retry_options=retry_options,
+            stream=stream,
+            parquet_path=parquet_path,
+            on_complete=on_complete,
+        )
 
     def _exec_split_query(
         self,
@@ -169,14 +238,16 @@ class QueryProviderConnectionsMixin(QueryProviderProtocol):
         query_source: QuerySource,
         query_params: Dict[str, Any],
         **kwargs,
-    ) -> Union[pd.DataFrame, str, None]:
+    ) -> Union[pd.DataFrame, Iterator[pd.DataFrame], str, None]:
         """
         Execute a query that is split into multiple queries.
 
         Parameters
         ----------
         split_by : str
-            The time interval to split the query by.
+            The time interval to split the query by or "auto"
+            to plan the time ranges from the expected number of
+            rows and the driver result limits.
         query_source : QuerySource
             The query to execute.
         query_params : Dict[str, Any]
@@ -190,37 +261,84 @@ class QueryProviderConnectionsMixin(QueryProviderProtocol):
             Show progress bar, by default True
         retry_on_error: bool, optional
             Retry failed queries, by default False
+        max_retries: int, optional
+            Maximum number of retries for each query, by default 3
+        retry_backoff: float, optional
+            Initial delay in seconds before retrying a query, by default 1.0.
+            The delay doubles for each retry.
+        split_on_error: bool, optional
+            If a time chunk fails with an error indicating that the
+            result was too large or the query timed out, split the
+            chunk into two smaller time ranges and run these,
+            by default False
+        stream: bool, optional
+            Return an iterator that yields the result of each time chunk
+            as it completes, by default False
+        parquet_path: Optional[str], optional
+            Write the result of each time chunk to a Parquet file
+            in this folder, rather than returning the results.
         **kwargs : Dict[str, Any]
             Additional keyword arguments to pass to the query method.
 
         Returns
         -------
-        pd.DataFrame
-            The concatenated results of the query executed against all connections.
+        Union[pd.DataFrame, Iterator[pd.DataFrame], str, None]
+            The concatenated results of the query time chunks,
+            an iterator of results (if `stream` is True) or the path
+            of the Parquet output folder (if `parquet_path` is specified).
 
         Notes
         -----
         This method executes the time-chunks of the split query.
         If the driver supports threading or async execution, the sub-queries are
         executed asynchronously. Otherwise, the queries are executed sequentially.
+        The status of each time chunk is available in `last_query_status`.
+
+        If `stream` is True, the results are not combined - the result
+        of each time chunk is yielded as soon as it is available (in
+        the order that the chunks complete). The query status is
+        available once the iterator is exhausted.
+
+        If `split_by` is "auto", the number of time chunks is calculated
+        so that each chunk should return no more than half of the driver's
+        row and size limits. The expected number of rows is estimated
+        from the results of previous runs of the query or, if the query
+        has not been run before, from a row count query (if the driver
+        supports this). Chunks that return errors indicating that a
+        size limit was exceeded, or that return the maximum number of
+        rows (truncated results), are split into smaller chunks.
 
         """
         start = query_params.pop("start", None)
         end = query_params.pop("end", None)
         progress = kwargs.pop("progress", True)
-        retry = kwargs.pop("retry_on_error", False)
+        stream = kwargs.pop("stream", False)
+        parquet_path = kwargs.pop("parquet_path", None)
+        retry_options = _RetryOptions.from_kwargs(kwargs)
         debug = kwargs.pop("debug", False)
         if not (start or end):
             print("Cannot split a query with no 'start' and 'end' parameters")
             return None
 
-        split_queries = self._create_split_queries(
-            query_source=query_source,
-            query_params=query_params,
-            start=start,
-            end=end,
-            split_by=split_by,
-        )
+        if str(split_by).casefold() == "auto":
+            ranges = self._plan_auto_split(
+                query_source, query_params, start, end, probe=not debug
+            )
+            split_queries = self._create_range_queries(
+                query_source, query_params, ranges
+            )
+            retry_options.split_on_error = True
+            retry_options.max_rows = self._query_provider.get_driver_property(
+                DriverProps.MAX_RESULT_ROWS
+            )
+        else:
+            split_queries = self._create_split_queries(
+                query_source=query_source,
+                query_params=query_params,
+                start=start,
+                end=end,
+                split_by=split_by,
+            )
         if debug:
             return "\n\n".join(
                 f"{start}-{end}\n{query}"
@@ -230,16 +348,133 @@ class QueryProviderConnectionsMixin(QueryProviderProtocol):
         query_tasks = self._create_split_query_tasks(
             query_source, query_params, split_queries, **kwargs
         )
-        # Run the queries threaded if supported
-        if self._query_provider.get_driver_property(DriverProps.SUPPORTS_THREADING):
-            logger.info("Running threaded queries.")
-            event_loop = _get_event_loop()
-            return event_loop.run_until_complete(
-                self._exec_queries_threaded(query_tasks, progress, retry)
+        resplit = partial(
+            self._resplit_query_task,
+            query_source=query_source,
+            query_params=query_params,
+            **kwargs,
+        )
+        return self._exec_query_tasks(
+            query_tasks,
+            progress=progress,
+            retry_options=retry_options,
+            resplit=resplit,
+            stream=stream,
+            parquet_path=parquet_path,
+            on_complete=partial(self._update_split_stats, query_source.name),
+        )
+
+    def _plan_auto_split(
+        self,
+        query_source: QuerySource,
+        query_params: Dict[str, Any],
+        start: datetime,
+        end: datetime,
+        probe: bool = True,
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        Return time ranges sized to keep results within the driver limits.
+
+        Parameters
+        ----------
+        query_source : QuerySource
+            The query to execute.
+        query_params : Dict[str, Any]
+            The parameters to pass to the query.
+        start : datetime
+            Query start time
+        end : datetime
+            Query end time
+        probe : bool, optional
+            Run a row count query if there is no previous row density
+            for the query, by default True
+
+        Returns
+        -------
+        List[Tuple[datetime, datetime]]
+            The time ranges to query.
+
+        """
+        max_rows = self._query_provider.get_driver_property(DriverProps.MAX_RESULT_ROWS)
+        max_size = self._query_provider.get_driver_property(DriverProps.MAX_RESULT_SIZE)
+        total_secs = (pd.Timestamp(end) - pd.Timestamp(start)).total_seconds()
+        if not max_rows or total_secs <= 0:
+            return [(start, end)]
+
+        density = self.query_store.split_stats.get(query_source.name)
+        if density is not None:
+            expected_rows = round(density.rows_per_sec * total_secs)
+        else:
+            expected_rows = (
+                self._probe_row_count(query_source, query_params, start, end)
+                if probe
+                else None
+            )
+        if expected_rows is None:
+            # no estimate - start with a single range and split on failure
+            logger.info("No row estimate for %s", query_source.name)
+            return [(start, end)]
+
+        target_rows = max_rows * _AUTO_SPLIT_FILL
+        if max_size and density is not None and density.bytes_per_row:
+            target_rows = min(
+                target_rows, max_size * _AUTO_SPLIT_FILL / density.bytes_per_row
+            )
+        max_chunks = max(1, int(total_secs // _MIN_SPLIT_DELTA.total_seconds()))
+        chunks = min(max_chunks, max(1, math.ceil(expected_rows / target_rows)))
+        logger.info(
+            "Auto split: %d expected rows, %d chunks", int(expected_rows), chunks
+        )
+        return _calc_equal_ranges(start, end, chunks)
+
+    def _probe_row_count(
+        self,
+        query_source: QuerySource,
+        query_params: Dict[str, Any],
+        start: datetime,
+        end: datetime,
+    ) -> Optional[int]:
+        """Return the row count for the query time range or None."""
+        count_template = self._query_provider.get_driver_property(
+            DriverProps.ROW_COUNT_QUERY
+        )
+        if not count_template:
+            return None
+        query = query_source.create_query(
+            formatters=self._query_provider.formatters,
+            start=start,
+            end=end,
+            **query_params,
+        )
+        try:
+            result = self._query_provider.query(
+                count_template.format(query=query),
+                query_source=query_source,
+                time_span={"start": start, "end": end},
             )
+            return int(result.iloc[0, 0])
+        except Exception:  # pylint: disable=broad-except
+            logger.warning("Row count query failed", exc_info=True)
+            return None
 
-        # or revert to standard synchronous execution
-        return self._exec_synchronous_queries(progress, query_tasks)
+    def _update_split_stats(self, query_name: str, statuses: List[QueryTaskStatus]):
+        """Record the row density for `query_name` from completed chunks."""
+        completed = [
+            status
+            for status in statuses
+            if status.status == "success" and status.start is not None
+        ]
+        total_secs = sum(
+            (pd.Timestamp(status.end) - pd.Timestamp(status.start)).total_seconds()
+            for status in completed
+        )
+        if total_secs <= 0:
+            return
+        rows = sum(status.rows for status in completed)
+        size = sum(status.size for status in completed)
+        self.query_store.split_stats[query_name] = QueryDensity(
+            rows_per_sec=rows / total_secs, bytes_per_row=size / rows if rows else 0.0
+        )
 
     def _create_split_query_tasks(
         self,
@@ -247,41 +482,152 @@ class QueryProviderConnectionsMixin(QueryProviderProtocol):
         query_params: Dict[str, Any],
         split_queries,
         **kwargs,
-    ) -> Dict[str, partial]:
-        """Return dictionary of partials to execute queries."""
+    ) -> List[_QueryTask]:
+        """Return list of tasks to execute queries."""
         # Retrieve any query options passed (other than query params)
         query_options = self._get_query_options(query_params, kwargs)
         logger.info("query_options: %s", query_options)
         logger.info("kwargs: %s", kwargs)
         if "time_span" in query_options:
             del query_options["time_span"]
-        return {
-            f"{start}-{end}": partial(
-                self.exec_query,
-                query=query_str,
-                query_source=query_source,
-                time_span={"start": start, "end": end},
-                **query_options,
+        return [
+            _QueryTask(
+                query_id=f"{start}-{end}",
+                func=partial(
+                    self.exec_query,
+                    query=query_str,
+                    query_source=query_source,
+                    time_span={"start": start, "end": end},
+                    **query_options,
+                ),
+                start=start,
+                end=end,
             )
             for (start, end), query_str in split_queries.items()
-        }
+        ]
 
-    @staticmethod
-    def _exec_synchronous_queries(
-        progress: bool, query_tasks: Dict[str, Any]
-    ) -> pd.DataFrame:
-        logger.info("Running queries sequentially.")
-        results: List[pd.DataFrame] = []
-        if progress:
-            query_iter = tqdm(query_tasks.items(), unit="sub-queries", desc="Running")
+    def _resplit_query_task(
+        self,
+        task: _QueryTask,
+        query_source: QuerySource,
+        query_params: Dict[str, Any],
+        **kwargs,
+    ) -> List[_QueryTask]:
+        """Return tasks for the two halves of the time range of `task`."""
+        if task.start is None or task.end is None:
+            return []
+        q_start, q_end = pd.Timestamp(task.start), pd.Timestamp(task.end)
+        if q_end - q_start < _MIN_SPLIT_DELTA * 2:
+            return []
+        mid_time = q_start + (q_end - q_start) / 2
+        split_queries = self._create_range_queries(
+            query_source,
+            query_params,
+            [(q_start, mid_time - pd.Timedelta("1ns")), (mid_time, q_end)],
+        )
+        logger.info("Splitting query chunk %s", task.query_id)
+        return self._create_split_query_tasks(
+            query_source, query_params, split_queries, **kwargs
+        )
+
+    # pylint: disable=too-many-arguments
+    def _exec_query_tasks(
+        self,
+        query_tasks: List[_QueryTask],
+        progress: bool = True,
+        retry_options: Optional[_RetryOptions] = None,
+        resplit: Optional[Callable[[_QueryTask], List[_QueryTask]]] = None,
+        stream: bool = False,
+        parquet_path: Optional[str] = None,
+        on_complete: Optional[Callable[[List[QueryTaskStatus]], None]] = None,
+    ) -> Union[pd.DataFrame, Iterator[pd.DataFrame], str]:
+        """Return combined results, a results iterator or Parquet output path."""
+        tracker = _QueryTaskTracker(
+            query_tasks,
+            retry_options,
+            resplit,
+            progress,
+            keep_results=not (stream or parquet_path),
+        )
+        results = self._iter_query_tasks(tracker, query_tasks, on_complete)
+        if parquet_path:
+            return _write_parquet_chunks(results, parquet_path)
+        if stream:
+            return results
+        # run all the tasks - the tracker keeps the results in query order
+        deque(results, maxlen=0)
+        return tracker.results()
+
+    def _iter_query_tasks(
+        self,
+        tracker: "_QueryTaskTracker",
+        query_tasks: List[_QueryTask],
+        on_complete: Optional[Callable[[List[QueryTaskStatus]], None]] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """Run the query tasks, yielding each successful result as it completes."""
+        if self._query_provider.get_driver_property(DriverProps.SUPPORTS_THREADING):
+            logger.info("Running threaded queries.")
+            results = self._iter_queries_threaded(tracker, query_tasks)
         else:
-            query_iter = query_tasks.items()
-        for con_name, query_task in query_iter:
+            # or revert to standard synchronous execution
+            logger.info("Running queries sequentially.")
+            results = _iter_synchronous_queries(tracker, query_tasks)
+        try:
+            yield from results
+        finally:
+            self._query_status = tracker.status
+            tracker.close()
+            if on_complete is not None:
+                on_complete(tracker.status)
+
+    def _iter_queries_threaded(
+        self, tracker: "_QueryTaskTracker", query_tasks: List[_QueryTask]
+    ) -> Iterator[pd.DataFrame]:
+        """Run query tasks in a thread pool, yielding results as they complete."""
+        logger.info("Running threaded queries for %d tasks.", len(query_tasks))
+        # tasks waiting to run, with the time at which they can be started
+        scheduled: List[Tuple[float, _QueryTask]] = [
+            (0.0, task) for task in query_tasks
+        ]
+        pending: Dict[Future, str] = {}
+        with ThreadPoolExecutor(
+            max_workers=self._query_provider.get_driver_property(
+                DriverProps.MAX_PARALLEL
+            )
+        ) as executor:
             try:
-                results.append(query_task())
-            except MsticpyDataQueryError:
-                print(f"Query {con_name} failed.")
-        return pd.concat(results)
+                while pending or scheduled:
+                    now = time.monotonic()
+                    for _, task in (item for item in scheduled if item[0] <= now):
+                        logger.info("Scheduling query task '%s'", task.query_id)
+                        pending[executor.submit(task.func)] = task.query_id
+                    scheduled = [item for item in scheduled if item[0] > now]
+                    # wait for a task to complete or a retry to be due
+                    timeout = (
+                        max(0.0, min(item[0] for item in scheduled) - now)
+                        if scheduled
+                        else None
+                    )
+                    if not pending:
+                        time.sleep(timeout or 0)
+                        continue
+                    done, _ = wait(
+                        pending, timeout=timeout, return_when=FIRST_COMPLETED
+                    )
+                    for future in done:
+                        result, next_tasks = tracker.complete(
+                            pending.pop(future), future.result
+                        )
+                        scheduled.extend(
+                            (time.monotonic() + delay, next_task)
+                            for next_task, delay in next_tasks
+                        )
+                        if result is not None:
+                            yield result
+            finally:
+                # cancel queued tasks if the caller stops iterating
+                for future in pending:
+                    future.cancel()
 
     def _create_split_queries(
         self,
@@ -300,7 +646,18 @@ class QueryProviderConnectionsMixin(QueryProviderProtocol):
 
         ranges = _calc_split_ranges(start, end, split_delta)
 
-        split_queries = {
+        split_queries = self._create_range_queries(query_source, query_params, ranges)
+        logger.info("Split query into %s chunks", len(split_queries))
+        return split_queries
+
+    def _create_range_queries(
+        self,
+        query_source: QuerySource,
+        query_params: Dict[str, Any],
+        ranges: List[Tuple[datetime, datetime]],
+    ) -> Dict[Tuple[datetime, datetime], str]:
+        """Return queries for each time range in `ranges`."""
+        return {
             (q_start, q_end): query_source.create_query(
                 formatters=self._query_provider.formatters,
                 start=q_start,
@@ -309,68 +666,6 @@ class QueryProviderConnectionsMixin(QueryProviderProtocol):
             )
             for q_start, q_end in ranges
         }
-        logger.info("Split query into %s chunks", len(split_queries))
-        return split_queries
-
-    async def _exec_queries_threaded(
-        self,
-        query_tasks: Dict[str, partial],
-        progress: bool = True,
-        retry: bool = False,
-    ) -> pd.DataFrame:
-        """Return results of multiple queries run as threaded tasks."""
-        logger.info("Running threaded queries for %d connections.", len(query_tasks))
-
-        event_loop = _get_event_loop()
-
-        with ThreadPoolExecutor(
-            max_workers=self._query_provider.get_driver_property(
-                DriverProps.MAX_PARALLEL
-            )
-        ) as executor:
-            # add the additional connections
-            thread_tasks = {
-                query_id: event_loop.run_in_executor(executor, query_func)
-                for query_id, query_func in query_tasks.items()
-            }
-            results: List[pd.DataFrame] = []
-            failed_tasks: Dict[str, asyncio.Future] = {}
-            if progress:
-                task_iter = tqdm(
-                    asyncio.as_completed(thread_tasks.values()),
-                    unit="sub-queries",
-                    desc="Running",
-                )
-            else:
-                task_iter = asyncio.as_completed(thread_tasks.values())
-            ids_and_tasks = dict(zip(thread_tasks, task_iter))
-            for query_id, thread_task in ids_and_tasks.items():
-                try:
-                    result = await thread_task
-                    logger.info("Query task '%s' completed successfully.", query_id)
-                    results.append(result)
-                except Exception:  # pylint: disable=broad-except
-                    logger.warning(
-                        "Query task '%s' failed with exception", query_id, exc_info=True
-                    )
-                    failed_tasks[query_id] = thread_task
-
-            if retry and failed_tasks:
-                for query_id, thread_task in failed_tasks.items():
-                    try:
-                        logger.info("Retrying query task '%s'", query_id)
-                        result = await thread_task
-                        results.append(result)
-                    except Exception:  # pylint: disable=broad-except
-                        logger.warning(
-                            "Retried query task '%s' failed with exception",
-                            query_id,
-                            exc_info=True,
-                        )
-            # Sort the results by the order of the tasks
-            results = [result for _, result in sorted(zip(thread_tasks, results))]
-
-        return pd.concat(results, ignore_index=True)
 
 
 def _get_event_loop() -> asyncio.AbstractEventLoop:
@@ -383,32 +678,52 @@ def _get_event_loop() -> asyncio.AbstractEventLoop:
     return loop
 
 
-def _calc_split_ranges(start: datetime, end: datetime, split_delta: pd.Timedelta):
-    """Return a list of time ranges split by `split_delta`."""
-    # Use pandas date_range and split the result into 2 iterables
-    s_ranges, e_ranges = tee(pd.date_range(start, end, freq=split_delta))
-    next(e_ranges, None)  # skip to the next item in the 2nd iterable
-    # Zip them together to get a list of (start, end) tuples of ranges
-    # Note: we subtract 1 nanosecond from the 'end' value of each range so
-    # to avoid getting duplicated records at the boundaries of the ranges.
-    # Some providers don't have nanosecond granularity so we might
-    # get duplicates in these cases
-    ranges = [
-        (s_time, e_time - pd.Timedelta("1ns"))
-        for s_time, e_time in zip(s_ranges, e_ranges)
-    ]
-
-    # Since the generated time ranges are based on deltas from 'start'
-    # we need to adjust the end time on the final range.
-    # If the difference between the calculated last range end and
-    # the query 'end' that the user requested is small (< 10% of a delta),
-    # we just replace the last "end" time with our query end time.
-    if (ranges[-1][1] - end) < (split_delta / 10):
-        ranges[-1] = ranges[-1][0], end
-    else:
-        # otherwise append a new range starting after the last range
-        # in ranges and ending in 'end"
-        # note - we need to add back our subtracted 1 nanosecond
-        ranges.append((ranges[-1][0] + pd.Timedelta("1ns"), end))
-
-    return ranges
+def _write_parquet_chunks(chunks: Iterable[Any], parquet_path: Union[str, Path]) -> str:
+    """
+    Write each DataFrame in `chunks` to a Parquet file in `parquet_path`.
+
+    Parameters
+    ----------
+    chunks : Iterable[Any]
+        Query results. Results that are not DataFrames are skipped.
+    parquet_path : Union[str, Path]
+        The folder to write the files to. The files are named
+        "part-00000.parquet", "part-00001.parquet", etc.
+
+    Returns
+    -------
+    str
+        The path of the folder. This can be read as a single
+        DataFrame using `pd.read_parquet`.
+
+    Raises
+    ------
+    MsticpyImportExtraError
+        If no Parquet library is installed.
+    MsticpyParameterError
+        If the folder already contains Parquet files.
+
+    """
+    if not parquet_available():
+        raise MsticpyImportExtraError(
+            "Cannot write query results to Parquet without pyarrow installed",
+            title="Error writing Parquet files",
+            extra="parquet",
+        )
+    out_path = Path(parquet_path).expanduser()
+    if out_path.is_dir() and any(out_path.glob("*.parquet")):
+        raise MsticpyParameterError(
+            f"The folder {out_path} already contains Parquet files.",
+            "Please specify an empty or new folder.",
+            parameter="parquet_path",
+        )
+    out_path.mkdir(parents=True, exist_ok=True)
+    part = 0
+    for chunk in chunks:
+        if not isinstance(chunk, pd.DataFrame):
+            logger.warning("Skipping result of type %s", type(chunk).__name__)
+            continue
+        chunk.to_parquet(out_path.joinpath(f"part-{part:05d}.parquet"), index=False)
+        part += 1
+    logger.info("Wrote %d Parquet files to %s", part, out_path)
+    return str(out_path)
@@ -13,7 +13,9 @@ from ..._version import VERSION
 from ...common.exceptions import MsticpyUserConfigError
 from .data_query_reader import find_yaml_files, read_query_def_file
 from .query_defns import DataEnvironment, DataFamily
+from .query_index import QueryFileDefs, get_query_index
 from .query_source import QuerySource
+from .query_tasks import QueryDensity
 
 __version__ = VERSION
 __author__ = "Ian Hellen"
@@ -80,6 +82,8 @@ class QueryStore:
         self.data_families: Dict[str, Dict[str, QuerySource]] = defaultdict(dict)
         self.data_family_defaults: Dict[str, Dict[str, Any]] = defaultdict(dict)
         self._all_sources: List[QuerySource] = []
+        # row density of split queries, used to plan "auto" splits
+        self.split_stats: Dict[str, QueryDensity] = {}
 
     def __getattr__(self, name: str):
         """Return the item in dot-separated path `name`."""
@@ -242,6 +246,8 @@ class QueryStore:
         source_path: list,
         recursive: bool = True,
         driver_query_filter: Optional[Dict[str, Set[str]]] = None,
+        use_index: bool = False,
+        index_path: Optional[str] = None,
     ) -> Dict[str, "QueryStore"]:
         """
         Import multiple query definition files from directory path.
@@ -257,6 +263,12 @@ class QueryStore:
             A dictionary of query metadata keys and values. This is used
             to test each read query to see if it is relevant to the driver
             and should be returned in the created QueryStore dictionary.
+        use_index : bool, optional
+            If True, read parsed query files from the query index,
+            only parsing files that have changed, by default False.
+        index_path : Optional[str], optional
+            Path of the query index file, by default None
+            ("~/.msticpy/query_index.pkl").
 
         Returns
         -------
@@ -270,41 +282,51 @@ class QueryStore:
             File read error or Syntax or semantic error found in
             a source file.
 
+        Notes
+        -----
+        If `use_index` is True, the parsed contents of each file are
+        cached in the query index (see `QueryIndex`) so that unchanged
+        files are not parsed again. Files that are not in the index
+        are parsed in parallel.
+
         """
-        env_stores: Dict[str, QueryStore] = {}
+        file_paths: List[str] = []
         for query_dir in source_path:
             if not path.isdir(query_dir):
                 raise FileNotFoundError(f"{query_dir} is not a directory")
-            for file_path in find_yaml_files(query_dir, recursive):
-                try:
-                    sources, defaults, metadata = read_query_def_file(str(file_path))
-                except ValueError:
-                    print(
-                        f"{file_path} is not a valid query definition file - skipping."
-                    )
-                    continue
-
-                for env_value in metadata["data_environments"]:
-                    if "." in env_value:
-                        env_value = env_value.split(".")[1]
-                    environment = DataEnvironment.parse(env_value)
-                    environment_name = (
-                        environment.name
-                        if environment != DataEnvironment.Unknown
-                        else env_value
-                    )
-
-                    if environment_name not in env_stores:
-                        env_stores[environment_name] = cls(environment=environment_name)
-                    for source_name, source in sources.items():
-                        new_source = QuerySource(
-                            source_name, source, defaults, metadata
-                        )
-                        if not driver_query_filter or (
-                            driver_query_filter
-                            and _matches_driver_filter(new_source, driver_query_filter)
-                        ):
-                            env_stores[environment_name].add_data_source(new_source)
+            file_paths.extend(
+                str(file_path) for file_path in find_yaml_files(query_dir, recursive)
+            )
+        if use_index:
+            query_files = get_query_index(index_path).read_files(file_paths)
+        else:
+            query_files = _read_query_files(file_paths)
+
+        env_stores: Dict[str, QueryStore] = {}
+        for file_path, query_defs in query_files.items():
+            if query_defs is None:
+                print(f"{file_path} is not a valid query definition file - skipping.")
+                continue
+            sources, defaults, metadata = query_defs
+            for env_value in metadata["data_environments"]:
+                if "." in env_value:
+                    env_value = env_value.split(".")[1]
+                environment = DataEnvironment.parse(env_value)
+                environment_name = (
+                    environment.name
+                    if environment != DataEnvironment.Unknown
+                    else env_value
+                )
+
+                if environment_name not in env_stores:
+                    env_stores[environment_name] = cls(environment=environment_name)
+                for source_name, source in sources.items():
+                    new_source = QuerySource(source_name, source, defaults, metadata)
+                    if not driver_query_filter or (
+                        driver_query_filter
+                        and _matches_driver_filter(new_source, driver_query_filter)
+                    ):
+                        env_stores[environment_name].add_data_source(new_source)
         return env_stores
 
     def get_query(
@@ -367,6 +389,19 @@ class QueryStore:
         }
 
 
+def _read_query_files(
+    file_paths: Iterable[str],
+) -> Dict[str, Optional[QueryFileDefs]]:
+    """Return the parsed contents of each file (None for invalid files)."""
+    query_files: Dict[str, Optional[QueryFileDefs]] = {}
+    for file_path in file_paths:
+        try:
+            query_files[file_path] = read_query_def_file(file_path)
+        except ValueError:
+            query_files[file_path] = None
+    return query_files
+
+
 def _matches_driver_filter(
     query_source: QuerySource, filter_spec: Dict[str, Set[str]]
 ) -> bool:
@@ -0,0 +1,342 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""Query task scheduling, retry and time range split helpers."""
+import logging
+import re
+import time
+from collections import deque
+from datetime import datetime
+from itertools import tee
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+import attr
+import pandas as pd
+from tqdm.auto import tqdm
+
+from ..._version import VERSION
+from ...common.exceptions import MsticpyDataQueryError
+from .query_utils import estimate_size
+
+__version__ = VERSION
+__author__ = "Ian Hellen"
+
+logger = logging.getLogger(__name__)
+
+# Maximum delay between retries of a failed query
+_MAX_BACKOFF = 60.0
+# Failed time chunks are not split into ranges shorter than this
+_MIN_SPLIT_DELTA = pd.Timedelta("1min")
+# Errors that indicate that a query returned too much data or timed out
+_SPLIT_ERRORS = re.compile(
+    r"limit|exceed|too large|too many|truncat|timeout|timed out|size", re.IGNORECASE
+)
+
+
+# pylint: disable=too-few-public-methods
+@attr.s(auto_attribs=True)
+class QueryTaskStatus:
+    """Execution status of a query chunk or connection query."""
+
+    query_id: str
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    status: str = "pending"
+    attempts: int = 0
+    rows: int = 0
+    size: int = 0
+    error: Optional[str] = None
+
+
+@attr.s(auto_attribs=True)
+class QueryDensity:
+    """Observed row density of a query - used to plan auto splits."""
+
+    rows_per_sec: float
+    bytes_per_row: float = 0.0
+
+
+@attr.s(auto_attribs=True)
+class _QueryTask:
+    """Query function to execute for a chunk or connection."""
+
+    query_id: str
+    func: Callable[[], Any]
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+
+
+@attr.s(auto_attribs=True)
+class _RetryOptions:
+    """Retry settings for split and multi-connection queries."""
+
+    retry: bool = False
+    max_retries: int = 3
+    backoff: float = 1.0
+    split_on_error: bool = False
+    max_rows: Optional[int] = None
+
+    @classmethod
+    def from_kwargs(cls, kwargs: Dict[str, Any]) -> "_RetryOptions":
+        """Create options from (and remove the options from) `kwargs`."""
+        return cls(
+            retry=kwargs.pop("retry_on_error", False),
+            max_retries=int(kwargs.pop("max_retries", 3)),
+            backoff=float(kwargs.pop("retry_backoff", 1.0)),
+            split_on_error=kwargs.pop("split_on_error", False),
+        )
+
+    def delay(self, attempts: int) -> float:
+        """Return the delay before retrying after `attempts` executions."""
+        return min(_MAX_BACKOFF, self.backoff * 2 ** (attempts - 1))
+
+
+# pylint: disable=super-init-not-called
+class _QueryTaskTracker:
+    """Track status and results of query tasks and schedule retries."""
+
+    def __init__(
+        self,
+        query_tasks: List[_QueryTask],
+        retry_options: Optional[_RetryOptions] = None,
+        resplit: Optional[Callable[[_QueryTask], List[_QueryTask]]] = None,
+        progress: bool = True,
+        keep_results: bool = True,
+    ):
+        """Initialize the tracker with the initial tasks."""
+        self.options = retry_options or _RetryOptions()
+        self.keep_results = keep_results
+        self.resplit: Optional[Callable[[_QueryTask], List[_QueryTask]]] = (
+            resplit if self.options.split_on_error else None
+        )
+        self.tasks: Dict[str, _QueryTask] = {}
+        self._status: Dict[str, QueryTaskStatus] = {}
+        self._order: List[str] = []
+        self._results: Dict[str, pd.DataFrame] = {}
+        self._add_tasks(query_tasks)
+        self._progress = (
+            tqdm(total=len(query_tasks), unit="sub-queries", desc="Running")
+            if progress
+            else None
+        )
+
+    @property
+    def status(self) -> List[QueryTaskStatus]:
+        """Return the task status list in query order."""
+        return [self._status[query_id] for query_id in self._order]
+
+    def complete(
+        self, query_id: str, get_result: Callable[[], Any]
+    ) -> Tuple[Any, List[Tuple[_QueryTask, float]]]:
+        """
+        Record the outcome of a task execution.
+
+        Parameters
+        ----------
+        query_id : str
+            The ID of the task.
+        get_result : Callable[[], Any]
+            Function that returns the query result (or raises
+            the query exception).
+
+        Returns
+        -------
+        Tuple[Any, List[Tuple[_QueryTask, float]]]
+            The result (None if the task did not succeed) and
+            the tasks to run next (see `task_done`).
+
+        """
+        try:
+            result = get_result()
+        except Exception as err:  # pylint: disable=broad-except
+            logger.warning(
+                "Query task '%s' failed with exception", query_id, exc_info=True
+            )
+            return None, self.task_done(query_id, error=err)
+        next_tasks = self.task_done(query_id, result=result)
+        logger.info("Query task '%s' completed.", query_id)
+        if self._status[query_id].status != "success":
+            return None, next_tasks
+        return result, next_tasks
+
+    def task_done(
+        self, query_id: str, result: Any = None, error: Optional[Exception] = None
+    ) -> List[Tuple[_QueryTask, float]]:
+        """
+        Record the result of a task execution.
+
+        Parameters
+        ----------
+        query_id : str
+            The ID of the task.
+        result : Any, optional
+            The result of the query, by default None
+        error : Optional[Exception], optional
+            The exception raised by the query, by default None
+
+        Returns
+        -------
+        List[Tuple[_QueryTask, float]]
+            Tasks to run (with delay in seconds before running)
+            to retry or replace the failed task.
+
+        """
+        status = self._status[query_id]
+        status.attempts += 1
+        task = self.tasks[query_id]
+        if error is None and not isinstance(result, pd.DataFrame):
+            error = MsticpyDataQueryError(f"Query returned {type(result).__name__}.")
+        if error is None:
+            status.rows = len(result)
+            status.size = estimate_size(result)
+            if self.resplit and self.options.max_rows:
+                if status.rows >= self.options.max_rows:
+                    # the result was probably truncated at the row limit
+                    status.error = f"Result truncated at row limit ({status.rows})"
+                    sub_tasks = self._split_task(task, status)
+                    if sub_tasks:
+                        return sub_tasks
+            status.status = "success"
+            if self.keep_results:
+                self._results[query_id] = result
+            self._update_progress()
+            return []
+
+        status.error = f"{type(error).__name__}: {error}"
+        if self.resplit and _SPLIT_ERRORS.search(str(error)):
+            sub_tasks = self._split_task(task, status)
+            if sub_tasks:
+                return sub_tasks
+        if self.options.retry and status.attempts <= self.options.max_retries:
+            status.status = "retrying"
+            return [(task, self.options.delay(status.attempts))]
+        status.status = "failed"
+        self._update_progress()
+        return []
+
+    def _split_task(
+        self, task: _QueryTask, status: QueryTaskStatus
+    ) -> List[Tuple[_QueryTask, float]]:
+        """Replace `task` with tasks for smaller time ranges."""
+        if self.resplit is None:
+            return []
+        sub_tasks = self.resplit(task)
+        if not sub_tasks:
+            return []
+        status.status = "split"
+        self._add_tasks(sub_tasks, replace=task.query_id)
+        if self._progress is not None:
+            self._progress.total += len(sub_tasks)
+        self._update_progress()
+        return [(sub_task, 0.0) for sub_task in sub_tasks]
+
+    def close(self):
+        """Close the progress bar and report any failed tasks."""
+        if self._progress is not None:
+            self._progress.close()
+        failed = [status for status in self.status if status.status == "failed"]
+        if failed:
+            print(
+                f"{len(failed)} of {len(self._order)} queries failed:",
+                ", ".join(status.query_id for status in failed),
+                "\nSee 'last_query_status' for details.",
+            )
+
+    def results(self) -> pd.DataFrame:
+        """Return the combined results of all successful tasks in query order."""
+        results = [
+            self._results[query_id]
+            for query_id in self._order
+            if query_id in self._results
+        ]
+        if not results:
+            return pd.DataFrame()
+        return pd.concat(results, ignore_index=True)
+
+    def _add_tasks(self, query_tasks: List[_QueryTask], replace: Optional[str] = None):
+        """Add tasks, optionally replacing task `replace` in the query order."""
+        for task in query_tasks:
+            self.tasks[task.query_id] = task
+            self._status[task.query_id] = QueryTaskStatus(
+                task.query_id, task.start, task.end
+            )
+        new_ids = [task.query_id for task in query_tasks]
+        if replace is None:
+            self._order.extend(new_ids)
+        else:
+            idx = self._order.index(replace)
+            self._order[idx + 1 : idx + 1] = new_ids  # noqa: E203
+
+    def _update_progress(self):
+        if self._progress is not None:
+            self._progress.update(1)
+
+
+def _iter_synchronous_queries(
+    tracker: _QueryTaskTracker, query_tasks: List[_QueryTask]
+) -> Iterator[pd.DataFrame]:
+    """Run query tasks sequentially, yielding each successful result."""
+    task_queue: Deque[Tuple[_QueryTask, float]] = deque(
+        (task, 0.0) for task in query_tasks
+    )
+    while task_queue:
+        task, ready_time = task_queue.popleft()
+        delay = ready_time - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        result, next_tasks = tracker.complete(task.query_id, task.func)
+        task_queue.extend(
+            (next_task, time.monotonic() + delay) for next_task, delay in next_tasks
+        )
+        if result is not None:
+            yield result
+
+
+def _calc_split_ranges(start: datetime, end: datetime, split_delta: pd.Timedelta):
+    """Return a list of time ranges split by `split_delta`."""
+    # Use pandas date_range and split the result into 2 iterables
+    s_ranges, e_ranges = tee(pd.date_range(start, end, freq=split_delta))
+    next(e_ranges, None)  # skip to the next item in the 2nd iterable
+    # Zip them together to get a list of (start, end) tuples of ranges
+    # Note: we subtract 1 nanosecond from the 'end' value of each range so
+    # to avoid getting duplicated records at the boundaries of the ranges.
+    # Some providers don't have nanosecond granularity so we might
+    # get duplicates in these cases
+    ranges = [
+        (s_time, e_time - pd.Timedelta("1ns"))
+        for s_time, e_time in zip(s_ranges, e_ranges)
+    ]
+
+    # Since the generated time ranges are based on deltas from 'start'
+    # we need to adjust the end time on the final range.
+    # If the difference between the calculated last range end and
+    # the query 'end' that the user requested is small (< 10% of a delta),
+    # we just replace the last "end" time with our query end time.
+    if (ranges[-1][1] - end) < (split_delta / 10):
+        ranges[-1] = ranges[-1][0], end
+    else:
+        # otherwise append a new range starting after the last range
+        # in ranges and ending in 'end"
+        # note - we need to add back our subtracted 1 nanosecond
+        ranges.append((ranges[-1][0] + pd.Timedelta("1ns"), end))
+
+    return ranges
+
+
+def _calc_equal_ranges(
+    start: datetime, end: datetime, chunks: int
+) -> List[Tuple[datetime, datetime]]:
+    """Return a list of `chunks` equal time ranges between `start` and `end`."""
+    if chunks <= 1:
+        return [(start, end)]
+    bounds = pd.date_range(start, end, periods=chunks + 1)
+    # as with _calc_split_ranges, subtract 1ns from the end of each range
+    # to avoid duplicate records at the boundaries
+    ranges = [
+        (s_time, e_time - pd.Timedelta("1ns"))
+        for s_time, e_time in zip(bounds[:-1], bounds[1:])
+    ]
+    ranges[-1] = ranges[-1][0], end
+    return ranges
@@ -0,0 +1,27 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""Helper functions for query result handling."""
+import importlib.util
+
+import pandas as pd
+
+from ..._version import VERSION
+
+__version__ = VERSION
+__author__ = "Ian Hellen"
+
+
+def estimate_size(data: pd.DataFrame) -> int:
+    """Return estimated memory size of `data` (sampling large DataFrames)."""
+    if data.empty:
+        return 0
+    sample = data.head(1000)
+    return int(sample.memory_usage(deep=True).sum() * len(data) / len(sample))
+
+
+def parquet_available() -> bool:
+    """Return True if a Parquet library is installed."""
+    return any(importlib.util.find_spec(pkg) for pkg in ("pyarrow", "fastparquet"))
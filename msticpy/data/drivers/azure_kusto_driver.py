@@ -183,6 +183,10 @@ class AzureKustoDriver(DriverBase):
         self.set_driver_property(
             DriverProps.MAX_PARALLEL, value=kwargs.get("max_threads", 4)
         )
+        # Kusto result limits (used to plan split queries)
+        self.set_driver_property(DriverProps.MAX_RESULT_ROWS, 500_000)
+        self.set_driver_property(DriverProps.MAX_RESULT_SIZE, 64 * 1024 * 1024)
+        self.set_driver_property(DriverProps.ROW_COUNT_QUERY, "{query}\n| count")
         self._loaded = True
 
     def _set_public_attribs(self):
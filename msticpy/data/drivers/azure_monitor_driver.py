@@ -136,6 +136,10 @@ class AzureMonitorDriver(DriverBase):
         self.set_driver_property(
             DriverProps.MAX_PARALLEL, value=kwargs.get("max_threads", 4)
         )
+        # Log Analytics result limits (used to plan split queries)
+        self.set_driver_property(DriverProps.MAX_RESULT_ROWS, 500_000)
+        self.set_driver_property(DriverProps.MAX_RESULT_SIZE, 64 * 1024 * 1024)
+        self.set_driver_property(DriverProps.ROW_COUNT_QUERY, "{query}\n| count")
         self.az_cloud_config = AzureCloudConfig()
         logger.info(
             "AzureMonitorDriver loaded. connect_str  %s, kwargs: %s",
@@ -175,6 +179,16 @@ class AzureMonitorDriver(DriverBase):
         """Allow attrib to be set but ignore."""
         del value
 
+    @property
+    def connection_id(self) -> Optional[str]:
+        """Return the tenant and IDs of all of the connected workspaces."""
+        workspace_ids = self._workspace_ids or (
+            [self._workspace_id] if self._workspace_id else []
+        )
+        if not workspace_ids:
+            return None
+        return f"{self._az_tenant_id}/{','.join(sorted(workspace_ids))}"
+
     def connect(self, connection_str: Optional[str] = None, **kwargs):
         """
         Connect to data source.
@@ -34,6 +34,9 @@ class DriverProps:
     SUPPORTS_ASYNC = "supports_async"
     MAX_PARALLEL = "max_parallel"
     FILTER_ON_CONNECT = "filter_queries_on_connect"
+    MAX_RESULT_ROWS = "max_result_rows"
+    MAX_RESULT_SIZE = "max_result_size"
+    ROW_COUNT_QUERY = "row_count_query"
 
     PROPERTY_TYPES: Dict[str, Any] = {
         PUBLIC_ATTRS: dict,
@@ -45,6 +48,9 @@ class DriverProps:
         SUPPORTS_ASYNC: bool,
         MAX_PARALLEL: int,
         FILTER_ON_CONNECT: bool,
+        MAX_RESULT_ROWS: (int, type(None)),
+        MAX_RESULT_SIZE: (int, type(None)),
+        ROW_COUNT_QUERY: (str, type(None)),
     }
 
     @classmethod
@@ -60,6 +66,9 @@ class DriverProps:
             cls.SUPPORTS_ASYNC: False,
             cls.MAX_PARALLEL: 4,
             cls.FILTER_ON_CONNECT: False,
+            cls.MAX_RESULT_ROWS: None,
+            cls.MAX_RESULT_SIZE: None,
+            cls.ROW_COUNT_QUERY: None,
         }
 
     @classmethod
@@ -158,6 +167,23 @@ class DriverBase(ABC):
         """
         return self._instance
 
+    @property
+    def connection_id(self) -> Optional[str]:
+        """
+        Return an identifier for the data source of the current connection.
+
+        Returns
+        -------
+        Optional[str]
+            The identifier (e.g. workspace, cluster or host) or None
+            if the data source is not known. Query results are
+            only cached for connections that have an identifier.
+
+        """
+        if self.current_connection:
+            return str(self.current_connection)
+        return self._instance
+
     @property
     def schema(self) -> Dict[str, Dict]:
         """
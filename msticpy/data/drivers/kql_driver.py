@@ -117,6 +117,10 @@ class KqlDriver(DriverBase):
         self.set_driver_property(
             DriverProps.EFFECTIVE_ENV, DataEnvironment.MSSentinel.name
         )
+        # Log Analytics result limits (used to plan split queries)
+        self.set_driver_property(DriverProps.MAX_RESULT_ROWS, 500_000)
+        self.set_driver_property(DriverProps.MAX_RESULT_SIZE, 64 * 1024 * 1024)
+        self.set_driver_property(DriverProps.ROW_COUNT_QUERY, "{query}\n| count")
         self.kql_cloud, self.az_cloud = self._set_kql_cloud()
         for option, value in kwargs.items():
             self._set_kql_option(option, value)
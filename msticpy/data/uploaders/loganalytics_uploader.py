@@ -19,6 +19,7 @@ from tqdm.notebook import tqdm
 
 from ..._version import VERSION
 from ...common.exceptions import MsticpyConnectionError
+from ...common.http_client import get_http_client
 from ...common.utility import mp_ua_header
 from .uploader_base import UploaderBase
 
@@ -127,7 +128,7 @@ class LAUploader(UploaderBase):
             **mp_ua_header(),
         }
         try:
-            response = httpx.post(
+            response = get_http_client().post(
                 uri, content=body, headers=headers, timeout=self.get_http_timeout()
             )
         except httpx.ConnectError as req_err:
@@ -45,6 +45,11 @@ class MsticpyCoreAccessor:
             Show additional status (the default is None)
         utf16 : bool, optional
             Attempt to decode UTF16 byte strings
+        n_jobs : int, optional
+            Number of processes to use to decode large DataFrames,
+            by default None (use the current process). -1 uses all CPUs.
+        executor : concurrent.futures.Executor, optional
+            Executor to use to decode in parallel, by default None.
 
         Returns
         -------
@@ -103,6 +108,13 @@ class MsticpyCoreAccessor:
             (the default is false - excludes 'windows_path'
             and 'linux_path'). If `ioc_types` is specified
             this parameter is ignored.
+        n_jobs : int, optional
+            Number of processes to use to extract IoCs from large
+            DataFrames, by default None (use the current process).
+            -1 uses all CPUs.
+        executor : concurrent.futures.Executor, optional
+            Executor to use to run the extraction in parallel,
+            by default None.
 
         Returns
         -------
@@ -134,6 +146,7 @@ class MsticpyCoreAccessor:
         schema: Union[ProcSchema, Dict[str, Any]] = None,
         show_summary: bool = False,
         debug: bool = False,
+        low_memory: bool = False,
     ) -> pd.DataFrame:
         """
         Build process trees from the process events.
@@ -150,6 +163,10 @@ class MsticpyCoreAccessor:
         debug : bool
             If True produces extra debugging output,
             by default False
+        low_memory : bool
+            If True, use a lower-memory method to match processes to
+            their parents, by default False. In this mode, processes are
+            only matched to parents on the same host.
 
         Returns
         -------
@@ -162,7 +179,11 @@ class MsticpyCoreAccessor:
 
         """
         return build_process_tree(
-            procs=self._df, schema=schema, show_summary=show_summary, debug=debug
+            procs=self._df,
+            schema=schema,
+            show_summary=show_summary,
+            debug=debug,
+            low_memory=low_memory,
         )
 
     def to_graph(self, **kwargs):
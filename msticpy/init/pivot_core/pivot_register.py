@@ -4,20 +4,26 @@
 # license information.
 # --------------------------------------------------------------------------
 """Pivot helper functions ."""
+import logging
+import pickle  # nosec
 import warnings
 from collections import abc
-from functools import wraps
-from typing import Any, Callable, Dict, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import attr
+import numpy as np
 import pandas as pd
 
 from ..._version import VERSION
+from ...common.utility.parallel import map_parallel
 from ...datamodel import entities
 
 __version__ = VERSION
 __author__ = "Ian Hellen"
 
+logger = logging.getLogger(__name__)
 
 _DF_SRC_COL_PARAM_NAMES = [
     "column",
@@ -27,6 +33,18 @@ _DF_SRC_COL_PARAM_NAMES = [
     "src_col",
 ]
 
+_EXEC_MODES = ("io", "cpu")
+
+# Entity attributes with values that can be compared case-insensitively
+_CASE_INSENSITIVE_ATTRS = {
+    "Dns": {"DomainName"},
+    "File": {"Md5", "Sha1", "Sha256", "Sha256Ac"},
+    "FileHash": {"Value"},
+    "Host": {"DnsDomain", "HostName", "NetBiosName", "NTDomain", "fqdn"},
+    "IpAddress": {"Address"},
+    "Url": {"host"},
+}
+
 
 @attr.s(auto_attribs=True)
 class PivotRegistration:
@@ -82,6 +100,21 @@ class PivotRegistration:
         try to format into a DataFrame. Default is False.
     create_shortcut : bool
         If True, create a shortcut function directly on the entity.
+    exec_mode : Optional[str]
+        How to run the function for multiple input values (only
+        relevant for input_type == value). "io" (for I/O-bound functions,
+        such as network lookups) runs the values in a thread pool,
+        "cpu" (for CPU-bound functions) runs them in a process pool.
+        The default (None) runs them serially.
+    max_concurrency : Optional[int]
+        The maximum number of threads or processes to use if `exec_mode`
+        is set. If None, use the default for the executor type.
+    dedupe_input : bool
+        If True (the default), call the function once for each distinct
+        input value (only relevant for input_type == value) and copy
+        the results to the rows with the same value. Values are compared
+        case-insensitively if all of the `entity_map` attributes are
+        case-insensitive (e.g. domain names, IP addresses and hashes).
 
     """
 
@@ -102,6 +135,12 @@ class PivotRegistration:
     entity_container_name: Optional[str] = None
     return_raw_output: bool = False
     create_shortcut: bool = False
+    exec_mode: Optional[str] = attr.ib(
+        default=None,
+        validator=attr.validators.optional(attr.validators.in_(_EXEC_MODES)),
+    )
+    max_concurrency: Optional[int] = None
+    dedupe_input: bool = True
 
     def attr_for_entity(self, entity: Union[entities.Entity, str]) -> Optional[str]:
         """
@@ -124,6 +163,14 @@ class PivotRegistration:
             ent_name = entity
         return self.entity_map.get(ent_name)
 
+    @property
+    def ignore_input_case(self) -> bool:
+        """Return True if the input values of all entities are case-insensitive."""
+        return bool(self.entity_map) and all(
+            ent_attr in _CASE_INSENSITIVE_ATTRS.get(ent_name, ())
+            for ent_name, ent_attr in self.entity_map.items()
+        )
+
 
 def create_pivot_func(
     target_func: Callable[[Any], Any],
@@ -182,6 +229,7 @@ def create_pivot_func(
         param_dict.update(pivot_reg.func_static_params or {})
 
         # Call the target function and collect the results
+        src_rows = None
         if pivot_reg.input_type == "value":
             if not pivot_reg.can_iterate and len(input_df) > 1:
                 raise TypeError(
@@ -189,7 +237,7 @@ def create_pivot_func(
                     "Try again with a single row/value as input.",
                     "E.g. func(data=df.iloc[N], column=...)",
                 )
-            result_df = _iterate_func(
+            result_df, src_rows = _iterate_func(
                 target_func, input_df, input_column, pivot_reg, **kwargs
             )
         else:
@@ -201,6 +249,19 @@ def create_pivot_func(
         if join_type and not pivot_reg.return_raw_output:
             left_on = left_on or input_column
             right_on = right_on or merge_key
+            if src_rows is not None and (left_on, right_on) == (
+                input_column,
+                merge_key,
+            ):
+                # we know the input row of each result row so can join
+                # on these rather than on the key values
+                return _join_src_rows(
+                    input_df=input_df,
+                    result_df=result_df,
+                    src_rows=src_rows,
+                    how=join_type,
+                    key_col=left_on if left_on == right_on else None,
+                ).drop(columns="src_row_index", errors="ignore")
             return join_result(
                 input_df=input_df,
                 result_df=result_df,
@@ -314,18 +375,81 @@ def join_result(
             suffixes=("_src", "_res"),
         )
 
-    # We need to join case-insensitive
-    left_on = f"{left_on}_lc"
-    input_df[left_on] = input_df[left_on].str.casefold()
-    right_on = f"{right_on}_lc"
-    result_df[right_on] = result_df[right_on].astype("string").str.casefold()
+    # We need to join case-insensitive - join on the codes
+    # of the case-folded key values
+    left_keys = input_df[left_on].astype("string").str.casefold()
+    right_keys = result_df[right_on].astype("string").str.casefold()
+    key_codes = _factorize_keys(pd.concat([left_keys, right_keys], ignore_index=True))
     return input_df.merge(
         result_df,
-        left_on=left_on,
-        right_on=right_on,
+        left_on=key_codes[: len(input_df)],
+        right_on=key_codes[len(input_df) :],
         how=how,
         suffixes=("_src", "_res"),
-    ).drop(columns=[left_on, right_on])
+    ).drop(columns="key_0")
+
+
+def _join_src_rows(
+    input_df: pd.DataFrame,
+    result_df: pd.DataFrame,
+    src_rows: np.ndarray,
+    how: str,
+    key_col: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Join input and result DFs using the input row of each result row.
+
+    Parameters
+    ----------
+    input_df : pd.DataFrame
+        Input DF
+    result_df : pd.DataFrame
+        Result DF
+    src_rows : np.ndarray
+        The position of the input row for each row of `result_df`
+    how : str
+        Join type - "inner", "left", "right", "outer"
+    key_col : Optional[str]
+        The name of the join key column, if this is the same
+        in both DFs (the result key column is dropped).
+
+    Returns
+    -------
+    pd.DataFrame
+        The joined DataFrame (in input row order)
+
+    """
+    res_rows = np.arange(len(result_df))
+    if how in ("left", "outer"):
+        # add the input rows with no results
+        no_result = np.ones(len(input_df), dtype=bool)
+        no_result[src_rows] = False
+        src_rows = np.concatenate([src_rows, np.flatnonzero(no_result)])
+        res_rows = np.concatenate([res_rows, np.full(no_result.sum(), -1)])
+        row_order = np.argsort(src_rows, kind="stable")
+        src_rows, res_rows = src_rows[row_order], res_rows[row_order]
+    left_df = input_df.iloc[src_rows].reset_index(drop=True)
+    right_df = result_df.reset_index(drop=True)
+    if key_col is not None:
+        right_df = right_df.drop(columns=key_col, errors="ignore")
+    if (res_rows < 0).any():
+        right_df = right_df.reindex(res_rows).reset_index(drop=True)
+    else:
+        right_df = right_df.iloc[res_rows].reset_index(drop=True)
+    common_cols = left_df.columns.intersection(right_df.columns)
+    return pd.concat(
+        [
+            left_df.rename(columns={col: f"{col}_src" for col in common_cols}),
+            right_df.rename(columns={col: f"{col}_res" for col in common_cols}),
+        ],
+        axis=1,
+    )
+
+
+def _factorize_keys(keys: pd.Series) -> np.ndarray:
+    """Return integer codes of `keys`, with a separate code for null values."""
+    codes, uniques = pd.factorize(keys)
+    return np.where(codes < 0, len(uniques), codes)
 
 
 def _get_entity_attr_or_self(obj, attrib):
@@ -474,41 +598,258 @@ def _create_input_df(input_value, pivot_reg, parent_kwargs):
 
 
 def _iterate_func(target_func, input_df, input_column, pivot_reg, **kwargs):
-    """Call `target_func` function with values of each row in `input_df`."""
-    results = []
+    """
+    Call `target_func` function with values of each row in `input_df`.
+
+    Parameters
+    ----------
+    target_func : Callable
+        The function to call
+    input_df : pd.DataFrame
+        The input data
+    input_column : str
+        The column containing the input values
+    pivot_reg : PivotRegistration
+        The pivot function registration object.
+
+    Other Parameters
+    ----------------
+    kwargs :
+        Other arguments passed to `target_func`
+
+    Returns
+    -------
+    Tuple[Any, Optional[np.ndarray]]
+        The results and the input row position of each result
+        row (None if `return_raw_output` is True).
+
+    Notes
+    -----
+    If `pivot_reg.dedupe_input` is True, the function is only
+    called for the first row with each distinct input value.
+    The results are copied to the other rows with that value.
+
+    """
     # Add any static parameters to all_rows_kwargs
-    all_rows_kwargs = kwargs.copy()
-    all_rows_kwargs.update((pivot_reg.func_static_params or {}))
+    func_kwargs = kwargs.copy()
+    func_kwargs.update((pivot_reg.func_static_params or {}))
+    # Get rid of any conflicting arguments from kwargs
+    func_kwargs.pop(pivot_reg.func_input_value_arg, None)
     res_key_col_name = pivot_reg.func_out_column_name or pivot_reg.func_input_value_arg
 
-    for row_index, row in enumerate(input_df[[input_column]].itertuples(index=False)):
-        # Get rid of any conflicting arguments from kwargs
-        func_kwargs = all_rows_kwargs.copy()
-        func_kwargs.pop(pivot_reg.func_input_value_arg, None)
-        # Create a param dictionary with the value parameter for this row
-        param_dict = {pivot_reg.func_input_value_arg: row[0]}
-        # run the function
-        result = target_func(**param_dict, **all_rows_kwargs)
-
-        # Process the output, if it is a DataFrame
-        if not pivot_reg.return_raw_output and not isinstance(result, pd.DataFrame):
-            col_value = next(iter(row._asdict().values()))
-            if isinstance(result, dict):
-                # if result is a dict - make that into a row.
-                result = pd.DataFrame(pd.Series(result)).T
-                result[res_key_col_name] = col_value
-            else:
-                # just make the result into a string and use that as a single col
-                result = pd.DataFrame(
-                    [[col_value, str(result)]], columns=[res_key_col_name, "result"]
-                )
-            result["src_row_index"] = row_index
-        results.append(result)
+    input_values = input_df[input_column]
+    value_codes, first_rows = _dedupe_input(input_values, pivot_reg)
+    values = input_values.iloc[first_rows].tolist()
+    results = _run_rows(target_func, values, pivot_reg, func_kwargs)
     if pivot_reg.return_raw_output:
+        results = [results[code] for code in value_codes]
         if len(results) == 1:
-            return results[0]
-        return results
-    return pd.concat(results, ignore_index=True)
+            return results[0], None
+        return results, None
+    result_df = _assemble_results(results, values, res_key_col_name)
+    if np.array_equal(value_codes, np.arange(len(input_df))):
+        row_counts = np.array([_result_rows(result) for result in results])
+        return result_df, np.repeat(np.arange(len(input_df)), row_counts)
+    return _fan_out_results(
+        result_df, results, value_codes, input_values, res_key_col_name
+    )
+
+
+def _dedupe_input(
+    input_values: pd.Series, pivot_reg: PivotRegistration
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the distinct value code of each row and first row of each value."""
+    all_rows = np.arange(len(input_values))
+    if not pivot_reg.dedupe_input or len(input_values) < 2:
+        return all_rows, all_rows
+    keys = input_values
+    if pivot_reg.ignore_input_case and keys.dtype.name in ("string", "object"):
+        keys = keys.map(lambda val: val.casefold() if isinstance(val, str) else val)
+    try:
+        value_codes = _factorize_keys(keys)
+    except TypeError:
+        # unhashable values
+        return all_rows, all_rows
+    _, first_rows = np.unique(value_codes, return_index=True)
+    return value_codes, first_rows
+
+
+def _result_rows(result: Any) -> int:
+    """Return the number of output rows from a function result."""
+    return len(result) if isinstance(result, pd.DataFrame) else 1
+
+
+def _fan_out_results(
+    result_df: pd.DataFrame,
+    results: List[Any],
+    value_codes: np.ndarray,
+    input_values: pd.Series,
+    res_key_col_name: str,
+) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Copy the results for distinct input values to all input rows.
+
+    Parameters
+    ----------
+    result_df : pd.DataFrame
+        The results for the distinct input values
+    results : List[Any]
+        The function result for each distinct value
+    value_codes : np.ndarray
+        The distinct value code (index of `results`) for each input row
+    input_values : pd.Series
+        The input values
+    res_key_col_name : str
+        The name of the output column for the input values
+
+    Returns
+    -------
+    Tuple[pd.DataFrame, np.ndarray]
+        The results for each input row, and the input
+        row position of each result row.
+
+    """
+    value_rows = np.array([_result_rows(result) for result in results])
+    value_starts = np.cumsum(value_rows) - value_rows
+    row_counts = value_rows[value_codes]
+    src_rows = np.repeat(np.arange(len(value_codes)), row_counts)
+    # position of each row's results in result_df (the results of each
+    # distinct value are a contiguous range of rows)
+    result_pos = np.repeat(
+        value_starts[value_codes] - (np.cumsum(row_counts) - row_counts), row_counts
+    ) + np.arange(len(src_rows))
+    row_results = result_df.take(result_pos).reset_index(drop=True)
+
+    # update the input value and row index of results not returned as DataFrames
+    is_value_row = np.array(
+        [not isinstance(result, pd.DataFrame) for result in results]
+    )[value_codes][src_rows]
+    if is_value_row.all():
+        row_results[res_key_col_name] = input_values.to_numpy()[src_rows]
+        row_results["src_row_index"] = src_rows
+    elif is_value_row.any():
+        value_src_rows = src_rows[is_value_row]
+        row_results.loc[is_value_row, res_key_col_name] = input_values.to_numpy()[
+            value_src_rows
+        ]
+        row_results.loc[is_value_row, "src_row_index"] = value_src_rows
+    return row_results, src_rows
+
+
+def _call_with_value(value, target_func, value_arg, func_kwargs):
+    """Call `target_func` with a single input value."""
+    return target_func(**{value_arg: value}, **func_kwargs)
+
+
+def _run_rows(
+    target_func: Callable[..., Any],
+    values: List[Any],
+    pivot_reg: PivotRegistration,
+    func_kwargs: Dict[str, Any],
+) -> List[Any]:
+    """Return results of `target_func` for each of `values` (in order)."""
+    row_func = partial(
+        _call_with_value,
+        target_func=target_func,
+        value_arg=pivot_reg.func_input_value_arg,
+        func_kwargs=func_kwargs,
+    )
+    exec_mode = pivot_reg.exec_mode
+    if not exec_mode or len(values) < 2 or pivot_reg.max_concurrency == 1:
+        return [row_func(value) for value in values]
+    if exec_mode == "cpu":
+        try:
+            pickle.dumps(row_func)
+        except Exception as err:  # pylint: disable=broad-except
+            logger.warning(
+                "Cannot run %s in a process pool (%s) - using threads",
+                pivot_reg.func_new_name or pivot_reg.src_func_name,
+                err,
+            )
+        else:
+            return map_parallel(
+                row_func, values, n_jobs=pivot_reg.max_concurrency or -1
+            )
+    with ThreadPoolExecutor(max_workers=pivot_reg.max_concurrency) as executor:
+        return list(executor.map(row_func, values))
+
+
+def _assemble_results(
+    results: List[Any], values: List[Any], res_key_col_name: str
+) -> pd.DataFrame:
+    """
+    Create a DataFrame from the per-row results.
+
+    Parameters
+    ----------
+    results : List[Any]
+        The function result for each input row
+    values : List[Any]
+        The input value of each row
+    res_key_col_name : str
+        The name of the output column for the input values
+
+    Returns
+    -------
+    pd.DataFrame
+        The concatenated results, in input row order.
+
+    Notes
+    -----
+    DataFrame results are returned as is. Consecutive scalar
+    and dict results are collected and converted into a single
+    DataFrame (dict keys become columns, other results are
+    converted to strings in a "result" column), with the input
+    value and the input row index ("src_row_index") added.
+
+    """
+    frames: List[pd.DataFrame] = []
+    row_indexes: List[int] = []
+    for row_index, result in enumerate(results):
+        if isinstance(result, pd.DataFrame):
+            if row_indexes:
+                frames.append(
+                    _rows_to_df(results, values, row_indexes, res_key_col_name)
+                )
+                row_indexes = []
+            frames.append(result)
+        else:
+            row_indexes.append(row_index)
+    if row_indexes or not frames:
+        frames.append(_rows_to_df(results, values, row_indexes, res_key_col_name))
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _rows_to_df(
+    results: List[Any],
+    values: List[Any],
+    row_indexes: List[int],
+    res_key_col_name: str,
+) -> pd.DataFrame:
+    """Return a DataFrame of the scalar or dict results at `row_indexes`."""
+    if not any(isinstance(results[idx], dict) for idx in row_indexes):
+        return pd.DataFrame(
+            {
+                res_key_col_name: [values[idx] for idx in row_indexes],
+                "result": [str(results[idx]) for idx in row_indexes],
+                "src_row_index": row_indexes,
+            }
+        )
+    records = [
+        {
+            **(
+                results[idx]
+                if isinstance(results[idx], dict)
+                else {"result": str(results[idx])}
+            ),
+            res_key_col_name: values[idx],
+            "src_row_index": idx,
+        }
+        for idx in row_indexes
+    ]
+    return pd.DataFrame.from_records(records)
 
 
 # _PARENT_SELF = "parent_self"
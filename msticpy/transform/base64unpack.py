@@ -34,14 +34,18 @@ import tarfile
 import warnings
 import zipfile
 from collections import namedtuple
+from concurrent.futures import Executor
+from functools import lru_cache
 
 # pylint: disable=unused-import
 from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
 from .._version import VERSION
 from ..common.utility import export
+from ..common.utility.parallel import run_partitioned
 
 __version__ = VERSION
 __author__ = "Ian Hellen"
@@ -102,6 +106,11 @@ _debug_trace = False
 
 _STRIP_TAGS = r"</?decoded[^>]*>"
 
+# Maximum number of unique strings for which decoded results are cached
+_DECODE_CACHE_SIZE = 1024
+# Size of chunks of binary data passed to hash functions
+_HASH_CHUNK_SIZE = 1024 * 1024
+
 
 def _get_trace_setting() -> Callable[[Optional[bool]], bool]:
     """Closure for holding trace setting."""
@@ -260,7 +269,12 @@ def unpack(
 
 @export
 def unpack_df(
-    data: pd.DataFrame, column: str, trace: bool = False, utf16: bool = False
+    data: pd.DataFrame,
+    column: str,
+    trace: bool = False,
+    utf16: bool = False,
+    n_jobs: Optional[int] = None,
+    executor: Optional[Executor] = None,
 ) -> pd.DataFrame:
     """
     Base64 decode strings taken from a pandas dataframe.
@@ -275,6 +289,12 @@ def unpack_df(
         Show additional status (the default is None)
     utf16 : bool, optional
         Attempt to decode UTF16 byte strings
+    n_jobs : Optional[int], optional
+        Number of processes to use to decode large DataFrames,
+        by default None (use the current process). -1 uses all CPUs.
+    executor : Optional[Executor], optional
+        Executor to use to decode in parallel, by default None
+        (a process pool is created if `n_jobs` is specified).
 
     Returns
     -------
@@ -312,24 +332,62 @@ def unpack_df(
       frame.
 
     """
+    if n_jobs not in (None, 1) or executor is not None:
+        return run_partitioned(
+            unpack_df,
+            data,
+            n_jobs=n_jobs,
+            executor=executor,
+            column=column,
+            trace=trace,
+            utf16=utf16,
+        )
     _GET_TRACE(trace)
     _GET_UTF16(utf16)
 
     output_df = pd.DataFrame(columns=BinaryRecord._fields)
-    row_results: List[pd.DataFrame] = []
-    rows_with_b64_match = data[data[column].str.contains(_BASE64_REGEX_NG)]
-    for input_row in rows_with_b64_match[[column]].itertuples():
-        (decoded_string, output_frame) = _decode_b64_string_recursive(input_row[1])
-        output_frame["src_index"] = input_row.Index
-        output_frame[column] = input_row._asdict()[column]
-        output_frame["full_decoded_string"] = decoded_string
-        row_results.append(output_frame)
-
-    if row_results:
-        output_df = pd.concat(row_results, ignore_index=True)
+    rows_with_b64_match = data[data[column].str.contains(_BASE64_REGEX_NG)][column]
+    if rows_with_b64_match.empty:
+        return output_df
+
+    # decode each unique string once and replicate the results for
+    # each row containing that string
+    unique_results: Dict[str, pd.DataFrame] = {}
+    for input_string in rows_with_b64_match.unique():
+        decoded_string, output_frame = _decode_b64_string_cached(
+            input_string, _GET_UTF16()
+        )
+        unique_results[input_string] = output_frame.assign(
+            **{column: input_string, "full_decoded_string": decoded_string}
+        )
+    row_results = [unique_results[input_string] for input_string in rows_with_b64_match]
+    output_df = pd.concat(row_results, ignore_index=True)
+    output_df.insert(
+        len(BinaryRecord._fields),
+        "src_index",
+        np.repeat(
+            rows_with_b64_match.index.values,
+            [len(row_result) for row_result in row_results],
+        ),
+    )
     return output_df
 
 
+@lru_cache(maxsize=_DECODE_CACHE_SIZE)
+def _decode_b64_string_cached(
+    input_string: str, utf16: bool
+) -> Tuple[str, pd.DataFrame]:
+    """
+    Return memoized results of `_decode_b64_string_recursive`.
+
+    The `utf16` setting is part of the cache key since it changes
+    the decoding results. Callers must not modify the returned DataFrame.
+
+    """
+    del utf16
+    return _decode_b64_string_recursive(input_string)
+
+
 # pylint: disable=too-many-locals
 def _decode_b64_string_recursive(
     input_string: str,
@@ -558,7 +616,7 @@ def _print_bytes(bytes_array: bytes):
 
 
 def _as_byte_string(bytes_array) -> str:
-    return " ".join(f"{b:02x}" for b in bytes_array)
+    return bytes_array.hex(" ")
 
 
 def _empty_binary_rec() -> BinaryRecord:
@@ -763,9 +821,8 @@ def get_items_from_zip(binary: bytes) -> Tuple[str, Dict[str, bytes]]:
     file_obj = io.BytesIO(binary)
     with zipfile.ZipFile(file_obj, mode="r") as zip_archive:
         archive_dict = {}
-        for item in zip_archive.namelist():
-            archive_file = zip_archive.read(item)
-            archive_dict[item] = archive_file
+        for item in zip_archive.infolist():
+            archive_dict[item.filename] = zip_archive.read(item)
         return "zip", archive_dict
 
 
@@ -790,9 +847,9 @@ def get_items_from_tar(binary: bytes) -> Tuple[str, Dict[str, bytes]]:
     with tarfile.open(mode="r", fileobj=file_obj) as tar:
         archive_dict: Dict[str, bytes] = {}
         # Iterate over every member
-        for item in tar.getnames():
+        for item in tar.getmembers():
             tar_file = tar.extractfile(item)
-            archive_dict[item] = tar_file.read() if tar_file else b""
+            archive_dict[item.name] = tar_file.read() if tar_file else b""
         return "tar", archive_dict
 
 
@@ -812,23 +869,26 @@ def get_hashes(binary: bytes) -> Dict[str, str]:
         dictionary of hash algorithm + hash value
 
     """
-    hash_dict = {}
-    for hash_type in ["md5", "sha1", "sha256"]:
-        if hash_type == "md5":
-            hash_alg = hashlib.md5()  # nosec
-        elif hash_type == "sha1":
-            hash_alg = hashlib.sha1()  # nosec
-        else:
-            hash_alg = hashlib.sha256()
-        hash_alg.update(binary)
-        hash_dict[hash_type] = hash_alg.hexdigest()
-    return hash_dict
+    hash_algs = {
+        "md5": hashlib.md5(),  # nosec
+        "sha1": hashlib.sha1(),  # nosec
+        "sha256": hashlib.sha256(),
+    }
+    # update all of the hashes with each chunk of the data in a single pass
+    bin_view = memoryview(binary)
+    for offset in range(0, len(bin_view), _HASH_CHUNK_SIZE):
+        chunk = bin_view[offset : offset + _HASH_CHUNK_SIZE]  # noqa: E203
+        for hash_alg in hash_algs.values():
+            hash_alg.update(chunk)
+    return {
+        hash_type: hash_alg.hexdigest() for hash_type, hash_alg in hash_algs.items()
+    }
 
 
 def _binary_to_bytesio(binary: Union[bytes, io.BytesIO]) -> memoryview:
     if isinstance(binary, io.BytesIO):
         return binary.getbuffer()
-    return io.BytesIO(binary).getbuffer()
+    return memoryview(binary)
 
 
 def _b64_string_pad(string: str) -> str:
@@ -863,6 +923,11 @@ class B64ExtractAccessor:
             Show additional status (the default is None)
         utf16 : bool, optional
             Attempt to decode UTF16 byte strings
+        n_jobs : int, optional
+            Number of processes to use to decode large DataFrames,
+            by default None (use the current process). -1 uses all CPUs.
+        executor : concurrent.futures.Executor, optional
+            Executor to use to decode in parallel, by default None.
 
         Returns
         -------
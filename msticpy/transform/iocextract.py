@@ -27,6 +27,7 @@ import re
 import warnings
 from collections import defaultdict, namedtuple
 from enum import Enum
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Set, Tuple, Union
 from urllib.parse import unquote
 
@@ -35,6 +36,7 @@ import pandas as pd
 from .._version import VERSION
 from ..common.utility import check_kwargs, export
 from ..common.utility.format import refang_ioc
+from ..common.utility.parallel import run_partitioned
 
 __version__ = VERSION
 __author__ = "Ian Hellen"
@@ -47,6 +49,8 @@ def _compile_regex(regex):
 IoCPattern = namedtuple("IoCPattern", ["ioc_type", "comp_regex", "priority", "group"])
 
 _RESULT_COLS = ["IoCType", "Observable", "SourceIndex", "Input"]
+_TLD_CACHE_SIZE = 65536
+_PARALLEL_ARGS = ["n_jobs", "executor"]
 
 
 @export
@@ -231,9 +235,36 @@ class IoCExtract:
 
         # pylint: enable=import-outside-toplevel
         self._dom_validator = DomainValidator()
+        # TLD lookups are relatively expensive and domains repeat a lot
+        self._check_tld = lru_cache(maxsize=_TLD_CACHE_SIZE)(
+            self._dom_validator.validate_tld
+        )
         self._ignore_tld = False
         self._defanged = defanged
 
+    def __getstate__(self):
+        """Return state for pickling (used for parallel extraction)."""
+        state = self.__dict__.copy()
+        # the IoC patterns are class attributes
+        state["_content_regex"] = dict(self._content_regex)
+        state["_content_df_regex"] = dict(self._content_df_regex)
+        del state["_dom_validator"]
+        del state["_check_tld"]
+        return state
+
+    def __setstate__(self, state):
+        """Restore state from pickled `state`."""
+        self.__dict__.update(state)
+        # inline import due to circular dependency
+        # pylint: disable=import-outside-toplevel
+        from ..context.domain_utils import DomainValidator
+
+        # pylint: enable=import-outside-toplevel
+        self._dom_validator = DomainValidator()
+        self._check_tld = lru_cache(maxsize=_TLD_CACHE_SIZE)(
+            self._dom_validator.validate_tld
+        )
+
     # Public members
     def add_ioc_type(
         self,
@@ -408,36 +439,53 @@ class IoCExtract:
                 " in supplied DataFrame",
             )
 
-        result_rows: List[pd.Series] = []
-        for idx, datarow in data.iterrows():
-            result_rows.extend(
-                self._search_in_row(datarow, idx, columns, ioc_types_to_use, defanged)
-            )
+        results = self._search_in_df(data, columns, ioc_types_to_use, defanged)
         self._ignore_tld = ignore_tld_current
-        return pd.DataFrame(data=result_rows, columns=_RESULT_COLS)
+        return results
 
-    # pylint: disable=too-many-arguments
-    def _search_in_row(
+    def _search_in_df(
         self,
-        datarow: pd.Series,
-        idx: Any,
+        data: pd.DataFrame,
         columns: List[str],
         ioc_types_to_use: List[str],
         defanged: bool = True,
-    ) -> List[pd.Series]:
-        """Return results for a single input row."""
-        result_rows = []
-        for col in columns:
-            ioc_results = self._scan_for_iocs(datarow[col], ioc_types_to_use, defanged)
-            for result_type, result_set in ioc_results.items():
-                if result_set:
-                    for observable in result_set:
-                        result_row = pd.Series(
-                            data=[result_type, observable, idx, datarow[col]],
-                            index=_RESULT_COLS,
-                        )
-                        result_rows.append(result_row)
-        return result_rows
+    ) -> pd.DataFrame:
+        """Return results for all rows of `data`."""
+        col_results = [
+            self._search_in_column(data[col], ioc_types_to_use, defanged)
+            for col in columns
+        ]
+        # Results are ordered by row, column, IoC type, as if each
+        # row were scanned in turn.
+        result_rows: List[Tuple[str, str, Any, Any]] = []
+        for idx, *row_results in zip(data.index, *col_results):
+            for src, ioc_results in row_results:
+                for result_type, result_set in ioc_results.items():
+                    result_rows.extend(
+                        (result_type, observable, idx, src) for observable in result_set
+                    )
+        return pd.DataFrame(data=result_rows, columns=_RESULT_COLS)
+
+    def _search_in_column(
+        self, values: pd.Series, ioc_types_to_use: List[str], defanged: bool = True
+    ) -> List[Tuple[Any, Dict[str, Set[str]]]]:
+        """Return the source and IoC results for each value in `values`."""
+        # Each distinct string is only scanned once - log data
+        # typically has many repeated values (e.g. command lines)
+        scanned: Dict[str, Dict[str, Set[str]]] = {}
+        col_results = []
+        for src in values.tolist():
+            if not isinstance(src, str):
+                col_results.append(
+                    (src, self._scan_for_iocs(src, ioc_types_to_use, defanged))
+                )
+                continue
+            ioc_results = scanned.get(src)
+            if ioc_results is None:
+                ioc_results = self._scan_for_iocs(src, ioc_types_to_use, defanged)
+                scanned[src] = ioc_results
+            col_results.append((src, ioc_results))
+        return col_results
 
     def extract_df(
         self, data: pd.DataFrame, columns: Union[str, List[str]], **kwargs
@@ -470,6 +518,14 @@ class IoCExtract:
         defanged : bool, optional
             If True will match defanged versions of from email, dns,
             url and ip entities.
+        n_jobs : int, optional
+            Number of processes to use to extract IoCs from large
+            DataFrames, by default None (use the current process).
+            -1 uses all CPUs.
+        executor : concurrent.futures.Executor, optional
+            Executor to use to run the extraction in parallel,
+            by default None (a process pool is created if `n_jobs`
+            is specified).
 
         Returns
         -------
@@ -494,7 +550,21 @@ class IoCExtract:
         is True or explicitly included in `ioc_types`.
 
         """
-        check_kwargs(kwargs, ["ioc_types", "include_paths", "ignore_tlds", "defanged"])
+        check_kwargs(
+            kwargs,
+            ["ioc_types", "include_paths", "ignore_tlds", "defanged", *_PARALLEL_ARGS],
+        )
+        n_jobs = kwargs.pop("n_jobs", None)
+        executor = kwargs.pop("executor", None)
+        if n_jobs not in (None, 1) or executor is not None:
+            return run_partitioned(
+                self.extract_df,
+                data,
+                n_jobs=n_jobs,
+                executor=executor,
+                columns=columns,
+                **kwargs,
+            )
         ioc_types = kwargs.get("ioc_types")
         include_paths = kwargs.get("include_paths", False)
         ignore_tld_current = self._ignore_tld
@@ -512,13 +582,9 @@ class IoCExtract:
                 " in supplied DataFrame",
             )
 
-        result_rows = []
-        for idx, datarow in data.iterrows():
-            result_rows.extend(
-                self._search_in_row(datarow, idx, columns, ioc_types_to_use, defanged)
-            )
+        results = self._search_in_df(data, columns, ioc_types_to_use, defanged)
         self._ignore_tld = ignore_tld_current
-        return pd.DataFrame(data=result_rows, columns=_RESULT_COLS)
+        return results
 
     def _get_ioc_types_to_use(
         self, ioc_types: Optional[List[str]], include_paths: bool
@@ -647,7 +713,7 @@ class IoCExtract:
         """If validate TLDS check with TLD list."""
         if self._ignore_tld:
             return True
-        return self._dom_validator.validate_tld(domain.replace("[.]", "."))
+        return self._check_tld(domain.replace("[.]", "."))
 
     def _scan_for_iocs(
         self,
@@ -753,6 +819,13 @@ class IoCExtractAccessor:
             (the default is false - excludes 'windows_path'
             and 'linux_path'). If `ioc_types` is specified
             this parameter is ignored.
+        n_jobs : int, optional
+            Number of processes to use to extract IoCs from large
+            DataFrames, by default None (use the current process).
+            -1 uses all CPUs.
+        executor : concurrent.futures.Executor, optional
+            Executor to use to run the extraction in parallel,
+            by default None.
 
         Returns
         -------
@@ -4,8 +4,12 @@
 # license information.
 # --------------------------------------------------------------------------
 """Process Tree builder for Windows security and Linux auditd events."""
+from typing import List, Tuple
+
 import attr
+import numpy as np
 import pandas as pd
+from pandas.api.extensions import take
 
 from .._version import VERSION
 from ..common.data_utils import ensure_df_datetimes
@@ -23,6 +27,7 @@ def extract_process_tree(
     procs: pd.DataFrame,
     schema: "ProcSchema",  # type: ignore  # noqa: F821
     debug: bool = False,
+    low_memory: bool = False,
 ) -> pd.DataFrame:
     """
     Build process trees from the process events.
@@ -39,6 +44,11 @@ def extract_process_tree(
     debug : bool
         If True produces extra debugging output,
         by default False
+    low_memory : bool
+        If True, use integer-encoded keys to match processes to
+        their parents, avoiding copies of the process data, by default False.
+        In this mode, processes are only matched to parent processes
+        on the same host (if the schema has a host name column).
 
     Returns
     -------
@@ -54,7 +64,10 @@ def extract_process_tree(
     procs_cln, schema = _clean_proc_data(procs, schema)
 
     # Merge parent-child
-    merged_procs = _merge_parent_by_time(procs_cln, schema)
+    if low_memory:
+        merged_procs = _merge_parent_by_time_codes(procs_cln, schema)
+    else:
+        merged_procs = _merge_parent_by_time(procs_cln, schema)
     if debug:
         _check_merge_status(procs_cln, merged_procs, schema)
 
@@ -64,14 +77,15 @@ def extract_process_tree(
         _check_inferred_parents(merged_procs, merged_procs_par)
 
     # Create Process and parent Keys
-    _assign_proc_key(
+    assign_key = _assign_proc_key_by_group if low_memory else _assign_proc_key
+    assign_key(
         merged_procs_par,
         Col.proc_key,
         Col.new_process_lc,
         schema.process_id,
         schema.time_stamp,
     )
-    _assign_proc_key(
+    assign_key(
         merged_procs_par,
         Col.parent_key,
         Col.parent_proc_lc,
@@ -163,28 +177,11 @@ def _merge_parent_by_time(
 ) -> pd.DataFrame:
     """Merge procs with parents using merge_asof."""
     parent_procs = (
-        procs[
-            [
-                schema.process_id,
-                Col.EffectiveLogonId,
-                Col.new_process_lc,
-                Col.source_index,
-                schema.parent_id,
-                schema.time_stamp,
-                schema.process_name,
-            ]
-        ]
+        procs[_get_parent_cols(schema)]
         .assign(timestamp_orig_par=procs[schema.time_stamp])
         .sort_values(schema.time_stamp, ascending=True)
     )
-    # if we have a parent name (Windows) - use that as part of the
-    # match
-    if schema.parent_name:
-        par_join_cols = [schema.process_id, Col.new_process_lc]
-        child_join_cols = [schema.parent_id, Col.parent_proc_lc]
-    else:
-        par_join_cols = [schema.process_id]
-        child_join_cols = [schema.parent_id]
+    par_join_cols, child_join_cols = _get_join_cols(schema)
     # merge_asof merges on the "by" fields and then the closest time
     # match in the time_stamp field. The default is to look backwards
     # for a match on the right of the join (parent) that is a time earlier
@@ -201,6 +198,113 @@ def _merge_parent_by_time(
     )
 
 
+def _merge_parent_by_time_codes(
+    procs: pd.DataFrame,
+    schema: "ProcSchema",  # type: ignore  # noqa: F821
+) -> pd.DataFrame:
+    """
+    Merge procs with parents using integer-encoded keys.
+
+    This produces the same columns as `_merge_parent_by_time`
+    but only the time stamps and integer join keys are passed
+    to merge_asof. The parent columns are then added to `procs`
+    (which is modified in place) from the matched parent rows.
+
+    """
+    # use the same ordering as sort_values, avoiding a copy if the
+    # data is already in this order
+    time_order = (
+        pd.Series(procs[schema.time_stamp].array).sort_values().index.to_numpy()
+    )
+    if not np.array_equal(time_order, np.arange(len(procs))):
+        procs = procs.take(time_order)
+    procs.index = pd.RangeIndex(len(procs))
+
+    par_join_cols, child_join_cols = _get_join_cols(schema)
+    if schema.host_name:
+        par_join_cols = [schema.host_name, *par_join_cols]
+        child_join_cols = [schema.host_name, *child_join_cols]
+    child_keys, par_keys = _encode_join_keys(procs, child_join_cols, par_join_cols)
+    time_stamps = procs[schema.time_stamp].array
+    # merge_asof merges on the "by" field and then the closest time
+    # match in the time_stamp field - looking backwards for a parent
+    # earlier than the child process
+    par_rows = pd.merge_asof(
+        left=pd.DataFrame({"time_stamp": time_stamps, "key": child_keys}),
+        right=pd.DataFrame(
+            {
+                "time_stamp": time_stamps,
+                "key": par_keys,
+                "par_row": np.arange(len(procs)),
+            }
+        ),
+        on="time_stamp",
+        by="key",
+    )["par_row"]
+    par_rows = par_rows.fillna(-1).to_numpy(dtype=np.int64)
+
+    if Col.source_index_par in procs.columns:
+        procs = procs.drop(columns=Col.source_index_par)
+    for col in _get_parent_cols(schema):
+        if col != schema.time_stamp:
+            procs[f"{col}_par"] = _take_rows(procs[col], par_rows)
+    procs[Col.timestamp_orig_par] = _take_rows(procs[schema.time_stamp], par_rows)
+    return procs
+
+
+def _take_rows(values: pd.Series, rows: np.ndarray):
+    """Return the values at positions `rows` (missing values for -1)."""
+    if pd.api.types.is_extension_array_dtype(values.dtype):
+        return take(values.array, rows, allow_fill=True)
+    return take(values.to_numpy(), rows, allow_fill=True)
+
+
+def _get_parent_cols(
+    schema: "ProcSchema",  # type: ignore  # noqa: F821
+) -> List[str]:
+    """Return the columns of the parent process used in the merge."""
+    return [
+        schema.process_id,
+        Col.EffectiveLogonId,
+        Col.new_process_lc,
+        Col.source_index,
+        schema.parent_id,
+        schema.time_stamp,
+        schema.process_name,
+    ]
+
+
+def _get_join_cols(
+    schema: "ProcSchema",  # type: ignore  # noqa: F821
+) -> Tuple[List[str], List[str]]:
+    """Return the parent and child columns used to match parent processes."""
+    # if we have a parent name (Windows) - use that as part of the
+    # match
+    if schema.parent_name:
+        return (
+            [schema.process_id, Col.new_process_lc],
+            [schema.parent_id, Col.parent_proc_lc],
+        )
+    return [schema.process_id], [schema.parent_id]
+
+
+def _encode_join_keys(
+    procs: pd.DataFrame, child_cols: List[str], par_cols: List[str]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return integer keys for the child and parent join columns."""
+    n_procs = len(procs)
+    keys = np.zeros(2 * n_procs, dtype=np.int64)
+    for child_col, par_col in zip(child_cols, par_cols):
+        col_codes, col_values = pd.factorize(
+            pd.concat([procs[child_col], procs[par_col]], ignore_index=True)
+        )
+        # missing values match each other (as in merge_asof)
+        col_codes[col_codes < 0] = len(col_values)
+        # combine with the previous columns and re-number the keys
+        keys, _ = pd.factorize(keys * (len(col_values) + 1) + col_codes)
+    return keys[:n_procs], keys[n_procs:]
+
+
 def _extract_inferred_parents(
     merged_procs: pd.DataFrame, schema: "ProcSchema"  # type: ignore  # noqa: F821
 ) -> pd.DataFrame:
@@ -286,6 +390,24 @@ def _assign_proc_key(
     # proc_data[key_name] = proc_data[key_name].fillna("")
 
 
+def _assign_proc_key_by_group(
+    proc_data: pd.DataFrame,
+    key_name: str,
+    proc_name_col: str,
+    proc_id_col: str,
+    timestamp_col: str,
+):
+    """Create process keys, sharing key strings between rows for the same process."""
+    key_cols = [proc_name_col, proc_id_col, timestamp_col]
+    key_ids = (
+        proc_data[key_cols].groupby(key_cols, sort=False, dropna=False).ngroup()
+    ).to_numpy()
+    _, first_rows = np.unique(key_ids, return_index=True)
+    proc_keys = proc_data.iloc[first_rows][key_cols].copy()
+    _assign_proc_key(proc_keys, key_name, *key_cols)
+    proc_data[key_name] = proc_keys[key_name].to_numpy()[key_ids]
+
+
 # Diagnostic/debug functions
 def _check_merge_status(procs, merged_procs, schema):
     """Diagnostic for _merge_parent_by_time."""
@@ -6,11 +6,13 @@
 """Process Tree Builder module for Process Tree Visualization."""
 from typing import Any, Dict, Optional, Union
 
+import numpy as np
 import pandas as pd
 
 from .._version import VERSION
 from . import proc_tree_build_mde as mde
 from . import proc_tree_build_winlx as winlx
+from .proc_tree_index import ProcTreeIndex
 
 # pylint: disable=unused-import
 from .proc_tree_schema import ProcSchema  # noqa: F401
@@ -36,6 +38,7 @@ def build_process_tree(
     schema: Union[ProcSchema, Dict[str, Any]] = None,
     show_summary: bool = False,
     debug: bool = False,
+    low_memory: bool = False,
     **kwargs,
 ) -> pd.DataFrame:
     """
@@ -55,6 +58,11 @@ def build_process_tree(
     debug : bool
         If True produces extra debugging output,
         by default False
+    low_memory : bool
+        If True, use a lower-memory method to match processes to
+        their parents, by default False. In this mode, processes are
+        only matched to parents on the same host. This is only
+        used for Windows and Linux process events.
 
     Returns
     -------
@@ -88,7 +96,9 @@ def build_process_tree(
     if schema == MDE_INT_EVENT_SCH:
         extr_proc_tree = mde.extract_process_tree(procs, debug=debug)
     else:
-        extr_proc_tree = winlx.extract_process_tree(procs, schema=schema, debug=debug)
+        extr_proc_tree = winlx.extract_process_tree(
+            procs, schema=schema, debug=debug, low_memory=low_memory
+        )
     merged_procs_keys = _add_tree_properties(extr_proc_tree)
 
     # Build process paths
@@ -173,42 +183,28 @@ def build_proc_tree(input_tree: pd.DataFrame, max_depth: int = -1) -> pd.DataFra
         DataFrame with ordered paths for each process.
 
     """
-    # set default path == current process row index
-    input_tree["path"] = input_tree[Col.source_index]
-    # input_tree["parent_index"] = np.nan
-
-    cur_level = input_tree[input_tree["IsRoot"]]
-    remaining_procs = input_tree[~input_tree["IsRoot"]]
-
-    cur_level_num = 0
-    while True:
-        sel_crit = remaining_procs[Col.parent_key].isin(cur_level.index)
-        next_level = remaining_procs[sel_crit].copy()
-        remaining_procs = remaining_procs[~sel_crit]
-
-        if next_level.empty:
-            break
-        if max_depth != -1 and cur_level_num >= max_depth:
-            print(f"max path depth reached: {cur_level_num}")
-            break
-
-        # merge next level with current level
-        tmp_df = next_level.merge(
-            cur_level[[Col.source_index, "path"]],
-            how="inner",
-            left_on=Col.parent_key,
-            right_index=True,
-        )
-
-        # Build the path of these processes
-        # = parent_path + child source_index
-        next_level.loc[tmp_df.index, "path"] = (
-            tmp_df["path_y"] + "/" + tmp_df["source_index_x"]
-        )
-        input_tree.loc[next_level.index, "path"] = next_level["path"]
-        input_tree.loc[tmp_df.index, "parent_index"] = tmp_df["source_index_y"]
-
-        cur_level = next_level
-        cur_level_num += 1
+    tree_index = ProcTreeIndex(input_tree.index, input_tree[Col.parent_key])
+    source_index = input_tree[Col.source_index].to_numpy(dtype=object)
+    # only processes that descend from a root process get a tree path
+    in_tree = input_tree["IsRoot"].to_numpy(dtype=bool)[tree_index.root]
+    if max_depth != -1:
+        too_deep = in_tree & (tree_index.depth > max_depth)
+        if too_deep.any():
+            print(f"max path depth reached: {max_depth}")
+        in_tree &= ~too_deep
 
+    # set default path == current process row index
+    paths = source_index.copy()
+    parent_index = np.full(len(input_tree), np.nan, dtype=object)
+    # Build the path of each level of processes
+    # = parent_path + child source_index
+    for level in tree_index.levels[1:]:
+        level = level[in_tree[level]]
+        parents = tree_index.parent[level]
+        paths[level] = paths[parents] + "/" + source_index[level]
+        parent_index[level] = source_index[parents]
+
+    input_tree["path"] = paths
+    if (in_tree & (tree_index.parent >= 0)).any():
+        input_tree["parent_index"] = parent_index
     return input_tree.copy()
@@ -0,0 +1,305 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""
+Process tree index.
+
+The index stores the parent/child relationships of the processes
+in a process tree DataFrame as integer (row position) arrays. This
+lets tree paths and descendant, ancestor and root queries be computed
+without repeatedly filtering or merging the whole DataFrame.
+
+"""
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .._version import VERSION
+from .proc_tree_schema import ColNames as Col
+
+__version__ = VERSION
+__author__ = "Ian Hellen"
+
+_TREE_INDEXES: Dict[int, Tuple[weakref.ref, pd.Series, "ProcTreeIndex"]] = {}
+
+
+class ProcTreeIndex:
+    """
+    Row-position index of the parent/child relationships in a process tree.
+
+    Attributes
+    ----------
+    keys : pd.Index
+        The process keys of the rows.
+    parent : np.ndarray
+        Row position of the parent of each process (-1 if the process
+        has no parent in the data).
+    child_ptr : np.ndarray
+        Offsets into `child_idx` of the children of each
+        process (CSR format) - the children of row `i` are
+        ``child_idx[child_ptr[i]:child_ptr[i + 1]]``
+    child_idx : np.ndarray
+        Row positions of the children of each process.
+    depth : np.ndarray
+        Depth of each process in its tree (0 for root processes).
+    root : np.ndarray
+        Row position of the root process of each process tree.
+    levels : List[np.ndarray]
+        The row positions of processes at each depth of the trees.
+    order : np.ndarray
+        Row positions in depth-first (pre-order) order.
+    tin : np.ndarray
+        The position of each process in `order`.
+    tout : np.ndarray
+        The end (exclusive) position of the process subtree in `order` -
+        the descendants of row `i` are ``order[tin[i] + 1:tout[i]]``
+
+    Notes
+    -----
+    If the parent keys of a set of processes form a cycle, the
+    cycle is broken at the first of these processes (in row order),
+    which is treated as a root process.
+
+    """
+
+    def __init__(self, keys: pd.Index, parent_keys: pd.Series):
+        """
+        Create the index from process and parent process keys.
+
+        Parameters
+        ----------
+        keys : pd.Index
+            The process keys of the rows
+        parent_keys : pd.Series
+            The parent process key of each row
+
+        """
+        self.keys = keys
+        n_procs = len(keys)
+        self.parent = _parent_positions(keys, parent_keys)
+        self.child_ptr, self.child_idx = _to_csr(self.parent)
+        self.levels = _tree_levels(
+            self.child_ptr, self.child_idx, np.flatnonzero(self.parent < 0)
+        )
+        if sum(len(level) for level in self.levels) < n_procs:
+            _break_cycles(self.parent, self.child_ptr, self.child_idx, self.levels)
+            self.child_ptr, self.child_idx = _to_csr(self.parent)
+            self.levels = _tree_levels(
+                self.child_ptr, self.child_idx, np.flatnonzero(self.parent < 0)
+            )
+
+        self.depth = np.zeros(n_procs, dtype=np.int64)
+        self.root = np.arange(n_procs, dtype=np.int64)
+        for level_num, level in enumerate(self.levels[1:], start=1):
+            self.depth[level] = level_num
+            self.root[level] = self.root[self.parent[level]]
+
+        # subtree sizes are summed from the deepest level upwards
+        sizes = np.ones(n_procs, dtype=np.int64)
+        for level in reversed(self.levels[1:]):
+            np.add.at(sizes, self.parent[level], sizes[level])
+        # pre-order positions - each child follows its parent and the
+        # subtrees of its preceding siblings
+        self.tin = np.zeros(n_procs, dtype=np.int64)
+        if self.levels:
+            roots = self.levels[0]
+            self.tin[roots] = np.cumsum(sizes[roots]) - sizes[roots]
+        for level in self.levels[:-1]:
+            counts = self.child_ptr[level + 1] - self.child_ptr[level]
+            children = _expand_ranges(self.child_ptr[level], counts, self.child_idx)
+            size_sums = np.concatenate([[0], np.cumsum(sizes[children])])
+            group_starts = np.cumsum(counts) - counts
+            self.tin[children] = (
+                np.repeat(self.tin[level] + 1 - size_sums[group_starts], counts)
+                + size_sums[:-1]
+            )
+        self.tout = self.tin + sizes
+        self.order = np.empty(n_procs, dtype=np.int64)
+        self.order[self.tin] = np.arange(n_procs)
+
+    def __len__(self) -> int:
+        """Return the number of processes in the index."""
+        return len(self.keys)
+
+    @property
+    def tree_depth(self) -> int:
+        """Return the number of levels in the deepest tree."""
+        return len(self.levels)
+
+    def get_position(self, key) -> Optional[int]:
+        """
+        Return the row position of a process key.
+
+        Parameters
+        ----------
+        key : Any
+            The process key.
+
+        Returns
+        -------
+        Optional[int]
+            The row position (the first row if the key is duplicated),
+            or None if the key is not in the index.
+
+        """
+        try:
+            loc = self.keys.get_loc(key)
+        except (KeyError, TypeError, pd.errors.InvalidIndexError):
+            return None
+        if isinstance(loc, slice):
+            return loc.start
+        if isinstance(loc, np.ndarray):
+            return int(np.argmax(loc))
+        return loc
+
+    def children(self, pos: int) -> np.ndarray:
+        """Return the row positions of the children of row `pos`."""
+        return self.child_idx[self.child_ptr[pos] : self.child_ptr[pos + 1]]
+
+    def ancestors(self, pos: int) -> np.ndarray:
+        """Return the row positions of `pos` and its ancestors (root last)."""
+        path = [pos]
+        while self.parent[path[-1]] >= 0:
+            path.append(self.parent[path[-1]])
+        return np.array(path, dtype=np.int64)
+
+    def subtrees(self, positions: np.ndarray, max_levels: int = -1) -> np.ndarray:
+        """
+        Return the row positions of processes in the subtrees of `positions`.
+
+        Parameters
+        ----------
+        positions : np.ndarray
+            Row positions of the subtree root processes.
+        max_levels : int, optional
+            Maximum number of levels below the subtree roots
+            to include, by default -1 (all levels)
+
+        Returns
+        -------
+        np.ndarray
+            The row positions (in ascending order) of the processes
+            in the subtrees, including the subtree root processes.
+
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        counts = self.tout[positions] - self.tin[positions]
+        members = self.order[_expand_ranges(self.tin[positions], counts)]
+        if max_levels != -1:
+            max_member_depth = np.repeat(self.depth[positions] + max_levels, counts)
+            members = members[self.depth[members] <= max_member_depth]
+        return np.sort(members)
+
+
+def get_tree_index(procs: pd.DataFrame) -> ProcTreeIndex:
+    """
+    Return the tree index for a process tree DataFrame.
+
+    Parameters
+    ----------
+    procs : pd.DataFrame
+        Process events (with process tree metadata)
+
+    Returns
+    -------
+    ProcTreeIndex
+        The tree index of `procs`.
+
+    Notes
+    -----
+    The index is cached for the lifetime of the DataFrame and
+    is rebuilt if the DataFrame index or the parent key column
+    is replaced or modified.
+
+    """
+    # pandas returns the same column Series until the column is
+    # updated, so the identity check detects parent key changes
+    parent_keys = procs[Col.parent_key]
+    cached = _TREE_INDEXES.get(id(procs))
+    if cached is not None:
+        procs_ref, cached_parent_keys, tree_index = cached
+        if (
+            procs_ref() is procs
+            and tree_index.keys is procs.index
+            and cached_parent_keys is parent_keys
+        ):
+            return tree_index
+    tree_index = ProcTreeIndex(procs.index, parent_keys)
+    df_id = id(procs)
+    _TREE_INDEXES[df_id] = (
+        weakref.ref(procs, lambda _: _TREE_INDEXES.pop(df_id, None)),
+        parent_keys,
+        tree_index,
+    )
+    return tree_index
+
+
+def _parent_positions(keys: pd.Index, parent_keys: pd.Series) -> np.ndarray:
+    """Return the row position of the parent of each row (or -1)."""
+    if keys.is_unique:
+        return keys.get_indexer(parent_keys).astype(np.int64)
+    # use the first row of any duplicated process keys
+    first_rows = np.flatnonzero(~keys.duplicated())
+    parent_pos = keys[first_rows].get_indexer(parent_keys)
+    return np.where(parent_pos >= 0, first_rows[parent_pos], -1).astype(np.int64)
+
+
+def _to_csr(parent: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the CSR offsets and child row positions of each row."""
+    has_parent = parent >= 0
+    child_idx = np.flatnonzero(has_parent)
+    child_idx = child_idx[np.argsort(parent[child_idx], kind="stable")]
+    child_ptr = np.zeros(len(parent) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(parent[has_parent], minlength=len(parent)), out=child_ptr[1:])
+    return child_ptr, child_idx
+
+
+def _expand_ranges(
+    starts: np.ndarray, counts: np.ndarray, values: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Return the concatenated ranges `starts[i]:starts[i] + counts[i]`."""
+    total = int(counts.sum())
+    offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(
+        total
+    )
+    return offsets if values is None else values[offsets]
+
+
+def _tree_levels(
+    child_ptr: np.ndarray, child_idx: np.ndarray, roots: np.ndarray
+) -> List[np.ndarray]:
+    """Return the row positions at each level below `roots`."""
+    levels = []
+    level = roots
+    while len(level):
+        levels.append(level)
+        counts = child_ptr[level + 1] - child_ptr[level]
+        level = _expand_ranges(child_ptr[level], counts, child_idx)
+    return levels
+
+
+def _break_cycles(
+    parent: np.ndarray,
+    child_ptr: np.ndarray,
+    child_idx: np.ndarray,
+    levels: List[np.ndarray],
+):
+    """Remove parent links of rows so that every row is reachable from a root."""
+    reached = np.zeros(len(parent), dtype=bool)
+    for level in levels:
+        reached[level] = True
+    unreached = np.flatnonzero(~reached)
+    while len(unreached):
+        # these rows are in (or descend from) a cycle of parent keys
+        parent[unreached[0]] = -1
+        level = unreached[:1]
+        while len(level):
+            reached[level] = True
+            counts = child_ptr[level + 1] - child_ptr[level]
+            level = _expand_ranges(child_ptr[level], counts, child_idx)
+            level = level[~reached[level]]
+        unreached = unreached[~reached[unreached]]
@@ -5,12 +5,13 @@
 # --------------------------------------------------------------------------
 """Process Tree Visualization."""
 import textwrap
-from collections import Counter
-from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
 from .._version import VERSION
+from .proc_tree_index import ProcTreeIndex, get_tree_index
 from .proc_tree_schema import ColNames as Col
 from .proc_tree_schema import ProcSchema
 
@@ -157,9 +158,11 @@ def get_root(procs: pd.DataFrame, source: Union[str, pd.Series]) -> pd.Series:
 
     """
     proc = get_process(procs, source)
-    p_path = proc.path.split("/")
-    root_proc = procs[procs[Col.source_index] == p_path[0]]
-    return root_proc.iloc[0]
+    tree_index = get_tree_index(procs)
+    proc_pos = _get_tree_position(tree_index, proc)
+    if proc_pos is None:
+        return proc
+    return procs.iloc[tree_index.root[proc_pos]]
 
 
 def get_root_tree(procs: pd.DataFrame, source: Union[str, pd.Series]) -> pd.DataFrame:
@@ -180,8 +183,11 @@ def get_root_tree(procs: pd.DataFrame, source: Union[str, pd.Series]) -> pd.Data
 
     """
     proc = get_process(procs, source)
-    p_path = proc.path.split("/")
-    return procs[procs["path"].str.startswith(p_path[0])]
+    tree_index = get_tree_index(procs)
+    proc_pos = _get_tree_position(tree_index, proc)
+    if proc_pos is None:
+        return pd.DataFrame(proc).T
+    return procs.iloc[tree_index.subtrees([tree_index.root[proc_pos]])]
 
 
 def get_tree_depth(procs: pd.DataFrame) -> int:
@@ -199,7 +205,7 @@ def get_tree_depth(procs: pd.DataFrame) -> int:
         Tree depth
 
     """
-    return procs["path"].str.count("/").max() + 1
+    return get_tree_index(procs).tree_depth
 
 
 def get_children(
@@ -224,12 +230,10 @@ def get_children(
 
     """
     proc = get_process(procs, source)
-    current_index_name = procs.index.name
-    children = procs[procs[Col.parent_key] == proc.name]
-    if include_source:
-        children = pd.concat([pd.DataFrame(proc).T, children])
-        children.index.name = current_index_name
-    return children
+    tree_index = get_tree_index(procs)
+    proc_pos = tree_index.get_position(proc.name)
+    child_pos = _get_child_positions(procs, tree_index, proc_pos, proc.name)
+    return _get_tree_rows(procs, proc, proc_pos, child_pos, include_source)
 
 
 def get_descendents(
@@ -259,35 +263,18 @@ def get_descendents(
 
     """
     proc = get_process(procs, source)
-    descendents = []
-    parent_keys = [proc.name]
-    level = 0
-    current_index_name = procs.index.name
-    rem_procs: Optional[pd.DataFrame] = None
-    while max_levels == -1 or level < max_levels:
-        if rem_procs is not None:
-            # pylint: disable=unsubscriptable-object
-            children = rem_procs[rem_procs[Col.parent_key].isin(parent_keys)]
-            rem_procs = rem_procs[~rem_procs[Col.parent_key].isin(parent_keys)]
-            # pylint: enable=unsubscriptable-object
-        else:
-            children = procs[procs[Col.parent_key].isin(parent_keys)]
-            rem_procs = procs[~procs[Col.parent_key].isin(parent_keys)]
-        if children.empty:
-            break
-        descendents.append(children)
-        parent_keys = children.index
-        level += 1
-
-    if descendents:
-        desc_procs = pd.concat(descendents)
+    tree_index = get_tree_index(procs)
+    proc_pos = tree_index.get_position(proc.name)
+    if max_levels == 0:
+        desc_pos = np.array([], dtype=np.int64)
     else:
-        desc_procs = pd.DataFrame(columns=proc.index, index=None)
-        desc_procs.index.name = Col.proc_key
-    if include_source:
-        desc_procs = pd.concat([pd.DataFrame(proc).T, desc_procs])
-        desc_procs.index.name = current_index_name
-    return desc_procs.sort_values("path")
+        child_pos = _get_child_positions(procs, tree_index, proc_pos, proc.name)
+        desc_pos = tree_index.subtrees(
+            child_pos, max_levels=-1 if max_levels == -1 else max_levels - 1
+        )
+    return _get_tree_rows(procs, proc, proc_pos, desc_pos, include_source).sort_values(
+        "path"
+    )
 
 
 def get_ancestors(procs: pd.DataFrame, source, include_source=True) -> pd.DataFrame:
@@ -310,10 +297,21 @@ def get_ancestors(procs: pd.DataFrame, source, include_source=True) -> pd.DataFr
 
     """
     proc = get_process(procs, source)
-    p_path = proc.path.split("/")
-    if not include_source:
-        p_path.remove(proc.source_index)
-    return procs[procs[Col.source_index].isin(p_path)].sort_values("path")
+    tree_index = get_tree_index(procs)
+    proc_pos = tree_index.get_position(proc.name)
+    parent_pos = (
+        tree_index.parent[proc_pos]
+        if proc_pos is not None
+        else tree_index.get_position(proc.get(Col.parent_key))
+    )
+    anc_pos = (
+        np.sort(tree_index.ancestors(parent_pos))
+        if parent_pos is not None and parent_pos >= 0
+        else np.array([], dtype=np.int64)
+    )
+    return _get_tree_rows(procs, proc, proc_pos, anc_pos, include_source).sort_values(
+        "path"
+    )
 
 
 def get_siblings(
@@ -362,14 +360,108 @@ def get_summary_info(procs: pd.DataFrame) -> Dict[str, int]:
     """
     summary: Dict[str, Any] = {}
     summary["Processes"] = len(procs)
-    summary["RootProcesses"] = len(procs[procs["IsRoot"]])
-    summary["LeafProcesses"] = len(procs[procs["IsLeaf"]])
-    summary["BranchProcesses"] = len(procs[procs["IsBranch"]])
-    summary["IsolatedProcesses"] = len(procs[(procs["IsRoot"]) & (procs["IsLeaf"])])
-    summary["LargestTreeDepth"] = procs["path"].str.count("/").max() + 1
+    summary["RootProcesses"] = int(procs["IsRoot"].sum())
+    summary["LeafProcesses"] = int(procs["IsLeaf"].sum())
+    summary["BranchProcesses"] = int(procs["IsBranch"].sum())
+    summary["IsolatedProcesses"] = int((procs["IsRoot"] & procs["IsLeaf"]).sum())
+    summary["LargestTreeDepth"] = get_tree_depth(procs)
     return summary
 
 
+def collapse_tree(
+    procs: pd.DataFrame, max_levels: int = -1, max_children: int = -1
+) -> pd.DataFrame:
+    """
+    Return the process trees with deep or large subtrees collapsed.
+
+    Parameters
+    ----------
+    procs : pd.DataFrame
+        Process events (with process tree metadata)
+    max_levels : int, optional
+        Maximum number of levels below the root processes to
+        include, by default -1 (all levels)
+    max_children : int, optional
+        Maximum number of child processes to include for
+        each process, by default -1 (all children).
+        The first `max_children` children (in the order of the rows
+        in `procs`) are included.
+
+    Returns
+    -------
+    pd.DataFrame
+        The included processes. The "CollapsedProcesses" column
+        has the number of processes below each process that were
+        not included.
+
+    Notes
+    -----
+    To expand a collapsed process, use `get_descendents` to
+    get the subtree beneath it.
+
+    """
+    tree_index = get_tree_index(procs)
+    included = np.ones(len(procs), dtype=bool)
+    if max_levels != -1:
+        included &= tree_index.depth <= max_levels
+    if max_children != -1:
+        child_rank = np.zeros(len(procs), dtype=np.int64)
+        child_rank[tree_index.child_idx] = np.arange(
+            len(tree_index.child_idx)
+        ) - np.repeat(tree_index.child_ptr[:-1], np.diff(tree_index.child_ptr))
+        included &= child_rank < max_children
+
+    # processes are also excluded if their parent is excluded - these
+    # are counted against the nearest included ancestor
+    nearest_included = np.arange(len(procs))
+    for level in tree_index.levels[1:]:
+        parents = tree_index.parent[level]
+        included[level] &= included[parents]
+        nearest_included[level] = np.where(
+            included[level], level, nearest_included[parents]
+        )
+    collapsed = np.bincount(nearest_included[~included], minlength=len(procs))
+    return procs.iloc[np.flatnonzero(included)].assign(
+        CollapsedProcesses=collapsed[included]
+    )
+
+
+def _get_tree_position(tree_index: ProcTreeIndex, proc: pd.Series) -> Optional[int]:
+    """Return the row position of the process or (if not found) its parent."""
+    proc_pos = tree_index.get_position(proc.name)
+    if proc_pos is None:
+        proc_pos = tree_index.get_position(proc.get(Col.parent_key))
+    return proc_pos
+
+
+def _get_child_positions(
+    procs: pd.DataFrame, tree_index: ProcTreeIndex, proc_pos: Optional[int], key
+) -> np.ndarray:
+    """Return the row positions of the children of a process."""
+    if proc_pos is not None:
+        return tree_index.children(proc_pos)
+    # the process is not in the data - match children on the parent key
+    return np.flatnonzero((procs[Col.parent_key] == key).to_numpy())
+
+
+def _get_tree_rows(
+    procs: pd.DataFrame,
+    proc: pd.Series,
+    proc_pos: Optional[int],
+    positions: np.ndarray,
+    include_source: bool,
+) -> pd.DataFrame:
+    """Return the rows at `positions`, optionally preceded by the source process."""
+    if not include_source or proc_pos is None:
+        tree_rows = procs.iloc[positions]
+    else:
+        tree_rows = procs.iloc[np.concatenate([[proc_pos], positions])]
+    if include_source and proc_pos is None:
+        tree_rows = pd.concat([pd.DataFrame(proc).T, tree_rows])
+        tree_rows.index.name = procs.index.name
+    return tree_rows
+
+
 class TemplateLine(NamedTuple):
     """
     Template definition for a line in text process tree.
@@ -391,6 +483,8 @@ def tree_to_text(
     template: Optional[List[TemplateLine]] = None,
     sort_column: str = "path",
     wrap_column: int = 0,
+    max_levels: int = -1,
+    max_children: int = -1,
 ) -> str:
     """
     Return text rendering of process tree.
@@ -409,6 +503,12 @@ def tree_to_text(
         The column to sort the DataFrame by, by default "path"
     wrap_column : int, optional
         Override any template-specified wrap limit, by default 0
+    max_levels : int, optional
+        Collapse processes more than `max_levels` below the
+        root processes, by default -1 (no limit)
+    max_children : int, optional
+        Collapse child processes after the first `max_children`
+        children of a process, by default -1 (no limit)
 
     Returns
     -------
@@ -418,50 +518,139 @@ def tree_to_text(
     Raises
     ------
     ValueError
-        If neither of
+        If neither of `schema` or `template` are supplied.
+
+    See Also
+    --------
+    iter_tree_text
+
+    """
+    return "".join(
+        iter_tree_text(
+            procs,
+            schema=schema,
+            template=template,
+            sort_column=sort_column,
+            wrap_column=wrap_column,
+            max_levels=max_levels,
+            max_children=max_children,
+        )
+    )
+
+
+def iter_tree_text(
+    procs: pd.DataFrame,
+    schema: Optional[Union[ProcSchema, Dict[str, str]]] = None,
+    template: Optional[List[TemplateLine]] = None,
+    sort_column: str = "path",
+    wrap_column: int = 0,
+    max_levels: int = -1,
+    max_children: int = -1,
+) -> Iterator[str]:
+    """
+    Return text rendering of process tree, one process at a time.
+
+    Parameters
+    ----------
+    procs : pd.DataFrame
+        The process tree DataFrame.
+    schema : Optional[Union[ProcSchema, Dict[str, str]]], optional
+        The schema to use for mapping the DataFrame column
+        names, by default None
+    template : Optional[List[TemplateLine]], optional
+        A manually created template to use to create the node
+        formatting, by default None
+    sort_column : str, optional
+        The column to sort the DataFrame by, by default "path"
+    wrap_column : int, optional
+        Override any template-specified wrap limit, by default 0
+    max_levels : int, optional
+        Collapse processes more than `max_levels` below the
+        root processes, by default -1 (no limit)
+    max_children : int, optional
+        Collapse child processes after the first `max_children`
+        children of a process, by default -1 (no limit)
+
+    Yields
+    ------
+    str
+        The formatted text for each process (including any
+        collapsed processes marker).
+
+    Raises
+    ------
+    ValueError
+        If neither of `schema` or `template` are supplied.
+
     """
     if not schema and not template:
         raise ValueError(
             "One of 'schema' and 'template' must be supplied", "as parameters."
         )
     template = template or _create_proctree_template(schema)  # type: ignore
-    output: List[str] = []
-    for _, row in procs.sort_values(sort_column).iterrows():
-        depth_count = Counter(row.path).get("/", 0)
-        header = _node_header(depth_count)
-
-        # handle first row separately since it needs a header
-        tmplt_line = template[0]
-        out_line = "  ".join(
-            f"{name}: {row[col]}" if name else f"{row[col]}"
-            for name, col in tmplt_line.items
+    if max_levels != -1 or max_children != -1:
+        procs = collapse_tree(procs, max_levels=max_levels, max_children=max_children)
+    procs = procs.sort_values(sort_column)
+    depth_counts = procs["path"].str.count("/").to_numpy()
+    collapsed = (
+        procs["CollapsedProcesses"].to_numpy()
+        if "CollapsedProcesses" in procs.columns
+        else np.zeros(len(procs), dtype=np.int64)
+    )
+
+    # the first line has no item names since it follows the node header
+    line_texts = [
+        _template_line_text(procs, tmplt_line, with_names=line_idx > 0)
+        for line_idx, tmplt_line in enumerate(template)
+    ]
+    wraps = [wrap_column or tmplt_line.wrap for tmplt_line in template]
+    for row_idx, depth_count in enumerate(depth_counts):
+        yield _node_text(
+            _node_header(depth_count),
+            [(texts[row_idx], wrap) for texts, wrap in zip(line_texts, wraps)],
+            collapsed[row_idx],
         )
-        indent = " " * len(header) + " "
+
+
+def _node_text(header: str, lines: List[Tuple[str, int]], collapsed: int) -> str:
+    """Return the wrapped text for a process from its (text, wrap) lines."""
+    indent = " " * len(header) + " "
+    (first_line, first_wrap), *other_lines = lines
+    out_line = "\n".join(
+        textwrap.wrap(first_line, width=first_wrap, subsequent_indent=indent)
+    )
+    output = [f"{header} {out_line}\n"]
+
+    # process subsequent rows
+    for line_text, wrap in other_lines:
         out_line = "\n".join(
             textwrap.wrap(
-                out_line,
-                width=wrap_column or tmplt_line.wrap,
-                subsequent_indent=indent,
+                line_text,
+                width=wrap,
+                initial_indent=indent,
+                subsequent_indent=indent + "   ",
             )
         )
-        output.append(f"{header} {out_line}\n")
+        output.extend([out_line, "\n"])
+    if collapsed:
+        output.append(f"{indent}({collapsed} descendant processes collapsed)\n")
+    return "".join(output)
 
-        # process subsequent rows
-        for tmplt_line in template[1:]:
-            out_line = "  ".join(
-                f"{name}: {row[col]}" for name, col in tmplt_line.items
-            )
-            out_line = "\n".join(
-                textwrap.wrap(
-                    out_line,
-                    width=wrap_column or tmplt_line.wrap,
-                    initial_indent=indent,
-                    subsequent_indent=indent + "   ",
-                )
-            )
-            output.extend([out_line, "\n"])
 
-    return "".join(output)
+def _template_line_text(
+    procs: pd.DataFrame, tmplt_line: TemplateLine, with_names: bool = True
+) -> List[str]:
+    """Return the unwrapped text of a template line for each process."""
+    columns = [(name, procs[col].tolist()) for name, col in tmplt_line.items]
+    if not columns:
+        return [""] * len(procs)
+    return [
+        "  ".join(
+            f"{name}: {value}" if name or with_names else f"{value}"
+            for (name, _), value in zip(columns, row_values)
+        )
+        for row_values in zip(*(values for _, values in columns))
+    ]
 
 
 def _create_proctree_template(
@@ -5,7 +5,7 @@
 # --------------------------------------------------------------------------
 """Process Tree Visualization."""
 import warnings
-from typing import Any, Dict, NamedTuple, Optional, Tuple, Union
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
@@ -44,6 +44,7 @@ from ..transform.proc_tree_schema import ProcessTreeSchemaException, ProcSchema
 # pylint: disable=unused-import
 # flake8: noqa F401
 from ..transform.process_tree_utils import (
+    collapse_tree,
     get_ancestors,
     get_children,
     get_descendents,
@@ -56,6 +57,8 @@ from ..transform.process_tree_utils import (
     get_siblings,
     get_summary_info,
     get_tree_depth,
+    iter_tree_text,
+    tree_to_text,
 )
 from .figure_dimension import bokeh_figure
 
@@ -64,7 +67,15 @@ from .figure_dimension import bokeh_figure
 __version__ = VERSION
 __author__ = "Ian Hellen"
 
-_DEFAULT_KWARGS = ["height", "title", "width", "hide_legend", "pid_fmt"]
+_DEFAULT_KWARGS = [
+    "height",
+    "title",
+    "width",
+    "hide_legend",
+    "pid_fmt",
+    "max_levels",
+    "max_children",
+]
 
 # wrap figure function to handle v2/v3 parameter renaming
 figure = bokeh_figure(figure)  # type: ignore[assignment, misc]
@@ -112,6 +123,12 @@ def build_and_show_process_tree(
     pid_fmt : str, optional
         Display Process ID as 'dec' (decimal), 'hex' (hexadecimal),
         or 'guid' (string), default is 'hex'.
+    max_levels : int, optional
+        Collapse processes more than `max_levels` below the root
+        processes, by default -1 (no limit)
+    max_children : int, optional
+        Collapse child processes after the first `max_children`
+        children of a process, by default -1 (no limit)
 
     Returns
     -------
@@ -183,6 +200,12 @@ def plot_process_tree(  # noqa: MC0001
     pid_fmt : str, optional
         Display Process ID as 'dec' (decimal), 'hex' (hexadecimal),
         or 'guid' (string), default is 'hex'.
+    max_levels : int, optional
+        Collapse processes more than `max_levels` below the root
+        processes, by default -1 (no limit)
+    max_children : int, optional
+        Collapse child processes after the first `max_children`
+        children of a process, by default -1 (no limit)
 
     Returns
     -------
@@ -211,13 +234,21 @@ def plot_process_tree(  # noqa: MC0001
     hide_legend = kwargs.pop("hide_legend", False)
     pid_fmt = kwargs.pop("pid_fmt", "hex")
 
-    proc_data, schema, levels, n_rows = _pre_process_tree(data, schema, pid_fmt=pid_fmt)
+    proc_data, schema, levels, n_rows = _pre_process_tree(
+        data,
+        schema,
+        pid_fmt=pid_fmt,
+        max_levels=kwargs.pop("max_levels", -1),
+        max_children=kwargs.pop("max_children", -1),
+    )
     if schema is None:
         raise ProcessTreeSchemaException("Could not infer data schema from data set.")
     if levels is None:
         raise ProcessTreeSchemaException("Could create process relationships.")
 
-    source = ColumnDataSource(data=proc_data)
+    source = ColumnDataSource(
+        data=proc_data[_get_source_columns(proc_data, schema, legend_col)]
+    )
     # Get legend/color bar map
     fill_map, color_bar = _create_fill_map(source, legend_col)
 
@@ -239,8 +270,11 @@ def plot_process_tree(  # noqa: MC0001
         height=plot_height,
     )
 
+    tool_tips = _get_tool_tips(schema)
+    if "CollapsedProcesses" in proc_data.columns:
+        tool_tips.append(("Collapsed", "@CollapsedProcesses"))
     hover = HoverTool(
-        tooltips=_get_tool_tips(schema),
+        tooltips=tool_tips,
         formatters={f"@{schema.time_stamp}": "datetime"},
     )
     b_plot.add_tools(hover)
@@ -344,6 +378,8 @@ def _pre_process_tree(
     proc_tree: pd.DataFrame,
     schema: Union[Dict[str, Any], ProcSchema] = None,
     pid_fmt: str = "hex",
+    max_levels: int = -1,
+    max_children: int = -1,
 ) -> TreeResult:
     """Extract dimensions and formatted values from proc_tree."""
     # Check if this table already seems to have the proc_tree metadata
@@ -360,6 +396,10 @@ def _pre_process_tree(
         return TreeResult(proc_tree, None, None, 0)
 
     _validate_plot_schema(proc_tree, schema)
+    if max_levels != -1 or max_children != -1:
+        proc_tree = collapse_tree(
+            proc_tree, max_levels=max_levels, max_children=max_children
+        )
 
     # kludgy fix to prevent NaNs making it into the data - Bokeh 3.0
     # is very sensitive to this in some places.
@@ -375,13 +415,20 @@ def _pre_process_tree(
     levels = proc_tree["Level"].unique()
 
     proc_tree[schema.process_name] = proc_tree[schema.process_name].fillna("unknown")
-    proc_tree["__proc_name$$"] = proc_tree.apply(
-        lambda x: x[schema.process_name].split(schema.path_separator)[-1], axis=1
+    proc_tree["__proc_name$$"] = (
+        proc_tree[schema.process_name].str.rsplit(schema.path_separator, n=1).str[-1]
     )
+    if "CollapsedProcesses" in proc_tree.columns:
+        collapsed = proc_tree["CollapsedProcesses"]
+        proc_tree.loc[collapsed > 0, "__proc_name$$"] += (
+            " (+" + collapsed[collapsed > 0].astype(str) + ")"
+        )
     proc_tree[schema.process_id] = proc_tree[schema.process_id].fillna("unknown")
-    proc_tree["__proc_id$$"] = proc_tree[schema.process_id].apply(
-        _pid_fmt, args=(pid_fmt,)
-    )
+    # format each distinct process ID once
+    pid_codes, pids = pd.factorize(proc_tree[schema.process_id])
+    proc_tree["__proc_id$$"] = np.array(
+        [_pid_fmt(pid, pid_fmt) for pid in pids], dtype=object
+    )[pid_codes]
 
     # Command line processing
     if not schema.cmd_line:
@@ -425,6 +472,35 @@ def _pid_fmt(pid, pid_fmt):
     )
 
 
+def _get_source_columns(
+    proc_tree: pd.DataFrame, schema: ProcSchema, legend_col: Optional[str]
+) -> List[str]:
+    """Return the columns used by the plot, tooltips and data table."""
+    plot_cols = [
+        "Row",
+        "Level",
+        "__proc_name$$",
+        "__proc_id$$",
+        "__cmd_line$$",
+        "CollapsedProcesses",
+        Col.proc_key,
+        schema.time_stamp,
+        schema.user_name,
+        schema.user_id,
+        schema.logon_id,
+        schema.process_id,
+        schema.process_name,
+        schema.cmd_line,
+        schema.parent_id,
+        schema.parent_name,
+        schema.target_logon_id,
+        legend_col,
+    ]
+    return list(
+        dict.fromkeys(col for col in plot_cols if col and col in proc_tree.columns)
+    )
+
+
 def _validate_plot_schema(proc_tree: pd.DataFrame, schema):
     """Validate that we have the required columns."""
     required_cols = {"path", schema.process_name, schema.process_id}
@@ -11,6 +11,7 @@ The g test outputs are tested against the fisher.g.test.single function in the G
 The code for this is located at https://github.com/cran/GeneCycle/blob/master/R/fisher.g.test.R
 """
 import unittest.mock as mock
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import numpy as np
@@ -161,6 +162,47 @@ def test_detect_polling_on_grouped_df(periodic_data, non_periodic_data):
     )
 
 
+def test_detect_polling_grouped_matches_single(periodic_data, non_periodic_data):
+    offset_data = non_periodic_data.assign(
+        timestamps=non_periodic_data["timestamps"] + 100
+    )
+    df = pd.concat(
+        [
+            periodic_data,
+            non_periodic_data,
+            offset_data.assign(edges="offset_edge"),
+            pd.DataFrame({"edges": ["single_edge"], "timestamps": [1669852800]}),
+        ]
+    )
+
+    per = poll.PeriodogramPollingDetector(df)
+    per.detect_polling("timestamps", groupby="edges")
+    results = per.data.groupby("edges").first()
+
+    for edge, edge_df in df.groupby("edges"):
+        if edge == "single_edge":
+            assert np.isnan(results.loc[edge, "p_value"])
+            continue
+        ts = edge_df["timestamps"]
+        p_value, freq, interval = per._detect_polling_arr(ts, min(ts), max(ts))
+        assert results.loc[edge, "p_value"] == pytest.approx(p_value, rel=1e-9)
+        assert results.loc[edge, "dominant_frequency"] == freq
+        assert results.loc[edge, "dominant_interval"] == interval
+
+
+def test_detect_polling_grouped_parallel(periodic_data, non_periodic_data):
+    df = pd.concat([periodic_data, non_periodic_data])
+
+    per = poll.PeriodogramPollingDetector(df, copy=True)
+    per.detect_polling("timestamps", groupby="edges")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        per_par = poll.PeriodogramPollingDetector(df, copy=True)
+        per_par.detect_polling("timestamps", groupby="edges", executor=executor)
+
+    pd.testing.assert_frame_equal(per.data, per_par.data)
+
+
 ## ########### ##
 ## Integration ##
 ## ########### ##
@@ -0,0 +1,175 @@
+import pickle
+import unittest
+
+import numpy as np
+
+from msticpy.analysis.anomalous_sequence.model import Model
+from msticpy.analysis.anomalous_sequence.utils import (
+    cmds_only,
+    cmds_params_only,
+    cmds_params_values,
+)
+from msticpy.analysis.anomalous_sequence.utils.data_structures import Cmd
+from msticpy.analysis.anomalous_sequence.utils.encoding import EncodedModel
+
+
+class TestEncoding(unittest.TestCase):
+    def setUp(self) -> None:
+        self.sessions1 = [
+            ["Set-User", "Set-User"],
+            ["Set-Mailbox", "Set-User", "Set-User", "Get-User"],
+            ["Set-Mailbox"],
+        ]
+        self.sessions2 = [
+            [
+                Cmd("Set-User", {"Identity"}),
+                Cmd("Set-User", {"Identity", "City", "Name"}),
+            ],
+            [
+                Cmd("Set-Mailbox", {"Identity"}),
+                Cmd("Set-User", {"Identity", "City"}),
+                Cmd("Set-User", {"Identity"}),
+                Cmd("Set-User", set()),
+            ],
+            [Cmd("Set-Mailbox", {"Identity"})],
+        ]
+        self.sessions3 = [
+            [
+                Cmd("Set-User", {"Identity": "blah"}),
+                Cmd("Set-User", {"Identity": "haha", "City": "york", "Name": "bob"}),
+            ],
+            [
+                Cmd("Set-Mailbox", {"Identity": "blah"}),
+                Cmd("Set-User", {"Identity": "blah", "City": "london"}),
+                Cmd("Set-User", {"Identity": "haha"}),
+                Cmd("Set-User", {}),
+            ],
+            [Cmd("Set-Mailbox", {"Identity": "blah"})],
+        ]
+
+    def _session_likelihood(self, model, session, use_tokens):
+        kwargs = dict(
+            window=session,
+            prior_probs=model.prior_probs,
+            trans_probs=model.trans_probs,
+            use_start_token=use_tokens,
+            use_end_token=use_tokens,
+            start_token=model.start_token,
+            end_token=model.end_token,
+        )
+        if isinstance(session[0], str):
+            return cmds_only.compute_likelihood_window(**kwargs)
+        kwargs["param_cond_cmd_probs"] = model.param_cond_cmd_probs
+        if isinstance(session[0].params, set):
+            return cmds_params_only.compute_likelihood_window(**kwargs)
+        kwargs["value_cond_param_probs"] = model.value_cond_param_probs
+        kwargs["modellable_params"] = model.modellable_params
+        return cmds_params_values.compute_likelihood_window(**kwargs)
+
+    def _window_likelihoods(self, model, session, window_len, use_tokens, use_geo):
+        kwargs = dict(
+            session=session,
+            prior_probs=model.prior_probs,
+            trans_probs=model.trans_probs,
+            window_len=window_len,
+            use_start_end_tokens=use_tokens,
+            start_token=model.start_token,
+            end_token=model.end_token,
+            use_geo_mean=use_geo,
+        )
+        if isinstance(session[0], str):
+            return cmds_only.rarest_window_session(**kwargs)
+        kwargs["param_cond_cmd_probs"] = model.param_cond_cmd_probs
+        if isinstance(session[0].params, set):
+            return cmds_params_only.rarest_window_session(**kwargs)
+        kwargs["value_cond_param_probs"] = model.value_cond_param_probs
+        kwargs["modellable_params"] = model.modellable_params
+        return cmds_params_values.rarest_window_session(**kwargs)
+
+    def test_encoded_scores_match_sessions(self):
+        for sessions in (self.sessions1, self.sessions2, self.sessions3):
+            model = Model(sessions=sessions)
+            model.train()
+            for use_tokens in (True, False):
+                model.compute_likelihoods_of_sessions(use_start_end_tokens=use_tokens)
+                for ses, lik in zip(sessions, model.session_likelihoods):
+                    exp_lik = self._session_likelihood(model, ses, use_tokens)
+                    self.assertAlmostEqual(lik, exp_lik, places=12)
+
+                for window_len in (1, 2, 3):
+                    for use_geo in (True, False):
+                        model.compute_rarest_windows(
+                            window_len=window_len,
+                            use_start_end_tokens=use_tokens,
+                            use_geo_mean=use_geo,
+                        )
+                        windows = (
+                            model.rare_windows_geo if use_geo else model.rare_windows
+                        )[window_len]
+                        liks = (
+                            model.rare_window_likelihoods_geo
+                            if use_geo
+                            else model.rare_window_likelihoods
+                        )[window_len]
+                        for ses, window, lik in zip(sessions, windows, liks):
+                            exp_window, exp_lik = self._window_likelihoods(
+                                model, ses, window_len, use_tokens, use_geo
+                            )
+                            self.assertEqual(window, exp_window)
+                            if np.isnan(exp_lik):
+                                self.assertTrue(np.isnan(lik))
+                            else:
+                                self.assertAlmostEqual(lik, exp_lik, places=12)
+
+    def test_encoded_model(self):
+        model = Model(sessions=self.sessions1)
+        model.train()
+        enc_model = EncodedModel(
+            prior_probs=model.prior_probs,
+            trans_probs=model.trans_probs,
+            start_token=model.start_token,
+            end_token=model.end_token,
+            unk_token=model.unk_token,
+        )
+        n_cmds = len(enc_model.cmd_ids)
+        self.assertEqual(enc_model.trans.shape, (n_cmds, n_cmds))
+        self.assertEqual(
+            enc_model.trans[enc_model.cmd_ids["Set-User"], enc_model.unk_id],
+            model.trans_probs["Set-User"]["Unseen-Cmd"],
+        )
+
+        enc_sessions = enc_model.encode_sessions([["Set-User", "Unseen-Cmd"], ["x"]])
+        self.assertEqual(
+            enc_sessions.cmd_ids.tolist(),
+            [
+                enc_model.cmd_ids["Set-User"],
+                enc_model.unk_id,
+                enc_model.end_id,
+                enc_model.unk_id,
+                enc_model.end_id,
+            ],
+        )
+        self.assertEqual(enc_sessions.offsets.tolist(), [0, 3, 5])
+        self.assertEqual(enc_sessions.lengths.tolist(), [2, 1])
+
+        window_idx, window_liks = enc_model.compute_rarest_windows(
+            enc_sessions, window_len=3, use_start_end_tokens=False
+        )
+        self.assertEqual(window_idx.tolist(), [-1, -1])
+        self.assertTrue(np.isnan(window_liks).all())
+
+    def test_pickle_model(self):
+        model = Model(sessions=self.sessions3)
+        model.train()
+        model.compute_scores(use_start_end_tokens=True)
+        model.compute_setof_params_cond_cmd(use_geo_mean=True)
+
+        unpickled = pickle.loads(pickle.dumps(model))
+        self.assertIsNone(unpickled._encoded_sessions)
+        unpickled.compute_scores(use_start_end_tokens=True)
+        self.assertEqual(unpickled.session_likelihoods, model.session_likelihoods)
+        self.assertEqual(str(unpickled.rare_windows[3]), str(model.rare_windows[3]))
+
+
+if __name__ == "__main__":
+    unittest.main()
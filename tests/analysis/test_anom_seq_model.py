@@ -1,4 +1,6 @@
+import tempfile
 import unittest
+from pathlib import Path
 
 from msticpy.analysis.anomalous_sequence.model import Model
 from msticpy.analysis.anomalous_sequence.utils.data_structures import Cmd
@@ -169,6 +171,54 @@ class TestModel(unittest.TestCase):
         self.assertTrue(3 in model.rare_window_likelihoods_geo)
         self.assertTrue(3 in model.rare_windows_geo)
 
+    def test_partial_fit(self):
+        for sessions in (self.sessions1, self.sessions2, self.sessions3):
+            model = Model(sessions=sessions[:1])
+            model.train()
+            model.partial_fit(sessions[1:])
+            self.assertEqual(model.sessions, sessions[1:])
+
+            full_model = Model(sessions=sessions)
+            full_model.train()
+            full_model.set_sessions(sessions[1:])
+            self.assertEqual(model.seq2_counts, full_model.seq2_counts)
+            self.assertEqual(model.param_counts, full_model.param_counts)
+            self.assertEqual(model.value_counts, full_model.value_counts)
+            self.assertEqual(model.modellable_params, full_model.modellable_params)
+            model.compute_scores(use_start_end_tokens=True)
+            full_model.compute_scores(use_start_end_tokens=True)
+            self.assertEqual(model.session_likelihoods, full_model.session_likelihoods)
+
+        model = Model(sessions=self.sessions1)
+        model.train()
+        self.assertRaises(MsticpyException, lambda: model.partial_fit(self.sessions2))
+        self.assertRaises(MsticpyException, lambda: model.set_sessions([]))
+
+    def test_save_load(self):
+        for sessions in (self.sessions1, self.sessions2, self.sessions3):
+            model = Model(sessions=sessions)
+            self.assertRaises(MsticpyException, lambda: model.save("model.json"))
+            model.train()
+            model.compute_scores(use_start_end_tokens=True)
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                for file_name in ("model.json", "model.json.gz"):
+                    path = Path(tmp_dir).joinpath(file_name)
+                    model.save(path)
+                    loaded = Model.load(path)
+                    self.assertEqual(loaded.sessions, [])
+                    self.assertEqual(loaded.session_type, model.session_type)
+                    self.assertEqual(loaded.modellable_params, model.modellable_params)
+                    self.assertEqual(loaded.trans_probs, model.trans_probs)
+
+                    loaded.set_sessions(sessions)
+                    loaded.compute_scores(use_start_end_tokens=True)
+                    self.assertEqual(
+                        loaded.session_likelihoods, model.session_likelihoods
+                    )
+                    self.assertEqual(
+                        loaded.rare_window_likelihoods, model.rare_window_likelihoods
+                    )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -258,6 +258,29 @@ class TestSessionize(unittest.TestCase):
 
         assert_frame_equal(actual, self.df3_sessionized, check_dtype=False)
 
+    def test_create_session_col_max_session_time(self):
+        # events every minute for 50 minutes are split into sessions
+        # each starting more than 20 minutes after the previous session start
+        data = pd.DataFrame(
+            {
+                "UserId": [1] * 50 + [2] * 3,
+                "time": list(
+                    pd.date_range("2020-01-03 00:00:00", periods=50, freq="1min")
+                )
+                + list(pd.date_range("2020-01-03 00:00:00", periods=3, freq="30min")),
+            }
+        )
+        actual = sessionize.create_session_col(
+            data=data.sample(frac=1, random_state=1),
+            user_identifier_cols=["UserId"],
+            time_col="time",
+            max_session_time_mins=20,
+            max_event_separation_mins=2,
+        )
+        expected = [0] * 21 + [1] * 21 + [2] * 8 + [3, 4, 5]
+        assert list(actual["session_ind"]) == expected
+        assert_frame_equal(actual[["UserId", "time"]], data)
+
 
 if __name__ == "__main__":
     unittest.main()
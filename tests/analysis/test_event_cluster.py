@@ -8,6 +8,7 @@ import os
 import unittest
 
 import pandas as pd
+from sklearn.cluster import DBSCAN
 
 from msticpy.analysis.eventcluster import (
     add_process_features,
@@ -25,6 +26,13 @@ from msticpy.analysis.eventcluster import (
 
 from ..unit_test_lib import TEST_DATA_PATH
 
+try:
+    from sklearn.cluster import HDBSCAN  # noqa: F401
+
+    _HAS_HDBSCAN = True
+except ImportError:
+    _HAS_HDBSCAN = False
+
 
 class TestEventCluster(unittest.TestCase):
     """Unit test class."""
@@ -55,6 +63,46 @@ class TestEventCluster(unittest.TestCase):
         self.assertIn("commandlineTokensHash", out_df.columns)
         self.assertIn("pathHash", out_df.columns)
 
+    def test_cluster_features_values(self):
+        """Test that feature values match the scalar feature functions."""
+        out_df = add_process_features(input_frame=self.input_df, path_separator="\\")
+        proc_names = self.input_df["NewProcessName"].fillna("")
+        cmd_lines = self.input_df["CommandLine"].fillna("")
+
+        self.assertListEqual(
+            out_df["processName"].tolist(),
+            [name.split("\\")[-1] for name in proc_names],
+        )
+        self.assertListEqual(
+            out_df["pathScore"].tolist(), [char_ord_score(name) for name in proc_names]
+        )
+        self.assertListEqual(
+            out_df["pathHash"].tolist(), [crc32_hash(name) for name in proc_names]
+        )
+        self.assertListEqual(
+            out_df["commandlineLen"].tolist(), [len(cmd) for cmd in cmd_lines]
+        )
+        self.assertListEqual(
+            out_df["commandlineTokensFull"].tolist(),
+            [delim_count(cmd) for cmd in cmd_lines],
+        )
+        self.assertListEqual(
+            out_df["commandlineScore"].tolist(),
+            [char_ord_score(cmd) for cmd in cmd_lines],
+        )
+        self.assertListEqual(
+            out_df["commandlineTokensHash"].tolist(),
+            [delim_hash(cmd) for cmd in cmd_lines],
+        )
+        self.assertEqual(out_df["commandlineLogLen"][cmd_lines == ""].sum(), 0)
+
+        test_df = pd.DataFrame({"input": ["a b", None, "a b", "", "c--d"]})
+        self.assertListEqual(
+            token_count_df(test_df, "input", delimiter="-").tolist()[2:],
+            [1, 1, 3],
+        )
+        self.assertTrue(pd.isna(crc32_hash_df(test_df, "input")[1]))
+
     def test_custom_features(self):
         input_str = (
             "The quick & sly (as all foxes might be/or not) fox, jumped over a frog."
@@ -122,3 +170,64 @@ class TestEventCluster(unittest.TestCase):
         self.assertEqual(out_df3["ClusterId"].max(), 31)
         self.assertEqual(out_df3["ClusterSize"].min(), 1)
         self.assertEqual(len(out_df3[out_df3["ClusterId"] == -1]), 89)
+
+    def test_clustering_methods(self):
+        out_df = add_process_features(input_frame=self.input_df, path_separator="\\")
+        cluster_args = dict(
+            data=out_df,
+            cluster_columns=["pathHash", "commandlineTokensHash", "isSystemSession"],
+            time_column="TimeGenerated",
+            max_cluster_distance=0.001,
+            min_cluster_samples=2,
+        )
+        full_df, _, _ = dbcluster_events(**cluster_args)
+        dedup_df, db_cluster, x_norm = dbcluster_events(
+            deduplicate=True, **cluster_args
+        )
+        pd.testing.assert_frame_equal(full_df, dedup_df)
+        self.assertEqual(len(x_norm), len(out_df))
+        self.assertLess(len(db_cluster.labels_), len(out_df))
+
+        custom_df, custom_cluster, _ = dbcluster_events(
+            cluster_method=DBSCAN(eps=0.001, min_samples=2), **cluster_args
+        )
+        pd.testing.assert_frame_equal(full_df, custom_df)
+        self.assertIsInstance(custom_cluster, DBSCAN)
+
+        self.assertEqual(full_df["ClusterSize"].sum(), len(out_df))
+        self.assertTrue(full_df["ClusterId"].is_monotonic_increasing)
+        for _, row in full_df[full_df["Clustered"]].iterrows():
+            self.assertLessEqual(row["FirstEventTime"], row["LastEventTime"])
+
+        with self.assertRaises(ValueError):
+            dbcluster_events(cluster_method="kmeans", **cluster_args)
+
+    @unittest.skipUnless(_HAS_HDBSCAN, "HDBSCAN requires scikit-learn >= 1.3")
+    def test_clustering_hdbscan(self):
+        out_df = add_process_features(input_frame=self.input_df, path_separator="\\")
+        out_df2, hdb_cluster, _ = dbcluster_events(
+            data=out_df,
+            cluster_columns=["pathHash", "commandlineTokensHash", "isSystemSession"],
+            time_column="TimeGenerated",
+            min_cluster_samples=2,
+            cluster_method="hdbscan",
+            # deduplicate is ignored (HDBSCAN does not support sample weights)
+            deduplicate=True,
+        )
+        self.assertEqual(type(hdb_cluster).__name__, "HDBSCAN")
+        self.assertEqual(len(hdb_cluster.labels_), len(out_df))
+        self.assertEqual(out_df2["ClusterSize"].sum(), len(out_df))
+        self.assertGreaterEqual(out_df2["ClusterId"].min(), -1)
+
+        # HDBSCAN cluster selection by epsilon can fail for data with
+        # many duplicate rows - the model is refitted without epsilon
+        out_df3, hdb_cluster, _ = dbcluster_events(
+            data=out_df,
+            cluster_columns=["pathHash", "commandlineTokensHash", "isSystemSession"],
+            time_column="TimeGenerated",
+            min_cluster_samples=2,
+            cluster_method="hdbscan",
+            cluster_selection_epsilon=0.01,
+        )
+        self.assertEqual(len(hdb_cluster.labels_), len(out_df))
+        self.assertEqual(out_df3["ClusterSize"].sum(), len(out_df))
@@ -5,7 +5,10 @@
 # --------------------------------------------------------------------------
 """Test time series anomalies module."""
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
+import numpy as np
 import pandas as pd
 import pytest
 import pytest_check as check
@@ -50,6 +53,91 @@ def test_ts_anomalies_stl(df_data):
     check.equal(len(results.query("anomalies != 0")), 3)
 
 
+def test_ts_anomalies_stl_grouped(df_data):
+    """Test ts_anomalies_stl with multiple time series."""
+    single = timeseries.ts_anomalies_stl(
+        df_data, time_column="TimeGenerated", data_column="TotalBytesSent"
+    )
+    multi_df = pd.concat(
+        [
+            df_data.assign(Host="host1"),
+            df_data.assign(Host="host2", TotalBytesSent=df_data["TotalBytesSent"] * 2),
+            df_data.head(5).assign(Host="short_host"),
+        ],
+        ignore_index=True,
+    )
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = multi_df.mp_timeseries.analyze(
+            time_column="TimeGenerated",
+            data_column="TotalBytesSent",
+            group_by="Host",
+            executor=executor,
+            cache=False,
+        )
+    check.equal(list(results.columns[:3]), ["Host", "TimeGenerated", "TotalBytesSent"])
+    # short series cannot be decomposed and are skipped
+    check.equal(set(results["Host"].unique()), {"host1", "host2"})
+    host1 = results[results["Host"] == "host1"].drop(columns="Host")
+    check.is_true(host1.reset_index(drop=True).equals(single.reset_index(drop=True)))
+    check.equal(len(results.query("anomalies != 0")), 6)
+
+    # subsequent runs use the cached decompositions
+    timeseries.ts_anomalies_stl(
+        multi_df,
+        time_column="TimeGenerated",
+        data_column="TotalBytesSent",
+        group_by=["Host"],
+    )
+    with mock.patch.object(timeseries, "_stl_decompose") as stl_decompose:
+        cached = timeseries.ts_anomalies_stl(
+            multi_df,
+            time_column="TimeGenerated",
+            data_column="TotalBytesSent",
+            group_by=["Host"],
+        )
+    check.equal(stl_decompose.call_count, 0)
+    check.is_true(cached.equals(results))
+
+    periods = results.mp_timeseries.anomaly_periods(group_by="Host")
+    check.equal(list(periods.columns), ["Host", "start", "end"])
+    check.equal(len(periods[periods["Host"] == "host1"]), 3)
+    check.equal(
+        list(periods[periods["Host"] == "host1"]["start"]),
+        [span.start for span in single.mp_timeseries.anomaly_periods()],
+    )
+
+
+def test_stl_cache_bounds():
+    """Test the STL cache is bounded by number of items and total size."""
+    # pylint: disable=protected-access
+    components = timeseries._STLComponents(*(np.zeros(100) for _ in range(4)))
+    item_size = 4 * 100 * 8
+    cache = timeseries._STLCache(max_items=3, max_bytes=item_size * 2)
+    for idx in range(3):
+        cache.put(("key", idx), components)
+    check.equal(len(cache), 2)
+    check.equal(cache.size, item_size * 2)
+    check.is_none(cache.get(("key", 0)))
+    # most recently used item is retained
+    check.is_not_none(cache.get(("key", 1)))
+    cache.put(("key", 3), components)
+    check.is_none(cache.get(("key", 2)))
+    check.is_not_none(cache.get(("key", 1)))
+
+    # items larger than the cache are not added
+    cache.put(("big", 0), timeseries._STLComponents(*(np.zeros(1000),) * 4))
+    check.is_none(cache.get(("big", 0)))
+    check.equal(cache.size, item_size * 2)
+
+    cache.max_bytes = item_size * 10
+    for idx in range(5):
+        cache.put(("key", idx), components)
+    check.equal(len(cache), 3)
+    check.equal(cache.size, item_size * 3)
+    cache.clear()
+    check.equal((len(cache), cache.size), (0, 0))
+
+
 def test_anomaly_periods(df_data):
     """Test extracting periods."""
 
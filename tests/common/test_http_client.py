@@ -0,0 +1,97 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""Shared HTTP client test class."""
+import asyncio
+
+import httpx
+import pytest_check as check
+import respx
+
+from msticpy.common import http_client
+from msticpy.common.http_client import (
+    close_http_clients,
+    get_async_http_client,
+    get_http_client,
+)
+from msticpy.context.ip_utils import _rdap_lookup
+from msticpy.context.tiproviders.greynoise import GreyNoise
+from msticpy.context.tiproviders.virustotal import VirusTotal
+
+# pylint: disable=protected-access
+
+
+def test_shared_client():
+    """Test that clients are shared by name."""
+    client = get_http_client("test")
+    check.is_instance(client, httpx.Client)
+    check.is_(client, get_http_client("test"))
+    check.is_not(client, get_http_client())
+
+    close_http_clients("test")
+    check.is_true(client.is_closed)
+    check.is_false(get_http_client().is_closed)
+    new_client = get_http_client("test")
+    check.is_not(client, new_client)
+    check.is_false(new_client.is_closed)
+
+
+def test_client_settings(monkeypatch):
+    """Test client settings and HTTP/2 fallback."""
+    monkeypatch.setattr(http_client, "http2_available", lambda: False)
+    params = http_client._client_params(max_connections=5, timeout=10)
+    check.is_false(params["http2"])
+    check.equal(params["limits"].max_connections, 5)
+    check.equal(params["timeout"].read, 10)
+
+    monkeypatch.setattr(http_client, "http2_available", lambda: True)
+    check.is_true(http_client._client_params()["http2"])
+    check.is_false(http_client._client_params(http2=False)["http2"])
+
+
+def test_async_client():
+    """Test async clients are created per event loop."""
+
+    async def _get_clients():
+        return get_async_http_client(), get_async_http_client()
+
+    # use explicit event loops - asyncio.run may re-use a loop
+    # if nest_asyncio has been applied
+    loop1 = asyncio.new_event_loop()
+    loop2 = asyncio.new_event_loop()
+    try:
+        client1, client2 = loop1.run_until_complete(_get_clients())
+        check.is_instance(client1, httpx.AsyncClient)
+        check.is_(client1, client2)
+        client3, _ = loop2.run_until_complete(_get_clients())
+        check.is_not(client1, client3)
+        check.is_(client1, loop1.run_until_complete(_get_clients())[0])
+    finally:
+        loop1.close()
+        loop2.close()
+
+
+@respx.mock
+def test_providers_use_shared_client():
+    """Test that providers and utility functions share one client."""
+    vt_prov = VirusTotal(AuthKey="test")
+    gn_prov = GreyNoise(AuthKey="test")
+    check.is_(vt_prov._httpx_client, gn_prov._httpx_client)
+    check.is_(vt_prov._httpx_client, get_http_client())
+
+    # closed clients are replaced
+    vt_prov._httpx_client = httpx.Client()
+    vt_prov._httpx_client.close()
+    vt_route = respx.get(url__regex=r"https://www\.virustotal\.com/.*").respond(
+        200, json={"response_code": 0}
+    )
+    vt_prov.lookup_ioc("104.215.148.63", "ipv4")
+    check.equal(vt_route.call_count, 1)
+    check.is_(vt_prov._httpx_client, get_http_client())
+
+    route = respx.get("https://rdap.test/ip/1.2.3.4").respond(200, json={})
+    response = _rdap_lookup("https://rdap.test/ip/1.2.3.4")
+    check.equal(response.status_code, 200)
+    check.equal(route.call_count, 1)
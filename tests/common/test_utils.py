@@ -4,12 +4,15 @@
 # license information.
 # --------------------------------------------------------------------------
 """common.utility test class."""
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import pandas as pd
 import pytest
 import pytest_check as check
 
 from msticpy.common import utility as utils
+from msticpy.common.utility import parallel as parallel_utils
 
 
 def test_misc_funcs():
@@ -149,3 +152,40 @@ def test_collapse_dicts():
             "two": {"two_c": "d3_two_val"},
         },
     )
+
+
+def _double_values(data: pd.DataFrame) -> pd.DataFrame:
+    """Return data with doubled values."""
+    return data.assign(value=data["value"] * 2)
+
+
+def test_parallel_funcs():
+    """Test parallel helper functions."""
+
+    def _local_double(value):
+        return value * 2
+
+    # local functions cannot be pickled - these run serially
+    check.equal(
+        parallel_utils.map_parallel(_local_double, [1, 2, 3], n_jobs=2), [2, 4, 6]
+    )
+    check.equal(
+        parallel_utils.map_parallel(lambda val: val + 1, [1, 2, 3], n_jobs=2),
+        [2, 3, 4],
+    )
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        check.equal(
+            parallel_utils.map_parallel(_local_double, [1, 2, 3], executor=executor),
+            [2, 4, 6],
+        )
+
+    # the result index does not depend on partitioning
+    data = pd.DataFrame({"value": range(10)}, index=range(100, 110))
+    serial_df = parallel_utils.run_partitioned(_double_values, data)
+    check.equal(serial_df.index.tolist(), list(range(10)))
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        parallel_df = parallel_utils.run_partitioned(
+            _double_values, data, executor=executor, min_rows=2
+        )
+    check.is_true(serial_df.equals(parallel_df))
+    check.equal(parallel_df["value"].tolist(), [val * 2 for val in range(10)])
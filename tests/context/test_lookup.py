@@ -4,6 +4,8 @@
 # license information.
 # --------------------------------------------------------------------------
 """Lookup test class."""
+import threading
+import time
 import warnings
 from pathlib import Path
 
@@ -20,7 +22,7 @@ from msticpy.context.preprocess_observable import (
     _clean_url,
     preprocess_observable,
 )
-from msticpy.context.provider_base import generate_items
+from msticpy.context.provider_base import Provider, _make_sync, generate_items
 
 from ..unit_test_lib import custom_mp_config, get_test_data_path
 
@@ -289,3 +291,44 @@ def test_iterable_generator():
     #         )
 
     #     os.environ[pkg_config._CONFIG_ENV_VAR] = saved_env
+
+
+class _SlowProvider(Provider):
+    """Test provider that records concurrent lookups."""
+
+    _QUERIES = {"ipv4": None}
+
+    def __init__(self, **kwargs):
+        """Initialize the provider."""
+        super().__init__(**kwargs)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def lookup_item(self, item, item_type=None, query_type=None, **kwargs):
+        """Lookup item with a short delay."""
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.02)
+        with self._lock:
+            self.active -= 1
+        return pd.DataFrame([{"Item": item, "ItemType": item_type}])
+
+
+@pytest.mark.parametrize("max_concurrency, expected", [(1, 1), (4, 4)])
+def test_lookup_items_async_concurrency(max_concurrency, expected):
+    """Test that async item lookups are bounded by max_concurrency."""
+    provider = _SlowProvider(max_concurrency=max_concurrency)
+    check.equal(provider.max_concurrency, max_concurrency)
+
+    results = _make_sync(provider.lookup_items_async(_IOC_IPS))
+
+    check.equal(provider.max_active, expected)
+    # results are returned in input order
+    check.equal(results["Item"].to_list(), _IOC_IPS)
+    check.is_true((results["ItemType"] == "ipv4").all())
+
+    provider = _SlowProvider()
+    _make_sync(provider.lookup_items_async(_IOC_IPS, max_concurrency=3))
+    check.equal(provider.max_active, 3)
@@ -0,0 +1,147 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""Lookup cache test class."""
+import time
+
+import pandas as pd
+import pytest
+import pytest_check as check
+
+from msticpy.context.lookup import Lookup
+from msticpy.context.lookup_cache import LookupCache
+from msticpy.context.lookup_result import LookupStatus
+from msticpy.context.provider_base import Provider
+
+_IOCS = ["185.92.220.35", "213.159.214.86", "77.222.54.202"]
+
+
+# pylint: disable=protected-access, redefined-outer-name
+class _CountingProvider(Provider):
+    """Test provider that counts lookups."""
+
+    _QUERIES = {"ipv4": None}
+
+    def __init__(self, **kwargs):
+        """Initialize the provider."""
+        super().__init__(**kwargs)
+        self.lookups = 0
+        self.status = LookupStatus.OK.value
+
+    def lookup_item(self, item, item_type=None, query_type=None, **kwargs):
+        """Return a result row for `item`."""
+        self.lookups += 1
+        return pd.DataFrame(
+            [
+                {
+                    "Item": item,
+                    "ItemType": item_type,
+                    "Result": True,
+                    "RawResult": {"value": item},
+                    "Status": self.status,
+                }
+            ]
+        )
+
+
+@pytest.fixture
+def lookup_cache(tmp_path):
+    """Return LookupCache using a temporary file."""
+    cache = LookupCache(path=tmp_path.joinpath("cache.db"))
+    yield cache
+    cache.close()
+
+
+def test_cache_get_put(lookup_cache):
+    """Test basic cache operations and counters."""
+    result = pd.DataFrame([{"Item": "a", "Status": LookupStatus.OK.value}])
+    check.is_none(lookup_cache.get("Prov", "a", "ipv4"))
+    check.is_true(lookup_cache.put("Prov", "a", "ipv4", None, result))
+
+    cached = lookup_cache.get("Prov", "a", "ipv4")
+    check.is_true(cached.equals(result))
+    # different query type or provider is a miss
+    check.is_none(lookup_cache.get("Prov", "a", "ipv4", "rep"))
+    check.is_none(lookup_cache.get("Prov2", "a", "ipv4"))
+
+    stats = lookup_cache.stats
+    check.equal(stats.hits, 1)
+    check.equal(stats.misses, 3)
+    check.equal(stats.entries, 1)
+    check.greater(stats.size, 0)
+
+    # failed lookups are not cached
+    failed = pd.DataFrame([{"Item": "b", "Status": 429}])
+    check.is_false(lookup_cache.put("Prov", "b", "ipv4", None, failed))
+    check.equal(lookup_cache.stats.entries, 1)
+
+    lookup_cache.clear("Prov")
+    check.equal(lookup_cache.stats.entries, 0)
+
+
+def test_cache_ttl(tmp_path):
+    """Test expiry of cache entries."""
+    cache = LookupCache(path=tmp_path.joinpath("cache.db"), provider_ttl={"Short": 0})
+    result = pd.DataFrame([{"Item": "a", "Status": LookupStatus.OK.value}])
+    cache.put("Short", "a", "ipv4", None, result)
+    cache.put("Long", "a", "ipv4", None, result)
+    time.sleep(0.01)
+    check.is_none(cache.get("Short", "a", "ipv4"))
+    check.is_not_none(cache.get("Long", "a", "ipv4"))
+
+    check.equal(cache.purge_expired(), 1)
+    check.equal(cache.stats.entries, 1)
+    cache.close()
+
+
+def test_cache_lru_eviction(tmp_path):
+    """Test least recently used entries are evicted when over max_size."""
+    cache = LookupCache(path=tmp_path.joinpath("cache.db"))
+    result = pd.DataFrame([{"Item": "a" * 1000, "Status": LookupStatus.OK.value}])
+    cache.put("Prov", "1", "ipv4", None, result)
+    entry_size = cache.stats.size
+    cache.max_size = entry_size * 2
+    cache.put("Prov", "2", "ipv4", None, result)
+    time.sleep(0.01)
+    # access first item so that "2" is the least recently used
+    cache.get("Prov", "1", "ipv4")
+    cache.put("Prov", "3", "ipv4", None, result)
+
+    check.equal(cache.stats.entries, 2)
+    check.is_not_none(cache.get("Prov", "1", "ipv4"))
+    check.is_none(cache.get("Prov", "2", "ipv4"))
+    check.is_not_none(cache.get("Prov", "3", "ipv4"))
+    cache.close()
+
+
+def test_lookup_uses_cache(tmp_path):
+    """Test that Lookup reads results from a shared persistent cache."""
+    cache_path = str(tmp_path.joinpath("cache.db"))
+    provider = _CountingProvider()
+    lookup = Lookup(primary_providers=[provider], cache=cache_path)
+
+    results = lookup.lookup_items(_IOCS, progress=False)
+    check.equal(len(results), len(_IOCS))
+    check.equal(provider.lookups, len(_IOCS))
+
+    # a second Lookup instance sharing the cache file does no lookups
+    provider2 = _CountingProvider()
+    lookup2 = Lookup(primary_providers=[provider2], cache=cache_path)
+    results2 = lookup2.lookup_items(_IOCS, progress=False)
+    check.equal(provider2.lookups, 0)
+    check.equal(results2["Item"].to_list(), _IOCS)
+    check.equal(lookup2.cache.stats.hits, len(_IOCS))
+
+    results3 = lookup2.lookup_items_sync(_IOCS)
+    check.equal(provider2.lookups, 0)
+    check.equal(len(results3), len(_IOCS))
+
+    # failed results are not cached
+    provider3 = _CountingProvider()
+    provider3.status = 429
+    lookup3 = Lookup(primary_providers=[provider3], cache=LookupCache(":memory:"))
+    lookup3.lookup_items(_IOCS, progress=False)
+    lookup3.lookup_items(_IOCS, progress=False)
+    check.equal(provider3.lookups, len(_IOCS) * 2)
@@ -0,0 +1,196 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""Rate limiter and HTTP provider retry test class."""
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+import pytest_check as check
+import respx
+
+from msticpy.context.contextproviders.http_context_provider import (
+    HttpContextProvider,
+)
+from msticpy.context.http_provider import APILookupParams
+from msticpy.context.lookup_result import LookupStatus
+from msticpy.context.rate_limiter import (
+    RateLimiter,
+    get_rate_limiter,
+    parse_retry_after,
+)
+from msticpy.context.tiproviders.result_severity import ResultSeverity
+from msticpy.context.tiproviders.ti_http_provider import HttpTIProvider
+
+# pylint: disable=protected-access, redefined-outer-name
+
+_BASE_URL = "https://ti.test.local"
+
+
+class _TestTIProvider(HttpTIProvider):
+    """Test HTTP TI provider."""
+
+    _BASE_URL = _BASE_URL
+    _QUERIES = {"ipv4": APILookupParams(path="/ip/{observable}")}
+    _BACKOFF_BASE = 0.01
+
+    def parse_results(self, response):
+        """Return parsed result."""
+        return True, ResultSeverity.information, response["RawResult"]
+
+
+class _TestContextProvider(HttpContextProvider):
+    """Test HTTP context provider."""
+
+    _BASE_URL = _BASE_URL
+    _QUERIES = {"ipv4": APILookupParams(path="/ip/{observable}")}
+    _BACKOFF_BASE = 0.01
+
+    def parse_results(self, response):
+        """Return parsed result."""
+        return True, response["RawResult"]
+
+
+@pytest.fixture
+def ti_provider():
+    """Return test provider instance."""
+    return _TestTIProvider(AuthKey="test")
+
+
+def test_token_bucket_limit():
+    """Test that requests are throttled to the quota."""
+    limiter = RateLimiter(requests_per_minute=60 * 50)
+    start = time.monotonic()
+    for _ in range(60 * 50 + 10):
+        limiter.acquire()
+    # 10 requests over the bucket capacity at 50 req/sec
+    check.greater_equal(time.monotonic() - start, 0.15)
+
+    limiter = RateLimiter(requests_per_day=1)
+    check.is_true(limiter.acquire(max_wait=0))
+    check.is_false(limiter.acquire(max_wait=0))
+
+
+def test_shared_limiter():
+    """Test that limiters are shared by provider name."""
+    limiter = get_rate_limiter("Prov1", requests_per_minute=10)
+    check.is_(limiter, get_rate_limiter("Prov1", requests_per_minute=10))
+    check.is_not(limiter, get_rate_limiter("Prov2", requests_per_minute=10))
+
+    # different limits are applied to the shared limiter (keeping the stricter)
+    check.is_(limiter, get_rate_limiter("Prov1", requests_per_minute=20))
+    check.equal(limiter.limits, (10, None))
+    check.is_(limiter, get_rate_limiter("Prov1", requests_per_minute=5))
+    check.equal(limiter.limits, (5, None))
+    get_rate_limiter("Prov1", requests_per_day=2)
+    check.equal(limiter.limits, (5, 2))
+    check.is_true(limiter.acquire(max_wait=0))
+    check.is_true(limiter.acquire(max_wait=0))
+    check.is_false(limiter.acquire(max_wait=0))
+
+    # tokens used are carried over when the limits are restricted
+    limiter = RateLimiter(requests_per_minute=10)
+    for _ in range(8):
+        limiter.acquire()
+    limiter.restrict(requests_per_minute=5)
+    check.is_true(limiter.acquire(max_wait=0))
+    check.is_true(limiter.acquire(max_wait=0))
+    check.is_false(limiter.acquire(max_wait=0))
+
+
+def test_parse_retry_after():
+    """Test parsing Retry-After header values."""
+    check.equal(parse_retry_after("5"), 5.0)
+    check.is_none(parse_retry_after(None))
+    check.is_none(parse_retry_after("not a date"))
+    retry_date = datetime.now(timezone.utc) + timedelta(seconds=30)
+    delay = parse_retry_after(format_datetime(retry_date, usegmt=True))
+    check.between(delay, 25, 31)
+
+
+@respx.mock
+def test_retry_on_throttle(ti_provider):
+    """Test lookup retries after 429 and 503 responses."""
+    route = respx.get(re.compile(f"{_BASE_URL}/ip/.*")).mock(
+        side_effect=[
+            httpx.Response(429, headers={"Retry-After": "0.05"}),
+            httpx.Response(503),
+            httpx.Response(200, json={"ip": "1.2.3.4"}),
+        ]
+    )
+    start = time.monotonic()
+    result = ti_provider.lookup_ioc("1.2.3.4", "ipv4")
+    check.equal(route.call_count, 3)
+    check.greater_equal(time.monotonic() - start, 0.05)
+    check.equal(result.iloc[0]["Status"], LookupStatus.OK.value)
+    check.equal(result.iloc[0]["RawResult"], {"ip": "1.2.3.4"})
+
+
+@respx.mock
+def test_retry_after_too_long(ti_provider):
+    """Test that a long Retry-After delay is returned, not waited for."""
+    route = respx.get(re.compile(f"{_BASE_URL}/ip/.*")).mock(
+        side_effect=[
+            httpx.Response(429, headers={"Retry-After": "86400"}),
+            httpx.Response(200, json={"ip": "1.2.3.4"}),
+        ]
+    )
+    start = time.monotonic()
+    result = ti_provider.lookup_ioc("1.2.3.9", "ipv4")
+    check.less(time.monotonic() - start, 5)
+    check.equal(route.call_count, 1)
+    check.equal(result.iloc[0]["Status"], 429)
+    check.is_true(ti_provider._rate_limiter.acquire(max_wait=0))
+
+    ti_provider.max_rate_wait = 0.01
+    route.mock(side_effect=[httpx.Response(503, headers={"Retry-After": "1"})])
+    route.reset()
+    result = ti_provider.lookup_ioc("1.2.3.10", "ipv4")
+    check.equal(route.call_count, 1)
+    check.equal(result.iloc[0]["Status"], 503)
+
+
+@respx.mock
+def test_retry_exhausted(ti_provider):
+    """Test lookup returns failure after max_retries."""
+    ti_provider.max_retries = 2
+    route = respx.get(re.compile(f"{_BASE_URL}/ip/.*")).respond(500)
+    result = ti_provider.lookup_ioc("1.2.3.5", "ipv4")
+    check.equal(route.call_count, 3)
+    check.equal(result.iloc[0]["Status"], 500)
+
+    route.mock(side_effect=[httpx.ConnectError("failed"), httpx.Response(200, json={})])
+    route.reset()
+    result = ti_provider.lookup_ioc("1.2.3.6", "ipv4")
+    check.equal(route.call_count, 2)
+    check.equal(result.iloc[0]["Status"], LookupStatus.OK.value)
+
+
+@respx.mock
+def test_rate_quota_exceeded():
+    """Test that a request is not sent if the quota wait is too long."""
+    provider = _TestTIProvider(requests_per_day=1, max_rate_wait=0)
+    route = respx.get(re.compile(f"{_BASE_URL}/ip/.*")).respond(200, json={})
+    result = provider.lookup_ioc("1.2.3.7", "ipv4")
+    check.equal(result.iloc[0]["Status"], LookupStatus.OK.value)
+    result = provider.lookup_ioc("1.2.3.8", "ipv4")
+    check.equal(route.call_count, 1)
+    check.equal(result.iloc[0]["Status"], 429)
+
+
+@respx.mock
+def test_context_lookup_network_error():
+    """Test context lookup returns a failure row for network errors."""
+    provider = _TestContextProvider(max_retries=1)
+    route = respx.get(re.compile(f"{_BASE_URL}/ip/.*")).mock(
+        side_effect=httpx.ConnectError("failed")
+    )
+    result = provider.lookup_observable("1.2.3.9", "ipv4")
+    check.equal(route.call_count, 2)
+    check.equal(result.iloc[0]["Status"], LookupStatus.QUERY_FAILED.value)
+    check.is_true(result.iloc[0]["Reference"].startswith(_BASE_URL))
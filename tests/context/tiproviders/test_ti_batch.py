@@ -0,0 +1,194 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""TI provider batch lookup tests."""
+import hashlib
+import json
+import re
+
+import httpx
+import pandas as pd
+import pytest_check as check
+import respx
+
+from msticpy.context.lookup_cache import LookupCache
+from msticpy.context.lookup_result import LookupStatus
+from msticpy.context.tilookup import TILookup
+from msticpy.context.tiproviders.greynoise import GreyNoise
+from msticpy.context.tiproviders.virustotal import VirusTotal
+
+# pylint: disable=protected-access
+
+_HASHES = [hashlib.md5(str(idx).encode()).hexdigest() for idx in range(10)]
+_IPS = [f"104.215.148.{idx}" for idx in range(1, 6)]
+
+
+def _vt_file_response(request):
+    """Return VT file report response for all requested resources."""
+    resources = request.url.params["resource"].split(",")
+    records = [
+        {
+            "resource": resource,
+            "response_code": 1,
+            "positives": int(resource, 16) % 3,
+            "permalink": f"https://vt/{resource}",
+        }
+        # leave out the last hash to test missing results
+        for resource in resources
+        if resource != _HASHES[-1]
+    ]
+    return httpx.Response(200, json=records if len(records) > 1 else records[0])
+
+
+@respx.mock
+def test_vt_batch_lookup():
+    """Test VirusTotal hash lookups are sent in batches."""
+    route = respx.get(re.compile(r"https://www\.virustotal\.com/vtapi/v2/file.*")).mock(
+        side_effect=_vt_file_response
+    )
+    vt_prov = VirusTotal(AuthKey="test")
+    check.is_true(vt_prov.supports_batch("md5_hash"))
+    check.is_false(vt_prov.supports_batch("ipv4"))
+
+    results = vt_prov.lookup_iocs(_HASHES + _HASHES[:2])
+
+    # 10 unique hashes in batches of 4
+    check.equal(route.call_count, 3)
+    check.equal(len(results), len(_HASHES) + 2)
+    check.equal(results["Ioc"].to_list(), _HASHES + _HASHES[:2])
+    found = results[results["Status"] == LookupStatus.OK.value]
+    check.equal(len(found), len(_HASHES) + 1)
+    check.is_true(
+        all(
+            row.RawResult["resource"] == row.Ioc
+            and row.Details["positives"] == int(row.Ioc, 16) % 3
+            for row in found.itertuples()
+        )
+    )
+    missing = results[results["Ioc"] == _HASHES[-1]].iloc[0]
+    check.equal(missing["Status"], LookupStatus.NO_DATA.value)
+    check.is_false(missing["Result"])
+
+
+@respx.mock
+def test_vt_batch_mixed_types():
+    """Test batch and single lookups are combined in input order."""
+    respx.get(re.compile(r"https://www\.virustotal\.com/vtapi/v2/file.*")).mock(
+        side_effect=_vt_file_response
+    )
+    ip_route = respx.get(
+        re.compile(r"https://www\.virustotal\.com/vtapi/v2/ip-address.*")
+    ).respond(200, json={"response_code": 1, "verbose_msg": "ok"})
+    vt_prov = VirusTotal(AuthKey="test")
+    iocs = [_HASHES[0], _IPS[0], _HASHES[1], _IPS[1]]
+
+    results = vt_prov.lookup_iocs(iocs)
+    check.equal(results["Ioc"].to_list(), iocs)
+    check.equal(ip_route.call_count, 2)
+
+    results = vt_prov.lookup_iocs(pd.DataFrame({"ioc": iocs}), ioc_col="ioc")
+    check.equal(results["Ioc"].to_list(), iocs)
+
+    # async lookup via TILookup
+    ti_lookup = TILookup(primary_providers=[vt_prov])
+    results = ti_lookup.lookup_iocs(iocs, progress=False)
+    check.equal(results["Ioc"].to_list(), iocs)
+
+
+@respx.mock
+def test_vt_batch_normalized_results():
+    """Test batch results are matched to IoCs normalized by the provider."""
+
+    def _vt_url_response(request):
+        resources = request.url.params["resource"].split("\n")
+        # VT returns the canonical form of the URL
+        return httpx.Response(
+            200,
+            json=[
+                {"resource": f"{url.upper()}/", "response_code": 1, "positives": 0}
+                for url in resources
+            ],
+        )
+
+    respx.get(re.compile(r"https://www\.virustotal\.com/vtapi/v2/url.*")).mock(
+        side_effect=_vt_url_response
+    )
+    vt_prov = VirusTotal(AuthKey="test")
+    urls = [f"http://www.contoso{idx}.com" for idx in range(3)]
+    results = vt_prov.lookup_iocs(urls)
+    check.equal(results["Ioc"].to_list(), urls)
+    check.is_true((results["Status"] == LookupStatus.OK.value).all())
+
+
+def test_batch_unmatched_results(monkeypatch):
+    """Test IoCs without a batch result row get a NO_DATA result."""
+
+    def _lookup_iocs_batch(iocs, ioc_type, query_type=None, **kwargs):
+        del ioc_type, query_type, kwargs
+        # return the first IoC in upper case and leave out the last one
+        return pd.DataFrame(
+            [
+                {"Ioc": ioc.upper() if idx == 0 else ioc, "Status": 0}
+                for idx, ioc in enumerate(iocs[:-1])
+            ]
+        )
+
+    vt_prov = VirusTotal(AuthKey="test")
+    monkeypatch.setattr(vt_prov, "lookup_iocs_batch", _lookup_iocs_batch)
+    lookup_cache = LookupCache(path=":memory:")
+    results = vt_prov.lookup_iocs(_HASHES[:4], lookup_cache=lookup_cache)
+
+    check.equal(len(results), 4)
+    check.equal(results["Status"].to_list(), [0, 0, 0, LookupStatus.NO_DATA.value])
+    check.equal(results.iloc[3]["Ioc"], _HASHES[3])
+    # unmatched IoCs are not cached
+    check.is_not_none(lookup_cache.get(vt_prov.name, _HASHES[0], "md5_hash", None))
+    check.is_none(lookup_cache.get(vt_prov.name, _HASHES[3], "md5_hash", None))
+
+
+@respx.mock
+def test_greynoise_batch_lookup():
+    """Test GreyNoise multi quick lookups."""
+
+    def _gn_response(request):
+        ips = json.loads(request.content)["ips"]
+        return httpx.Response(
+            200, json=[{"ip": ip, "noise": True, "code": "0x01"} for ip in ips]
+        )
+
+    route = respx.post("https://api.greynoise.io/v2/noise/multi/quick").mock(
+        side_effect=_gn_response
+    )
+    gn_prov = GreyNoise(AuthKey="test")
+    results = gn_prov.lookup_iocs(_IPS, query_type="quick")
+
+    check.equal(route.call_count, 1)
+    check.equal(results["Ioc"].to_list(), _IPS)
+    check.is_true((results["Status"] == LookupStatus.OK.value).all())
+    check.is_true(results["Details"].apply(lambda det: det["noise"]).all())
+
+    route = respx.post("https://api.greynoise.io/v2/noise/multi/quick").respond(401)
+    results = gn_prov.lookup_iocs(_IPS, query_type="quick")
+    check.is_true((results["Status"] == 401).all())
+
+
+@respx.mock
+def test_lookup_network_error():
+    """Test single and batch lookups return failure rows for network errors."""
+    respx.get(re.compile(r"https://www\.virustotal\.com/vtapi/v2/.*")).mock(
+        side_effect=httpx.ConnectError("failed")
+    )
+    vt_prov = VirusTotal(AuthKey="test")
+    vt_prov.max_retries = 0
+    iocs = [_HASHES[0], _HASHES[1], _IPS[0]]
+
+    results = vt_prov.lookup_iocs(iocs)
+    check.equal(results["Ioc"].to_list(), iocs)
+    check.is_true((results["Status"] == LookupStatus.QUERY_FAILED.value).all())
+    check.is_false(results["Result"].any())
+    check.is_true(results["Reference"].str.startswith("https://").all())
+
+    result = vt_prov.lookup_ioc(_IPS[1], ioc_type="ipv4")
+    check.equal(result.iloc[0]["Status"], LookupStatus.QUERY_FAILED.value)
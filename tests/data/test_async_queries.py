@@ -8,8 +8,15 @@
 from datetime import datetime, timedelta, timezone
 
 import pandas as pd
+import pytest
 import pytest_check as check
 
+from msticpy.common.exceptions import (
+    MsticpyDataQueryError,
+    MsticpyImportExtraError,
+    MsticpyParameterError,
+)
+from msticpy.data.core import query_provider_connections_mixin as conn_mixin
 from msticpy.data.core.data_providers import QueryProvider
 from msticpy.data.core.query_provider_connections_mixin import _calc_split_ranges
 from msticpy.data.drivers.driver_base import DriverProps
@@ -162,3 +169,229 @@ def test_split_queries_async():
     check.equal(single_results.shape[0] * 5, result_queries.shape[0])
     # verify columns/schema is the same.
     check.equal(list(single_results.columns), list(result_queries.columns))
+
+
+def _flaky_query(query_func, fail_count: int = 0, max_span: str = None):
+    """Return query function that fails for the first calls or large time spans."""
+    calls = []
+
+    def _query(*args, **kwargs):
+        calls.append(kwargs.get("time_span"))
+        if len(calls) <= fail_count:
+            raise MsticpyDataQueryError("Transient failure")
+        time_span = kwargs.get("time_span")
+        if max_span and time_span["end"] - time_span["start"] > pd.Timedelta(max_span):
+            raise MsticpyDataQueryError("Query result exceeded the size limit")
+        return query_func(*args, **kwargs)
+
+    return _query, calls
+
+
+@pytest.mark.parametrize("threaded", [False, True])
+def test_split_queries_retry(threaded):
+    """Test failed query chunks are retried and re-split."""
+    prov_args = dict(query_paths=_LOCAL_DATA_PATHS, data_paths=_LOCAL_DATA_PATHS)
+    local_prov = QueryProvider("LocalData", **prov_args)
+    local_prov._query_provider.set_driver_property(
+        DriverProps.SUPPORTS_THREADING, value=threaded
+    )
+    start = datetime.now(timezone.utc) - pd.Timedelta("5H")
+    end = datetime.now(timezone.utc) + pd.Timedelta("5min")
+    query_params = dict(host_name="DESKTOP-12345", start=start, end=end)
+    single_results = local_prov.WindowsSecurity.list_host_logons(**query_params)
+    driver_query = local_prov._query_provider.query
+
+    # failures without retry are reported
+    local_prov._query_provider.query, calls = _flaky_query(driver_query, fail_count=2)
+    results = local_prov.WindowsSecurity.list_host_logons(
+        split_query_by="1H", progress=False, **query_params
+    )
+    check.equal(len(calls), 5)
+    check.equal(results.shape[0], single_results.shape[0] * 3)
+    status = local_prov.last_query_status
+    check.equal(len(status), 5)
+    check.equal((status["status"] == "failed").sum(), 2)
+    check.is_in("Transient failure", status["error"].dropna().iloc[0])
+
+    # failed chunks are retried
+    local_prov._query_provider.query, calls = _flaky_query(driver_query, fail_count=2)
+    results = local_prov.WindowsSecurity.list_host_logons(
+        split_query_by="1H",
+        retry_on_error=True,
+        retry_backoff=0.01,
+        progress=False,
+        **query_params,
+    )
+    check.equal(len(calls), 7)
+    check.equal(results.shape[0], single_results.shape[0] * 5)
+    status = local_prov.last_query_status
+    check.is_true((status["status"] == "success").all())
+    check.equal(status["attempts"].sum(), 7)
+    check.equal(list(status["start"]), sorted(status["start"]))
+
+    # chunks failing with size errors are split into smaller chunks
+    local_prov._query_provider.query, calls = _flaky_query(
+        driver_query, max_span="45min"
+    )
+    results = local_prov.WindowsSecurity.list_host_logons(
+        split_query_by="1H", split_on_error=True, progress=False, **query_params
+    )
+    check.equal(results.shape[0], single_results.shape[0] * 10)
+    status = local_prov.last_query_status
+    check.equal((status["status"] == "split").sum(), 5)
+    check.equal((status["status"] == "success").sum(), 10)
+    local_prov._query_provider.query = driver_query
+
+
+def _density_query(max_rows: int, rows_per_hour: int = 10):
+    """Return query function returning rows in proportion to the time span."""
+    calls = []
+
+    def _query(query, **kwargs):
+        time_span = kwargs.get("time_span")
+        hours = (time_span["end"] - time_span["start"]) / pd.Timedelta("1h")
+        rows = int(round(hours * rows_per_hour))
+        calls.append((query, rows))
+        if query.endswith("| count"):
+            return pd.DataFrame({"Count": [rows]})
+        # simulate result truncation at the row limit
+        return pd.DataFrame({"Row": range(min(rows, max_rows))})
+
+    return _query, calls
+
+
+@pytest.mark.parametrize("threaded", [False, True])
+def test_split_queries_auto(threaded):
+    """Test auto split planning from row counts and result limits."""
+    prov_args = dict(query_paths=_LOCAL_DATA_PATHS, data_paths=_LOCAL_DATA_PATHS)
+    local_prov = QueryProvider("LocalData", **prov_args)
+    driver = local_prov._query_provider
+    driver.set_driver_property(DriverProps.SUPPORTS_THREADING, value=threaded)
+    driver.set_driver_property(DriverProps.MAX_RESULT_ROWS, 40)
+    driver.set_driver_property(DriverProps.ROW_COUNT_QUERY, "{query}\n| count")
+    end = datetime.now(timezone.utc)
+    start = end - pd.Timedelta("10h")
+    query_params = dict(host_name="DESKTOP-12345", start=start, end=end)
+    driver.query, calls = _density_query(max_rows=40)
+
+    # print query does not run the count query
+    queries = local_prov.WindowsSecurity.list_host_logons(
+        "print", split_query_by="auto", **query_params
+    )
+    check.equal(len(queries.split("\n\n")), 1)
+    check.equal(len(calls), 0)
+
+    # row count probe (100 rows) - chunks of 20 rows (half the limit)
+    results = local_prov.WindowsSecurity.list_host_logons(
+        split_query_by="auto", progress=False, **query_params
+    )
+    check.equal(len(results), 100)
+    check.is_true(calls[0][0].endswith("| count"))
+    check.equal([rows for _, rows in calls[1:]], [20] * 5)
+
+    # density is learned from previous results
+    calls.clear()
+    results = local_prov.WindowsSecurity.list_host_logons(
+        split_query_by="auto", progress=False, **query_params
+    )
+    check.equal(len(results), 100)
+    check.equal(len(calls), 5)
+    check.is_false(any(query.endswith("| count") for query, _ in calls))
+
+    # without an estimate, truncated chunks are split
+    local_prov.query_store.split_stats.clear()
+    driver.set_driver_property(DriverProps.ROW_COUNT_QUERY, None)
+    calls.clear()
+    results = local_prov.WindowsSecurity.list_host_logons(
+        split_query_by="auto", progress=False, **query_params
+    )
+    check.equal(len(results), 100)
+    status = local_prov.last_query_status
+    check.equal((status["status"] == "split").sum(), 3)
+    check.equal((status["status"] == "success").sum(), 4)
+    check.is_true((status.loc[status["status"] == "success", "rows"] == 25).all())
+
+
+@pytest.mark.parametrize("threaded", [False, True])
+def test_split_queries_stream(threaded):
+    """Test streaming split query results."""
+    prov_args = dict(query_paths=_LOCAL_DATA_PATHS, data_paths=_LOCAL_DATA_PATHS)
+    local_prov = QueryProvider("LocalData", **prov_args)
+    local_prov._query_provider.set_driver_property(
+        DriverProps.SUPPORTS_THREADING, value=threaded
+    )
+    start = datetime.now(timezone.utc) - pd.Timedelta("5h")
+    end = datetime.now(timezone.utc)
+    single_results = local_prov.WindowsSecurity.list_host_logons(
+        host_name="DESKTOP-12345", start=start, end=end
+    )
+    chunks = local_prov.WindowsSecurity.list_host_logons(
+        host_name="DESKTOP-12345",
+        start=start,
+        end=end,
+        split_query_by="1h",
+        stream=True,
+        progress=False,
+    )
+    check.is_not_instance(chunks, pd.DataFrame)
+    chunk_list = list(chunks)
+    check.equal(len(chunk_list), 5)
+    for chunk in chunk_list:
+        check.equal(len(chunk), len(single_results))
+    status = local_prov.last_query_status
+    check.equal(len(status), 5)
+    check.is_true((status["status"] == "success").all())
+
+    # results from multiple connections
+    local_prov.add_connection(alias="SecondInst", **prov_args)
+    chunks = local_prov.WindowsSecurity.list_host_logons(
+        host_name="DESKTOP-12345", start=start, end=end, stream=True
+    )
+    check.equal([len(chunk) for chunk in chunks], [len(single_results)] * 2)
+
+
+def test_split_queries_parquet(tmp_path, monkeypatch):
+    """Test writing split query results to Parquet files."""
+    prov_args = dict(query_paths=_LOCAL_DATA_PATHS, data_paths=_LOCAL_DATA_PATHS)
+    local_prov = QueryProvider("LocalData", **prov_args)
+    start = datetime.now(timezone.utc) - pd.Timedelta("5h")
+    end = datetime.now(timezone.utc)
+    query_params = dict(
+        host_name="DESKTOP-12345",
+        start=start,
+        end=end,
+        split_query_by="1h",
+        progress=False,
+    )
+    out_path = tmp_path.joinpath("results")
+
+    monkeypatch.setattr(conn_mixin, "parquet_available", lambda: False)
+    with pytest.raises(MsticpyImportExtraError):
+        local_prov.WindowsSecurity.list_host_logons(
+            parquet_path=str(out_path), **query_params
+        )
+    check.is_false(out_path.exists())
+
+    # write pickle files in place of Parquet
+    monkeypatch.setattr(conn_mixin, "parquet_available", lambda: True)
+    monkeypatch.setattr(
+        pd.DataFrame,
+        "to_parquet",
+        lambda data, path, **kwargs: data.to_pickle(path),
+        raising=False,
+    )
+    result = local_prov.WindowsSecurity.list_host_logons(
+        parquet_path=str(out_path), **query_params
+    )
+    check.equal(result, str(out_path))
+    files = sorted(out_path.glob("*.parquet"))
+    check.equal([file.name for file in files][-1], "part-00004.parquet")
+    check.equal(
+        len(pd.concat(pd.read_pickle(file) for file in files)),
+        local_prov.last_query_status["rows"].sum(),
+    )
+    # existing output is not overwritten
+    with pytest.raises(MsticpyParameterError):
+        local_prov.WindowsSecurity.list_host_logons(
+            parquet_path=str(out_path), **query_params
+        )
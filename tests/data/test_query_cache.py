@@ -0,0 +1,251 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""Query result cache test class."""
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+import pytest_check as check
+
+from msticpy.common.exceptions import MsticpyParameterError
+from msticpy.data.core.data_providers import QueryProvider
+from msticpy.data.core.query_cache import QueryCache
+
+from ..unit_test_lib import get_test_data_path
+
+_LOCAL_DATA_PATHS = [str(get_test_data_path().joinpath("localdata"))]
+
+# pylint: disable=protected-access
+
+
+def _test_df(rows=10):
+    return pd.DataFrame({"Id": range(rows), "Name": [f"name_{i}" for i in range(rows)]})
+
+
+def test_query_cache_tiers(tmp_path):
+    """Test memory and disk cache tiers."""
+    cache = QueryCache(path=tmp_path)
+    key = QueryCache.make_key("env", "query", 1)
+    check.equal(len(key), 64)
+    check.is_none(cache.get(key))
+
+    data = _test_df()
+    check.is_true(cache.put(key, data))
+    check.is_false(cache.put("other", "not a DataFrame"))
+    result = cache.get(key)
+    check.is_true(result.equals(data))
+    # results are copies
+    result["Id"] = 0
+    check.is_true(cache.get(key).equals(data))
+
+    # new instance reads from disk
+    disk_cache = QueryCache(path=tmp_path)
+    check.is_true(disk_cache.get(key).equals(data))
+    stats = disk_cache.stats
+    check.equal((stats.hits, stats.misses), (1, 0))
+    check.equal((stats.memory_entries, stats.disk_entries), (1, 1))
+
+    cache.clear()
+    check.is_none(QueryCache(path=tmp_path).get(key))
+
+    mem_cache = QueryCache(path=":memory:")
+    mem_cache.put(key, data)
+    check.is_true(mem_cache.get(key).equals(data))
+    check.equal(mem_cache.stats.disk_entries, 0)
+
+
+def test_query_cache_ttl_eviction(tmp_path):
+    """Test cache expiry and size-based eviction."""
+    cache = QueryCache(path=tmp_path, ttl=60)
+    cache.put("key1", _test_df())
+    # age the disk and memory entries
+    old_time = time.time() - 120
+    for file in tmp_path.iterdir():
+        os.utime(file, (old_time, old_time))
+    cache._memory["key1"] = cache._memory["key1"]._replace(created=old_time)
+    check.is_none(cache.get("key1"))
+    check.equal(cache.stats.disk_entries, 0)
+
+    cache.put("key2", _test_df())
+    cache._memory["key2"] = cache._memory["key2"]._replace(created=old_time)
+    check.equal(cache.purge_expired(), 1)
+    check.equal(cache.stats.memory_entries, 0)
+
+    # memory tier evicts least recently used entries
+    cache.put("key3", _test_df(1000))
+    entry_size = cache._memory_size
+    cache.max_memory = entry_size * 2
+    cache.put("key4", _test_df(1000))
+    cache.get("key3")
+    cache.put("key5", _test_df(1000))
+    check.equal(list(cache._memory), ["key3", "key5"])
+
+    # disk tier evicts least recently used files
+    file_size = max(file.stat().st_size for file in tmp_path.iterdir())
+    cache.max_disk = file_size * 2
+    cache.put("key6", _test_df(1000))
+    check.equal(cache.stats.disk_entries, 2)
+
+
+@pytest.fixture
+def local_prov(tmp_path):
+    """Return LocalData provider with a query cache and count of queries."""
+    prov_args = dict(query_paths=_LOCAL_DATA_PATHS, data_paths=_LOCAL_DATA_PATHS)
+    provider = QueryProvider(
+        "LocalData", cache=QueryCache(path=tmp_path.joinpath("cache")), **prov_args
+    )
+    driver_query = provider._query_provider.query
+    calls = []
+
+    def _query(query, **kwargs):
+        calls.append(query)
+        return driver_query(query, **kwargs)
+
+    provider._query_provider.query = _query
+    return provider, calls
+
+
+def test_provider_cache(local_prov):
+    """Test caching of query provider results."""
+    provider, calls = local_prov
+    start = datetime.now(timezone.utc) - timedelta(days=1)
+    end = datetime.now(timezone.utc)
+    params = dict(host_name="DESKTOP-12345", start=start, end=end)
+
+    result = provider.WindowsSecurity.list_host_logons(**params)
+    check.equal(len(calls), 1)
+    cached = provider.WindowsSecurity.list_host_logons(**params)
+    check.equal(len(calls), 1)
+    check.is_true(cached.equals(result))
+
+    # different time range is a different query
+    provider.WindowsSecurity.list_host_logons(
+        host_name="DESKTOP-12345", start=start - timedelta(hours=1), end=end
+    )
+    check.equal(len(calls), 2)
+
+    provider.WindowsSecurity.list_host_logons(cache="refresh", **params)
+    check.equal(len(calls), 3)
+    provider.WindowsSecurity.list_host_logons(cache=False, **params)
+    check.equal(len(calls), 4)
+    provider.WindowsSecurity.list_host_logons(cache="only", **params)
+    check.equal(len(calls), 4)
+
+    provider.cache.clear()
+    result = provider.WindowsSecurity.list_host_logons(cache="only", **params)
+    check.is_true(result.empty)
+    check.equal(len(calls), 4)
+
+    with pytest.raises(MsticpyParameterError):
+        provider.WindowsSecurity.list_host_logons(cache="sometimes", **params)
+
+
+def test_provider_cache_split_query(local_prov):
+    """Test that split query chunks are cached individually."""
+    provider, calls = local_prov
+    start = datetime.now(timezone.utc) - pd.Timedelta("5h")
+    end = datetime.now(timezone.utc)
+    params = dict(host_name="DESKTOP-12345", start=start, end=end, progress=False)
+
+    result = provider.WindowsSecurity.list_host_logons(split_query_by="1h", **params)
+    check.equal(len(calls), 5)
+    cached = provider.WindowsSecurity.list_host_logons(split_query_by="1h", **params)
+    check.equal(len(calls), 5)
+    check.equal(len(cached), len(result))
+    check.equal(provider.cache.stats.memory_entries, 5)
+
+
+def test_provider_cache_failed_connection(local_prov):
+    """Test that partial results from failed connections are not cached."""
+    provider, calls = local_prov
+    prov_args = dict(query_paths=_LOCAL_DATA_PATHS, data_paths=_LOCAL_DATA_PATHS)
+    provider.add_connection(alias="SecondInst", **prov_args)
+    second_conn = provider._additional_connections["SecondInst"]
+    driver_query = second_conn.query
+    failures = [ConnectionError("Connection failed")]
+
+    def _query(query, **kwargs):
+        if failures:
+            raise failures.pop()
+        return driver_query(query, **kwargs)
+
+    second_conn.query = _query
+    params = dict(
+        host_name="DESKTOP-12345",
+        start=datetime.now(timezone.utc) - timedelta(days=1),
+        end=datetime.now(timezone.utc),
+        progress=False,
+    )
+    partial_result = provider.WindowsSecurity.list_host_logons(**params)
+    check.equal(len(calls), 1)
+    check.equal(provider.cache.stats.memory_entries, 0)
+
+    # the query is run again (and cached) when all connections succeed
+    result = provider.WindowsSecurity.list_host_logons(**params)
+    check.equal(len(calls), 2)
+    check.equal(len(result), len(partial_result) * 2)
+    check.equal(provider.cache.stats.memory_entries, 1)
+    cached = provider.WindowsSecurity.list_host_logons(**params)
+    check.equal(len(calls), 2)
+    check.equal(len(cached), len(result))
+
+
+def test_provider_cache_key_options(local_prov):
+    """Test that query options are part of the cache key."""
+    provider, _ = local_prov
+    time_span = {"start": datetime(2024, 1, 1), "end": datetime(2024, 1, 2)}
+    key = provider._get_cache_key("query", {"time_span": time_span})
+    check.equal(
+        key,
+        provider._get_cache_key(
+            "query", {"time_span": time_span, "cache": "refresh", "progress": False}
+        ),
+    )
+    check.not_equal(
+        key, provider._get_cache_key("query", {"time_span": time_span, "timeout": 60})
+    )
+    check.not_equal(
+        key,
+        provider._get_cache_key(
+            "query", {"time_span": time_span, "retry_on_error": True}
+        ),
+    )
+
+
+def test_provider_cache_key_connection(local_prov, tmp_path):
+    """Test that the connection identity is part of the cache key."""
+    provider, _ = local_prov
+    time_span = {"start": datetime(2024, 1, 1), "end": datetime(2024, 1, 2)}
+    key = provider._get_cache_key("query", {"time_span": time_span})
+
+    other_prov = QueryProvider(
+        "LocalData", query_paths=_LOCAL_DATA_PATHS, data_paths=[str(tmp_path)]
+    )
+    check.not_equal(key, other_prov._get_cache_key("query", {"time_span": time_span}))
+
+    # results are not cached if a connection cannot be identified
+    provider._query_provider.current_connection = None
+    check.is_none(provider._get_cache_key("query", {"time_span": time_span}))
+
+
+def test_provider_query_cache_memory():
+    """Test that a query cache option without a provider cache uses memory."""
+    provider = QueryProvider(
+        "LocalData", query_paths=_LOCAL_DATA_PATHS, data_paths=_LOCAL_DATA_PATHS
+    )
+    check.is_none(provider.cache)
+    params = dict(
+        host_name="DESKTOP-12345",
+        start=datetime.now(timezone.utc) - timedelta(days=1),
+        end=datetime.now(timezone.utc),
+    )
+    result = provider.WindowsSecurity.list_host_logons(cache="use", **params)
+    check.is_none(provider.cache.path)
+    check.equal(provider.cache.stats.memory_entries, 1)
+    cached = provider.WindowsSecurity.list_host_logons(cache="only", **params)
+    check.is_true(cached.equals(result))
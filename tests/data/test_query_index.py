@@ -0,0 +1,103 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+"""Query index test class."""
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+import pytest_check as check
+
+from msticpy.data.core import query_index
+from msticpy.data.core.data_query_reader import read_query_def_file
+from msticpy.data.core.query_index import QueryIndex
+from msticpy.data.core.query_store import QueryStore
+
+# pylint: disable=protected-access, redefined-outer-name
+
+_QUERY_PATH = Path(__file__).parent.parent.parent.joinpath(
+    "msticpy/data/queries/mssentinel"
+)
+
+
+@pytest.fixture
+def query_files(tmp_path):
+    """Return a folder with copies of query files."""
+    query_dir = tmp_path.joinpath("queries")
+    query_dir.mkdir()
+    for file_path in sorted(_QUERY_PATH.glob("*.yaml"))[:4]:
+        shutil.copy(file_path, query_dir)
+    return query_dir
+
+
+@pytest.fixture
+def parse_count(monkeypatch):
+    """Count the files parsed by the index."""
+    parsed = []
+    parse_files = query_index._parse_files
+
+    def _count_parse(file_paths):
+        parsed.extend(file_paths)
+        return parse_files(file_paths)
+
+    monkeypatch.setattr(query_index, "_parse_files", _count_parse)
+    return parsed
+
+
+def test_query_index(query_files, tmp_path, parse_count):
+    """Test files are only parsed when changed."""
+    index_path = tmp_path.joinpath("index.pkl")
+    file_paths = sorted(str(path) for path in query_files.glob("*.yaml"))
+    index = QueryIndex(index_path)
+
+    results = index.read_files(file_paths)
+    check.equal(list(results), file_paths)
+    check.equal(len(parse_count), 4)
+    for file_path, query_defs in results.items():
+        check.equal(query_defs, read_query_def_file(file_path))
+    check.is_true(index_path.is_file())
+
+    # cached in memory and on disk
+    index.read_files(file_paths)
+    QueryIndex(index_path).read_files(file_paths)
+    check.equal(len(parse_count), 4)
+
+    # results are independent copies
+    results[file_paths[0]][0].clear()
+    check.not_equal(index.read_files(file_paths[:1])[file_paths[0]][0], {})
+
+    # touched but unchanged file is not parsed
+    os.utime(file_paths[0], ns=(0, 0))
+    index.read_files(file_paths)
+    check.equal(len(parse_count), 4)
+
+    # changed file is parsed
+    with open(file_paths[1], "a", encoding="utf-8") as file_handle:
+        file_handle.write("\n# changed\n")
+    index.read_files(file_paths)
+    check.equal(parse_count[4:], [str(Path(file_paths[1]).resolve())])
+
+
+def test_query_index_parallel(query_files, tmp_path, monkeypatch):
+    """Test parallel parsing of query files."""
+    monkeypatch.setattr(query_index, "_MIN_PARALLEL_FILES", 2)
+    file_paths = sorted(str(path) for path in query_files.glob("*.yaml"))
+    results = QueryIndex(tmp_path.joinpath("index.pkl")).read_files(file_paths)
+    for file_path, query_defs in results.items():
+        check.equal(query_defs, read_query_def_file(file_path))
+
+
+def test_import_files_index(query_files, tmp_path):
+    """Test QueryStore import using the index."""
+    index_path = tmp_path.joinpath("index.pkl")
+    indexed = QueryStore.import_files(
+        [str(query_files)], use_index=True, index_path=str(index_path)
+    )
+    check.is_true(index_path.is_file())
+    not_indexed = QueryStore.import_files([str(query_files)])
+    check.equal(set(indexed), set(not_indexed))
+    for env, store in indexed.items():
+        check.equal(list(store.query_names), list(not_indexed[env].query_names))
@@ -22,7 +22,7 @@ _TEST_DATA = get_test_data_path()
 
 # pylint: disable=protected-access, redefined-outer-name
 @pytest.fixture(scope="module")
-@patch("httpx.post")
+@patch("httpx.Client.post")
 def la_uploader(mock_put):
     """Generate LAUploader for testing."""
     response = Response(200)
@@ -31,7 +31,7 @@ def la_uploader(mock_put):
     return la_uploader
 
 
-@patch("httpx.post")
+@patch("httpx.Client.post")
 def test_df_upload(mock_put, la_uploader):
     """Check DataFrame upload."""
     response = Response(200)
@@ -41,7 +41,7 @@ def test_df_upload(mock_put, la_uploader):
     la_uploader.upload_df(data, "test")
 
 
-@patch("httpx.post")
+@patch("httpx.Client.post")
 def test_file_upload(mock_put, la_uploader):
     """Check file upload."""
     response = Response(200)
@@ -50,7 +50,7 @@ def test_file_upload(mock_put, la_uploader):
     la_uploader.upload_file(data_path, "test")
 
 
-@patch("httpx.post")
+@patch("httpx.Client.post")
 def test_folder_upload(mock_put, la_uploader):
     """Check folder upload."""
     response = Response(200)
@@ -60,7 +60,7 @@ def test_folder_upload(mock_put, la_uploader):
     la_uploader.upload_folder(data_path)
 
 
-@patch("httpx.post")
+@patch("httpx.Client.post")
 def test_upload_fails(mock_put, la_uploader):
     """Check upload failure."""
     response = Response(503)
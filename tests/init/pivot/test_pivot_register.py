@@ -19,6 +19,11 @@ import respx
 from msticpy.context.geoip import GeoLiteLookup
 from msticpy.context.tilookup import TILookup
 from msticpy.datamodel import entities
+from msticpy.init.pivot_core.pivot_register import (
+    PivotRegistration,
+    create_pivot_func,
+    join_result,
+)
 
 from ...context.test_ip_utils import ASN_RESPONSE, RDAP_RESPONSE
 
@@ -330,3 +335,120 @@ def test_pivot_container(create_pivot):
 
     pr_content = print_capture.getvalue()
     check.is_in("(pivot function)", pr_content)
+
+
+def _domain_info(domain: str):
+    """Return test results of different types."""
+    if domain.endswith(".com"):
+        return {"domain": domain, "parts": domain.count(".") + 1}
+    if domain.endswith(".net"):
+        return pd.DataFrame({"domain": [domain], "tld": ["net"]})
+    return domain.upper()
+
+
+@pytest.mark.parametrize("exec_mode", [None, "io", "cpu"])
+def test_pivot_func_exec_mode(exec_mode):
+    """Test running pivot function rows serially and in parallel."""
+    piv_reg = PivotRegistration(
+        input_type="value",
+        entity_map={"Dns": "DomainName"},
+        func_input_value_arg="domain",
+        exec_mode=exec_mode,
+        max_concurrency=2,
+    )
+    pivot_func = create_pivot_func(_domain_info, piv_reg)
+    domains = ["a.contoso.com", "b.org", "c.contoso.net", "d.com", "e.org"]
+
+    result_df = pivot_func(domains)
+    check.equal(len(result_df), 5)
+    check.equal(result_df["domain"].tolist(), domains)
+    check.equal(result_df["parts"].iloc[0], 3)
+    check.is_true(pd.isna(result_df["parts"].iloc[1]))
+    check.equal(result_df["result"].tolist()[1], "B.ORG")
+    check.equal(result_df["tld"].tolist()[2], "net")
+    check.equal(result_df["src_row_index"].dropna().tolist(), [0, 1, 3, 4])
+
+    result_df = pivot_func(["b.org", "e.org"])
+    check.equal(list(result_df.columns), ["domain", "result", "src_row_index"])
+    check.equal(result_df["result"].tolist(), ["B.ORG", "E.ORG"])
+
+    with pytest.raises(ValueError):
+        PivotRegistration(
+            input_type="value",
+            entity_map={"Dns": "DomainName"},
+            func_input_value_arg="domain",
+            exec_mode="gpu",
+        )
+
+
+@pytest.mark.parametrize(
+    "entity_map, dedupe, exp_calls",
+    [
+        ({"Dns": "DomainName"}, True, 3),
+        ({"Url": "Url"}, True, 4),
+        ({"Dns": "DomainName", "Url": "Url"}, True, 4),
+        ({"Dns": "DomainName"}, False, 6),
+    ],
+)
+def test_pivot_func_dedupe(entity_map, dedupe, exp_calls):
+    """Test pivot function is called once for each distinct value."""
+    calls = []
+
+    def _lookup(domain: str):
+        calls.append(domain)
+        if domain.casefold().startswith("multi"):
+            return pd.DataFrame({"domain": [domain] * 2, "ip": ["1.1.1.1", "2.2.2.2"]})
+        return domain.casefold()
+
+    piv_reg = PivotRegistration(
+        input_type="value",
+        entity_map=entity_map,
+        func_input_value_arg="domain",
+        dedupe_input=dedupe,
+    )
+    pivot_func = create_pivot_func(_lookup, piv_reg)
+    domains = ["a.com", "b.com", "A.com", "a.com", "multi.com", "b.com"]
+
+    result_df = pivot_func(domains)
+    check.equal(len(calls), exp_calls)
+    check.equal(len(result_df), 7)
+    check.equal(result_df["domain"].tolist()[:4], domains[:4])
+    check.equal(result_df["result"].tolist()[:4], ["a.com", "b.com", "a.com", "a.com"])
+    check.equal(result_df["src_row_index"].tolist()[:4], [0, 1, 2, 3])
+    check.equal(result_df["ip"].tolist()[4:6], ["1.1.1.1", "2.2.2.2"])
+
+    # each result row is joined to its input row
+    input_df = pd.DataFrame({"host": domains, "row": range(6)})
+    joined_df = pivot_func(input_df, column="host", join="left")
+    check.equal(len(joined_df), 7)
+    check.equal(joined_df["row"].tolist(), [0, 1, 2, 3, 4, 4, 5])
+    check.equal(joined_df["domain"].tolist()[:4], domains[:4])
+    check.equal(joined_df["ip"].tolist()[4:6], ["1.1.1.1", "2.2.2.2"])
+    check.is_not_in("src_row_index", joined_df.columns)
+
+
+def test_join_result_ignore_case():
+    """Test case-insensitive join of input and results."""
+    input_df = pd.DataFrame({"domain": ["A.com", "b.com", "c.com"]})
+    result_df = pd.DataFrame({"query": ["a.com", "B.COM"], "ip": ["1.1.1.1", None]})
+    joined_df = join_result(
+        input_df,
+        result_df,
+        how="left",
+        left_on="domain",
+        right_on="query",
+        ignore_case=True,
+    )
+    check.equal(list(joined_df.columns), ["domain", "query", "ip"])
+    check.equal(joined_df["query"].tolist()[:2], ["a.com", "B.COM"])
+    check.is_true(pd.isna(joined_df["query"].iloc[2]))
+    joined_df = join_result(
+        input_df,
+        result_df,
+        how="inner",
+        left_on="domain",
+        right_on="query",
+        ignore_case=True,
+    )
+    check.equal(len(joined_df), 2)
+    check.equal(list(input_df.columns), ["domain"])
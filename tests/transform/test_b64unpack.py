@@ -4,11 +4,15 @@
 # license information.
 # --------------------------------------------------------------------------
 """Base64unpack test class."""
+import hashlib
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from os import path
+from unittest import mock
 
 import pandas as pd
 
+from msticpy.common.utility import parallel as parallel_utils
 from msticpy.transform import base64unpack as b64
 
 from ..unit_test_lib import TEST_DATA_PATH
@@ -94,6 +98,62 @@ class TestB64Unpack(unittest.TestCase):
         except FileNotFoundError as ex:
             self.fail(msg="Exception {}".format(str(ex)))
 
+    def test_unpack_df_parallel(self):
+        FILE_NAME = path.join(TEST_DATA_PATH, "base64msg.txt")
+        with open(FILE_NAME, "r") as f_handle:
+            input_txt = f_handle.read()
+        input_df = pd.DataFrame(data={"input": [input_txt, "no b64 here"] * 4})
+        expected = b64.unpack_df(data=input_df, column="input")
+
+        with mock.patch.object(parallel_utils, "_MIN_PARTITION_ROWS", 2):
+            result_df = b64.unpack_df(data=input_df, column="input", n_jobs=2)
+            self.assertTrue(result_df.equals(expected))
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                result_df = b64.unpack_df(
+                    data=input_df, column="input", executor=executor
+                )
+            self.assertTrue(result_df.equals(expected))
+            self.assertEqual(sorted(result_df["src_index"].unique()), [0, 2, 4, 6])
+
+    def test_unpack_df_repeated_values(self):
+        FILE_NAME = path.join(TEST_DATA_PATH, "base64msg.txt")
+        with open(FILE_NAME, "r") as f_handle:
+            input_txt = f_handle.read()
+        input_df = pd.DataFrame(
+            data={"input": [input_txt, "no b64 here", input_txt]}, index=[5, 6, 7]
+        )
+        with mock.patch.object(
+            b64,
+            "_decode_b64_string_recursive",
+            wraps=b64._decode_b64_string_recursive,
+        ) as decode_mock:
+            b64._decode_b64_string_cached.cache_clear()
+            single_df = b64.unpack_df(data=input_df.iloc[:1], column="input")
+            single_calls = decode_mock.call_count
+            b64._decode_b64_string_cached.cache_clear()
+            result_df = b64.unpack_df(data=input_df, column="input")
+        # each unique string is only decoded once
+        self.assertEqual(decode_mock.call_count, single_calls * 2)
+        self.assertEqual(len(result_df), len(single_df) * 2)
+        self.assertEqual(list(result_df.columns), list(single_df.columns))
+        self.assertEqual(
+            list(result_df["src_index"]), [5] * len(single_df) + [7] * len(single_df)
+        )
+        self.assertTrue(
+            result_df[result_df["src_index"] == 7]
+            .drop(columns="src_index")
+            .reset_index(drop=True)
+            .equals(single_df.drop(columns="src_index"))
+        )
+
+    def test_get_hashes(self):
+        binary = bytes(range(256)) * 10000
+        with mock.patch.object(b64, "_HASH_CHUNK_SIZE", 1000):
+            hashes = b64.get_hashes(binary)
+        self.assertEqual(hashes["md5"], hashlib.md5(binary).hexdigest())
+        self.assertEqual(hashes["sha1"], hashlib.sha1(binary).hexdigest())
+        self.assertEqual(hashes["sha256"], hashlib.sha256(binary).hexdigest())
+
 
 if __name__ == "__main__":
     unittest.main()
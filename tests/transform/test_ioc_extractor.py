@@ -4,11 +4,13 @@
 # license information.
 # --------------------------------------------------------------------------
 """IoC extract tests."""
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas as pd
 import pytest
 import pytest_check as check
 
+from msticpy.common.utility import parallel as parallel_utils
 from msticpy.transform.iocextract import IoCExtract
 
 from ..unit_test_lib import TEST_DATA_PATH
@@ -339,3 +341,52 @@ def test_defanged_iocs_no_defang(test, expected, ioc_extract_no_df):
     results = ioc_extract_no_df.extract(test)
     # all IP cases should fail
     check.equal(len(results["ipv4"]), 0)
+
+
+def test_dataframe_repeated_values(ioc_extract):
+    """Test results for repeated and non-string values match per-row scans."""
+    input_df = pd.DataFrame.from_dict(
+        data=TEST_CASES, orient="index", columns=["input"]
+    )
+    input_df = pd.concat([input_df, input_df.iloc[::-1]])
+    input_df["input2"] = input_df["input"].str.upper()
+    ioc_types = ["ipv4", "ipv6", "dns", "url", "email", "windows_path", "md5_hash"]
+    output_df = ioc_extract.extract_df(
+        data=input_df, columns=["input", "input2"], ioc_types=ioc_types
+    )
+
+    expected = []
+    for idx, row in input_df.iterrows():
+        for col in ["input", "input2"]:
+            iocs = ioc_extract.extract(row[col], ioc_types=ioc_types)
+            expected.extend(
+                (ioc_type, observable, idx, row[col])
+                for ioc_type, observables in iocs.items()
+                for observable in observables
+            )
+    check.equal(len(output_df), len(expected))
+    check.equal(list(output_df.itertuples(index=False, name=None)), expected)
+
+    input_df.iloc[0, 0] = None
+    with pytest.raises(TypeError):
+        ioc_extract.extract_df(data=input_df, columns=["input"])
+
+
+@pytest.mark.parametrize("parallel", ["n_jobs", "executor"])
+def test_dataframe_parallel(ioc_extract, monkeypatch, parallel):
+    """Test parallel extraction returns the same results as serial."""
+    monkeypatch.setattr(parallel_utils, "_MIN_PARTITION_ROWS", 5)
+    input_df = pd.DataFrame.from_dict(
+        data=TEST_CASES, orient="index", columns=["input"]
+    )
+    input_df = pd.concat([input_df] * 3)
+    expected = ioc_extract.extract_df(data=input_df, columns=["input"])
+
+    if parallel == "n_jobs":
+        output_df = ioc_extract.extract_df(data=input_df, columns=["input"], n_jobs=2)
+    else:
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            output_df = ioc_extract.extract_df(
+                data=input_df, columns=["input"], executor=executor
+            )
+    check.is_true(output_df.equals(expected))
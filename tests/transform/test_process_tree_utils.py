@@ -12,6 +12,7 @@ import pytest
 
 from msticpy.transform import proc_tree_builder as pt_build
 from msticpy.transform import process_tree_utils as pt_util
+from msticpy.transform.proc_tree_index import ProcTreeIndex, get_tree_index
 from msticpy.transform.proc_tree_schema import LX_EVENT_SCH, WIN_EVENT_SCH
 from msticpy.vis.process_tree import build_and_show_process_tree
 
@@ -242,6 +243,43 @@ def test_build_win_tree_dict_schema_no_logon_id():
     }
 
 
+@pytest.mark.parametrize("test_data", [testdf_win, testdf_lx])
+def test_build_tree_low_memory(test_data):
+    """Test building process tree in low memory mode."""
+    p_tree = pt_build.build_process_tree(test_data)
+    p_tree_lm = pt_build.build_process_tree(test_data, low_memory=True)
+    pd.testing.assert_frame_equal(p_tree, p_tree_lm)
+
+
+def test_build_tree_low_memory_hosts():
+    """Test low memory mode only matches parents on the same host."""
+    procs = pd.DataFrame(
+        {
+            "Computer": ["host_a", "host_b", "host_a"],
+            "TimeGenerated": pd.to_datetime(
+                ["2022-01-01 00:00:00", "2022-01-01 00:00:10", "2022-01-01 00:00:20"]
+            ),
+            "NewProcessName": ["cmd.exe", "cmd.exe", "notepad.exe"],
+            "NewProcessId": ["0x10", "0x10", "0x20"],
+            "ParentProcessName": ["explorer.exe", "explorer.exe", "cmd.exe"],
+            "ProcessId": ["0x1", "0x1", "0x10"],
+            "SubjectLogonId": ["0x3e7", "0x3e7", "0x3e7"],
+            "TargetLogonId": ["0x0", "0x0", "0x0"],
+            "CommandLine": ["cmd", "cmd", "notepad"],
+            "SubjectUserName": ["user", "user", "user"],
+            "SubjectUserSid": ["S-1", "S-1", "S-1"],
+            "EventID": [4688, 4688, 4688],
+        }
+    )
+    for low_memory, parent_host in ((False, "host_b"), (True, "host_a")):
+        p_tree = pt_build.build_process_tree(
+            procs, schema=WIN_EVENT_SCH, low_memory=low_memory
+        )
+        child = p_tree[p_tree["NewProcessName"] == "notepad.exe"].iloc[0]
+        parent = pt_util.get_parent(p_tree, child)
+        assert parent["Computer"] == parent_host
+
+
 def test_build_tree_minimal():
     """Test build tree with minimal columns."""
     cust_win_schema = {
@@ -357,11 +395,90 @@ def test_tree_utils_lx():
     assert pt_build.infer_schema(p_tree_l) == LX_EVENT_SCH
 
 
+def test_tree_index():
+    """Test the tree index matches the process tree paths."""
+    p_tree = pt_build.build_process_tree(testdf_win)
+    tree_index = get_tree_index(p_tree)
+    assert get_tree_index(p_tree) is tree_index
+    assert (tree_index.depth == p_tree["path"].str.count("/").to_numpy()).all()
+    assert tree_index.tree_depth == 7
+
+    for proc_pos in range(0, len(p_tree), 37):
+        proc = p_tree.iloc[proc_pos]
+        expected = p_tree[p_tree["path"].str.startswith(proc.path)]
+        subtree = p_tree.iloc[tree_index.subtrees([proc_pos])]
+        assert set(subtree.index) == set(expected.index)
+        ancestors = p_tree.iloc[tree_index.ancestors(proc_pos)]
+        assert ancestors["source_index"].tolist() == proc.path.split("/")[::-1]
+
+    # index is rebuilt if the parent keys are changed
+    p_tree_copy = p_tree.copy()
+    copy_index = get_tree_index(p_tree_copy)
+    assert get_tree_index(p_tree_copy) is copy_index
+    p_tree_copy.loc[p_tree_copy.index[1], "parent_key"] = None
+    updated_index = get_tree_index(p_tree_copy)
+    assert updated_index is not copy_index
+    assert updated_index.depth[1] == 0
+    p_tree_copy["parent_key"] = p_tree["parent_key"].to_numpy()
+    assert get_tree_index(p_tree_copy) is not updated_index
+
+    # index is rebuilt for a new frame
+    sorted_tree = p_tree.sort_values("TimeGenerated")
+    assert get_tree_index(sorted_tree) is not tree_index
+    children = pt_util.get_children(sorted_tree, p_tree.iloc[0], include_source=False)
+    assert (children["parent_key"] == p_tree.index[0]).all()
+
+
+def test_tree_index_cycles():
+    """Test tree index with orphaned and cyclic parent keys."""
+    procs = pd.DataFrame(
+        {
+            "parent_key": [None, "a", "a", "b", "f", "e", "g", "zz", "h"],
+            "IsRoot": [True] + [False] * 8,
+            "source_index": [f"{idx:05d}" for idx in range(9)],
+        },
+        index=pd.Index(list("abcdefghi"), name="proc_key"),
+    )
+    tree_index = ProcTreeIndex(procs.index, procs["parent_key"])
+    assert tree_index.parent.tolist() == [-1, 0, 0, 1, -1, 4, -1, -1, 7]
+    assert tree_index.root.tolist() == [0, 0, 0, 0, 4, 4, 6, 7, 7]
+    assert sorted(tree_index.subtrees([0])) == [0, 1, 2, 3]
+    assert sorted(tree_index.subtrees([0], max_levels=1)) == [0, 1, 2]
+    assert sorted(tree_index.order) == list(range(9))
+
+    p_tree = pt_build.build_proc_tree(procs.copy())
+    assert p_tree["path"].tolist() == [
+        "00000",
+        "00000/00001",
+        "00000/00002",
+        "00000/00001/00003",
+        "00004",
+        "00005",
+        "00006",
+        "00007",
+        "00008",
+    ]
+    p_tree = pt_build.build_proc_tree(procs.copy(), max_depth=1)
+    assert p_tree.loc["d", "path"] == "00003"
+    assert pd.isna(p_tree.loc["d", "parent_index"])
+    assert p_tree.loc["b", "parent_index"] == "00000"
+
+
 def test_build_and_plot_process_tree_win():
     """Test build and plot process tree."""
     build_and_show_process_tree(testdf_win, legend_col="NewProcessName")
 
 
+def test_build_and_plot_process_tree_collapsed():
+    """Test build and plot process tree with collapsed subtrees."""
+    fig, _ = build_and_show_process_tree(
+        testdf_win, legend_col="NewProcessName", max_levels=2, max_children=5
+    )
+    source = fig.renderers[0].data_source
+    assert "CollapsedProcesses" in source.column_names
+    assert len(source.data["Row"]) < len(testdf_win)
+
+
 def test_build_and_plot_process_tree_lx():
     """Test build and plot process tree."""
     build_and_show_process_tree(testdf_lx, legend_col="exe")
@@ -449,6 +566,34 @@ def test_text_process_tree():
     tree_txt = pt_util.tree_to_text(p_tree, schema=schema)
     assert len(tree_txt.split("\n")) == 5028
 
+    tree_iter = pt_util.iter_tree_text(p_tree, schema=schema)
+    first_node = next(tree_iter)
+    assert tree_txt.startswith(first_node)
+    assert first_node + "".join(tree_iter) == tree_txt
+
+    collapsed_txt = pt_util.tree_to_text(
+        p_tree, schema=schema, max_levels=1, max_children=3
+    )
+    assert len(collapsed_txt) < len(tree_txt)
+    assert "descendant processes collapsed" in collapsed_txt
+
+
+def test_collapse_tree():
+    """Test collapsing deep and large subtrees."""
+    p_tree = pt_build.build_process_tree(testdf_win)
+    collapsed = pt_util.collapse_tree(p_tree, max_levels=2)
+    assert collapsed["path"].str.count("/").max() == 2
+    assert len(collapsed) + collapsed["CollapsedProcesses"].sum() == len(p_tree)
+
+    collapsed = pt_util.collapse_tree(p_tree, max_children=2)
+    assert (collapsed.groupby("parent_key").size() <= 2).all()
+    assert len(collapsed) + collapsed["CollapsedProcesses"].sum() == len(p_tree)
+
+    t_root = pt_util.get_roots(p_tree).iloc[4]
+    root_row = pt_util.collapse_tree(p_tree, max_levels=0).loc[t_root.name]
+    assert root_row["CollapsedProcesses"] == 24
+    assert len(pt_util.collapse_tree(p_tree)) == len(p_tree)
+
 
 _NB_FOLDER = "docs/notebooks"
 _NB_NAME = "ProcessTree.ipynb"